@@ -1,13 +1,17 @@
+import asyncio
 import os
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
+import jwt
 from fastapi import HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from loguru import logger
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 
+from api.jwt_verifier import SupabaseJWTVerifier, token_expiry
+
 # Try to import Supabase, fall back to password auth if not available
 try:
     from supabase import Client, create_client
@@ -87,6 +91,8 @@ class SupabaseAuthMiddleware(BaseHTTPMiddleware):
         self.supabase_url = os.environ.get("SUPABASE_URL")
         self.supabase_anon_key = os.environ.get("SUPABASE_ANON_KEY")
         self.supabase_client: Optional[Client] = None
+        # Verifies tokens without a round trip to Supabase
+        self.jwt_verifier: Optional[SupabaseJWTVerifier] = None
         
         # Fallback password auth (for backward compatibility)
         self.password = os.environ.get("OPEN_NOTEBOOK_PASSWORD")
@@ -95,6 +101,10 @@ class SupabaseAuthMiddleware(BaseHTTPMiddleware):
         if SUPABASE_AVAILABLE and self.supabase_url and self.supabase_anon_key:
             try:
                 self.supabase_client = create_client(self.supabase_url, self.supabase_anon_key)
+                self.jwt_verifier = SupabaseJWTVerifier(
+                    self.supabase_url,
+                    jwt_secret=os.environ.get("SUPABASE_JWT_SECRET"),
+                )
                 logger.info("Supabase authentication enabled")
             except Exception as e:
                 logger.error(f"Failed to initialize Supabase client: {e}")
@@ -134,30 +144,51 @@ class SupabaseAuthMiddleware(BaseHTTPMiddleware):
             )
         
         # Try Supabase JWT authentication first
-        if self.supabase_client:
+        if self.jwt_verifier:
             try:
-                # Verify JWT token with Supabase
-                auth_response = self.supabase_client.auth.get_user(token)
-
-                if auth_response is not None and auth_response.user is not None:
-                    # Token is valid, attach user info to request state
-                    user = auth_response.user
-                    request.state.user = {
-                        "id": user.id,
-                        "email": user.email,
-                        "role": user.role or "authenticated",
-                    }
-                    response_obj = await call_next(request)
-                    return response_obj
-                else:
+                # Verified locally; None when the signing key is unknown here
+                user = await self.jwt_verifier.verify(token)
+                if user is not None:
+                    request.state.user = user
+                    return await call_next(request)
+            except jwt.InvalidTokenError as e:
+                logger.debug(f"Supabase token validation failed: {e}")
+                if not self.password:
                     return JSONResponse(
                         status_code=401,
                         content={"detail": "Invalid token"},
                         headers={"WWW-Authenticate": "Bearer"}
                     )
-            except Exception as e:
-                logger.debug(f"Supabase token validation failed: {e}")
-                # Fall through to password auth if Supabase fails
+                # Fall through to password auth
+            else:
+                # Ask Supabase, off the event loop
+                try:
+                    auth_response = await asyncio.to_thread(
+                        self.supabase_client.auth.get_user, token  # type: ignore[union-attr]
+                    )
+
+                    if auth_response is not None and auth_response.user is not None:
+                        # Token is valid, attach user info to request state
+                        user = auth_response.user
+                        request.state.user = {
+                            "id": user.id,
+                            "email": user.email,
+                            "role": user.role or "authenticated",
+                        }
+                        exp = token_expiry(token)
+                        if exp is not None:
+                            self.jwt_verifier.remember(token, request.state.user, exp)
+                        response_obj = await call_next(request)
+                        return response_obj
+                    else:
+                        return JSONResponse(
+                            status_code=401,
+                            content={"detail": "Invalid token"},
+                            headers={"WWW-Authenticate": "Bearer"}
+                        )
+                except Exception as e:
+                    logger.debug(f"Supabase token validation failed: {e}")
+                    # Fall through to password auth if Supabase fails
         
         # Fallback to password authentication (for backward compatibility)
         if self.password:
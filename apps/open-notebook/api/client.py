@@ -1,19 +1,62 @@
 """
 API client for Open Notebook API.
 This module provides a client interface to interact with the Open Notebook API.
+
+APIClient is synchronous and AsyncAPIClient is its asyncio twin; both keep one
+pooled httpx client open, so calls reuse keep-alive connections instead of
+connecting for every request. Every endpoint method is shared: on
+AsyncAPIClient each one returns an awaitable.
 """
 
+import asyncio
 import os
-from typing import Any, Dict, List, Optional, Union
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    TypeVar,
+    Union,
+)
 
 import httpx
 from loguru import logger
 
+T = TypeVar("T")
 
-class APIClient:
-    """Client for Open Notebook API."""
+# Seconds to wait for a connection to the API before giving up
+CONNECT_TIMEOUT = 10.0
+DEFAULT_BATCH_CONCURRENCY = 8
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _APIClientBase(ABC):
+    """Configuration and endpoint methods shared by both clients."""
 
-    def __init__(self, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        endpoint_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            base_url: API address; API_BASE_URL or http://127.0.0.1:5055 if not given
+            endpoint_timeouts: Read timeouts in seconds by endpoint path prefix,
+                overriding the defaults; the longest matching prefix wins
+        """
         self.base_url = base_url or os.getenv("API_BASE_URL", "http://127.0.0.1:5055")
         # Timeout increased to 5 minutes (300s) to accommodate slow LLM operations
         # (transformations, insights) on slower hardware (Ollama, LM Studio, remote APIs)
@@ -33,32 +76,62 @@ class APIClient:
             logger.error(f"Invalid API_CLIENT_TIMEOUT value '{timeout_str}', using default 300s")
             self.timeout = 300.0
 
+        # Calls that do not run models get a shorter timeout, so a hung API
+        # is noticed quickly; model-backed calls pass self.timeout
+        default_timeout_str = os.getenv("API_CLIENT_DEFAULT_TIMEOUT", "60.0")
+        try:
+            self.default_timeout = min(float(default_timeout_str), self.timeout)
+        except ValueError:
+            logger.error(
+                f"Invalid API_CLIENT_DEFAULT_TIMEOUT value '{default_timeout_str}', using default 60s"
+            )
+            self.default_timeout = min(60.0, self.timeout)
+        self.endpoint_timeouts = dict(endpoint_timeouts or {})
+
+        # HTTP/2 multiplexes requests over one connection; needs the h2 package
+        self.http2 = os.getenv("API_CLIENT_HTTP2", "false").lower() == "true"
+        if self.http2 and not _http2_available():
+            logger.warning("API_CLIENT_HTTP2 is set but h2 is not installed, using HTTP/1.1")
+            self.http2 = False
+        max_connections = int(os.getenv("API_CLIENT_MAX_CONNECTIONS", "20"))
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+
         # Add authentication header if password is set
         self.headers = {}
         password = os.getenv("OPEN_NOTEBOOK_PASSWORD")
         if password:
             self.headers["Authorization"] = f"Bearer {password}"
 
-    def _make_request(
-        self, method: str, endpoint: str, timeout: Optional[float] = None, **kwargs
-    ) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
-        """Make HTTP request to the API."""
-        url = f"{self.base_url}{endpoint}"
-        request_timeout = timeout if timeout is not None else self.timeout
-        
+    def _timeout_for(self, endpoint: str, timeout: Optional[float]) -> httpx.Timeout:
+        """Timeout for a call: explicit, then by endpoint prefix, then the default."""
+        if timeout is None:
+            prefixes = [p for p in self.endpoint_timeouts if endpoint.startswith(p)]
+            timeout = (
+                self.endpoint_timeouts[max(prefixes, key=len)]
+                if prefixes
+                else self.default_timeout
+            )
+        return httpx.Timeout(timeout, connect=min(CONNECT_TIMEOUT, timeout))
+
+    def _prepare_request(
+        self, method: str, endpoint: str, timeout: Optional[float], kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
         # Merge headers
         headers = kwargs.get("headers", {})
         headers.update(self.headers)
         kwargs["headers"] = headers
+        kwargs["timeout"] = self._timeout_for(endpoint, timeout)
+        return kwargs
 
+    def _handle_response(
+        self, method: str, endpoint: str, response: httpx.Response, expect: Optional[str]
+    ) -> Any:
+        url = f"{self.base_url}{endpoint}"
         try:
-            with httpx.Client(timeout=request_timeout) as client:
-                response = client.request(method, url, **kwargs)
-                response.raise_for_status()
-                return response.json()
-        except httpx.RequestError as e:
-            logger.error(f"Request error for {method} {url}: {str(e)}")
-            raise ConnectionError(f"Failed to connect to API: {str(e)}")
+            response.raise_for_status()
         except httpx.HTTPStatusError as e:
             logger.error(
                 f"HTTP error {e.response.status_code} for {method} {url}: {e.response.text}"
@@ -66,9 +139,29 @@ class APIClient:
             raise RuntimeError(
                 f"API request failed: {e.response.status_code} - {e.response.text}"
             )
-        except Exception as e:
-            logger.error(f"Unexpected error for {method} {url}: {str(e)}")
-            raise
+        result = response.json()
+        if expect == "list":
+            return result if isinstance(result, list) else [result]
+        if expect == "dict":
+            return result if isinstance(result, dict) else {}
+        return result
+
+    @abstractmethod
+    def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        timeout: Optional[float] = None,
+        expect: Optional[Literal["list", "dict"]] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Make HTTP request to the API.
+
+        Args:
+            timeout: Read timeout in seconds for this call
+            expect: Coerce the result to a list or a dict
+        """
 
     # Notebooks API methods
     def get_notebooks(
@@ -79,8 +172,7 @@ class APIClient:
         if archived is not None:
             params["archived"] = str(archived).lower()
 
-        result = self._make_request("GET", "/api/notebooks", params=params)
-        return result if isinstance(result, list) else [result]
+        return self._make_request("GET", "/api/notebooks", params=params, expect="list")
 
     def create_notebook(self, name: str, description: str = "") -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Create a new notebook."""
@@ -118,7 +210,8 @@ class APIClient:
             "search_notes": search_notes,
             "minimum_score": minimum_score,
         }
-        return self._make_request("POST", "/api/search", json=data)
+        # Vector search embeds the query with the configured model
+        return self._make_request("POST", "/api/search", json=data, timeout=self.timeout)
 
     def ask_simple(
         self,
@@ -145,8 +238,7 @@ class APIClient:
         params = {}
         if model_type:
             params["type"] = model_type
-        result = self._make_request("GET", "/api/models", params=params)
-        return result if isinstance(result, list) else [result]
+        return self._make_request("GET", "/api/models", params=params, expect="list")
 
     def create_model(self, name: str, provider: str, model_type: str) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Create a new model."""
@@ -172,8 +264,7 @@ class APIClient:
     # Transformations API methods
     def get_transformations(self) -> List[Dict[Any, Any]]:
         """Get all transformations."""
-        result = self._make_request("GET", "/api/transformations")
-        return result if isinstance(result, list) else [result]
+        return self._make_request("GET", "/api/transformations", expect="list")
 
     def create_transformation(
         self,
@@ -227,8 +318,7 @@ class APIClient:
         params = {}
         if notebook_id:
             params["notebook_id"] = notebook_id
-        result = self._make_request("GET", "/api/notes", params=params)
-        return result if isinstance(result, list) else [result]
+        return self._make_request("GET", "/api/notes", params=params, expect="list")
 
     def create_note(
         self,
@@ -246,7 +336,8 @@ class APIClient:
             data["title"] = title
         if notebook_id:
             data["notebook_id"] = notebook_id
-        return self._make_request("POST", "/api/notes", json=data)
+        # Notes are embedded when saved
+        return self._make_request("POST", "/api/notes", json=data, timeout=self.timeout)
 
     def get_note(self, note_id: str) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Get a specific note."""
@@ -254,7 +345,9 @@ class APIClient:
 
     def update_note(self, note_id: str, **updates) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Update a note."""
-        return self._make_request("PUT", f"/api/notes/{note_id}", json=updates)
+        return self._make_request(
+            "PUT", f"/api/notes/{note_id}", json=updates, timeout=self.timeout
+        )
 
     def delete_note(self, note_id: str) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Delete a note."""
@@ -314,10 +407,9 @@ class APIClient:
         data: Dict[str, Any] = {"notebook_id": notebook_id}
         if context_config:
             data["context_config"] = context_config
-        result = self._make_request(
-            "POST", f"/api/notebooks/{notebook_id}/context", json=data
+        return self._make_request(
+            "POST", f"/api/notebooks/{notebook_id}/context", json=data, expect="dict"
         )
-        return result if isinstance(result, dict) else {}
 
     # Sources API methods
     def get_sources(self, notebook_id: Optional[str] = None) -> List[Dict[Any, Any]]:
@@ -325,8 +417,7 @@ class APIClient:
         params = {}
         if notebook_id:
             params["notebook_id"] = notebook_id
-        result = self._make_request("GET", "/api/sources", params=params)
-        return result if isinstance(result, list) else [result]
+        return self._make_request("GET", "/api/sources", params=params, expect="list")
 
     def create_source(
         self,
@@ -372,9 +463,30 @@ class APIClient:
         # Use configured timeout for source creation (especially PDF processing with OCR)
         return self._make_request("POST", "/api/sources/json", json=data, timeout=self.timeout)
 
-    def get_source(self, source_id: str) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
+    def get_source(
+        self, source_id: str, include_full_text: bool = False
+    ) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Get a specific source."""
-        return self._make_request("GET", f"/api/sources/{source_id}")
+        return self._make_request(
+            "GET",
+            f"/api/sources/{source_id}",
+            params={"include_full_text": include_full_text},
+        )
+
+    def get_source_text(
+        self,
+        source_id: str,
+        offset: int = 0,
+        length: Optional[int] = None,
+        unit: str = "chars",
+    ) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
+        """Get a slice of a source's text."""
+        params: Dict[str, Any] = {"offset": offset, "unit": unit}
+        if length is not None:
+            params["length"] = length
+        return self._make_request(
+            "GET", f"/api/sources/{source_id}/text", params=params
+        )
 
     def get_source_status(self, source_id: str) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Get processing status for a source."""
@@ -391,8 +503,7 @@ class APIClient:
     # Insights API methods
     def get_source_insights(self, source_id: str) -> List[Dict[Any, Any]]:
         """Get all insights for a specific source."""
-        result = self._make_request("GET", f"/api/sources/{source_id}/insights")
-        return result if isinstance(result, list) else [result]
+        return self._make_request("GET", f"/api/sources/{source_id}/insights", expect="list")
 
     def get_insight(self, insight_id: str) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Get a specific insight."""
@@ -410,7 +521,10 @@ class APIClient:
         if notebook_id:
             data["notebook_id"] = notebook_id
         return self._make_request(
-            "POST", f"/api/insights/{insight_id}/save-as-note", json=data
+            "POST",
+            f"/api/insights/{insight_id}/save-as-note",
+            json=data,
+            timeout=self.timeout,
         )
 
     def create_source_insight(
@@ -421,14 +535,13 @@ class APIClient:
         if model_id:
             data["model_id"] = model_id
         return self._make_request(
-            "POST", f"/api/sources/{source_id}/insights", json=data
+            "POST", f"/api/sources/{source_id}/insights", json=data, timeout=self.timeout
         )
 
     # Episode Profiles API methods
     def get_episode_profiles(self) -> List[Dict[Any, Any]]:
         """Get all episode profiles."""
-        result = self._make_request("GET", "/api/episode-profiles")
-        return result if isinstance(result, list) else [result]
+        return self._make_request("GET", "/api/episode-profiles", expect="list")
 
     def get_episode_profile(self, profile_name: str) -> Union[Dict[Any, Any], List[Dict[Any, Any]]]:
         """Get a specific episode profile by name."""
@@ -469,5 +582,159 @@ class APIClient:
         return self._make_request("DELETE", f"/api/episode-profiles/{profile_id}")
 
 
+
+class APIClient(_APIClientBase):
+    """Client for Open Notebook API."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        endpoint_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        super().__init__(base_url, endpoint_timeouts)
+        self._client: Optional[httpx.Client] = None
+
+    @property
+    def client(self) -> httpx.Client:
+        """The pooled connection, opened on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(
+                base_url=self.base_url, limits=self.limits, http2=self.http2
+            )
+        return self._client
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def __enter__(self) -> "APIClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        timeout: Optional[float] = None,
+        expect: Optional[Literal["list", "dict"]] = None,
+        **kwargs,
+    ) -> Any:
+        """Make HTTP request to the API."""
+        url = f"{self.base_url}{endpoint}"
+        kwargs = self._prepare_request(method, endpoint, timeout, kwargs)
+        try:
+            response = self.client.request(method, endpoint, **kwargs)
+        except httpx.RequestError as e:
+            logger.error(f"Request error for {method} {url}: {str(e)}")
+            raise ConnectionError(f"Failed to connect to API: {str(e)}")
+        return self._handle_response(method, endpoint, response, expect)
+
+    def batch(
+        self,
+        calls: Iterable[Callable[[], T]],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[T]:
+        """
+        Run independent calls concurrently over the pooled connection.
+
+            source, insights = api_client.batch([
+                lambda: api_client.get_source(source_id),
+                lambda: api_client.get_source_insights(source_id),
+            ])
+
+        Results come back in call order; the first failure is raised.
+        """
+        calls = list(calls)
+        if len(calls) <= 1:
+            return [call() for call in calls]
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(calls))) as executor:
+            return list(executor.map(lambda call: call(), calls))
+
+
+class AsyncAPIClient(_APIClientBase):
+    """
+    Asyncio client for Open Notebook API.
+
+    Has the same endpoint methods as APIClient, each returning an awaitable.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        endpoint_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        super().__init__(base_url, endpoint_timeouts)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled connection for the running event loop, opened on first use."""
+        loop = asyncio.get_running_loop()
+        # Async connections belong to the loop that opened them
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url, limits=self.limits, http2=self.http2
+            )
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    async def __aenter__(self) -> "AsyncAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _make_request(  # type: ignore[override]
+        self,
+        method: str,
+        endpoint: str,
+        timeout: Optional[float] = None,
+        expect: Optional[Literal["list", "dict"]] = None,
+        **kwargs,
+    ) -> Any:
+        """Make HTTP request to the API."""
+        url = f"{self.base_url}{endpoint}"
+        kwargs = self._prepare_request(method, endpoint, timeout, kwargs)
+        try:
+            response = await self.client.request(method, endpoint, **kwargs)
+        except httpx.RequestError as e:
+            logger.error(f"Request error for {method} {url}: {str(e)}")
+            raise ConnectionError(f"Failed to connect to API: {str(e)}")
+        return self._handle_response(method, endpoint, response, expect)
+
+    async def batch(
+        self,
+        requests: Iterable[Awaitable[T]],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> List[T]:
+        """
+        Await independent requests concurrently, at most max_concurrency at once.
+
+            source, insights = await client.batch([
+                client.get_source(source_id),
+                client.get_source_insights(source_id),
+            ])
+
+        Results come back in request order; the first failure is raised.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def limited(request: Awaitable[T]) -> T:
+            async with semaphore:
+                return await request
+
+        return list(await asyncio.gather(*(limited(r) for r in requests)))
+
+
 # Global client instance
 api_client = APIClient()
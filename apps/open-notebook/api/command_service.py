@@ -1,7 +1,14 @@
+import asyncio
+import time
 from typing import Any, Dict, List, Optional
 
 from loguru import logger
-from surreal_commands import get_command_status, submit_command
+from surreal_commands import CommandResult, get_command_status, submit_command
+
+# Status polling while waiting for a command: starts fast for quick commands,
+# backs off to one query every couple of seconds for long ones
+WAIT_INITIAL_INTERVAL = 0.1
+WAIT_MAX_INTERVAL = 2.0
 
 
 class CommandService:
@@ -25,10 +32,13 @@ class CommandService:
                 raise ValueError("Command modules not available")
 
             # surreal-commands expects: submit_command(app_name, command_name, args)
-            cmd_id = submit_command(
+            # It connects and inserts synchronously, so keep it off the event loop
+            cmd_id = await asyncio.to_thread(
+                submit_command,
                 module_name,  # This is actually the app name (e.g., "open_notebook")
                 command_name,  # Command name (e.g., "process_text")
                 command_args,  # Input data
+                context,  # Scheduling context (e.g. tenant for fair-share worker)
             )
             # Convert RecordID to string if needed
             if not cmd_id:
@@ -43,6 +53,32 @@ class CommandService:
             logger.error(f"Failed to submit command job: {e}")
             raise
 
+    @staticmethod
+    async def wait_for_command_job(
+        job_id: str, timeout: Optional[float] = None
+    ) -> CommandResult:
+        """
+        Wait for a command to complete without blocking the event loop.
+
+        Polls its status with exponential backoff between WAIT_INITIAL_INTERVAL
+        and WAIT_MAX_INTERVAL seconds. Raises TimeoutError after timeout seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = WAIT_INITIAL_INTERVAL
+        while True:
+            result = await get_command_status(job_id)
+            if result.is_complete():
+                return result
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Command {job_id} did not complete within {timeout} seconds"
+                    )
+                interval = min(interval, remaining)
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, WAIT_MAX_INTERVAL)
+
     @staticmethod
     async def get_command_status(job_id: str) -> Dict[str, Any]:
         """Get status of any command job"""
@@ -79,6 +115,36 @@ class CommandService:
         # For now, return empty list as this is foundation phase
         return []
 
+    @staticmethod
+    async def get_tenant_queue_stats() -> List[Dict[str, Any]]:
+        """Queued and running command counts per tenant, read from the queue table"""
+        from open_notebook.database.repository import repo_query
+        from open_notebook.jobs import SYSTEM_TENANT
+
+        try:
+            rows = await repo_query(
+                """
+                SELECT context.tenant AS tenant, status, count() AS count
+                FROM command
+                WHERE status IN ['new', 'running']
+                GROUP BY tenant, status
+                """
+            )
+            stats: Dict[str, Dict[str, Any]] = {}
+            for row in rows or []:
+                tenant = row.get("tenant") or SYSTEM_TENANT
+                entry = stats.setdefault(
+                    tenant, {"tenant": tenant, "queued": 0, "running": 0}
+                )
+                key = "queued" if row.get("status") == "new" else "running"
+                entry[key] += row.get("count", 0)
+            return sorted(
+                stats.values(), key=lambda e: (-(e["queued"] + e["running"]), e["tenant"])
+            )
+        except Exception as e:
+            logger.error(f"Failed to get tenant queue stats: {e}")
+            raise
+
     @staticmethod
     async def cancel_command_job(job_id: str) -> bool:
         """Cancel a running command job"""
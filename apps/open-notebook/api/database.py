@@ -0,0 +1,18 @@
+"""
+Request-scoped database session.
+
+Registered as an app-wide dependency, so every repository call made while
+handling a request, including those deep in domain code, shares one
+connection through the session's context variable instead of opening its
+own. Code running outside a request opens a connection per call as before,
+or uses repository.db_session() directly.
+"""
+
+from typing import AsyncIterator
+
+from open_notebook.database.repository import DbSession, db_session
+
+
+async def request_db_session() -> AsyncIterator[DbSession]:
+    async with db_session() as session:
+        yield session
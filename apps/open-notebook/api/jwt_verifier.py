@@ -0,0 +1,162 @@
+"""
+Local verification of Supabase access tokens.
+
+Tokens are checked against the project's JWT secret (HS256) or its public
+signing keys (JWKS, fetched once and cached), so authenticating a request
+does not call Supabase. Verified tokens are kept in an LRU cache until they
+expire, making repeat requests with the same token a dictionary lookup.
+
+Local verification cannot see sessions revoked before their token expires;
+Supabase access tokens are short-lived, which bounds that window.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import jwt
+from loguru import logger
+
+# Algorithms Supabase signs access tokens with
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+DEFAULT_CACHE_SIZE = 1024
+# Minimum seconds between JWKS fetches, so tokens with unknown key ids
+# cannot make every request refetch
+JWKS_MIN_REFRESH_INTERVAL = 60.0
+JWKS_TIMEOUT = 5.0
+
+
+class SupabaseJWTVerifier:
+    """Verify Supabase access tokens locally and cache the results."""
+
+    def __init__(
+        self,
+        supabase_url: Optional[str] = None,
+        jwt_secret: Optional[str] = None,
+        audience: str = "authenticated",
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        leeway: float = 0,
+    ):
+        self.jwks_url = (
+            f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+            if supabase_url
+            else None
+        )
+        self.jwt_secret = jwt_secret
+        self.audience = audience
+        self.cache_size = cache_size
+        self.leeway = leeway
+        # token -> (user, exp), least recently used first
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._keys_fetched_at = 0.0
+        self._keys_lock = asyncio.Lock()
+
+    def cached_user(self, token: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(token)
+        if entry is None:
+            return None
+        user, exp = entry
+        if exp <= time.time():
+            del self._cache[token]
+            return None
+        self._cache.move_to_end(token)
+        return user
+
+    def remember(self, token: str, user: Dict[str, Any], exp: float) -> None:
+        """Cache a verified token's user until exp."""
+        self._cache[token] = (user, exp)
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Verify a token and return its user.
+
+        Returns None when the token cannot be checked locally: an HS256 token
+        without a configured secret, or a key id missing from the JWKS.
+        Raises jwt.InvalidTokenError for tokens that are not valid.
+        """
+        user = self.cached_user(token)
+        if user is not None:
+            return user
+
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            if not self.jwt_secret:
+                return None
+            key: Any = self.jwt_secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            signing_key = await self._signing_key(header.get("kid"))
+            if signing_key is None:
+                return None
+            key = signing_key.key
+        else:
+            raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {algorithm}")
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=self.audience,
+            leeway=self.leeway,
+            options={"require": ["exp", "sub"]},
+        )
+        user = user_from_claims(claims)
+        self.remember(token, user, claims["exp"])
+        return user
+
+    async def _signing_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        if kid in self._keys:
+            return self._keys[kid]
+        if not self.jwks_url:
+            return None
+        async with self._keys_lock:
+            if kid not in self._keys and (
+                not self._keys_fetched_at
+                or time.monotonic() - self._keys_fetched_at >= JWKS_MIN_REFRESH_INTERVAL
+            ):
+                await self._fetch_keys()
+        return self._keys.get(kid)
+
+    async def _fetch_keys(self) -> None:
+        self._keys_fetched_at = time.monotonic()
+        try:
+            async with httpx.AsyncClient(timeout=JWKS_TIMEOUT) as client:
+                response = await client.get(self.jwks_url)  # type: ignore[arg-type]
+                response.raise_for_status()
+                jwks = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Failed to fetch Supabase signing keys: {e}")
+            return
+
+        keys = {}
+        for data in jwks.get("keys", []):
+            try:
+                keys[data.get("kid")] = jwt.PyJWK(data)
+            except jwt.PyJWTError as e:
+                logger.debug(f"Skipping unusable signing key {data.get('kid')}: {e}")
+        self._keys = keys
+        logger.debug(f"Loaded {len(keys)} Supabase signing keys")
+
+
+def user_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """The request.state.user dict for a token's claims."""
+    return {
+        "id": claims["sub"],
+        "email": claims.get("email"),
+        "role": claims.get("role") or "authenticated",
+    }
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """exp claim of a token, read without verifying it."""
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return None
+    return float(exp) if exp is not None else None
@@ -8,12 +8,18 @@ root_env = Path(__file__).parent.parent.parent.parent / ".env"
 load_dotenv(root_env)
 
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from loguru import logger
 
 from api.auth import SupabaseAuthMiddleware
+from api.command_service import CommandService
+from api.database import request_db_session
+from api.metrics import MetricsMiddleware
+from api.profiling import ProfilingMiddleware, profiling_sample_rate, profiling_token
 from api.routers import (
     auth,
     chat,
@@ -27,6 +33,7 @@ from api.routers import (
     notebooks,
     notes,
     podcasts,
+    profiles,
     search,
     settings,
     source_chat,
@@ -36,6 +43,9 @@ from api.routers import (
 )
 from api.routers import commands as commands_router
 from open_notebook.database.async_migrate import AsyncMigrationManager
+from open_notebook.loop_monitor import start_loop_monitor
+from open_notebook.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from open_notebook.metrics import REGISTRY, metrics_authorized, metrics_token
 
 # Import commands to register them in the API process
 try:
@@ -45,6 +55,10 @@ except Exception as e:
     logger.error(f"Failed to import commands in API process: {e}")
 
 
+# Migration that added stored token counts
+TOKEN_COUNT_MIGRATION = 15
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -64,6 +78,16 @@ async def lifespan(app: FastAPI):
             await migration_manager.run_migration_up()
             new_version = await migration_manager.get_current_version()
             logger.success(f"Migrations completed successfully. Database is now at version {new_version}")
+
+            # Records saved before token counts were stored (migration 15)
+            # get them from a background job
+            if current_version < TOKEN_COUNT_MIGRATION <= new_version:
+                try:
+                    await CommandService.submit_command_job(
+                        "open_notebook", "backfill_token_counts", {}
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not schedule token count backfill: {e}")
         else:
             logger.info("Database is already at the latest version. No migrations needed.")
     except Exception as e:
@@ -74,10 +98,15 @@ async def lifespan(app: FastAPI):
 
     logger.success("API initialization completed successfully")
 
+    # Report request handlers that block the event loop
+    loop_monitor = await start_loop_monitor()
+
     # Yield control to the application
     yield
 
     # Shutdown: cleanup if needed
+    if loop_monitor:
+        await loop_monitor.stop()
     logger.info("API shutdown complete")
 
 
@@ -86,12 +115,15 @@ app = FastAPI(
     description="API for Open Notebook - Research Assistant",
     version="0.2.2",
     lifespan=lifespan,
+    # One database connection per request, see api/database.py
+    dependencies=[Depends(request_db_session)],
 )
 
 # Add Supabase authentication middleware first
-# Exclude /api/auth/status, /api/auth/login, and /api/config from authentication
+# Exclude /api/auth/status, /api/auth/login, /api/config and /metrics from authentication
+# (/metrics checks METRICS_TOKEN itself)
 # Uses Supabase JWT verification with fallback to password auth for backward compatibility
-app.add_middleware(SupabaseAuthMiddleware, excluded_paths=["/", "/health", "/docs", "/openapi.json", "/redoc", "/api/auth/status", "/api/auth/login", "/api/config"])
+app.add_middleware(SupabaseAuthMiddleware, excluded_paths=["/", "/health", "/docs", "/openapi.json", "/redoc", "/api/auth/status", "/api/auth/login", "/api/config", "/metrics"])
 
 # Add CORS middleware last (so it processes first)
 app.add_middleware(
@@ -100,8 +132,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# Opt-in request profiling, see api/profiling.py; not installed unless configured
+if profiling_token() or profiling_sample_rate():
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=profiling_token(),
+        sample_rate=profiling_sample_rate(),
+    )
+
+# Outermost, so request latency includes authentication
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api", tags=["auth"])
 app.include_router(config.router, prefix="/api", tags=["config"])
@@ -122,6 +166,7 @@ app.include_router(episode_profiles.router, prefix="/api", tags=["episode-profil
 app.include_router(speaker_profiles.router, prefix="/api", tags=["speaker-profiles"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
 app.include_router(source_chat.router, prefix="/api", tags=["source-chat"])
+app.include_router(profiles.router, prefix="/api", tags=["profiles"])
 
 
 @app.get("/")
@@ -132,3 +177,17 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    # Scrapers authenticate with METRICS_TOKEN instead of a user session
+    if not metrics_token():
+        raise HTTPException(status_code=404, detail="Metrics are not enabled")
+    if not metrics_authorized(authorization):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
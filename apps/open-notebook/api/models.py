@@ -239,13 +239,17 @@ class EmbedResponse(BaseModel):
 
 # Rebuild request/response models
 class RebuildRequest(BaseModel):
-    mode: Literal["existing", "all"] = Field(
+    mode: Literal["existing", "all", "stale"] = Field(
         ...,
-        description="Rebuild mode: 'existing' only re-embeds items with embeddings, 'all' embeds everything",
+        description="Rebuild mode: 'existing' only re-embeds items with embeddings, 'stale' only re-embeds items embedded by a different model than the current default, 'all' embeds everything",
     )
     include_sources: bool = Field(True, description="Include sources in rebuild")
     include_notes: bool = Field(True, description="Include notes in rebuild")
     include_insights: bool = Field(True, description="Include insights in rebuild")
+    resume: bool = Field(
+        True,
+        description="Continue an interrupted rebuild with the same scope from its last checkpoint",
+    )
 
 
 class RebuildResponse(BaseModel):
@@ -258,6 +262,12 @@ class RebuildProgress(BaseModel):
     processed: int = Field(..., description="Number of items processed")
     total: int = Field(..., description="Total items to process")
     percentage: float = Field(..., description="Progress percentage")
+    items_per_second: Optional[float] = Field(
+        None, description="Throughput of the current run"
+    )
+    eta_seconds: Optional[float] = Field(
+        None, description="Estimated seconds until the rebuild completes"
+    )
 
 
 class RebuildStats(BaseModel):
@@ -277,6 +287,29 @@ class RebuildStatusResponse(BaseModel):
     error_message: Optional[str] = None
 
 
+class EmbeddingMigrationRequest(BaseModel):
+    target_model: str = Field(..., description="Embedding model ID to migrate to")
+
+
+class EmbeddingCoverage(BaseModel):
+    total: int = Field(..., description="Embedded items of this type")
+    covered: int = Field(..., description="Items that already have a target-model vector")
+
+
+class EmbeddingMigrationResponse(BaseModel):
+    status: Optional[str] = Field(
+        None, description="Status: backfilling, collecting, completed, cancelled"
+    )
+    source_model: Optional[str] = None
+    target_model: Optional[str] = None
+    rebuild_command_id: Optional[str] = None
+    started_at: Optional[str] = None
+    cutover_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    coverage: Optional[Dict[str, EmbeddingCoverage]] = None
+    coverage_percentage: Optional[float] = None
+
+
 # Settings API models
 class SettingsResponse(BaseModel):
     default_content_processing_engine_doc: Optional[str] = None
@@ -447,6 +480,27 @@ class SourceStatusResponse(BaseModel):
     command_id: Optional[str] = Field(None, description="Command ID if available")
 
 
+# Source text slices
+class SourceTextChunk(BaseModel):
+    order: int = Field(..., description="Chunk position in the source")
+    content: str = Field(..., description="Chunk text")
+
+
+class SourceTextResponse(BaseModel):
+    source_id: str = Field(..., description="Source ID")
+    unit: Literal["chars", "chunks"] = Field(..., description="Unit of offset and length")
+    offset: int = Field(..., description="Start of the slice")
+    length: int = Field(..., description="Size of the returned slice")
+    total: int = Field(..., description="Size of the whole text in the same unit")
+    next_offset: Optional[int] = Field(
+        None, description="Offset of the next slice, or None at the end"
+    )
+    text: Optional[str] = Field(None, description="Text slice (unit=chars)")
+    chunks: Optional[List[SourceTextChunk]] = Field(
+        None, description="Chunks in order (unit=chunks)"
+    )
+
+
 # Error response
 class ErrorResponse(BaseModel):
     error: str
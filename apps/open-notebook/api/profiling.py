@@ -0,0 +1,218 @@
+"""
+On-demand request profiling.
+
+A request is profiled when it carries the admin X-Profile-Token header, or
+when it is picked by the PROFILING_SAMPLE_RATE sample. The profile is a
+cProfile dump (open it with snakeviz or pstats) plus a JSON summary that
+splits the request's wall time into database, LLM, embedding,
+tokenization and Pydantic validation time.
+
+cProfile records everything the event loop runs while the request is in
+flight, so other concurrent requests show up in the function list; the
+attributed times come from the request's own context and do not. Only one
+request is profiled at a time. When neither PROFILING_TOKEN nor a sample
+rate is set, the middleware is not installed at all.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from open_notebook.config import PROFILES_FOLDER
+from open_notebook.metrics import collect_timings
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+# Oldest profiles are deleted beyond this many
+MAX_PROFILES = 200
+TOP_FUNCTIONS = 30
+
+_profiling_active = False
+
+
+def profiling_token() -> Optional[str]:
+    return os.getenv("PROFILING_TOKEN") or None
+
+
+def profiling_sample_rate() -> float:
+    try:
+        return min(max(float(os.getenv("PROFILING_SAMPLE_RATE", "0")), 0.0), 1.0)
+    except ValueError:
+        logger.warning("Ignoring invalid PROFILING_SAMPLE_RATE")
+        return 0.0
+
+
+def token_matches(provided: Optional[str], token: Optional[str]) -> bool:
+    return bool(provided and token) and hmac.compare_digest(
+        provided.encode(), token.encode()  # type: ignore[union-attr]
+    )
+
+
+def validation_seconds(stats: pstats.Stats) -> float:
+    """Time spent inside pydantic-core validators and serializers."""
+    total = 0.0
+    for (filename, _, name), (_, _, _, cumulative, _) in stats.stats.items():  # type: ignore[attr-defined]
+        if filename == "~" and "pydantic_core" in name:
+            total += cumulative
+    return total
+
+
+def top_functions(stats: pstats.Stats, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    rows = sorted(
+        stats.stats.items(),  # type: ignore[attr-defined]
+        key=lambda item: item[1][3],
+        reverse=True,
+    )[:limit]
+    return [
+        {
+            "function": pstats.func_std_string(func),
+            "calls": calls,
+            "total_seconds": round(total, 6),
+            "cumulative_seconds": round(cumulative, 6),
+        }
+        for func, (_, calls, total, cumulative, _) in rows
+    ]
+
+
+def save_profile(
+    folder: str,
+    profile_id: str,
+    profiler: cProfile.Profile,
+    summary: Dict[str, Any],
+    timings: Dict[str, float],
+) -> Dict[str, Any]:
+    """Write the cProfile dump and its summary, pruning old profiles."""
+    os.makedirs(folder, exist_ok=True)
+    base = Path(folder) / profile_id
+    profiler.dump_stats(f"{base}.prof")
+
+    stats = pstats.Stats(profiler)
+    attributed = {name: round(seconds, 6) for name, seconds in sorted(timings.items())}
+    attributed["validation"] = round(validation_seconds(stats), 6)
+    summary.update(
+        attributed_seconds=attributed,
+        unattributed_seconds=round(
+            max(summary["wall_seconds"] - sum(attributed.values()), 0.0), 6
+        ),
+        top_functions=top_functions(stats),
+    )
+    Path(f"{base}.json").write_text(json.dumps(summary, indent=2))
+
+    summaries = sorted(Path(folder).glob("*.json"))
+    for old in summaries[: max(len(summaries) - MAX_PROFILES, 0)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+    return summary
+
+
+class ProfilingMiddleware:
+    """Profile requests that ask for it or are sampled."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        folder: str = PROFILES_FOLDER,
+        path_prefix: str = "/api/",
+    ):
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.folder = folder
+        self.path_prefix = path_prefix
+        self._header = PROFILE_TOKEN_HEADER.lower().encode()
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == self._header:
+                    if token_matches(value.decode("latin-1"), self.token):
+                        return "header"
+                    break
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        global _profiling_active
+
+        if (
+            scope["type"] != "http"
+            or _profiling_active
+            or not scope["path"].startswith(self.path_prefix)
+            or scope["path"].startswith("/api/profiles")
+        ):
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = datetime.now(timezone.utc)
+        profile_id = f"{started.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trigger == "header":
+                    headers = list(message.get("headers", []))
+                    headers.append((PROFILE_ID_HEADER.lower().encode(), profile_id.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage) holds the interpreter's hooks
+            await self.app(scope, receive, send)
+            return
+        _profiling_active = True
+        start = time.perf_counter()
+        try:
+            with collect_timings() as timings:
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    profiler.disable()
+        finally:
+            _profiling_active = False
+            wall = time.perf_counter() - start
+            route = scope.get("route")
+            summary = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "status": status,
+                "trigger": trigger,
+                "started": started.isoformat(),
+                "wall_seconds": round(wall, 6),
+            }
+            try:
+                await asyncio.to_thread(
+                    save_profile, self.folder, profile_id, profiler, summary, timings
+                )
+                logger.info(
+                    f"Profiled {scope['method']} {scope['path']} in {wall:.3f}s: {profile_id}"
+                )
+            except Exception as e:
+                logger.error(f"Failed to save request profile {profile_id}: {e}")
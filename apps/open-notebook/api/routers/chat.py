@@ -1,17 +1,24 @@
 import asyncio
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from langchain_core.runnables import RunnableConfig
 from loguru import logger
 from pydantic import BaseModel, Field
 
+from open_notebook.database.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    next_cursor,
+)
 from open_notebook.database.repository import ensure_record_id, repo_query
 from open_notebook.domain.notebook import ChatSession, Note, Notebook, Source
 from open_notebook.exceptions import (
+    InvalidInputError,
     NotFoundError,
 )
 from open_notebook.graphs.chat import graph as chat_graph
+from open_notebook.utils.context_builder import ContextBuilder, ContextConfig
 
 router = APIRouter()
 
@@ -67,6 +74,22 @@ class ExecuteChatRequest(BaseModel):
     model_override: Optional[str] = Field(
         None, description="Optional model override for this message"
     )
+    context_mode: Literal["selected", "retrieval"] = Field(
+        "selected",
+        description="'selected' sends the given context as is; 'retrieval' "
+        "replaces full source content with the chunks most relevant to the message",
+    )
+    context_config: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Source/note inclusion levels for retrieval mode "
+        "(defaults to every source and note in the notebook)",
+    )
+    max_context_tokens: int = Field(
+        20000, gt=0, description="Token budget for the retrieval context"
+    )
+    retrieval_top_k: int = Field(
+        20, gt=0, le=200, description="Number of chunks to consider in retrieval mode"
+    )
 
 
 class ExecuteChatResponse(BaseModel):
@@ -91,8 +114,22 @@ class SuccessResponse(BaseModel):
 
 
 @router.get("/chat/sessions", response_model=List[ChatSessionResponse])
-async def get_sessions(notebook_id: str = Query(..., description="Notebook ID")):
-    """Get all chat sessions for a notebook."""
+async def get_sessions(
+    response: Response,
+    notebook_id: str = Query(..., description="Notebook ID"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Return one page of at most this many sessions"
+    ),
+    cursor: Optional[str] = Query(
+        None, description=f"Continue after a previous page, from its {NEXT_CURSOR_HEADER} header"
+    ),
+):
+    """
+    Get chat sessions for a notebook, most recently updated first.
+
+    With limit, sessions are paged by cursor; the X-Next-Cursor header
+    carries the cursor of the next page.
+    """
     try:
         # Get notebook to verify it exists
         notebook = await Notebook.get(notebook_id)
@@ -100,7 +137,10 @@ async def get_sessions(notebook_id: str = Query(..., description="Notebook ID"))
             raise HTTPException(status_code=404, detail="Notebook not found")
 
         # Get sessions for this notebook
-        sessions = await notebook.get_chat_sessions()
+        sessions = await notebook.get_chat_sessions(limit=limit, cursor=cursor)
+        page_cursor = next_cursor(sessions, limit, "updated")
+        if page_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page_cursor
 
         return [
             ChatSessionResponse(
@@ -114,8 +154,12 @@ async def get_sessions(notebook_id: str = Query(..., description="Notebook ID"))
             )
             for session in sessions
         ]
+    except HTTPException:
+        raise
     except NotFoundError:
         raise HTTPException(status_code=404, detail="Notebook not found")
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching chat sessions: {str(e)}")
         raise HTTPException(
@@ -178,7 +222,7 @@ async def get_session(session_id: str):
             raise HTTPException(status_code=404, detail="Session not found")
 
         # Get session state from LangGraph to retrieve messages
-        thread_state = chat_graph.get_state(
+        thread_state = await chat_graph.aget_state(
             config=RunnableConfig(configurable={"thread_id": session_id})
         )
 
@@ -333,7 +377,7 @@ async def execute_chat(request: ExecuteChatRequest):
         )
 
         # Get current state
-        current_state = chat_graph.get_state(
+        current_state = await chat_graph.aget_state(
             config=RunnableConfig(
                 configurable={"thread_id": request.session_id}
             )
@@ -345,6 +389,30 @@ async def execute_chat(request: ExecuteChatRequest):
         state_values["context"] = request.context
         state_values["model_override"] = model_override
 
+        if request.context_mode == "retrieval":
+            notebook_query = await repo_query(
+                "SELECT out FROM refers_to WHERE in = $session_id",
+                {"session_id": ensure_record_id(full_session_id)},
+            )
+            if not notebook_query:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Retrieval context requires a session linked to a notebook",
+                )
+            config = request.context_config or {}
+            context_builder = ContextBuilder(
+                notebook_id=str(notebook_query[0]["out"]),
+                context_config=ContextConfig(
+                    sources=config.get("sources"),
+                    notes=config.get("notes"),
+                    max_tokens=request.max_context_tokens,
+                ),
+                max_tokens=request.max_context_tokens,
+                query=request.message,
+                retrieval_top_k=request.retrieval_top_k,
+            )
+            state_values["context"] = await context_builder.build()
+
         # Add user message to state
         from langchain_core.messages import HumanMessage
 
@@ -352,7 +420,7 @@ async def execute_chat(request: ExecuteChatRequest):
         state_values["messages"].append(user_message)
 
         # Execute chat graph
-        result = chat_graph.invoke(
+        result = await chat_graph.ainvoke(
             input=state_values,  # type: ignore[arg-type]
             config=RunnableConfig(
                 configurable={
@@ -378,6 +446,8 @@ async def execute_chat(request: ExecuteChatRequest):
             )
 
         return ExecuteChatResponse(session_id=request.session_id, messages=messages)
+    except HTTPException:
+        raise
     except NotFoundError:
         raise HTTPException(status_code=404, detail="Session not found")
     except Exception as e:
@@ -395,7 +465,8 @@ async def build_context(request: BuildContextRequest):
             raise HTTPException(status_code=404, detail="Notebook not found")
 
         context_data: dict[str, list[dict[str, str]]] = {"sources": [], "notes": []}
-        total_content = ""
+        total_tokens = 0
+        char_count = 0
 
         # Process context configuration if provided
         if request.context_config:
@@ -413,18 +484,21 @@ async def build_context(request: BuildContextRequest):
                     )
 
                     try:
-                        source = await Source.get(full_source_id)
+                        # full_text is loaded by get_context only when needed
+                        source = await Source.get(full_source_id, omit=["full_text"])
                     except Exception:
                         continue
 
                     if "insights" in status:
                         source_context = await source.get_context(context_size="short")
                         context_data["sources"].append(source_context)
-                        total_content += str(source_context)
+                        total_tokens += sum(source.context_field_tokens(source_context).values())
+                        char_count += len(str(source_context))
                     elif "full content" in status:
                         source_context = await source.get_context(context_size="long")
                         context_data["sources"].append(source_context)
-                        total_content += str(source_context)
+                        total_tokens += sum(source.context_field_tokens(source_context).values())
+                        char_count += len(str(source_context))
                 except Exception as e:
                     logger.warning(f"Error processing source {source_id}: {str(e)}")
                     continue
@@ -446,7 +520,8 @@ async def build_context(request: BuildContextRequest):
                     if "full content" in status:
                         note_context = note.get_context(context_size="long")
                         context_data["notes"].append(note_context)
-                        total_content += str(note_context)
+                        total_tokens += sum(note.context_field_tokens(note_context).values())
+                        char_count += len(str(note_context))
                 except Exception as e:
                     logger.warning(f"Error processing note {note_id}: {str(e)}")
                     continue
@@ -457,7 +532,8 @@ async def build_context(request: BuildContextRequest):
                 try:
                     source_context = await source.get_context(context_size="short")
                     context_data["sources"].append(source_context)
-                    total_content += str(source_context)
+                    total_tokens += sum(source.context_field_tokens(source_context).values())
+                    char_count += len(str(source_context))
                 except Exception as e:
                     logger.warning(f"Error processing source {source.id}: {str(e)}")
                     continue
@@ -467,24 +543,14 @@ async def build_context(request: BuildContextRequest):
                 try:
                     note_context = note.get_context(context_size="short")
                     context_data["notes"].append(note_context)
-                    total_content += str(note_context)
+                    total_tokens += sum(note.context_field_tokens(note_context).values())
+                    char_count += len(str(note_context))
                 except Exception as e:
                     logger.warning(f"Error processing note {note.id}: {str(e)}")
                     continue
 
-        # Calculate character and token counts
-        char_count = len(total_content)
-        # Use token count utility if available
-        try:
-            from open_notebook.utils import token_count
-
-            estimated_tokens = token_count(total_content) if total_content else 0
-        except ImportError:
-            # Fallback to simple estimation
-            estimated_tokens = char_count // 4
-
         return BuildContextResponse(
-            context=context_data, token_count=estimated_tokens, char_count=char_count
+            context=context_data, token_count=total_tokens, char_count=char_count
         )
     except HTTPException:
         raise
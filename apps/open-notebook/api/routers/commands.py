@@ -28,6 +28,11 @@ class CommandJobStatusResponse(BaseModel):
     updated: Optional[str] = None
     progress: Optional[Dict[str, Any]] = None
 
+class TenantQueueStatsResponse(BaseModel):
+    tenant: str = Field(..., description="Tenant key (team:<id>, user:<id> or system)")
+    queued: int = Field(0, description="Commands waiting for a worker slot")
+    running: int = Field(0, description="Commands currently executing")
+
 @router.post("/commands/jobs", response_model=CommandJobResponse)
 async def execute_command(request: CommandExecutionRequest):
     """
@@ -101,6 +106,20 @@ async def list_command_jobs(
             detail=f"Failed to list command jobs: {str(e)}"
         )
 
+@router.get("/commands/tenants", response_model=List[TenantQueueStatsResponse])
+async def get_tenant_queue_stats():
+    """Queued and running background commands per tenant (fair-share scheduling view)"""
+    try:
+        stats = await CommandService.get_tenant_queue_stats()
+        return [TenantQueueStatsResponse(**row) for row in stats]
+
+    except Exception as e:
+        logger.error(f"Error fetching tenant queue stats: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch tenant queue stats: {str(e)}"
+        )
+
 @router.delete("/commands/jobs/{job_id}")
 async def cancel_command_job(job_id: str):
     """Cancel a running command job"""
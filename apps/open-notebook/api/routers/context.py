@@ -5,7 +5,6 @@ from loguru import logger
 from api.models import ContextRequest, ContextResponse
 from open_notebook.domain.notebook import Note, Notebook, Source
 from open_notebook.exceptions import InvalidInputError
-from open_notebook.utils import token_count
 
 router = APIRouter()
 
@@ -20,7 +19,7 @@ async def get_notebook_context(notebook_id: str, context_request: ContextRequest
             raise HTTPException(status_code=404, detail="Notebook not found")
 
         context_data: dict[str, list[dict[str, str]]] = {"note": [], "source": []}
-        total_content = ""
+        total_tokens = 0
 
         # Process context configuration if provided
         if context_request.context_config:
@@ -38,18 +37,19 @@ async def get_notebook_context(notebook_id: str, context_request: ContextRequest
                     )
 
                     try:
-                        source = await Source.get(full_source_id)
+                        # full_text is loaded by get_context only when needed
+                        source = await Source.get(full_source_id, omit=["full_text"])
                     except Exception:
                         continue
 
                     if "insights" in status:
                         source_context = await source.get_context(context_size="short")
                         context_data["source"].append(source_context)
-                        total_content += str(source_context)
+                        total_tokens += sum(source.context_field_tokens(source_context).values())
                     elif "full content" in status:
                         source_context = await source.get_context(context_size="long")
                         context_data["source"].append(source_context)
-                        total_content += str(source_context)
+                        total_tokens += sum(source.context_field_tokens(source_context).values())
                 except Exception as e:
                     logger.warning(f"Error processing source {source_id}: {str(e)}")
                     continue
@@ -71,7 +71,7 @@ async def get_notebook_context(notebook_id: str, context_request: ContextRequest
                     if "full content" in status:
                         note_context = note.get_context(context_size="long")
                         context_data["note"].append(note_context)
-                        total_content += str(note_context)
+                        total_tokens += sum(note.context_field_tokens(note_context).values())
                 except Exception as e:
                     logger.warning(f"Error processing note {note_id}: {str(e)}")
                     continue
@@ -82,7 +82,7 @@ async def get_notebook_context(notebook_id: str, context_request: ContextRequest
                 try:
                     source_context = await source.get_context(context_size="short")
                     context_data["source"].append(source_context)
-                    total_content += str(source_context)
+                    total_tokens += sum(source.context_field_tokens(source_context).values())
                 except Exception as e:
                     logger.warning(f"Error processing source {source.id}: {str(e)}")
                     continue
@@ -92,19 +92,16 @@ async def get_notebook_context(notebook_id: str, context_request: ContextRequest
                 try:
                     note_context = note.get_context(context_size="short")
                     context_data["note"].append(note_context)
-                    total_content += str(note_context)
+                    total_tokens += sum(note.context_field_tokens(note_context).values())
                 except Exception as e:
                     logger.warning(f"Error processing note {note.id}: {str(e)}")
                     continue
 
-        # Calculate estimated token count
-        estimated_tokens = token_count(total_content) if total_content else 0
-
         return ContextResponse(
             notebook_id=notebook_id,
             sources=context_data["source"],
             notes=context_data["note"],
-            total_tokens=estimated_tokens,
+            total_tokens=total_tokens,
         )
 
     except HTTPException:
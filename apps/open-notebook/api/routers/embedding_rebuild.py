@@ -1,29 +1,74 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
 from fastapi import APIRouter, HTTPException
 from loguru import logger
 from surreal_commands import get_command_status
 
 from api.command_service import CommandService
 from api.models import (
+    EmbeddingCoverage,
+    EmbeddingMigrationRequest,
+    EmbeddingMigrationResponse,
     RebuildProgress,
     RebuildRequest,
     RebuildResponse,
     RebuildStats,
     RebuildStatusResponse,
 )
-from open_notebook.database.repository import repo_query
+from open_notebook.database.repository import ensure_record_id, repo_query
+from open_notebook.domain.embedding_migration import (
+    EmbeddingMigration,
+    coverage_percentage,
+    discard_shadow_embeddings,
+    get_embedding_coverage,
+    start_embedding_migration,
+)
+from open_notebook.exceptions import InvalidInputError
 
 router = APIRouter()
 
 
+def _checkpoint_progress(
+    checkpoint: Dict[str, Any], now: Optional[datetime] = None
+) -> RebuildProgress:
+    """Build live progress, throughput and ETA from a rebuild checkpoint."""
+    processed_by_type = checkpoint.get("processed") or {}
+    done = sum(processed_by_type.values()) + checkpoint.get("failed_items", 0)
+    total = checkpoint.get("total_items", 0)
+
+    items_per_second = None
+    eta_seconds = None
+    started_at = checkpoint.get("run_started_at")
+    if started_at:
+        now = now or datetime.now(timezone.utc)
+        elapsed = (now - datetime.fromisoformat(str(started_at))).total_seconds()
+        done_this_run = done - checkpoint.get("run_done_at_start", 0)
+        if elapsed > 0 and done_this_run > 0:
+            items_per_second = round(done_this_run / elapsed, 2)
+            eta_seconds = round(max(total - done, 0) / items_per_second, 1)
+
+    return RebuildProgress(
+        processed=done,
+        total=total,
+        percentage=round((done / total * 100) if total > 0 else 0, 2),
+        items_per_second=items_per_second,
+        eta_seconds=eta_seconds,
+    )
+
+
 @router.post("/rebuild", response_model=RebuildResponse)
 async def start_rebuild(request: RebuildRequest):
     """
     Start a background job to rebuild embeddings.
 
-    - **mode**: "existing" (re-embed items with embeddings) or "all" (embed everything)
+    - **mode**: "existing" (re-embed items with embeddings), "stale" (re-embed items
+      embedded by a model other than the current default or before vectors were
+      stamped with their model) or "all" (embed everything)
     - **include_sources**: Include sources in rebuild (default: true)
     - **include_notes**: Include notes in rebuild (default: true)
     - **include_insights**: Include insights in rebuild (default: true)
+    - **resume**: Pick up an interrupted rebuild with the same scope (default: true)
 
     Returns command ID to track progress and estimated item count.
     """
@@ -36,6 +81,12 @@ async def start_rebuild(request: RebuildRequest):
         # Estimate total items (quick count query)
         # This is a rough estimate before the command runs
         total_estimate = 0
+        stale_vars = {}
+        if request.mode == "stale":
+            from open_notebook.domain.models import model_manager
+
+            defaults = await model_manager.get_defaults()
+            stale_vars = {"embedding_model": defaults.default_embedding_model}
 
         if request.include_sources:
             if request.mode == "existing":
@@ -49,10 +100,21 @@ async def start_rebuild(request: RebuildRequest):
                     )) as count FROM {}
                     """
                 )
+            elif request.mode == "stale":
+                result = await repo_query(
+                    """
+                    SELECT VALUE count(array::distinct(
+                        SELECT VALUE source.id
+                        FROM source_embedding
+                        WHERE embedding_model != $embedding_model
+                    )) as count FROM {}
+                    """,
+                    stale_vars,
+                )
             else:
                 # Count all sources with content
                 result = await repo_query(
-                    "SELECT VALUE count() as count FROM source WHERE full_text != none GROUP ALL"
+                    "SELECT VALUE count() as count FROM source WHERE full_text != none OR full_text_ref != none GROUP ALL"
                 )
 
             if result and isinstance(result[0], dict):
@@ -65,6 +127,11 @@ async def start_rebuild(request: RebuildRequest):
                 result = await repo_query(
                     "SELECT VALUE count() as count FROM note WHERE embedding != none AND array::len(embedding) > 0 GROUP ALL"
                 )
+            elif request.mode == "stale":
+                result = await repo_query(
+                    "SELECT VALUE count() as count FROM note WHERE content != none AND embedding_model != $embedding_model GROUP ALL",
+                    stale_vars,
+                )
             else:
                 result = await repo_query(
                     "SELECT VALUE count() as count FROM note WHERE content != none GROUP ALL"
@@ -80,6 +147,11 @@ async def start_rebuild(request: RebuildRequest):
                 result = await repo_query(
                     "SELECT VALUE count() as count FROM source_insight WHERE embedding != none AND array::len(embedding) > 0 GROUP ALL"
                 )
+            elif request.mode == "stale":
+                result = await repo_query(
+                    "SELECT VALUE count() as count FROM source_insight WHERE embedding_model != $embedding_model GROUP ALL",
+                    stale_vars,
+                )
             else:
                 result = await repo_query(
                     "SELECT VALUE count() as count FROM source_insight GROUP ALL"
@@ -101,6 +173,7 @@ async def start_rebuild(request: RebuildRequest):
                 "include_sources": request.include_sources,
                 "include_notes": request.include_notes,
                 "include_insights": request.include_insights,
+                "resume": request.resume,
             },
         )
 
@@ -127,7 +200,7 @@ async def get_rebuild_status(command_id: str):
 
     Returns:
     - **status**: queued, running, completed, failed
-    - **progress**: processed count, total count, percentage
+    - **progress**: processed count, total count, percentage, throughput and ETA
     - **stats**: breakdown by type (sources, notes, insights, failed)
     - **timestamps**: started_at, completed_at
     """
@@ -144,6 +217,21 @@ async def get_rebuild_status(command_id: str):
             status=status.status,
         )
 
+        # While running, report live progress from the rebuild checkpoint
+        if status.status in ("new", "running"):
+            from commands.embedding_commands import load_rebuild_checkpoint
+
+            checkpoint = await load_rebuild_checkpoint()
+            if checkpoint and checkpoint.get("command_id") == command_id:
+                response.progress = _checkpoint_progress(checkpoint)
+                processed = checkpoint.get("processed") or {}
+                response.stats = RebuildStats(
+                    sources=processed.get("sources", 0),
+                    notes=processed.get("notes", 0),
+                    insights=processed.get("insights", 0),
+                    failed=checkpoint.get("failed_items", 0),
+                )
+
         # Extract metadata from command result
         if status.result and isinstance(status.result, dict):
             result = status.result
@@ -188,3 +276,151 @@ async def get_rebuild_status(command_id: str):
         raise HTTPException(
             status_code=500, detail=f"Failed to get rebuild status: {str(e)}"
         )
+
+
+async def _migration_response(migration: EmbeddingMigration) -> EmbeddingMigrationResponse:
+    response = EmbeddingMigrationResponse(
+        status=migration.status,
+        source_model=migration.source_model,
+        target_model=migration.target_model,
+        rebuild_command_id=migration.rebuild_command_id,
+        started_at=migration.started_at,
+        cutover_at=migration.cutover_at,
+        completed_at=migration.completed_at,
+    )
+    if migration.target_model and migration.is_backfilling:
+        coverage = await get_embedding_coverage(migration.target_model)
+        response.coverage = {
+            item_type: EmbeddingCoverage(**counts)
+            for item_type, counts in coverage.items()
+        }
+        response.coverage_percentage = coverage_percentage(coverage)
+    return response
+
+
+@router.post("/migration", response_model=EmbeddingMigrationResponse)
+async def start_migration(request: EmbeddingMigrationRequest):
+    """
+    Start migrating all vectors to a new embedding model.
+
+    New vectors are written for both models while a background rebuild backfills
+    the target model. Search keeps using the current default model until every
+    embedded item has a target vector; then default_embedding_model is switched
+    in one transaction and the old vectors are garbage-collected.
+    """
+    try:
+        # Import commands to ensure they're registered
+        import commands.embedding_commands  # noqa: F401
+        from open_notebook.domain.models import Model, model_manager
+
+        try:
+            target = await Model.get(request.target_model)
+        except Exception:
+            raise InvalidInputError(f"Model {request.target_model} not found")
+        if target.type != "embedding":
+            raise InvalidInputError(f"Model {request.target_model} is not an embedding model")
+
+        defaults = await model_manager.get_defaults()
+        migration = await start_embedding_migration(
+            str(target.id), defaults.default_embedding_model
+        )
+
+        command_id = await CommandService.submit_command_job(
+            "open_notebook",
+            "rebuild_embeddings",
+            {"mode": "stale", "target_model": migration.target_model},
+        )
+        await repo_query(
+            "UPDATE $record_id MERGE { rebuild_command_id: $command_id }",
+            {
+                "record_id": ensure_record_id(EmbeddingMigration.record_id),
+                "command_id": command_id,
+            },
+        )
+        migration.rebuild_command_id = command_id
+        logger.info(
+            f"Started embedding migration {migration.source_model} -> "
+            f"{migration.target_model} (backfill {command_id})"
+        )
+        return await _migration_response(migration)
+
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to start embedding migration: {e}")
+        logger.exception(e)
+        raise HTTPException(
+            status_code=500, detail=f"Failed to start embedding migration: {str(e)}"
+        )
+
+
+@router.get("/migration", response_model=EmbeddingMigrationResponse)
+async def get_migration_status():
+    """
+    Get the state of the current (or last) embedding migration.
+
+    While backfilling, includes per-type coverage of the target model.
+    """
+    try:
+        return await _migration_response(await EmbeddingMigration.get_instance())
+    except Exception as e:
+        logger.error(f"Failed to get embedding migration status: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get embedding migration status: {str(e)}"
+        )
+
+
+@router.post("/migration/cutover", response_model=RebuildResponse)
+async def retry_migration_cutover():
+    """
+    Queue another cutover check, e.g. after failed items were fixed.
+
+    The switch only happens once coverage of the target model reaches 100%.
+    """
+    try:
+        import commands.embedding_commands  # noqa: F401
+
+        migration = await EmbeddingMigration.get_instance()
+        if not migration.is_backfilling:
+            raise InvalidInputError("No embedding migration is backfilling")
+
+        command_id = await CommandService.submit_command_job(
+            "open_notebook",
+            "finalize_embedding_migration",
+            {"target_model": migration.target_model},
+        )
+        coverage = await get_embedding_coverage(migration.target_model)  # type: ignore[arg-type]
+        return RebuildResponse(
+            command_id=command_id,
+            total_items=sum(counts["total"] for counts in coverage.values()),
+            message=f"Cutover check queued at {coverage_percentage(coverage)}% coverage.",
+        )
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to queue embedding migration cutover: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to queue embedding migration cutover: {str(e)}"
+        )
+
+
+@router.delete("/migration", response_model=EmbeddingMigrationResponse)
+async def cancel_migration():
+    """Cancel a migration before cutover and drop the target model's vectors."""
+    try:
+        migration = await EmbeddingMigration.get_instance()
+        if not migration.is_backfilling:
+            raise InvalidInputError("Only a backfilling embedding migration can be cancelled")
+
+        await discard_shadow_embeddings(migration.target_model)  # type: ignore[arg-type]
+        logger.info(f"Cancelled embedding migration to {migration.target_model}")
+        return await _migration_response(await EmbeddingMigration.get_instance())
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to cancel embedding migration: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to cancel embedding migration: {str(e)}"
+        )
@@ -1,10 +1,18 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from loguru import logger
 
 from api.auth import get_ownership_context, get_ownership_filter
 from api.models import NotebookCreate, NotebookResponse, NotebookUpdate
+from open_notebook.database.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    cursor_projection,
+    keyset_clauses,
+    next_cursor,
+    parse_keyset_order,
+)
 from open_notebook.database.repository import ensure_record_id, repo_query
 from open_notebook.domain.notebook import Notebook, Source
 from open_notebook.exceptions import InvalidInputError
@@ -15,43 +23,78 @@ router = APIRouter()
 @router.get("/notebooks", response_model=List[NotebookResponse])
 async def get_notebooks(
     request: Request,
+    response: Response,
     archived: Optional[bool] = Query(None, description="Filter by archived status"),
     order_by: str = Query("updated desc", description="Order by field and direction"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Return one page of at most this many notebooks"
+    ),
+    cursor: Optional[str] = Query(
+        None, description=f"Continue after a previous page, from its {NEXT_CURSOR_HEADER} header"
+    ),
 ):
-    """Get all notebooks with optional filtering and ordering."""
+    """
+    Get all notebooks with optional filtering and ordering.
+
+    With limit, notebooks are paged by cursor on (created or updated, id);
+    the X-Next-Cursor header carries the cursor of the next page.
+    """
     try:
         # Get ownership filter from auth context
         user_id, team_id = get_ownership_filter(request)
 
         # Build ownership filter clause
+        conditions = []
         ownership_conditions = []
-        params = {}
+        params: Dict[str, Any] = {}
         if user_id is not None:
             ownership_conditions.append("user_id = $user_id")
             params["user_id"] = user_id
         if team_id is not None:
             ownership_conditions.append("team_id = $team_id")
             params["team_id"] = team_id
-
-        where_clause = ""
         if ownership_conditions:
-            where_clause = f"WHERE ({' OR '.join(ownership_conditions)})"
+            conditions.append(f"({' OR '.join(ownership_conditions)})")
+
+        # Filter by archived status in the query so pages stay full
+        if archived is not None:
+            conditions.append("archived = $archived")
+            params["archived"] = archived
+
+        limit_clause = ""
+        sort_field = None
+        if limit is not None or cursor is not None:
+            sort_field, direction = parse_keyset_order(order_by)
+            keyset_condition, order_by, keyset_params = keyset_clauses(
+                sort_field, direction, cursor
+            )
+            if keyset_condition:
+                conditions.append(keyset_condition)
+                params.update(keyset_params)
+            if limit is not None:
+                limit_clause = "LIMIT $limit"
+                params["limit"] = limit
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
         # Build the query with counts and ownership filter
+        cursor_clause = f"{cursor_projection(sort_field)}," if sort_field else ""
         query = f"""
-            SELECT *,
+            SELECT *, {cursor_clause}
             count(<-reference.in) as source_count,
             count(<-artifact.in) as note_count
             FROM notebook
             {where_clause}
             ORDER BY {order_by}
+            {limit_clause}
         """
 
         result = await repo_query(query, params) if params else await repo_query(query)
 
-        # Filter by archived status if specified
-        if archived is not None:
-            result = [nb for nb in result if nb.get("archived") == archived]
+        if sort_field:
+            page_cursor = next_cursor(result, limit, sort_field)
+            if page_cursor:
+                response.headers[NEXT_CURSOR_HEADER] = page_cursor
 
         return [
             NotebookResponse(
@@ -69,6 +112,8 @@ async def get_notebooks(
             )
             for nb in result
         ]
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching notebooks: {str(e)}")
         raise HTTPException(
@@ -244,7 +289,7 @@ async def add_source_to_notebook(notebook_id: str, source_id: str):
             raise HTTPException(status_code=404, detail="Notebook not found")
 
         # Check if source exists
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, fields=["id"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -1,9 +1,14 @@
 from typing import List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from loguru import logger
 
 from api.models import NoteCreate, NoteResponse, NoteUpdate
+from open_notebook.database.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    next_cursor,
+)
 from open_notebook.domain.notebook import Note
 from open_notebook.exceptions import InvalidInputError
 
@@ -12,9 +17,21 @@ router = APIRouter()
 
 @router.get("/notes", response_model=List[NoteResponse])
 async def get_notes(
-    notebook_id: Optional[str] = Query(None, description="Filter by notebook ID")
+    response: Response,
+    notebook_id: Optional[str] = Query(None, description="Filter by notebook ID"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Return one page of at most this many notes"
+    ),
+    cursor: Optional[str] = Query(
+        None, description=f"Continue after a previous page, from its {NEXT_CURSOR_HEADER} header"
+    ),
 ):
-    """Get all notes with optional notebook filtering."""
+    """
+    Get notes with optional notebook filtering, most recently updated first.
+
+    With limit, notes are paged by cursor; the X-Next-Cursor header carries
+    the cursor of the next page.
+    """
     try:
         if notebook_id:
             # Get notes for a specific notebook
@@ -22,11 +39,16 @@ async def get_notes(
             notebook = await Notebook.get(notebook_id)
             if not notebook:
                 raise HTTPException(status_code=404, detail="Notebook not found")
-            notes = await notebook.get_notes()
+            notes = await notebook.get_notes(limit=limit, cursor=cursor)
         else:
             # Get all notes
-            notes = await Note.get_all(order_by="updated desc")
-        
+            notes = await Note.get_all(
+                order_by="updated desc", limit=limit, cursor=cursor
+            )
+
+        page_cursor = next_cursor(notes, limit, "updated")
+        if page_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page_cursor
         return [
             NoteResponse(
                 id=note.id or "",
@@ -40,6 +62,8 @@ async def get_notes(
         ]
     except HTTPException:
         raise
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching notes: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching notes: {str(e)}")
@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from api.profiling import PROFILE_ID_PATTERN, profiling_token, token_matches
+from open_notebook.config import PROFILES_FOLDER
+
+router = APIRouter()
+
+
+def require_profiling_token(provided: Optional[str]) -> None:
+    """Profiles are admin-only: the caller must present PROFILING_TOKEN."""
+    token = profiling_token()
+    if not token:
+        raise HTTPException(status_code=404, detail="Request profiling is not enabled")
+    if not token_matches(provided, token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+def profile_path(profile_id: str, suffix: str) -> Path:
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    path = Path(PROFILES_FOLDER) / f"{profile_id}{suffix}"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return path
+
+
+@router.get("/profiles")
+async def list_profiles(
+    limit: int = 50, x_profile_token: Optional[str] = Header(None)
+) -> List[Dict[str, Any]]:
+    """Summaries of captured request profiles, newest first."""
+    require_profiling_token(x_profile_token)
+    folder = Path(PROFILES_FOLDER)
+    if not folder.exists():
+        return []
+    summaries = []
+    for path in sorted(folder.glob("*.json"), reverse=True)[:limit]:
+        summary = json.loads(path.read_text())
+        summary.pop("top_functions", None)
+        summaries.append(summary)
+    return summaries
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str, x_profile_token: Optional[str] = Header(None)
+) -> Dict[str, Any]:
+    """A profile's summary: attributed time and the slowest functions."""
+    require_profiling_token(x_profile_token)
+    return json.loads(profile_path(profile_id, ".json").read_text())
+
+
+@router.get("/profiles/{profile_id}/download")
+async def download_profile(
+    profile_id: str, x_profile_token: Optional[str] = Header(None)
+):
+    """The raw cProfile dump, for snakeviz or pstats."""
+    require_profiling_token(x_profile_token)
+    return FileResponse(
+        profile_path(profile_id, ".prof"),
+        media_type="application/octet-stream",
+        filename=f"{profile_id}.prof",
+    )
@@ -2,16 +2,24 @@ import asyncio
 import json
 from typing import AsyncGenerator, List, Optional
 
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, HTTPException, Path, Query, Response
 from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
 from loguru import logger
 from pydantic import BaseModel, Field
 
+from open_notebook.database.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    cursor_projection,
+    keyset_clauses,
+    next_cursor,
+)
 from open_notebook.database.repository import ensure_record_id, repo_query
 from open_notebook.domain.notebook import ChatSession, Source
 from open_notebook.exceptions import (
+    InvalidInputError,
     NotFoundError,
 )
 from open_notebook.graphs.source_chat import source_chat_graph as source_chat_graph
@@ -70,7 +78,7 @@ async def create_source_chat_session(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, fields=["id"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -102,44 +110,66 @@ async def create_source_chat_session(
 
 @router.get("/sources/{source_id}/chat/sessions", response_model=List[SourceChatSessionResponse])
 async def get_source_chat_sessions(
-    source_id: str = Path(..., description="Source ID")
+    response: Response,
+    source_id: str = Path(..., description="Source ID"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Return one page of at most this many sessions"
+    ),
+    cursor: Optional[str] = Query(
+        None, description=f"Continue after a previous page, from its {NEXT_CURSOR_HEADER} header"
+    ),
 ):
-    """Get all chat sessions for a source."""
+    """
+    Get chat sessions for a source, newest first.
+
+    With limit, sessions are paged by cursor; the X-Next-Cursor header
+    carries the cursor of the next page.
+    """
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, fields=["id"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
-        
-        # Get sessions that refer to this source - first get relations, then sessions
-        relations = await repo_query(
-            "SELECT in FROM refers_to WHERE out = $source_id",
-            {"source_id": ensure_record_id(full_source_id)}
+
+        # Get the sessions that refer to this source in one query
+        where, order, keyset_params = keyset_clauses("created", "desc", cursor)
+        rows = await repo_query(
+            f"""
+            SELECT *, {cursor_projection("created")}
+            FROM (SELECT VALUE in FROM refers_to WHERE out = $source_id)
+            {f"WHERE {where}" if where else ""}
+            ORDER BY {order}
+            {"LIMIT $limit" if limit is not None else ""}
+            """,
+            {
+                "source_id": ensure_record_id(full_source_id),
+                "limit": limit,
+                **keyset_params,
+            },
         )
-        
-        sessions = []
-        for relation in relations:
-            session_id = relation.get("in")
-            if session_id:
-                session_result = await repo_query(f"SELECT * FROM {session_id}")
-                if session_result and len(session_result) > 0:
-                    session_data = session_result[0]
-                    sessions.append(SourceChatSessionResponse(
-                        id=session_data.get("id") or "",
-                        title=session_data.get("title") or "Untitled Session",
-                        source_id=source_id,
-                        model_override=session_data.get("model_override"),
-                        created=str(session_data.get("created")),
-                        updated=str(session_data.get("updated")),
-                        message_count=0  # TODO: Add message count if needed
-                    ))
-        
-        # Sort sessions by created date (newest first)
-        sessions.sort(key=lambda x: x.created, reverse=True)
-        return sessions
+
+        page_cursor = next_cursor(rows, limit, "created")
+        if page_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page_cursor
+        return [
+            SourceChatSessionResponse(
+                id=session_data.get("id") or "",
+                title=session_data.get("title") or "Untitled Session",
+                source_id=source_id,
+                model_override=session_data.get("model_override"),
+                created=str(session_data.get("created")),
+                updated=str(session_data.get("updated")),
+                message_count=0  # TODO: Add message count if needed
+            )
+            for session_data in rows
+        ]
+    except HTTPException:
+        raise
     except NotFoundError:
         raise HTTPException(status_code=404, detail="Source not found")
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching source chat sessions: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching source chat sessions: {str(e)}")
@@ -154,7 +184,7 @@ async def get_source_chat_session(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, fields=["id"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -174,7 +204,7 @@ async def get_source_chat_session(
             raise HTTPException(status_code=404, detail="Session not found for this source")
         
         # Get session state from LangGraph to retrieve messages
-        thread_state = source_chat_graph.get_state(
+        thread_state = await source_chat_graph.aget_state(
             config=RunnableConfig(configurable={"thread_id": session_id})
         )
         
@@ -230,7 +260,7 @@ async def update_source_chat_session(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, fields=["id"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -282,7 +312,7 @@ async def delete_source_chat_session(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, fields=["id"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -323,7 +353,7 @@ async def stream_source_chat_response(
     """Stream the source chat response as Server-Sent Events."""
     try:
         # Get current state
-        current_state = source_chat_graph.get_state(
+        current_state = await source_chat_graph.aget_state(
             config=RunnableConfig(configurable={"thread_id": session_id})
         )
         
@@ -345,8 +375,8 @@ async def stream_source_chat_response(
         }
         yield f"data: {json.dumps(user_event)}\n\n"
         
-        # Execute source chat graph synchronously (like notebook chat does)
-        result = source_chat_graph.invoke(
+        # Execute source chat graph
+        result = await source_chat_graph.ainvoke(
             input=state_values,  # type: ignore[arg-type]
             config=RunnableConfig(
                 configurable={
@@ -395,7 +425,7 @@ async def send_message_to_source_chat(
     try:
         # Verify source exists
         full_source_id = source_id if source_id.startswith("source:") else f"source:{source_id}"
-        source = await Source.get(full_source_id)
+        source = await Source.get(full_source_id, fields=["id"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
         
@@ -1,6 +1,8 @@
+import asyncio
+import hashlib
 import os
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, List, Literal, Optional
 
 from fastapi import (
     APIRouter,
@@ -14,7 +16,6 @@ from fastapi import (
 )
 from fastapi.responses import FileResponse, Response
 from loguru import logger
-from surreal_commands import execute_command_sync
 
 from api.auth import get_ownership_context, get_ownership_filter
 from api.command_service import CommandService
@@ -26,17 +27,38 @@ from api.models import (
     SourceListResponse,
     SourceResponse,
     SourceStatusResponse,
+    SourceTextChunk,
+    SourceTextResponse,
     SourceUpdate,
 )
 from commands.source_commands import SourceProcessingInput
 from open_notebook.config import UPLOADS_FOLDER, get_upload_folder
-from open_notebook.database.repository import ensure_record_id, repo_query
+from open_notebook.database import blob_store
+from open_notebook.database.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    cursor_projection,
+    keyset_clauses,
+    next_cursor,
+)
+from open_notebook.database.repository import (
+    QueryBatch,
+    ensure_record_id,
+    repo_query,
+)
 from open_notebook.domain.notebook import Notebook, Source
 from open_notebook.domain.transformation import Transformation
 from open_notebook.exceptions import InvalidInputError
+from open_notebook.jobs import tenant_context
 
 router = APIRouter()
 
+# Default and maximum slice sizes for /sources/{id}/text
+TEXT_SLICE_CHARS = 50_000
+MAX_TEXT_SLICE_CHARS = 1_000_000
+TEXT_SLICE_CHUNKS = 20
+MAX_TEXT_SLICE_CHUNKS = 500
+
 
 def generate_unique_filename(original_filename: str, upload_folder: str) -> str:
     """Generate unique filename like Streamlit app (append counter if file exists)."""
@@ -172,22 +194,39 @@ def parse_source_form_data(
 
 @router.get("/sources", response_model=List[SourceListResponse])
 async def get_sources(
+    response: Response,
     notebook_id: Optional[str] = Query(None, description="Filter by notebook ID"),
-    limit: int = Query(50, ge=1, le=100, description="Number of sources to return (1-100)"),
-    offset: int = Query(0, ge=0, description="Number of sources to skip"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Number of sources to return (1-100)"),
+    offset: int = Query(0, ge=0, description="Number of sources to skip (prefer cursor)"),
+    cursor: Optional[str] = Query(
+        None, description=f"Continue after a previous page, from its {NEXT_CURSOR_HEADER} header"
+    ),
     sort_by: str = Query("updated", description="Field to sort by (created or updated)"),
     sort_order: str = Query("desc", description="Sort order (asc or desc)"),
 ):
-    """Get sources with pagination and sorting support."""
+    """
+    Get sources with pagination and sorting support.
+
+    Pages are keyed on (sort_by, id): pass the X-Next-Cursor header of a page
+    as cursor to get the next one at constant cost. offset still works but
+    gets slower the deeper the page.
+    """
     try:
         # Validate sort parameters
         if sort_by not in ["created", "updated"]:
             raise HTTPException(status_code=400, detail="sort_by must be 'created' or 'updated'")
         if sort_order.lower() not in ["asc", "desc"]:
             raise HTTPException(status_code=400, detail="sort_order must be 'asc' or 'desc'")
+        if cursor and offset:
+            raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
 
-        # Build ORDER BY clause
-        order_clause = f"ORDER BY {sort_by} {sort_order.upper()}"
+        # Build WHERE and ORDER BY clauses; the id tie-break keeps pages stable
+        keyset_condition, order, keyset_params = keyset_clauses(
+            sort_by, sort_order.lower(), cursor
+        )
+        where_clause = f"WHERE {keyset_condition}" if keyset_condition else ""
+        order_clause = f"ORDER BY {order}"
+        page_clause = "LIMIT $limit START $offset" if offset else "LIMIT $limit"
 
         # Build the query
         if notebook_id:
@@ -199,30 +238,41 @@ async def get_sources(
             # Query sources for specific notebook - include command field
             query = f"""
                 SELECT id, asset, created, title, updated, topics, command,
+                {cursor_projection(sort_by)},
                 (SELECT VALUE count() FROM source_insight WHERE source = $parent.id GROUP ALL)[0].count OR 0 AS insights_count,
                 ((SELECT VALUE id FROM source_embedding WHERE source = $parent.id LIMIT 1)) != NONE AS embedded
                 FROM (select value in from reference where out=$notebook_id)
+                {where_clause}
                 {order_clause}
-                LIMIT $limit START $offset
+                {page_clause}
             """
             result = await repo_query(
                 query, {
                     "notebook_id": ensure_record_id(notebook_id),
                     "limit": limit,
-                    "offset": offset
+                    "offset": offset,
+                    **keyset_params,
                 }
             )
         else:
             # Query all sources - include command field
             query = f"""
                 SELECT id, asset, created, title, updated, topics, command,
+                {cursor_projection(sort_by)},
                 (SELECT VALUE count() FROM source_insight WHERE source = $parent.id GROUP ALL)[0].count OR 0 AS insights_count,
                 ((SELECT VALUE id FROM source_embedding WHERE source = $parent.id LIMIT 1)) != NONE AS embedded
                 FROM source
+                {where_clause}
                 {order_clause}
-                LIMIT $limit START $offset
+                {page_clause}
             """
-            result = await repo_query(query, {"limit": limit, "offset": offset})
+            result = await repo_query(
+                query, {"limit": limit, "offset": offset, **keyset_params}
+            )
+
+        page_cursor = next_cursor(result, limit, sort_by)
+        if page_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page_cursor
 
         # Extract command IDs for batch status fetching
         command_ids = []
@@ -332,6 +382,8 @@ async def get_sources(
         return response_list
     except HTTPException:
         raise
+    except InvalidInputError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching sources: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching sources: {str(e)}")
@@ -357,7 +409,7 @@ async def create_source(
 
         # Verify all specified notebooks exist (backward compatibility support)
         for notebook_id in (source_data.notebooks or []):
-            notebook = await Notebook.get(notebook_id)
+            notebook = await Notebook.get(notebook_id, fields=["id"])
             if not notebook:
                 raise HTTPException(
                     status_code=404, detail=f"Notebook {notebook_id} not found"
@@ -456,6 +508,7 @@ async def create_source(
                     "open_notebook",  # app name
                     "process_source",  # command name
                     command_input.model_dump(),
+                    context=tenant_context(user_id, team_id),
                 )
 
                 logger.info(f"Submitted async processing command: {command_id}")
@@ -499,7 +552,7 @@ async def create_source(
                 )
 
         else:
-            # SYNC PATH: Execute synchronously using execute_command_sync
+            # SYNC PATH: Submit the command and await its completion
             logger.info("Using sync processing path")
 
             try:
@@ -530,10 +583,16 @@ async def create_source(
                     embed=source_data.embed,
                 )
 
-                result = execute_command_sync(
+                # Awaited with polling, so the event loop keeps serving
+                # other requests while the worker processes this one
+                command_id = await CommandService.submit_command_job(
                     "open_notebook",  # app name
                     "process_source",  # command name
                     command_input.model_dump(),
+                    context=tenant_context(user_id, team_id),
+                )
+                result = await CommandService.wait_for_command_job(
+                    command_id,
                     timeout=300,  # 5 minute timeout for sync processing
                 )
 
@@ -566,6 +625,8 @@ async def create_source(
                         status_code=500, detail="Processed source not found"
                     )
 
+                # Blob-stored text is not part of the row
+                await processed_source.load_fields("full_text")
                 embedded_chunks = await processed_source.get_embedded_chunks()
                 return SourceResponse(
                     id=processed_source.id or "",
@@ -674,31 +735,64 @@ def _is_source_file_available(source: Source) -> Optional[bool]:
 
 
 @router.get("/sources/{source_id}", response_model=SourceResponse)
-async def get_source(source_id: str):
-    """Get a specific source by ID."""
+async def get_source(
+    source_id: str,
+    include_full_text: bool = Query(
+        False,
+        description="Include the complete full_text; use /sources/{id}/text for slices",
+    ),
+):
+    """
+    Get a specific source by ID.
+
+    The source, its command status, chunk count and notebooks are read in
+    one multi-statement query.
+    """
     try:
-        source = await Source.get(source_id)
-        if not source:
+        record_id = ensure_record_id(source_id)
+        projection, unloaded = Source._projection(
+            omit=None if include_full_text else ["full_text"]
+        )
+        batch = QueryBatch()
+        batch.add(f"SELECT {projection} FROM $id", {"id": record_id})
+        batch.add(
+            """
+            SELECT
+                command.status AS status,
+                command.result AS result,
+                command.error_message AS error_message
+            FROM $id
+            """,
+            {"id": record_id},
+        )
+        batch.add(
+            "SELECT count() AS chunks FROM source_embedding WHERE source = $id GROUP ALL",
+            {"id": record_id},
+        )
+        batch.add("SELECT VALUE out FROM reference WHERE in = $id", {"id": record_id})
+        source_rows, command_rows, chunk_rows, notebooks_query = await batch.execute()
+
+        if not source_rows:
             raise HTTPException(status_code=404, detail="Source not found")
+        source = Source.from_row(source_rows[0], unloaded)
+        if include_full_text:
+            await source.load_fields("full_text")
 
         # Get status information if command exists
         status = None
         processing_info = None
         if source.command:
-            try:
-                status = await source.get_status()
-                processing_info = await source.get_processing_progress()
-            except Exception as e:
-                logger.warning(f"Failed to get status for source {source_id}: {e}")
+            command = command_rows[0] if command_rows else {}
+            if command.get("status"):
+                status = command["status"]
+                processing_info = source.command_progress(command)
+            else:
+                logger.warning(f"Failed to get status for source {source_id}: command not found")
                 status = "unknown"
 
-        embedded_chunks = await source.get_embedded_chunks()
+        embedded_chunks = chunk_rows[0]["chunks"] if chunk_rows else 0
 
         # Get associated notebooks
-        notebooks_query = await repo_query(
-            "SELECT VALUE out FROM reference WHERE in = $source_id",
-            {"source_id": ensure_record_id(source.id or source_id)}
-        )
         notebook_ids = [str(nb_id) for nb_id in notebooks_query] if notebooks_query else []
 
         return SourceResponse(
@@ -731,6 +825,123 @@ async def get_source(source_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching source: {str(e)}")
 
 
+def _text_etag(source_id: str, updated: Any, total: int, unit: str, offset: int, length: int) -> str:
+    """ETag for a text slice; changes whenever the source is saved."""
+    key = f"{source_id}|{updated}|{total}|{unit}|{offset}|{length}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+@router.get("/sources/{source_id}/text", response_model=SourceTextResponse)
+async def get_source_text(
+    request: Request,
+    response: Response,
+    source_id: str,
+    unit: Literal["chars", "chunks"] = Query(
+        "chars", description="Slice by characters of full_text or by embedded chunks"
+    ),
+    offset: int = Query(0, ge=0, description="Start of the slice"),
+    length: Optional[int] = Query(None, ge=1, description="Size of the slice"),
+):
+    """
+    Get a slice of a source's text.
+
+    Character slices are cut in the database, so only the requested part of
+    full_text is transferred; blob-stored text is decompressed only up to the
+    end of the slice. Chunk slices follow the embedding chunk order.
+    Responses carry an ETag and honor If-None-Match.
+    """
+    try:
+        record_id = ensure_record_id(source_id)
+        if unit == "chars":
+            length = min(length or TEXT_SLICE_CHARS, MAX_TEXT_SLICE_CHARS)
+            info = await repo_query(
+                """
+                SELECT
+                    updated,
+                    full_text_ref,
+                    IF full_text_ref THEN full_text_length
+                    ELSE string::len(full_text OR '') END AS total
+                FROM $id
+                """,
+                {"id": record_id},
+            )
+        else:
+            length = min(length or TEXT_SLICE_CHUNKS, MAX_TEXT_SLICE_CHUNKS)
+            info = await repo_query(
+                """
+                SELECT
+                    updated,
+                    array::len(array::distinct(
+                        (SELECT VALUE order FROM source_embedding WHERE source = $parent.id)
+                    )) AS total
+                FROM $id
+                """,
+                {"id": record_id},
+            )
+        if not info:
+            raise HTTPException(status_code=404, detail="Source not found")
+
+        total = info[0].get("total") or 0
+        etag = _text_etag(source_id, info[0].get("updated"), total, unit, offset, length)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        text = None
+        chunks = None
+        returned = 0
+        if unit == "chars":
+            full_text_ref = info[0].get("full_text_ref")
+            if offset < total and full_text_ref:
+                text = await asyncio.to_thread(
+                    blob_store.read_text_range, full_text_ref, offset, length
+                )
+            elif offset < total:
+                result = await repo_query(
+                    # string::slice takes (start, length)
+                    "SELECT VALUE string::slice(full_text, $offset, $length) FROM $id",
+                    {"id": record_id, "offset": offset, "length": min(length, total - offset)},
+                )
+                text = result[0] if result else ""
+            else:
+                text = ""
+            returned = len(text)
+        else:
+            rows = await repo_query(
+                """
+                SELECT order, content FROM source_embedding
+                WHERE source = $id AND order >= $start AND order < $end
+                ORDER BY order
+                """,
+                {"id": record_id, "start": offset, "end": offset + length},
+            )
+            # During an embedding model migration a chunk can exist once per model
+            by_order = {row["order"]: row["content"] for row in rows}
+            chunks = [
+                SourceTextChunk(order=order, content=content)
+                for order, content in sorted(by_order.items())
+            ]
+            returned = len(chunks)
+
+        end = offset + (returned if unit == "chars" else length)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+        return SourceTextResponse(
+            source_id=source_id,
+            unit=unit,
+            offset=offset,
+            length=returned,
+            total=total,
+            next_offset=end if end < total else None,
+            text=text,
+            chunks=chunks,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching text for source {source_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching source text: {str(e)}")
+
+
 @router.head("/sources/{source_id}/download")
 async def check_source_file(source_id: str):
     """Check if a source has a downloadable file."""
@@ -766,7 +977,7 @@ async def get_source_status(source_id: str):
     """Get processing status for a source."""
     try:
         # First, verify source exists
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, fields=["command"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -839,6 +1050,8 @@ async def update_source(source_id: str, source_update: SourceUpdate):
 
         await source.save()
 
+        # Blob-stored text is not part of the row
+        await source.load_fields("full_text")
         embedded_chunks = await source.get_embedded_chunks()
         return SourceResponse(
             id=source.id or "",
@@ -869,8 +1082,8 @@ async def update_source(source_id: str, source_update: SourceUpdate):
 async def retry_source_processing(source_id: str):
     """Retry processing for a failed or stuck source."""
     try:
-        # First, verify source exists
-        source = await Source.get(source_id)
+        # First, verify source exists; full_text is only needed for text sources
+        source = await Source.get(source_id, omit=["full_text"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -915,6 +1128,7 @@ async def retry_source_processing(source_id: str):
                 )
         else:
             # Check if it's a text source by trying to get full_text
+            await source.load_fields("full_text")
             if source.full_text:
                 content_state = {"content": source.full_text}
             else:
@@ -939,6 +1153,7 @@ async def retry_source_processing(source_id: str):
                 "open_notebook",  # app name
                 "process_source",  # command name
                 command_input.model_dump(),
+                context=tenant_context(source.user_id, source.team_id),
             )
 
             logger.info(
@@ -949,6 +1164,8 @@ async def retry_source_processing(source_id: str):
             source.command = ensure_record_id(f"command:{command_id}")
             await source.save()
 
+            # Fetched without full_text (and blob-stored text is not part of the row)
+            await source.load_fields("full_text")
             # Get current embedded chunks count
             embedded_chunks = await source.get_embedded_chunks()
 
@@ -994,7 +1211,7 @@ async def retry_source_processing(source_id: str):
 async def delete_source(source_id: str):
     """Delete a source."""
     try:
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, fields=["id"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -1012,7 +1229,7 @@ async def delete_source(source_id: str):
 async def get_source_insights(source_id: str):
     """Get all insights for a specific source."""
     try:
-        source = await Source.get(source_id)
+        source = await Source.get(source_id, fields=["id"])
         if not source:
             raise HTTPException(status_code=404, detail="Source not found")
 
@@ -99,7 +99,7 @@ class SourcesService:
 
     def get_source(self, source_id: str) -> SourceWithMetadata:
         """Get a specific source."""
-        response = api_client.get_source(source_id)
+        response = api_client.get_source(source_id, include_full_text=True)
         source_data = response if isinstance(response, dict) else response[0]
         source = Source(
             title=source_data["title"],
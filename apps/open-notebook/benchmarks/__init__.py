@@ -0,0 +1,10 @@
+"""
+Offline benchmark suite.
+
+Runs the app's own ingestion, search, context and chat code paths against
+an embedded SurrealDB with fake language and embedding providers, so the
+numbers reflect Open Notebook itself rather than a network or a model.
+
+Usage:
+    uv run python -m benchmarks --help
+"""
@@ -0,0 +1,169 @@
+"""
+Run the offline benchmark suite and print (or write) the results as JSON.
+
+Usage:
+    uv run python -m benchmarks --scenarios search --sizes 10000,100000
+    uv run python -m benchmarks --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.harness import APP_ROOT, prepare_environment
+
+DEFAULT_SCENARIOS = [
+    "ingestion",
+    "vectorize_source",
+    "search",
+    "context_build",
+    "chat_turn",
+    "rebuild_embeddings",
+]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Offline Open Notebook benchmarks"
+    )
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(DEFAULT_SCENARIOS),
+        help="Comma-separated scenarios to run (default: all)",
+    )
+    parser.add_argument(
+        "--sizes",
+        default="10000",
+        help="Comma-separated chunk counts for the search scenario, e.g. 10000,100000,1000000",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement")
+    parser.add_argument("--sources", type=int, default=5, help="Sources per scenario")
+    parser.add_argument("--words", type=int, default=5000, help="Words per source")
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call"
+    )
+    parser.add_argument(
+        "--embedding-latency",
+        type=float,
+        default=0.02,
+        help="Seconds per fake embedding call",
+    )
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument(
+        "--concurrency", type=int, default=5, help="Concurrent background commands"
+    )
+    parser.add_argument(
+        "--workdir", help="Scratch directory for data and the database (default: a temp dir)"
+    )
+    parser.add_argument(
+        "--db-url", help="SurrealDB URL (default: SurrealKV inside the scratch directory)"
+    )
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=APP_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace, names: List[str]) -> Dict[str, Any]:
+    # App modules are imported only after prepare_environment has run
+    from benchmarks.harness import InlineCommandQueue, setup_database
+    from benchmarks.scenarios import SCENARIOS, BenchContext
+    from open_notebook.database.repository import db_session
+
+    queue = InlineCommandQueue(args.concurrency)
+    queue.install()
+    results: Dict[str, Any] = {}
+    for name in names:
+        ctx = BenchContext(
+            queue=queue,
+            repeat=args.repeat,
+            sources=args.sources,
+            words=args.words,
+            dim=args.embedding_dim,
+            sizes=[int(size) for size in args.sizes.split(",")],
+        )
+        # Every scenario starts from its own freshly migrated database
+        os.environ["SURREAL_DATABASE"] = f"bench_{name}"
+        print(f"Running {name}...", file=sys.stderr)
+        start = time.perf_counter()
+        try:
+            async with db_session():
+                await setup_database()
+                results[name] = await SCENARIOS[name](ctx)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        results[name]["total_s"] = round(time.perf_counter() - start, 3)
+    results["commands"] = {"executed": queue.executed, "failed": queue.failed}
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    # Resolve before prepare_environment changes the working directory
+    output_path = Path(args.output).resolve() if args.output else None
+    workdir = prepare_environment(args.workdir, args.db_url)
+
+    from loguru import logger
+
+    from benchmarks.fakes import FAKE_SETTINGS
+    from benchmarks.scenarios import SCENARIOS
+
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper())
+    FAKE_SETTINGS.llm_latency = args.llm_latency
+    FAKE_SETTINGS.embedding_latency = args.embedding_latency
+    FAKE_SETTINGS.embedding_dim = args.embedding_dim
+
+    report = {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "workdir": str(workdir),
+            "settings": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("output", "log_level")
+            },
+        },
+        "results": asyncio.run(run(args, names)),
+    }
+    output = json.dumps(report, indent=2)
+    if output_path:
+        output_path.write_text(output + "\n")
+        print(f"Results written to {output_path}", file=sys.stderr)
+    else:
+        print(output)
+    failed = [name for name in names if "error" in report["results"][name]]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
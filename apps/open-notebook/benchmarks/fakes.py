@@ -0,0 +1,215 @@
+"""
+Deterministic stand-ins for esperanto language and embedding providers.
+
+They are registered with AIFactory under the "fake" provider, so the app
+creates them through its normal model records and ModelManager. Latency,
+vector dimension and reply length come from FAKE_SETTINGS, which the
+benchmark CLI fills in before running.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from esperanto import AIFactory, EmbeddingModel, LanguageModel
+from esperanto.common_types import ChatCompletion, Choice, Message, Usage
+from esperanto.common_types import Model as ProviderModel
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+FAKE_PROVIDER = "fake"
+WORDS = (
+    "notebook source insight chunk context vector search model token answer "
+    "summary research question evidence claim result method data topic"
+).split()
+
+
+@dataclass
+class FakeSettings:
+    # Seconds per language model call, plus per generated token
+    llm_latency: float = 0.05
+    llm_seconds_per_token: float = 0.0
+    llm_output_tokens: int = 200
+    # Seconds per embedding call, plus per embedded text
+    embedding_latency: float = 0.02
+    embedding_seconds_per_text: float = 0.0
+    embedding_dim: int = 1536
+
+
+FAKE_SETTINGS = FakeSettings()
+
+
+def fake_vector(text: str, dim: int) -> List[float]:
+    """A unit-free vector that depends only on the text."""
+    seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+    rng = random.Random(seed)
+    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+
+
+def fake_reply(prompt: str, tokens: int) -> str:
+    seed = int.from_bytes(hashlib.blake2b(prompt.encode(), digest_size=8).digest(), "big")
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(tokens))
+
+
+def fake_json_reply(prompt: str, tokens: int) -> str:
+    """
+    A reply for structured (JSON) calls. The only one in the app is the ask
+    strategy, so it has that shape: reasoning plus a couple of searches.
+    """
+    words = fake_reply(prompt, tokens).split()
+    return json.dumps(
+        {
+            "reasoning": " ".join(words[: tokens // 2]),
+            "searches": [
+                {"term": " ".join(words[i : i + 2]), "instructions": " ".join(words[i : i + 8])}
+                for i in (0, 8)
+            ],
+        }
+    )
+
+
+def _llm_delay() -> float:
+    return (
+        FAKE_SETTINGS.llm_latency
+        + FAKE_SETTINGS.llm_seconds_per_token * FAKE_SETTINGS.llm_output_tokens
+    )
+
+
+def _embedding_delay(count: int) -> float:
+    return (
+        FAKE_SETTINGS.embedding_latency
+        + FAKE_SETTINGS.embedding_seconds_per_text * count
+    )
+
+
+class FakeChatModel(BaseChatModel):
+    """LangChain chat model that sleeps, then answers with seeded words."""
+
+    model_name: str = "fake-chat"
+    json_output: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        output_tokens = FAKE_SETTINGS.llm_output_tokens
+        reply = fake_json_reply if self.json_output else fake_reply
+        message = AIMessage(
+            content=reply(prompt, output_tokens),
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": output_tokens,
+                "total_tokens": len(prompt) // 4 + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(_llm_delay())
+        return self._result(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(_llm_delay())
+        return self._result(messages)
+
+
+class FakeLanguageModel(LanguageModel):
+    """esperanto language model backed by FakeChatModel."""
+
+    @property
+    def provider(self) -> str:
+        return FAKE_PROVIDER
+
+    def _get_default_model(self) -> str:
+        return "fake-chat"
+
+    def _get_models(self) -> List[ProviderModel]:
+        return []
+
+    def _completion(self, messages: List[Dict[str, Any]]) -> ChatCompletion:
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        output_tokens = FAKE_SETTINGS.llm_output_tokens
+        return ChatCompletion(
+            id=f"fake-{hashlib.blake2b(prompt.encode(), digest_size=4).hexdigest()}",
+            choices=[
+                Choice(
+                    index=0,
+                    message=Message(
+                        content=fake_reply(prompt, output_tokens), role="assistant"
+                    ),
+                    finish_reason="stop",
+                )
+            ],
+            model=self.get_model_name(),
+            provider=FAKE_PROVIDER,
+            usage=Usage(
+                prompt_tokens=len(prompt) // 4,
+                completion_tokens=output_tokens,
+                total_tokens=len(prompt) // 4 + output_tokens,
+            ),
+        )
+
+    def chat_complete(self, messages, stream=None, **kwargs):  # type: ignore[override]
+        time.sleep(_llm_delay())
+        return self._completion(messages)
+
+    async def achat_complete(self, messages, stream=None, **kwargs):  # type: ignore[override]
+        await asyncio.sleep(_llm_delay())
+        return self._completion(messages)
+
+    def to_langchain(self) -> BaseChatModel:
+        return FakeChatModel(
+            model_name=self.get_model_name(), json_output=self.structured is not None
+        )
+
+
+class FakeEmbeddingModel(EmbeddingModel):
+    """esperanto embedding model returning seeded vectors of FAKE_SETTINGS.embedding_dim."""
+
+    @property
+    def provider(self) -> str:
+        return FAKE_PROVIDER
+
+    def _get_default_model(self) -> str:
+        return "fake-embedding"
+
+    def _get_models(self) -> List[ProviderModel]:
+        return []
+
+    def embed(self, texts: List[str], **kwargs: Any) -> List[List[float]]:
+        time.sleep(_embedding_delay(len(texts)))
+        return [fake_vector(text, FAKE_SETTINGS.embedding_dim) for text in texts]
+
+    async def aembed(self, texts: List[str], **kwargs: Any) -> List[List[float]]:
+        await asyncio.sleep(_embedding_delay(len(texts)))
+        return [fake_vector(text, FAKE_SETTINGS.embedding_dim) for text in texts]
+
+
+def register_fake_providers() -> None:
+    """Make AIFactory create the fakes for provider "fake"."""
+    AIFactory._provider_modules["language"][FAKE_PROVIDER] = (
+        f"{__name__}:FakeLanguageModel"
+    )
+    AIFactory._provider_modules["embedding"][FAKE_PROVIDER] = (
+        f"{__name__}:FakeEmbeddingModel"
+    )
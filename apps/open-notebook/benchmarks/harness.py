@@ -0,0 +1,222 @@
+"""
+Benchmark environment: an embedded database, fake models, an in-process
+command queue, data seeding and timing.
+"""
+
+import asyncio
+import inspect
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+NAMESPACE = "bench"
+
+
+def prepare_environment(workdir: Optional[str] = None, db_url: Optional[str] = None) -> Path:
+    """
+    Point the app at a scratch directory and an embedded database.
+
+    Must run before open_notebook is imported: its config creates the data
+    folders relative to the working directory at import time. The database
+    defaults to SurrealKV inside the scratch directory, never the configured
+    server. (mem:// would give every connection its own empty database.)
+    """
+    root = Path(workdir or tempfile.mkdtemp(prefix="open-notebook-bench-")).resolve()
+    root.mkdir(parents=True, exist_ok=True)
+    os.environ.update(
+        SURREAL_URL=db_url or f"surrealkv://{root}/db",
+        SURREAL_NAMESPACE=NAMESPACE,
+        SURREAL_DATABASE=NAMESPACE,
+        PROMPTS_PATH=str(APP_ROOT / "prompts"),
+    )
+    # Reuse the app's tokenizer cache rather than downloading it again
+    tiktoken_cache = APP_ROOT / "data" / "tiktoken-cache"
+    if tiktoken_cache.is_dir() and not (root / "data" / "tiktoken-cache").exists():
+        (root / "data").mkdir(exist_ok=True)
+        (root / "data" / "tiktoken-cache").symlink_to(tiktoken_cache)
+    # Migrations are read from ./migrations
+    if not (root / "migrations").exists():
+        (root / "migrations").symlink_to(APP_ROOT / "migrations")
+    if str(APP_ROOT) not in sys.path:
+        sys.path.insert(0, str(APP_ROOT))
+    os.chdir(root)
+    return root
+
+
+class InlineCommandQueue:
+    """
+    Runs commands submitted with surreal-commands' submit_command in this
+    process, so chained commands (vectorize_source -> embed_chunk) execute
+    against the benchmark database with a worker-like concurrency limit.
+    """
+
+    def __init__(self, concurrency: int = 5):
+        self.concurrency = concurrency
+        self.pending: List[Tuple[str, str, Dict[str, Any]]] = []
+        self.executed = 0
+        self.failed = 0
+        self._next_id = 0
+        # submit may be called from another thread (the API server in a load test)
+        self._lock = threading.Lock()
+
+    def submit(self, app: str, name: str, args: Dict[str, Any], context: Any = None) -> str:
+        with self._lock:
+            self._next_id += 1
+            self.pending.append((app, name, args))
+            return f"command:inline{self._next_id}"
+
+    def install(self) -> None:
+        """Route the app's submit_command calls to this queue."""
+        import api.command_service
+        import commands.embedding_commands
+        import open_notebook.domain.notebook
+
+        for module in (
+            api.command_service,
+            open_notebook.domain.notebook,
+            commands.embedding_commands,
+        ):
+            module.submit_command = self.submit  # type: ignore[attr-defined]
+
+    async def _run(self, app: str, name: str, args: Dict[str, Any]) -> None:
+        from surreal_commands import registry
+
+        func = registry.get_command(app, name).runnable.afunc  # type: ignore[union-attr]
+        input_type = next(iter(inspect.signature(func).parameters.values())).annotation
+        output = await func(input_type(**args))
+        self.executed += 1
+        if getattr(output, "success", True) is False:
+            self.failed += 1
+
+    async def drain(self) -> int:
+        """Run queued commands, and any they submit, until none are left."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = self.executed
+
+        async def run(job: Tuple[str, str, Dict[str, Any]]) -> None:
+            async with semaphore:
+                await self._run(*job)
+
+        while self.pending:
+            with self._lock:
+                batch, self.pending = self.pending, []
+            await asyncio.gather(*(run(job) for job in batch))
+        return self.executed - started
+
+
+async def setup_database() -> None:
+    """Run the migrations and register the fake models as defaults."""
+    from benchmarks.fakes import register_fake_providers
+    from open_notebook.database.async_migrate import AsyncMigrationManager
+    from open_notebook.database.repository import repo_create, repo_query
+
+    register_fake_providers()
+    await AsyncMigrationManager().run_migration_up()
+    language = await repo_create(
+        "model", {"name": "fake-chat", "provider": "fake", "type": "language"}
+    )
+    embedding = await repo_create(
+        "model", {"name": "fake-embedding", "provider": "fake", "type": "embedding"}
+    )
+    language_id, embedding_id = language[0]["id"], embedding[0]["id"]
+    await repo_query(
+        "UPSERT open_notebook:default_models MERGE $data",
+        {
+            "data": {
+                "default_chat_model": language_id,
+                "default_transformation_model": language_id,
+                "large_context_model": language_id,
+                "default_tools_model": language_id,
+                "default_embedding_model": embedding_id,
+            }
+        },
+    )
+
+
+def lorem(rng: random.Random, words: int) -> str:
+    from benchmarks.fakes import WORDS
+
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+async def seed_chunks(
+    count: int, dim: int, chunks_per_source: int = 100, batch_size: int = 500
+) -> List[str]:
+    """
+    Insert count embedded chunks spread over sources of chunks_per_source
+    each, bypassing the embedding model. Returns the source ids.
+    """
+    from open_notebook.database.repository import (
+        ensure_record_id,
+        repo_insert,
+        repo_query,
+    )
+
+    defaults = await repo_query(
+        "SELECT default_embedding_model FROM open_notebook:default_models"
+    )
+    embedding_model = str(defaults[0]["default_embedding_model"]) if defaults else None
+    rng = random.Random(count)
+    source_count = max(1, -(-count // chunks_per_source))
+    source_ids: List[str] = []
+    for start in range(0, source_count, batch_size):
+        rows = [
+            {"title": f"Source {i} {lorem(rng, 4)}", "full_text": lorem(rng, 200), "topics": []}
+            for i in range(start, min(start + batch_size, source_count))
+        ]
+        source_ids.extend(str(row["id"]) for row in await repo_insert("source", rows))
+
+    for start in range(0, count, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, count)):
+            rows.append(
+                {
+                    "source": ensure_record_id(source_ids[i // chunks_per_source]),
+                    "order": i % chunks_per_source,
+                    "content": lorem(rng, 120),
+                    "embedding": [rng.uniform(-1.0, 1.0) for _ in range(dim)],
+                    "embedding_model": embedding_model,
+                    "embedding_dim": dim,
+                    "token_count": 160,
+                }
+            )
+        await repo_insert("source_embedding", rows)
+    return source_ids
+
+
+async def measure(
+    operation: Callable[[], Awaitable[Any]], repeat: int, warmup: int = 1
+) -> Dict[str, Any]:
+    """Time repeat runs of an operation after warmup runs, in seconds."""
+    for _ in range(warmup):
+        await operation()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await operation()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+    return {
+        "runs": len(samples),
+        "min_s": round(ordered[0], 6),
+        "mean_s": round(statistics.fmean(samples), 6),
+        "p50_s": round(percentile(0.50), 6),
+        "p95_s": round(percentile(0.95), 6),
+        "p99_s": round(percentile(0.99), 6),
+        "max_s": round(ordered[-1], 6),
+    }
@@ -0,0 +1,538 @@
+"""
+Load test: many concurrent users against one in-process API server.
+
+Starts api.main:app under uvicorn with the fake model providers, seeds a
+notebook, then runs virtual users that each loop over a weighted mix of
+operations (list sources, search, streaming ask, chat, upload, status
+polling) until the duration is up. Reports latency percentiles per
+operation and the lag of the server's event loop, which is where blocking
+calls show up.
+
+Usage:
+    uv run python -m benchmarks.loadtest --users 50 --duration 60
+    uv run python -m benchmarks.loadtest --db-url ws://localhost:8000/rpc --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import secrets
+import socket
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from benchmarks.harness import prepare_environment
+
+DEFAULT_MIX = "list_sources=30,search=25,status=15,chat=10,upload=10,ask=5,notebook=5"
+# Command statuses a seeded source can end up in
+FINISHED = {"completed", "failed"}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadtest",
+        description="Load test the Open Notebook API with a mix of user traffic",
+    )
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument(
+        "--ramp-up", type=float, default=5.0, help="Seconds over which users start"
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.5,
+        help="Mean pause between a user's requests, in seconds (exponential)",
+    )
+    parser.add_argument(
+        "--mix",
+        default=DEFAULT_MIX,
+        help=f"Operation weights, as name=weight pairs (default: {DEFAULT_MIX})",
+    )
+    parser.add_argument("--sources", type=int, default=20, help="Sources seeded up front")
+    parser.add_argument("--words", type=int, default=2000, help="Words per source and upload")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--embedding-latency", type=float, default=0.1)
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument(
+        "--concurrency", type=int, default=5, help="Concurrent background commands"
+    )
+    parser.add_argument(
+        "--seed-timeout",
+        type=float,
+        default=300.0,
+        help="Seconds to wait for seeded sources to be processed",
+    )
+    parser.add_argument(
+        "--lag-interval",
+        type=float,
+        default=0.05,
+        help="Seconds between event loop lag probes",
+    )
+    parser.add_argument("--port", type=int, default=0, help="API port (default: any free)")
+    parser.add_argument("--workdir", help="Scratch directory (default: a temp dir)")
+    parser.add_argument(
+        "--db-url",
+        help="SurrealDB URL, e.g. ws://localhost:8000/rpc (default: SurrealKV in the scratch directory)",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for pair in mix.split(","):
+        name, _, weight = pair.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operations: {', '.join(sorted(unknown))}")
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ============================================================================
+# Server side: the API, a worker and the event loop lag probe
+# ============================================================================
+
+
+class LagProbe:
+    """
+    Sleeps interval seconds at a time on the loop it runs on and records how
+    late it wakes up. Anything holding the loop shows up as lag.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: List[float] = []
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def reset(self) -> None:
+        self.samples = []
+
+
+class ServerThread(threading.Thread):
+    """Runs the API under uvicorn on its own event loop, with a lag probe."""
+
+    def __init__(self, port: int, lag_interval: float):
+        super().__init__(name="api-server", daemon=True)
+        import uvicorn
+
+        from api.main import app
+
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        )
+        self.probe = LagProbe(lag_interval)
+
+    async def _serve(self) -> None:
+        probe = asyncio.create_task(self.probe.run())
+        try:
+            await self.server.serve()
+        finally:
+            probe.cancel()
+
+    def run(self) -> None:
+        asyncio.run(self._serve())
+
+    def wait_started(self, timeout: float = 60.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.join(timeout=10)
+
+
+def start_worker(concurrency: int, embedded: bool) -> None:
+    """
+    Process background commands in a thread of this process.
+
+    Against a SurrealDB server this is the real fair-share worker. The
+    embedded engines cannot serve surreal-commands (it always signs in), so
+    there commands go through the benchmark's inline queue instead.
+    """
+    if embedded:
+        from benchmarks.harness import InlineCommandQueue
+
+        queue = InlineCommandQueue(concurrency)
+        queue.install()
+
+        async def drain_forever() -> None:
+            while True:
+                await queue.drain()
+                await asyncio.sleep(0.1)
+
+        target = drain_forever
+    else:
+        from open_notebook.jobs.fair_scheduler import FairScheduler
+        from open_notebook.jobs.worker import FairWorker, import_command_modules
+
+        import_command_modules(["commands"])
+        scheduler = FairScheduler(max_tasks=concurrency, tenant_max_tasks=concurrency)
+        target = FairWorker(scheduler).listen
+
+    threading.Thread(
+        target=lambda: asyncio.run(target()), name="worker", daemon=True
+    ).start()
+
+
+# ============================================================================
+# Client side: virtual users and their operations
+# ============================================================================
+
+
+@dataclass
+class LoadState:
+    notebook_id: str
+    session_id: str
+    models: Dict[str, Any]
+    source_ids: List[str]
+    words: int
+    rng: random.Random = field(default_factory=lambda: random.Random(7))
+    uploaded: List[str] = field(default_factory=list)
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    errors: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+
+    def text(self, words: int) -> str:
+        from benchmarks.fakes import WORDS
+
+        return " ".join(self.rng.choice(WORDS) for _ in range(words))
+
+    def record(self, operation: str, seconds: float, status: Any) -> None:
+        self.latencies[operation].append(seconds)
+        self.statuses[operation][str(status)] += 1
+
+
+Operation = Callable[[Any, LoadState], Awaitable[int]]
+OPERATIONS: Dict[str, Operation] = {}
+
+
+def operation(name: str) -> Callable[[Operation], Operation]:
+    def register(func: Operation) -> Operation:
+        OPERATIONS[name] = func
+        return func
+
+    return register
+
+
+@operation("list_sources")
+async def list_sources(client, state: LoadState) -> int:
+    response = await client.get("/api/sources", params={"notebook_id": state.notebook_id})
+    return response.status_code
+
+
+@operation("notebook")
+async def get_notebook(client, state: LoadState) -> int:
+    response = await client.get(f"/api/notebooks/{state.notebook_id}")
+    return response.status_code
+
+
+@operation("search")
+async def search(client, state: LoadState) -> int:
+    response = await client.post(
+        "/api/search",
+        json={
+            "query": state.text(3),
+            "type": state.rng.choice(["text", "vector"]),
+            "limit": 10,
+            "minimum_score": 0.0,
+        },
+    )
+    return response.status_code
+
+
+@operation("ask")
+async def ask(client, state: LoadState) -> int:
+    model = state.models["default_chat_model"]
+    start = time.perf_counter()
+    async with client.stream(
+        "POST",
+        "/api/search/ask",
+        json={
+            "question": state.text(10),
+            "strategy_model": model,
+            "answer_model": model,
+            "final_answer_model": model,
+        },
+    ) as response:
+        first = True
+        async for _ in response.aiter_bytes():
+            if first:
+                state.latencies["ask:first_byte"].append(time.perf_counter() - start)
+                first = False
+        return response.status_code
+
+
+@operation("chat")
+async def chat(client, state: LoadState) -> int:
+    response = await client.post(
+        "/api/chat/execute",
+        json={
+            "session_id": state.session_id,
+            "message": state.text(15),
+            "context": {"sources": [], "notes": []},
+            "context_mode": "retrieval",
+        },
+    )
+    return response.status_code
+
+
+@operation("upload")
+async def upload(client, state: LoadState) -> int:
+    response = await client.post(
+        "/api/sources",
+        data={
+            "type": "upload",
+            "notebooks": json.dumps([state.notebook_id]),
+            "embed": "true",
+            "async_processing": "true",
+        },
+        files={"file": (f"upload-{state.rng.randrange(10**9)}.txt", state.text(state.words))},
+    )
+    if response.status_code == 200:
+        state.uploaded.append(response.json()["id"])
+    return response.status_code
+
+
+@operation("status")
+async def status(client, state: LoadState) -> int:
+    source_id = state.rng.choice(state.uploaded or state.source_ids)
+    response = await client.get(f"/api/sources/{source_id}/status")
+    return response.status_code
+
+
+async def seed(client, args: argparse.Namespace) -> LoadState:
+    """A notebook with processed sources and a chat session, made through the API."""
+
+    async def post(path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        response = await client.post(path, json=body)
+        response.raise_for_status()
+        return response.json()
+
+    notebook = await post("/api/notebooks", {"name": "Load test", "description": ""})
+    models = (await client.get("/api/models/defaults")).json()
+    state = LoadState(
+        notebook_id=notebook["id"],
+        session_id="",
+        models=models,
+        source_ids=[],
+        words=args.words,
+    )
+    for i in range(args.sources):
+        source = await post(
+            "/api/sources/json",
+            {
+                "type": "text",
+                "title": f"Seed {i}",
+                "content": state.text(args.words),
+                "notebooks": [notebook["id"]],
+                "embed": True,
+                "async_processing": True,
+            },
+        )
+        state.source_ids.append(source["id"])
+    session = await post("/api/chat/sessions", {"notebook_id": notebook["id"]})
+    state.session_id = session["id"]
+
+    # Measure a steady state, not the backlog of seeding
+    deadline = time.monotonic() + args.seed_timeout
+    pending = set(state.source_ids)
+    while pending and time.monotonic() < deadline:
+        for source_id in list(pending):
+            status = (await client.get(f"/api/sources/{source_id}/status")).json()
+            source = (await client.get(f"/api/sources/{source_id}")).json()
+            if status.get("status") in FINISHED or source.get("embedded"):
+                pending.discard(source_id)
+        await asyncio.sleep(0.5)
+    if pending:
+        print(f"{len(pending)} seeded source(s) still processing", file=sys.stderr)
+    return state
+
+
+async def virtual_user(
+    client,
+    state: LoadState,
+    mix: Dict[str, float],
+    deadline: float,
+    think_time: float,
+    rng: random.Random,
+) -> None:
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            status_code = await OPERATIONS[name](client, state)
+            state.record(name, time.perf_counter() - start, status_code)
+            if status_code >= 400:
+                state.errors[name][f"HTTP {status_code}"] += 1
+        except Exception as e:
+            state.record(name, time.perf_counter() - start, "error")
+            state.errors[name][type(e).__name__] += 1
+        if think_time:
+            await asyncio.sleep(rng.expovariate(1 / think_time))
+
+
+async def run_load(
+    args: argparse.Namespace, base_url: str, token: str, server: ServerThread
+) -> Dict[str, Any]:
+    import httpx
+
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=httpx.Timeout(600.0),
+        limits=limits,
+    ) as client:
+        print(f"Seeding {args.sources} sources...", file=sys.stderr)
+        state = await seed(client, args)
+
+        print(f"Running {args.users} users for {args.duration:g}s...", file=sys.stderr)
+        server.probe.reset()
+        start = time.monotonic()
+        deadline = start + args.ramp_up + args.duration
+        users = []
+        for i in range(args.users):
+            users.append(
+                asyncio.create_task(
+                    virtual_user(
+                        client, state, mix, deadline, args.think_time, random.Random(i)
+                    )
+                )
+            )
+            await asyncio.sleep(args.ramp_up / args.users)
+        await asyncio.gather(*users)
+        elapsed = time.monotonic() - start
+        lag_samples = list(server.probe.samples)
+
+    return {"operations": operation_report(state, elapsed), "loop_lag": lag_report(lag_samples)}
+
+
+def operation_report(state: LoadState, elapsed: float) -> Dict[str, Any]:
+    from benchmarks.harness import summarize
+
+    report = {}
+    for name, samples in sorted(state.latencies.items()):
+        report[name] = {
+            "requests": len(samples),
+            "rps": round(len(samples) / elapsed, 2),
+            **summarize(samples),
+        }
+        if name in state.statuses:
+            report[name]["statuses"] = dict(state.statuses[name])
+            report[name]["errors"] = dict(state.errors[name])
+    return report
+
+
+def lag_report(samples: List[float]) -> Dict[str, Any]:
+    from benchmarks.harness import summarize
+
+    if not samples:
+        return {"runs": 0}
+    return {
+        **summarize(samples),
+        "over_100ms": sum(1 for lag in samples if lag > 0.1),
+        "over_1s": sum(1 for lag in samples if lag > 1.0),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    output_path = Path(args.output).resolve() if args.output else None
+    workdir = prepare_environment(args.workdir, args.db_url)
+    # A fresh database per run, and password auth with a throwaway token
+    token = secrets.token_urlsafe(16)
+    os.environ.update(
+        SURREAL_DATABASE=f"loadtest_{int(time.time())}",
+        OPEN_NOTEBOOK_PASSWORD=token,
+        SUPABASE_URL="",
+        SUPABASE_ANON_KEY="",
+    )
+
+    from loguru import logger
+
+    from benchmarks.fakes import FAKE_SETTINGS
+    from benchmarks.harness import setup_database
+    from open_notebook.database.repository import EMBEDDED_URL_SCHEMES, db_session
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper())
+    FAKE_SETTINGS.llm_latency = args.llm_latency
+    FAKE_SETTINGS.embedding_latency = args.embedding_latency
+    FAKE_SETTINGS.embedding_dim = args.embedding_dim
+
+    async def setup() -> None:
+        async with db_session():
+            await setup_database()
+
+    asyncio.run(setup())
+    start_worker(
+        args.concurrency, os.environ["SURREAL_URL"].startswith(EMBEDDED_URL_SCHEMES)
+    )
+    port = args.port or free_port()
+    server = ServerThread(port, args.lag_interval)
+    server.start()
+    server.wait_started()
+    try:
+        results = asyncio.run(run_load(args, f"http://127.0.0.1:{port}", token, server))
+    finally:
+        server.stop()
+
+    report = {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "workdir": str(workdir),
+            "settings": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("output", "log_level")
+            },
+        },
+        **results,
+    }
+    output = json.dumps(report, indent=2)
+    if output_path:
+        output_path.write_text(output + "\n")
+        print(f"Report written to {output_path}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
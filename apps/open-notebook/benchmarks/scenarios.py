@@ -0,0 +1,263 @@
+"""
+Benchmark scenarios.
+
+Each scenario gets a freshly migrated database and returns a JSON-ready
+dict of timings (see harness.summarize) plus whatever counts explain them.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
+
+from benchmarks.harness import (
+    InlineCommandQueue,
+    lorem,
+    measure,
+    seed_chunks,
+    summarize,
+)
+
+
+@dataclass
+class BenchContext:
+    queue: InlineCommandQueue
+    repeat: int = 5
+    sources: int = 5
+    words: int = 5000
+    dim: int = 1536
+    sizes: List[int] = field(default_factory=lambda: [10_000])
+    rng: random.Random = field(default_factory=lambda: random.Random(42))
+
+
+Scenario = Callable[[BenchContext], Awaitable[Dict[str, Any]]]
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str) -> Callable[[Scenario], Scenario]:
+    def register(func: Scenario) -> Scenario:
+        SCENARIOS[name] = func
+        return func
+
+    return register
+
+
+async def _notebook() -> Any:
+    from open_notebook.domain.notebook import Notebook
+
+    notebook = Notebook(name="Benchmark", description="Benchmark notebook")
+    await notebook.save()
+    return notebook
+
+
+async def _sources(
+    ctx: BenchContext, notebook_id: str, count: int, vectorize: bool = False
+) -> List[Any]:
+    """Sources with full text in a notebook, optionally with embedded chunks."""
+    from open_notebook.domain.notebook import Source
+
+    sources = []
+    for i in range(count):
+        source = Source(title=f"Source {i}", topics=[], full_text=lorem(ctx.rng, ctx.words))
+        await source.save()
+        await source.add_to_notebook(notebook_id)
+        if vectorize:
+            await source.vectorize()
+        sources.append(source)
+    await ctx.queue.drain()
+    return sources
+
+
+async def _timed(operation: Callable[[], Awaitable[Any]]) -> float:
+    start = time.perf_counter()
+    await operation()
+    return time.perf_counter() - start
+
+
+@scenario("ingestion")
+async def ingestion(ctx: BenchContext) -> Dict[str, Any]:
+    """process_source end to end: extraction, save, one transformation, embedding."""
+    from commands.source_commands import SourceProcessingInput, process_source_command
+    from open_notebook.domain.notebook import Source
+    from open_notebook.domain.transformation import Transformation
+
+    notebook = await _notebook()
+    transformation = Transformation(
+        name="summary",
+        title="Summary",
+        description="Benchmark summary",
+        prompt="Summarize the content.",
+        apply_default=False,
+    )
+    await transformation.save()
+
+    samples = []
+    chunks = 0
+    for i in range(ctx.sources):
+        source = Source(title=f"Ingested {i}", topics=[])
+        await source.save()
+        await source.add_to_notebook(str(notebook.id))
+        text = lorem(ctx.rng, ctx.words)
+
+        async def run() -> None:
+            output = await process_source_command(
+                SourceProcessingInput(
+                    source_id=str(source.id),
+                    content_state={"content": text},
+                    notebook_ids=[str(notebook.id)],
+                    transformations=[str(transformation.id)],
+                    embed=True,
+                )
+            )
+            if not output.success:
+                raise RuntimeError(output.error_message)
+            await ctx.queue.drain()
+
+        samples.append(await _timed(run))
+        chunks += await source.get_embedded_chunks()
+    return {**summarize(samples), "words_per_source": ctx.words, "chunks": chunks}
+
+
+@scenario("vectorize_source")
+async def vectorize_source(ctx: BenchContext) -> Dict[str, Any]:
+    """vectorize_source plus the embed_chunk commands it fans out."""
+    from commands.embedding_commands import (
+        VectorizeSourceInput,
+        vectorize_source_command,
+    )
+
+    notebook = await _notebook()
+    sources = await _sources(ctx, str(notebook.id), ctx.sources)
+    samples = []
+    chunks = 0
+    for source in sources:
+
+        async def run() -> None:
+            output = await vectorize_source_command(
+                VectorizeSourceInput(source_id=str(source.id))
+            )
+            if not output.success:
+                raise RuntimeError(output.error_message)
+            await ctx.queue.drain()
+
+        samples.append(await _timed(run))
+        chunks += await source.get_embedded_chunks()
+    return {**summarize(samples), "words_per_source": ctx.words, "chunks": chunks}
+
+
+@scenario("search")
+async def search(ctx: BenchContext) -> Dict[str, Any]:
+    """vector_search and text_search over growing chunk counts."""
+    from open_notebook.domain.notebook import text_search, vector_search
+
+    results: Dict[str, Any] = {}
+    seeded = 0
+    for size in sorted(ctx.sizes):
+        start = time.perf_counter()
+        await seed_chunks(size - seeded, ctx.dim)
+        seed_seconds = time.perf_counter() - start
+        seeded = size
+        results[str(size)] = {
+            "seed_s": round(seed_seconds, 3),
+            "vector_search": await measure(
+                lambda: vector_search("research evidence", 10, True, False), ctx.repeat
+            ),
+            "text_search": await measure(
+                lambda: text_search("research evidence", 10, True, False), ctx.repeat
+            ),
+        }
+    return results
+
+
+@scenario("context_build")
+async def context_build(ctx: BenchContext) -> Dict[str, Any]:
+    """ContextBuilder.build for a notebook, with full sources and in retrieval mode."""
+    from open_notebook.domain.notebook import Note
+    from open_notebook.utils.context_builder import ContextBuilder
+
+    notebook = await _notebook()
+    sources = await _sources(ctx, str(notebook.id), ctx.sources, vectorize=True)
+    for source in sources:
+        await source.add_insight("Summary", lorem(ctx.rng, 300))
+    for i in range(ctx.sources):
+        note = Note(title=f"Note {i}", note_type="human", content=lorem(ctx.rng, 500))
+        await note.save()
+        await note.add_to_notebook(str(notebook.id))
+
+    return {
+        "notebook": await measure(
+            lambda: ContextBuilder(notebook_id=str(notebook.id)).build(), ctx.repeat
+        ),
+        "retrieval": await measure(
+            lambda: ContextBuilder(
+                notebook_id=str(notebook.id),
+                query="research evidence",
+                max_tokens=8000,
+            ).build(),
+            ctx.repeat,
+        ),
+    }
+
+
+@scenario("chat_turn")
+async def chat_turn(ctx: BenchContext) -> Dict[str, Any]:
+    """One chat graph turn per run, as /api/chat/execute makes it."""
+    from langchain_core.messages import HumanMessage
+    from langchain_core.runnables import RunnableConfig
+
+    from open_notebook.domain.notebook import ChatSession
+    from open_notebook.graphs.chat import graph as chat_graph
+    from open_notebook.utils.context_builder import ContextBuilder
+
+    notebook = await _notebook()
+    await _sources(ctx, str(notebook.id), ctx.sources)
+    session = ChatSession(title="Benchmark")
+    await session.save()
+    await session.relate_to_notebook(str(notebook.id))
+    context = await ContextBuilder(notebook_id=str(notebook.id), max_tokens=8000).build()
+
+    async def turn() -> None:
+        await chat_graph.ainvoke(
+            input={  # type: ignore[arg-type]
+                "messages": [HumanMessage(content=lorem(ctx.rng, 20))],
+                "notebook": notebook,
+                "context": context,
+                "context_config": None,
+                "model_override": None,
+            },
+            config=RunnableConfig(configurable={"thread_id": str(session.id)}),
+        )
+
+    return await measure(turn, ctx.repeat)
+
+
+@scenario("rebuild_embeddings")
+async def rebuild_embeddings(ctx: BenchContext) -> Dict[str, Any]:
+    """A full rebuild_embeddings run over sources, notes and insights."""
+    from commands.embedding_commands import (
+        RebuildEmbeddingsInput,
+        rebuild_embeddings_command,
+    )
+    from open_notebook.domain.notebook import Note
+
+    notebook = await _notebook()
+    sources = await _sources(ctx, str(notebook.id), ctx.sources, vectorize=True)
+    for source in sources:
+        await source.add_insight("Summary", lorem(ctx.rng, 300))
+    for i in range(ctx.sources * 4):
+        note = Note(title=f"Note {i}", note_type="human", content=lorem(ctx.rng, 300))
+        await note.save()
+
+    processed = 0
+
+    async def run() -> None:
+        nonlocal processed
+        output = await rebuild_embeddings_command(
+            RebuildEmbeddingsInput(mode="all", resume=False)
+        )
+        if not output.success:
+            raise RuntimeError(output.error_message)
+        processed = output.processed_items
+        await ctx.queue.drain()
+
+    return {**await measure(run, ctx.repeat, warmup=0), "items": processed}
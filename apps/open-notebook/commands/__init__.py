@@ -1,15 +1,26 @@
 """Surreal-commands integration for Open Notebook"""
 
-from .embedding_commands import embed_single_item_command, rebuild_embeddings_command
+from .checkpoint_commands import compact_checkpoints_command
+from .embedding_commands import (
+    embed_single_item_command,
+    finalize_embedding_migration_command,
+    rebuild_embeddings_command,
+)
 from .example_commands import analyze_data_command, process_text_command
 from .podcast_commands import generate_podcast_command
 from .source_commands import process_source_command
+from .storage_commands import store_source_texts_command
+from .token_commands import backfill_token_counts_command
 
 __all__ = [
+    "backfill_token_counts_command",
+    "compact_checkpoints_command",
     "embed_single_item_command",
+    "finalize_embedding_migration_command",
     "generate_podcast_command",
     "process_source_command",
     "process_text_command",
     "analyze_data_command",
     "rebuild_embeddings_command",
+    "store_source_texts_command",
 ]
@@ -0,0 +1,57 @@
+import time
+from typing import Optional
+
+from loguru import logger
+from surreal_commands import CommandInput, CommandOutput, command
+
+from open_notebook.graphs.checkpoint import get_checkpointer
+
+
+class CompactCheckpointsInput(CommandInput):
+    retention: Optional[int] = None
+    vacuum: bool = True
+
+
+class CompactCheckpointsOutput(CommandOutput):
+    success: bool
+    threads: int = 0
+    checkpoints_deleted: int = 0
+    size_before: Optional[int] = None
+    size_after: Optional[int] = None
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+@command("compact_checkpoints", app="open_notebook", retry=None)
+async def compact_checkpoints_command(
+    input_data: CompactCheckpointsInput,
+) -> CompactCheckpointsOutput:
+    """
+    Prune chat checkpoints to the retention (LANGGRAPH_CHECKPOINT_RETENTION
+    unless given) and reclaim the space they used.
+    """
+    start_time = time.time()
+    try:
+        checkpointer = get_checkpointer()
+        acompact = getattr(checkpointer, "acompact", None)
+        if acompact is None:
+            raise ValueError(
+                f"{type(checkpointer).__name__} does not support compaction"
+            )
+        result = await acompact(input_data.retention, input_data.vacuum)
+        logger.info(
+            f"Compacted checkpoints of {result['threads']} threads: "
+            f"{result['checkpoints_deleted']} deleted"
+        )
+
+        return CompactCheckpointsOutput(
+            success=True, processing_time=time.time() - start_time, **result
+        )
+    except Exception as e:
+        logger.error(f"Compacting checkpoints failed: {e}")
+        logger.exception(e)
+        return CompactCheckpointsOutput(
+            success=False,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
@@ -1,14 +1,32 @@
+import asyncio
 import time
-from typing import Dict, List, Literal, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from loguru import logger
 from pydantic import BaseModel
 from surreal_commands import CommandInput, CommandOutput, command, submit_command
 
-from open_notebook.database.repository import ensure_record_id, repo_query
-from open_notebook.domain.models import model_manager
+from open_notebook.database.repository import (
+    ensure_record_id,
+    repo_query,
+    repo_stream,
+    repo_upsert,
+)
+from open_notebook.domain.embedding_migration import (
+    EmbeddingMigration,
+    collect_old_embeddings,
+    coverage_percentage,
+    cutover_embedding_model,
+    get_embedding_coverage,
+    is_fully_covered,
+    shadow_embedding_fields,
+)
+from open_notebook.domain.models import embedding_metadata, model_manager
 from open_notebook.domain.notebook import Note, Source, SourceInsight
+from open_notebook.jobs import tenant_context
 from open_notebook.utils.text_utils import split_text
+from open_notebook.utils.token_utils import token_count
 
 
 def full_model_dump(model):
@@ -40,6 +58,8 @@ class EmbedChunkInput(CommandInput):
     source_id: str
     chunk_index: int
     chunk_text: str
+    # Embed only with this model (migration backfill); default model otherwise
+    embedding_model_id: Optional[str] = None
 
 
 class EmbedChunkOutput(CommandOutput):
@@ -51,6 +71,8 @@ class EmbedChunkOutput(CommandOutput):
 
 class VectorizeSourceInput(CommandInput):
     source_id: str
+    # Only replace the chunks of this model (migration backfill)
+    embedding_model_id: Optional[str] = None
 
 
 class VectorizeSourceOutput(CommandOutput):
@@ -63,10 +85,33 @@ class VectorizeSourceOutput(CommandOutput):
 
 
 class RebuildEmbeddingsInput(CommandInput):
-    mode: Literal["existing", "all"]
+    mode: Literal["existing", "all", "stale"]
     include_sources: bool = True
     include_notes: bool = True
     include_insights: bool = True
+    resume: bool = True  # Continue from the persisted checkpoint of an unfinished run
+    batch_size: int = 50  # Items per checkpoint (and per embedding call for notes/insights)
+    concurrency: int = 4  # Concurrent operations per item type
+    # Backfill shadow vectors for an embedding migration to this model
+    target_model: Optional[str] = None
+
+
+class FinalizeEmbeddingMigrationInput(CommandInput):
+    target_model: str
+    max_wait_seconds: int = 3600  # How long to wait for chunk jobs to reach full coverage
+    poll_interval: float = 30.0
+
+
+class FinalizeEmbeddingMigrationOutput(CommandOutput):
+    success: bool
+    target_model: str
+    cut_over: bool = False
+    coverage_percentage: float = 0.0
+    sources_collected: int = 0
+    notes_promoted: int = 0
+    insights_promoted: int = 0
+    processing_time: float
+    error_message: Optional[str] = None
 
 
 class RebuildEmbeddingsOutput(CommandOutput):
@@ -96,7 +141,10 @@ async def embed_single_item_command(
         )
 
         # Check if embedding model is available
-        EMBEDDING_MODEL = await model_manager.get_embedding_model()
+        (
+            embedding_model_id,
+            EMBEDDING_MODEL,
+        ) = await model_manager.get_embedding_model_with_id()
         if not EMBEDDING_MODEL:
             raise ValueError(
                 "No embedding model configured. Please configure one in the Models section."
@@ -146,10 +194,14 @@ async def embed_single_item_command(
 
             # Update insight with new embedding
             await repo_query(
-                "UPDATE $insight_id SET embedding = $embedding",
+                "UPDATE $insight_id MERGE $data",
                 {
                     "insight_id": ensure_record_id(input_data.item_id),
-                    "embedding": embedding,
+                    "data": {
+                        "embedding": embedding,
+                        **embedding_metadata(embedding_model_id, embedding),
+                        **await insight._shadow_embedding(insight.content),
+                    },
                 },
             )
             logger.info(f"Insight embedded: {input_data.item_id}")
@@ -223,33 +275,58 @@ async def embed_chunk_command(
             f"Processing chunk {input_data.chunk_index} for source {input_data.source_id}"
         )
 
-        # Get embedding model
-        EMBEDDING_MODEL = await model_manager.get_embedding_model()
-        if not EMBEDDING_MODEL:
+        # Get embedding model(s): the default one plus the target of a running
+        # embedding migration, or only the requested model for a backfill
+        if input_data.embedding_model_id:
+            models = [
+                (
+                    input_data.embedding_model_id,
+                    await model_manager.get_model(input_data.embedding_model_id),
+                )
+            ]
+        else:
+            models = [await model_manager.get_embedding_model_with_id()]
+            shadow = await model_manager.get_shadow_embedding_model_with_id()
+            if shadow[1]:
+                models.append(shadow)
+        if not models[0][1]:
             raise ValueError(
                 "No embedding model configured. Please configure one in the Models section."
             )
 
-        # Generate embedding for the chunk
-        embedding = (await EMBEDDING_MODEL.aembed([input_data.chunk_text]))[0]
-
-        # Insert chunk embedding into database
-        await repo_query(
-            """
-            CREATE source_embedding CONTENT {
-                "source": $source_id,
-                "order": $order,
-                "content": $content,
-                "embedding": $embedding,
-            };
-            """,
-            {
-                "source_id": ensure_record_id(input_data.source_id),
-                "order": input_data.chunk_index,
-                "content": input_data.chunk_text,
-                "embedding": embedding,
-            },
-        )
+        # Stored with the chunk so retrieval context can be packed into a token
+        # budget without re-tokenizing
+        chunk_tokens = token_count(input_data.chunk_text)
+
+        for embedding_model_id, EMBEDDING_MODEL in models:
+            # Generate embedding for the chunk
+            embedding = (await EMBEDDING_MODEL.aembed([input_data.chunk_text]))[0]
+
+            # Insert chunk embedding into database, replacing a copy left by an
+            # earlier attempt so retries do not duplicate chunks
+            await repo_query(
+                """
+                DELETE source_embedding
+                    WHERE source = $source_id AND order = $order AND embedding_model = $embedding_model;
+                CREATE source_embedding CONTENT {
+                    "source": $source_id,
+                    "order": $order,
+                    "content": $content,
+                    "embedding": $embedding,
+                    "embedding_model": $embedding_model,
+                    "embedding_dim": $embedding_dim,
+                    "token_count": $token_count,
+                };
+                """,
+                {
+                    "source_id": ensure_record_id(input_data.source_id),
+                    "order": input_data.chunk_index,
+                    "content": input_data.chunk_text,
+                    "token_count": chunk_tokens,
+                    "embedding": embedding,
+                    **embedding_metadata(embedding_model_id, embedding),
+                },
+            )
 
         logger.debug(
             f"Successfully embedded chunk {input_data.chunk_index} for source {input_data.source_id}"
@@ -319,15 +396,25 @@ async def vectorize_source_command(
         if not source:
             raise ValueError(f"Source '{input_data.source_id}' not found")
 
+        await source.load_fields("full_text")
         if not source.full_text:
             raise ValueError(f"Source {input_data.source_id} has no text to vectorize")
 
         # 2. Delete existing embeddings (idempotency)
         logger.info(f"Deleting existing embeddings for source {input_data.source_id}")
-        delete_result = await repo_query(
-            "DELETE source_embedding WHERE source = $source_id",
-            {"source_id": ensure_record_id(input_data.source_id)}
-        )
+        if input_data.embedding_model_id:
+            delete_result = await repo_query(
+                "DELETE source_embedding WHERE source = $source_id AND embedding_model = $embedding_model",
+                {
+                    "source_id": ensure_record_id(input_data.source_id),
+                    "embedding_model": input_data.embedding_model_id,
+                },
+            )
+        else:
+            delete_result = await repo_query(
+                "DELETE source_embedding WHERE source = $source_id",
+                {"source_id": ensure_record_id(input_data.source_id)}
+            )
         deleted_count = len(delete_result) if delete_result else 0
         if deleted_count > 0:
             logger.info(f"Deleted {deleted_count} existing embeddings")
@@ -344,6 +431,7 @@ async def vectorize_source_command(
         # 4. Submit each chunk as a separate job
         logger.info(f"Submitting {total_chunks} chunk jobs to worker queue")
         jobs_submitted = 0
+        chunk_context = tenant_context(source.user_id, source.team_id)
 
         for idx, chunk_text in enumerate(chunks):
             try:
@@ -354,7 +442,9 @@ async def vectorize_source_command(
                         "source_id": input_data.source_id,
                         "chunk_index": idx,
                         "chunk_text": chunk_text,
-                    }
+                        "embedding_model_id": input_data.embedding_model_id,
+                    },
+                    chunk_context,
                 )
                 jobs_submitted += 1
 
@@ -395,73 +485,293 @@ async def vectorize_source_command(
         )
 
 
+# Ids fetched per page when collecting items to embed
+ID_STREAM_BATCH_SIZE = 1000
+
+
+async def _stream_ids(query: str, vars: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Collect the ids a query selects, paging through the table."""
+    return [str(row["id"]) async for row in repo_stream(query, vars, ID_STREAM_BATCH_SIZE)]
+
+
+def _has_chunk(condition: str, present: bool = True) -> str:
+    """Condition for a source having (or lacking) a chunk matching condition."""
+    return (
+        "(SELECT VALUE id FROM source_embedding"
+        f" WHERE source = $parent.id AND {condition} LIMIT 1)"
+        + (" != []" if present else " = []")
+    )
+
+
 async def collect_items_for_rebuild(
     mode: str,
     include_sources: bool,
     include_notes: bool,
     include_insights: bool,
+    embedding_model_id: Optional[str] = None,
 ) -> Dict[str, List[str]]:
     """
     Collect items to rebuild based on mode and include flags.
 
+    Mode "stale" only selects items whose vectors were produced by a model other
+    than embedding_model_id (including legacy vectors with no model stamp).
+
+    Tables are paged through with repo_stream, so only ids are held in memory;
+    sources are found by checking for a matching chunk rather than scanning
+    every chunk.
+
     Returns:
         Dict with keys: 'sources', 'notes', 'insights' containing lists of item IDs
     """
     items: Dict[str, List[str]] = {"sources": [], "notes": [], "insights": []}
+    model_vars = {"embedding_model": embedding_model_id}
 
     if include_sources:
         if mode == "existing":
-            # Query sources with embeddings (via source_embedding table)
-            result = await repo_query(
-                """
-                RETURN array::distinct(
-                    SELECT VALUE source.id
-                    FROM source_embedding
-                    WHERE embedding != none AND array::len(embedding) > 0
-                )
-                """
+            # Sources with at least one embedded chunk
+            items["sources"] = await _stream_ids(
+                "SELECT id FROM source WHERE "
+                + _has_chunk("embedding != none AND array::len(embedding) > 0")
+            )
+        elif mode == "stale":
+            # Sources with at least one chunk embedded by another model
+            items["sources"] = await _stream_ids(
+                "SELECT id FROM source WHERE "
+                + _has_chunk("embedding_model != $embedding_model"),
+                model_vars,
             )
-            # RETURN returns the array directly as the result (not nested)
-            if result:
-                items["sources"] = [str(item) for item in result]
-            else:
-                items["sources"] = []
         else:  # mode == "all"
             # Query all sources with content
-            result = await repo_query("SELECT id FROM source WHERE full_text != none")
-            items["sources"] = [str(item["id"]) for item in result] if result else []
+            items["sources"] = await _stream_ids(
+                "SELECT id FROM source WHERE full_text != none OR full_text_ref != none"
+            )
 
         logger.info(f"Collected {len(items['sources'])} sources for rebuild")
 
     if include_notes:
         if mode == "existing":
             # Query notes with embeddings
-            result = await repo_query(
+            items["notes"] = await _stream_ids(
                 "SELECT id FROM note WHERE embedding != none AND array::len(embedding) > 0"
             )
+        elif mode == "stale":
+            items["notes"] = await _stream_ids(
+                "SELECT id FROM note WHERE content != none AND embedding_model != $embedding_model",
+                model_vars,
+            )
         else:  # mode == "all"
             # Query all notes (with content)
-            result = await repo_query("SELECT id FROM note WHERE content != none")
+            items["notes"] = await _stream_ids("SELECT id FROM note WHERE content != none")
 
-        items["notes"] = [str(item["id"]) for item in result] if result else []
         logger.info(f"Collected {len(items['notes'])} notes for rebuild")
 
     if include_insights:
         if mode == "existing":
             # Query insights with embeddings
-            result = await repo_query(
+            items["insights"] = await _stream_ids(
                 "SELECT id FROM source_insight WHERE embedding != none AND array::len(embedding) > 0"
             )
+        elif mode == "stale":
+            items["insights"] = await _stream_ids(
+                "SELECT id FROM source_insight WHERE embedding_model != $embedding_model",
+                model_vars,
+            )
         else:  # mode == "all"
             # Query all insights
-            result = await repo_query("SELECT id FROM source_insight")
+            items["insights"] = await _stream_ids("SELECT id FROM source_insight")
 
-        items["insights"] = [str(item["id"]) for item in result] if result else []
         logger.info(f"Collected {len(items['insights'])} insights for rebuild")
 
     return items
 
 
+async def collect_items_for_migration(
+    target_model: str,
+    include_sources: bool,
+    include_notes: bool,
+    include_insights: bool,
+) -> Dict[str, List[str]]:
+    """
+    Collect embedded items that do not yet have a vector from target_model.
+
+    Returns:
+        Dict with keys: 'sources', 'notes', 'insights' containing lists of item IDs
+    """
+    items: Dict[str, List[str]] = {"sources": [], "notes": [], "insights": []}
+    target_vars = {"target": target_model}
+
+    if include_sources:
+        items["sources"] = await _stream_ids(
+            "SELECT id FROM source WHERE "
+            + _has_chunk("embedding_model != $target")
+            + " AND "
+            + _has_chunk("embedding_model = $target", present=False),
+            target_vars,
+        )
+
+    for item_type, table, included in (
+        ("notes", "note", include_notes),
+        ("insights", "source_insight", include_insights),
+    ):
+        if not included:
+            continue
+        items[item_type] = await _stream_ids(
+            f"""
+            SELECT id FROM {table}
+            WHERE embedding_dim != none
+                AND embedding_model != $target
+                AND next_embedding_model != $target
+            """,
+            target_vars,
+        )
+
+    logger.info(
+        f"Collected {len(items['sources'])} sources, {len(items['notes'])} notes and "
+        f"{len(items['insights'])} insights without {target_model} vectors"
+    )
+    return items
+
+
+REBUILD_CHECKPOINT_ID = "embedding_rebuild:checkpoint"
+REBUILD_ITEM_TYPES = ("sources", "notes", "insights")
+
+
+async def load_rebuild_checkpoint() -> Optional[Dict[str, Any]]:
+    """Return the persisted rebuild checkpoint, if any."""
+    result = await repo_query(
+        "SELECT * FROM $id", {"id": ensure_record_id(REBUILD_CHECKPOINT_ID)}
+    )
+    return result[0] if result else None
+
+
+async def save_rebuild_checkpoint(checkpoint: Dict[str, Any]) -> None:
+    """Persist rebuild progress so a restarted rebuild can resume where it stopped."""
+    await repo_upsert(
+        "embedding_rebuild", REBUILD_CHECKPOINT_ID, dict(checkpoint), add_timestamp=True
+    )
+
+
+def _checkpoint_matches(checkpoint: Optional[Dict[str, Any]], input_data: RebuildEmbeddingsInput) -> bool:
+    """An unfinished checkpoint can only be resumed by a rebuild with the same scope."""
+    if not checkpoint or checkpoint.get("status") != "running":
+        return False
+    return (
+        checkpoint.get("mode") == input_data.mode
+        and checkpoint.get("include_sources") == input_data.include_sources
+        and checkpoint.get("include_notes") == input_data.include_notes
+        and checkpoint.get("include_insights") == input_data.include_insights
+        and checkpoint.get("target_model") == input_data.target_model
+    )
+
+
+async def _rebuild_sources_batch(
+    source_ids: List[str],
+    semaphore: asyncio.Semaphore,
+    target_model: Optional[str] = None,
+) -> Tuple[int, int]:
+    """Submit vectorization for a batch of sources with bounded concurrency."""
+
+    async def vectorize_one(source_id: str) -> bool:
+        async with semaphore:
+            try:
+                source = await Source.get(source_id)
+                await source.vectorize(embedding_model_id=target_model)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to re-embed source {source_id}: {e}")
+                return False
+
+    results = await asyncio.gather(*(vectorize_one(sid) for sid in source_ids))
+    succeeded = sum(1 for ok in results if ok)
+    return succeeded, len(results) - succeeded
+
+
+async def _rebuild_content_batch(
+    item_type: str,
+    item_ids: List[str],
+    embedding_model: Any,
+    semaphore: asyncio.Semaphore,
+    embedding_model_id: Optional[str] = None,
+    shadow: bool = False,
+) -> Tuple[int, int]:
+    """
+    Re-embed a batch of notes or insights with a single embedding call.
+
+    Only the embedding fields are written; records are not re-validated or
+    rewritten. With shadow=True the vectors go to the next_embedding fields of
+    an embedding migration instead of replacing the searchable ones.
+    If the batched call fails, items are embedded one at a time so a single bad
+    item does not fail the whole batch.
+    """
+    rows = await repo_query(
+        "SELECT id, content FROM $ids",
+        {"ids": [ensure_record_id(item_id) for item_id in item_ids]},
+    )
+    rows = [row for row in rows if row.get("content")]
+    missing = len(item_ids) - len(rows)
+    if missing:
+        logger.warning(f"{missing} {item_type} in batch not found or empty, skipping")
+    if not rows:
+        return 0, missing
+
+    contents = [row["content"] for row in rows]
+    embeddings: List[Optional[List[float]]]
+    try:
+        embeddings = list(await embedding_model.aembed(contents))
+    except Exception as e:
+        logger.warning(f"Batch embedding failed for {item_type}, retrying per item: {e}")
+        embeddings = []
+        for content in contents:
+            try:
+                embeddings.append((await embedding_model.aembed([content]))[0])
+            except Exception as item_error:
+                logger.error(f"Failed to embed {item_type} item: {item_error}")
+                embeddings.append(None)
+
+    async def write_one(item_id: str, embedding: Optional[List[float]]) -> bool:
+        if embedding is None:
+            return False
+        async with semaphore:
+            try:
+                if shadow:
+                    data = shadow_embedding_fields(embedding_model_id, embedding)
+                else:
+                    data = {
+                        "embedding": embedding,
+                        **embedding_metadata(embedding_model_id, embedding),
+                    }
+                await repo_query(
+                    "UPDATE $id MERGE $data RETURN NONE",
+                    {"id": ensure_record_id(item_id), "data": data},
+                )
+                return True
+            except Exception as e:
+                logger.error(f"Failed to store embedding for {item_id}: {e}")
+                return False
+
+    results = await asyncio.gather(
+        *(write_one(str(row["id"]), emb) for row, emb in zip(rows, embeddings))
+    )
+    succeeded = sum(1 for ok in results if ok)
+    return succeeded, len(results) - succeeded + missing
+
+
+async def _submit_migration_finalize(target_model: str) -> None:
+    """Queue the cutover check once a migration backfill has been submitted."""
+    migration = await EmbeddingMigration.get_instance()
+    if not migration.is_backfilling or migration.target_model != target_model:
+        logger.warning(
+            f"No backfilling migration to {target_model}; skipping cutover"
+        )
+        return
+    command_id = submit_command(
+        "open_notebook",
+        "finalize_embedding_migration",
+        {"target_model": target_model},
+    )
+    logger.info(f"Submitted embedding migration cutover check: {command_id}")
+
+
 @command("rebuild_embeddings", app="open_notebook", retry=None)
 async def rebuild_embeddings_command(
     input_data: RebuildEmbeddingsInput,
@@ -469,6 +779,11 @@ async def rebuild_embeddings_command(
     """
     Rebuild embeddings for sources, notes, and/or insights
 
+    Each item type is processed by its own pipeline with bounded concurrency.
+    Items are walked in id order and a checkpoint (last processed id per item
+    type, plus counters) is written after every batch, so a rebuild that crashes
+    resumes from the last completed batch instead of starting over.
+
     Retry Strategy:
     - Retries disabled (retry=None) - batch failures are immediately reported
     - This ensures immediate visibility when batch operations fail
@@ -483,29 +798,46 @@ async def rebuild_embeddings_command(
         logger.info("=" * 60)
 
         # Check embedding model availability
-        EMBEDDING_MODEL = await model_manager.get_embedding_model()
+        shadow = bool(input_data.target_model)
+        if input_data.target_model:
+            embedding_model_id = input_data.target_model
+            EMBEDDING_MODEL = await model_manager.get_model(input_data.target_model)
+        else:
+            (
+                embedding_model_id,
+                EMBEDDING_MODEL,
+            ) = await model_manager.get_embedding_model_with_id()
         if not EMBEDDING_MODEL:
             raise ValueError(
                 "No embedding model configured. Please configure one in the Models section."
             )
 
-        logger.info(f"Using embedding model: {EMBEDDING_MODEL}")
+        logger.info(f"Using embedding model: {EMBEDDING_MODEL} ({embedding_model_id})")
 
         # Collect items to process
-        items = await collect_items_for_rebuild(
-            input_data.mode,
-            input_data.include_sources,
-            input_data.include_notes,
-            input_data.include_insights,
-        )
+        if input_data.target_model:
+            items = await collect_items_for_migration(
+                input_data.target_model,
+                input_data.include_sources,
+                input_data.include_notes,
+                input_data.include_insights,
+            )
+        else:
+            items = await collect_items_for_rebuild(
+                input_data.mode,
+                input_data.include_sources,
+                input_data.include_notes,
+                input_data.include_insights,
+                embedding_model_id,
+            )
 
-        total_items = (
-            len(items["sources"]) + len(items["notes"]) + len(items["insights"])
-        )
+        total_items = sum(len(items[item_type]) for item_type in REBUILD_ITEM_TYPES)
         logger.info(f"Total items to process: {total_items}")
 
         if total_items == 0:
             logger.warning("No items found to rebuild")
+            if input_data.target_model:
+                await _submit_migration_finalize(input_data.target_model)
             return RebuildEmbeddingsOutput(
                 success=True,
                 total_items=0,
@@ -514,87 +846,93 @@ async def rebuild_embeddings_command(
                 processing_time=time.time() - start_time,
             )
 
-        # Initialize counters
-        sources_processed = 0
-        notes_processed = 0
-        insights_processed = 0
-        failed_items = 0
-
-        # Process sources
-        logger.info(f"\nProcessing {len(items['sources'])} sources...")
-        for idx, source_id in enumerate(items["sources"], 1):
-            try:
-                source = await Source.get(source_id)
-                if not source:
-                    logger.warning(f"Source {source_id} not found, skipping")
-                    failed_items += 1
-                    continue
-
-                await source.vectorize()
-                sources_processed += 1
+        previous = await load_rebuild_checkpoint() if input_data.resume else None
+        resuming = _checkpoint_matches(previous, input_data)
+        command_id = (
+            str(input_data.execution_context.command_id)
+            if input_data.execution_context
+            else None
+        )
 
-                if idx % 10 == 0 or idx == len(items["sources"]):
-                    logger.info(
-                        f"  Progress: {idx}/{len(items['sources'])} sources processed"
+        checkpoint: Dict[str, Any] = {
+            "command_id": command_id,
+            "mode": input_data.mode,
+            "include_sources": input_data.include_sources,
+            "include_notes": input_data.include_notes,
+            "include_insights": input_data.include_insights,
+            "target_model": input_data.target_model,
+            "status": "running",
+            "total_items": total_items,
+            "last_ids": {item_type: None for item_type in REBUILD_ITEM_TYPES},
+            "processed": {item_type: 0 for item_type in REBUILD_ITEM_TYPES},
+            "failed_items": 0,
+        }
+        if resuming and previous:
+            checkpoint["last_ids"].update(previous.get("last_ids") or {})
+            checkpoint["processed"].update(previous.get("processed") or {})
+            checkpoint["failed_items"] = previous.get("failed_items", 0)
+            logger.info(f"Resuming rebuild from checkpoint: {checkpoint['last_ids']}")
+
+        done_at_start = sum(checkpoint["processed"].values()) + checkpoint["failed_items"]
+        checkpoint["run_started_at"] = datetime.now(timezone.utc).isoformat()
+        checkpoint["run_done_at_start"] = done_at_start
+        await save_rebuild_checkpoint(checkpoint)
+
+        batch_size = max(1, input_data.batch_size)
+        checkpoint_lock = asyncio.Lock()
+
+        async def run_pipeline(item_type: str) -> None:
+            semaphore = asyncio.Semaphore(max(1, input_data.concurrency))
+            item_ids = sorted(items[item_type])
+            last_id = checkpoint["last_ids"].get(item_type)
+            if last_id:
+                item_ids = [item_id for item_id in item_ids if item_id > last_id]
+
+            logger.info(f"Processing {len(item_ids)} {item_type}...")
+            for offset in range(0, len(item_ids), batch_size):
+                batch = item_ids[offset : offset + batch_size]
+                if shadow and not (await EmbeddingMigration.get_instance()).is_backfilling:
+                    logger.warning("Embedding migration is no longer backfilling, stopping")
+                    return
+                if item_type == "sources":
+                    succeeded, failed = await _rebuild_sources_batch(
+                        batch, semaphore, input_data.target_model
+                    )
+                else:
+                    succeeded, failed = await _rebuild_content_batch(
+                        item_type,
+                        batch,
+                        EMBEDDING_MODEL,
+                        semaphore,
+                        embedding_model_id,
+                        shadow=shadow,
                     )
 
-            except Exception as e:
-                logger.error(f"Failed to re-embed source {source_id}: {e}")
-                failed_items += 1
-
-        # Process notes
-        logger.info(f"\nProcessing {len(items['notes'])} notes...")
-        for idx, note_id in enumerate(items["notes"], 1):
-            try:
-                note = await Note.get(note_id)
-                if not note:
-                    logger.warning(f"Note {note_id} not found, skipping")
-                    failed_items += 1
-                    continue
-
-                await note.save()  # Auto-embeds via ObjectModel.save()
-                notes_processed += 1
-
-                if idx % 10 == 0 or idx == len(items["notes"]):
-                    logger.info(f"  Progress: {idx}/{len(items['notes'])} notes processed")
-
-            except Exception as e:
-                logger.error(f"Failed to re-embed note {note_id}: {e}")
-                failed_items += 1
-
-        # Process insights
-        logger.info(f"\nProcessing {len(items['insights'])} insights...")
-        for idx, insight_id in enumerate(items["insights"], 1):
-            try:
-                insight = await SourceInsight.get(insight_id)
-                if not insight:
-                    logger.warning(f"Insight {insight_id} not found, skipping")
-                    failed_items += 1
-                    continue
-
-                # Re-generate embedding
-                embedding = (await EMBEDDING_MODEL.aembed([insight.content]))[0]
+                async with checkpoint_lock:
+                    checkpoint["processed"][item_type] += succeeded
+                    checkpoint["failed_items"] += failed
+                    checkpoint["last_ids"][item_type] = batch[-1]
+                    await save_rebuild_checkpoint(checkpoint)
 
-                # Update insight with new embedding
-                await repo_query(
-                    "UPDATE $insight_id SET embedding = $embedding",
-                    {
-                        "insight_id": ensure_record_id(insight_id),
-                        "embedding": embedding,
-                    },
+                logger.info(
+                    f"  Progress: {offset + len(batch)}/{len(item_ids)} {item_type} processed"
                 )
-                insights_processed += 1
 
-                if idx % 10 == 0 or idx == len(items["insights"]):
-                    logger.info(
-                        f"  Progress: {idx}/{len(items['insights'])} insights processed"
-                    )
+        await asyncio.gather(
+            *(run_pipeline(item_type) for item_type in REBUILD_ITEM_TYPES if items[item_type])
+        )
 
-            except Exception as e:
-                logger.error(f"Failed to re-embed insight {insight_id}: {e}")
-                failed_items += 1
+        checkpoint["status"] = "completed"
+        await save_rebuild_checkpoint(checkpoint)
+
+        if input_data.target_model:
+            await _submit_migration_finalize(input_data.target_model)
 
         processing_time = time.time() - start_time
+        sources_processed = checkpoint["processed"]["sources"]
+        notes_processed = checkpoint["processed"]["notes"]
+        insights_processed = checkpoint["processed"]["insights"]
+        failed_items = checkpoint["failed_items"]
         processed_items = sources_processed + notes_processed + insights_processed
 
         logger.info("=" * 60)
@@ -631,3 +969,67 @@ async def rebuild_embeddings_command(
             processing_time=processing_time,
             error_message=str(e),
         )
+
+
+@command("finalize_embedding_migration", app="open_notebook", retry=None)
+async def finalize_embedding_migration_command(
+    input_data: FinalizeEmbeddingMigrationInput,
+) -> FinalizeEmbeddingMigrationOutput:
+    """
+    Cut over to the target model of an embedding migration, then collect old vectors.
+
+    Source chunks are embedded by separate embed_chunk jobs, so coverage is polled
+    until it reaches 100% (or max_wait_seconds passes). Only then is
+    default_embedding_model switched; until that moment search keeps using the
+    old vectors. After the switch, shadow vectors are promoted and old chunks
+    are deleted.
+    """
+    start_time = time.time()
+    target_model = input_data.target_model
+
+    try:
+        coverage = await get_embedding_coverage(target_model)
+        deadline = start_time + input_data.max_wait_seconds
+        while not is_fully_covered(coverage):
+            migration = await EmbeddingMigration.get_instance()
+            if not migration.is_backfilling or migration.target_model != target_model:
+                raise ValueError(f"Migration to {target_model} is no longer backfilling")
+            if time.time() >= deadline:
+                logger.warning(
+                    f"Embedding coverage for {target_model} stuck at "
+                    f"{coverage_percentage(coverage)}%; not cutting over"
+                )
+                return FinalizeEmbeddingMigrationOutput(
+                    success=False,
+                    target_model=target_model,
+                    coverage_percentage=coverage_percentage(coverage),
+                    processing_time=time.time() - start_time,
+                    error_message="Coverage did not reach 100% before the timeout",
+                )
+            await asyncio.sleep(input_data.poll_interval)
+            coverage = await get_embedding_coverage(target_model)
+
+        await cutover_embedding_model(target_model)
+        stats = await collect_old_embeddings(target_model)
+        logger.info(f"Embedding migration to {target_model} complete: {stats}")
+
+        return FinalizeEmbeddingMigrationOutput(
+            success=True,
+            target_model=target_model,
+            cut_over=True,
+            coverage_percentage=100.0,
+            sources_collected=stats["sources"],
+            notes_promoted=stats["notes"],
+            insights_promoted=stats["insights"],
+            processing_time=time.time() - start_time,
+        )
+
+    except Exception as e:
+        logger.error(f"Embedding migration finalize failed: {e}")
+        logger.exception(e)
+        return FinalizeEmbeddingMigrationOutput(
+            success=False,
+            target_model=target_model,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
@@ -79,9 +79,15 @@ async def generate_podcast_command(
         logger.info(f"Loaded episode profile: {episode_profile.name}")
         logger.info(f"Loaded speaker profile: {speaker_profile.name}")
 
-        # 3. Load all profiles and configure podcast-creator
-        episode_profiles = await repo_query("SELECT * FROM episode_profile")
-        speaker_profiles = await repo_query("SELECT * FROM speaker_profile")
+        # 3. Load the profiles this episode uses and configure podcast-creator
+        episode_profiles = await repo_query(
+            "SELECT * FROM episode_profile WHERE name = $name",
+            {"name": episode_profile.name},
+        )
+        speaker_profiles = await repo_query(
+            "SELECT * FROM speaker_profile WHERE name = $name",
+            {"name": speaker_profile.name},
+        )
 
         # Transform the surrealdb array into a dictionary for podcast-creator
         episode_profiles_dict = {
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from typing import Literal, Optional
+
+from loguru import logger
+from surreal_commands import CommandInput, CommandOutput, command
+
+from open_notebook.config import FULL_TEXT_PREVIEW_CHARS
+from open_notebook.database import blob_store
+from open_notebook.database.repository import ensure_record_id, repo_query
+from open_notebook.domain.notebook import delete_unreferenced_blobs
+
+
+class StoreSourceTextsInput(CommandInput):
+    storage: Literal["blob", "inline"] = "blob"
+    batch_size: int = 50
+
+
+class StoreSourceTextsOutput(CommandOutput):
+    success: bool
+    moved: int
+    blobs_deleted: int = 0
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+async def move_texts_to_blobs(batch_size: int) -> int:
+    """
+    Move inline full_text of existing sources into the blob store.
+
+    Each batch drops out of the query once moved, so the loop ends when
+    nothing is left and can be safely re-run.
+    """
+    moved = 0
+    while True:
+        rows = await repo_query(
+            """
+            SELECT id, full_text FROM source
+            WHERE full_text != none AND full_text_ref = none
+            LIMIT $batch_size
+            """,
+            {"batch_size": batch_size},
+        )
+        if not rows:
+            return moved
+
+        items = []
+        for row in rows:
+            text = row["full_text"]
+            items.append(
+                {
+                    "id": ensure_record_id(row["id"]),
+                    "ref": await asyncio.to_thread(blob_store.put_text, text),
+                    "preview": text[:FULL_TEXT_PREVIEW_CHARS],
+                    "length": len(text),
+                }
+            )
+        await repo_query(
+            """
+            FOR $item IN $items {
+                UPDATE $item.id SET
+                    full_text = NONE,
+                    full_text_ref = $item.ref,
+                    full_text_preview = $item.preview,
+                    full_text_length = $item.length
+                RETURN NONE;
+            };
+            """,
+            {"items": items},
+        )
+        moved += len(rows)
+        logger.debug(f"Moved {moved} source texts to the blob store")
+
+
+async def move_texts_inline(batch_size: int) -> int:
+    """
+    Move blob-stored full_text back into the source rows.
+
+    Blobs are deleted once no source references them.
+    """
+    moved = 0
+    while True:
+        rows = await repo_query(
+            "SELECT id, full_text_ref FROM source WHERE full_text_ref != none LIMIT $batch_size",
+            {"batch_size": batch_size},
+        )
+        if not rows:
+            return moved
+
+        items = [
+            {
+                "id": ensure_record_id(row["id"]),
+                "full_text": await asyncio.to_thread(
+                    blob_store.read_text, row["full_text_ref"]
+                ),
+            }
+            for row in rows
+        ]
+        await repo_query(
+            """
+            FOR $item IN $items {
+                UPDATE $item.id SET
+                    full_text = $item.full_text,
+                    full_text_ref = NONE,
+                    full_text_preview = NONE,
+                    full_text_length = NONE
+                RETURN NONE;
+            };
+            """,
+            {"items": items},
+        )
+        await delete_unreferenced_blobs([row["full_text_ref"] for row in rows])
+        moved += len(rows)
+        logger.debug(f"Moved {moved} source texts back inline")
+
+
+async def sweep_unreferenced_blobs(batch_size: int) -> int:
+    """
+    Delete blobs that no source references, such as ones kept back while
+    they were recently written.
+    """
+    refs = await asyncio.to_thread(lambda: list(blob_store.iter_refs()))
+    deleted = 0
+    for start in range(0, len(refs), batch_size):
+        deleted += await delete_unreferenced_blobs(refs[start : start + batch_size])
+    if deleted:
+        logger.debug(f"Deleted {deleted} unreferenced blobs")
+    return deleted
+
+
+@command("store_source_texts", app="open_notebook", retry=None)
+async def store_source_texts_command(
+    input_data: StoreSourceTextsInput,
+) -> StoreSourceTextsOutput:
+    """
+    Move the full_text of existing sources to the given storage, for use
+    after changing FULL_TEXT_STORAGE, then delete blobs no source references.
+    """
+    start_time = time.time()
+    try:
+        if input_data.storage == "blob":
+            moved = await move_texts_to_blobs(input_data.batch_size)
+        else:
+            moved = await move_texts_inline(input_data.batch_size)
+        logger.info(f"Moved {moved} source texts to {input_data.storage} storage")
+        blobs_deleted = await sweep_unreferenced_blobs(input_data.batch_size)
+
+        return StoreSourceTextsOutput(
+            success=True,
+            moved=moved,
+            blobs_deleted=blobs_deleted,
+            processing_time=time.time() - start_time,
+        )
+    except Exception as e:
+        logger.error(f"Moving source texts failed: {e}")
+        logger.exception(e)
+        return StoreSourceTextsOutput(
+            success=False,
+            moved=0,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
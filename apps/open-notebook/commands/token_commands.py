@@ -0,0 +1,103 @@
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+from surreal_commands import CommandInput, CommandOutput, command
+
+from open_notebook.database.repository import repo_query, repo_stream
+from open_notebook.utils.token_utils import token_count
+
+# Tables with a stored token count and the text field it counts
+TOKEN_COUNT_FIELDS = {
+    "source": "full_text",
+    "source_insight": "content",
+    "note": "content",
+    "source_embedding": "content",
+}
+
+
+class BackfillTokenCountsInput(CommandInput):
+    tables: List[str] = list(TOKEN_COUNT_FIELDS)
+    batch_size: int = 100
+
+
+class BackfillTokenCountsOutput(CommandOutput):
+    success: bool
+    counted: Dict[str, int]
+    processing_time: float
+    error_message: Optional[str] = None
+
+
+async def _store_token_counts(items: List[Dict]) -> None:
+    await repo_query(
+        """
+        FOR $item IN $items {
+            UPDATE $item.id SET token_count = $item.token_count RETURN NONE;
+        };
+        """,
+        {"items": items},
+    )
+
+
+async def backfill_table_token_counts(table: str, batch_size: int) -> int:
+    """
+    Store token counts for every record of a table that does not have one yet.
+
+    The table is streamed in id order and counts are written back in batches,
+    so memory stays bounded and each record is read once. Counted records no
+    longer match, so the backfill can be safely re-run.
+    """
+    field = TOKEN_COUNT_FIELDS[table]
+    counted = 0
+    items: List[Dict] = []
+    async for row in repo_stream(
+        f"SELECT id, {field} AS text FROM {table} WHERE token_count = none AND {field} != none",
+        batch_size=batch_size,
+    ):
+        items.append({"id": row["id"], "token_count": token_count(row.get("text") or "")})
+        if len(items) >= batch_size:
+            await _store_token_counts(items)
+            counted += len(items)
+            items = []
+            logger.debug(f"Stored token counts for {counted} {table} records")
+
+    if items:
+        await _store_token_counts(items)
+        counted += len(items)
+    return counted
+
+
+@command("backfill_token_counts", app="open_notebook", retry=None)
+async def backfill_token_counts_command(
+    input_data: BackfillTokenCountsInput,
+) -> BackfillTokenCountsOutput:
+    """
+    Store token counts for sources, insights, notes and chunks saved before
+    token counts were persisted.
+    """
+    start_time = time.time()
+    counted: Dict[str, int] = {}
+
+    try:
+        for table in input_data.tables:
+            if table not in TOKEN_COUNT_FIELDS:
+                raise ValueError(f"Table {table} has no stored token count")
+            counted[table] = await backfill_table_token_counts(
+                table, input_data.batch_size
+            )
+            logger.info(f"Backfilled token counts for {counted[table]} {table} records")
+
+        return BackfillTokenCountsOutput(
+            success=True,
+            counted=counted,
+            processing_time=time.time() - start_time,
+        )
+    except Exception as e:
+        logger.error(f"Token count backfill failed: {e}")
+        logger.exception(e)
+        return BackfillTokenCountsOutput(
+            success=False,
+            counted=counted,
+            processing_time=time.time() - start_time,
+            error_message=str(e),
+        )
@@ -20,7 +20,7 @@ import { embeddingApi } from '@/lib/api/embedding'
 import type { RebuildEmbeddingsRequest, RebuildStatusResponse } from '@/lib/api/embedding'
 
 export function RebuildEmbeddings() {
-  const [mode, setMode] = useState<'existing' | 'all'>('existing')
+  const [mode, setMode] = useState<'existing' | 'all' | 'stale'>('existing')
   const [includeSources, setIncludeSources] = useState(true)
   const [includeNotes, setIncludeNotes] = useState(true)
   const [includeInsights, setIncludeInsights] = useState(true)
@@ -133,19 +133,22 @@ export function RebuildEmbeddings() {
           <div className="space-y-6">
             <div className="space-y-3">
               <Label htmlFor="mode">Rebuild Mode</Label>
-              <Select value={mode} onValueChange={(value) => setMode(value as 'existing' | 'all')}>
+              <Select value={mode} onValueChange={(value) => setMode(value as 'existing' | 'all' | 'stale')}>
                 <SelectTrigger id="mode">
                   <SelectValue />
                 </SelectTrigger>
                 <SelectContent>
                   <SelectItem value="existing">Existing</SelectItem>
+                  <SelectItem value="stale">Stale</SelectItem>
                   <SelectItem value="all">All</SelectItem>
                 </SelectContent>
               </Select>
               <p className="text-sm text-muted-foreground">
                 {mode === 'existing'
                   ? 'Re-embed only items that already have embeddings (faster, for model switching)'
-                  : 'Re-embed existing items + create embeddings for items without any (slower, comprehensive)'}
+                  : mode === 'stale'
+                    ? 'Re-embed only items whose embeddings came from a different model than the current default (fastest after a model switch)'
+                    : 'Re-embed existing items + create embeddings for items without any (slower, comprehensive)'}
               </p>
             </div>
 
@@ -78,6 +78,9 @@ export function SourceDetailContent({
   onClose
 }: SourceDetailContentProps) {
   const [source, setSource] = useState<SourceDetailResponse | null>(null)
+  const [fullText, setFullText] = useState('')
+  const [nextTextOffset, setNextTextOffset] = useState<number | null>(null)
+  const [loadingText, setLoadingText] = useState(false)
   const [insights, setInsights] = useState<SourceInsightResponse[]>([])
   const [transformations, setTransformations] = useState<Transformation[]>([])
   const [selectedTransformation, setSelectedTransformation] = useState<string>('')
@@ -113,6 +116,19 @@ export function SourceDetailContent({
     }
   }, [sourceId])
 
+  const fetchText = useCallback(async (offset: number) => {
+    try {
+      setLoadingText(true)
+      const page = await sourcesApi.getText(sourceId, { offset })
+      setFullText(previous => (offset === 0 ? '' : previous) + (page.text ?? ''))
+      setNextTextOffset(page.next_offset)
+    } catch (err) {
+      console.error('Failed to fetch source text:', err)
+    } finally {
+      setLoadingText(false)
+    }
+  }, [sourceId])
+
   const fetchInsights = useCallback(async () => {
     try {
       setLoadingInsights(true)
@@ -137,10 +153,11 @@ export function SourceDetailContent({
   useEffect(() => {
     if (sourceId) {
       void fetchSource()
+      void fetchText(0)
       void fetchInsights()
       void fetchTransformations()
     }
-  }, [fetchInsights, fetchSource, fetchTransformations, sourceId])
+  }, [fetchInsights, fetchSource, fetchText, fetchTransformations, sourceId])
 
   const createInsight = async () => {
     if (!selectedTransformation) {
@@ -513,9 +530,21 @@ export function SourceDetailContent({
                       td: ({ children }) => <td className="border border-border px-3 py-2">{children}</td>,
                     }}
                   >
-                    {source.full_text || 'No content available'}
+                    {fullText || (loadingText ? '' : 'No content available')}
                   </ReactMarkdown>
                 </div>
+                {nextTextOffset !== null && (
+                  <div className="mt-4 flex justify-center">
+                    <Button
+                      variant="outline"
+                      size="sm"
+                      disabled={loadingText}
+                      onClick={() => void fetchText(nextTextOffset)}
+                    >
+                      {loadingText ? 'Loading...' : 'Load more'}
+                    </Button>
+                  </div>
+                )}
               </CardContent>
             </Card>
           </TabsContent>
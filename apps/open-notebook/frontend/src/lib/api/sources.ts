@@ -6,6 +6,7 @@ import {
   SourceDetailResponse, 
   SourceResponse,
   SourceStatusResponse,
+  SourceTextResponse,
   CreateSourceRequest, 
   UpdateSourceRequest 
 } from '@/lib/types/api'
@@ -15,6 +16,7 @@ export const sourcesApi = {
     notebook_id?: string
     limit?: number
     offset?: number
+    cursor?: string
     sort_by?: 'created' | 'updated'
     sort_order?: 'asc' | 'desc'
   }) => {
@@ -22,8 +24,30 @@ export const sourcesApi = {
     return response.data
   },
 
-  get: async (id: string) => {
-    const response = await apiClient.get<SourceDetailResponse>(`/sources/${id}`)
+  // One page of sources plus the cursor of the next page, if any
+  listPage: async (params: {
+    notebook_id?: string
+    limit: number
+    cursor?: string
+    sort_by?: 'created' | 'updated'
+    sort_order?: 'asc' | 'desc'
+  }) => {
+    const response = await apiClient.get<SourceListResponse[]>('/sources', { params })
+    const nextCursor: string | undefined = response.headers['x-next-cursor'] || undefined
+    return { sources: response.data, nextCursor }
+  },
+
+  get: async (id: string, params?: { include_full_text?: boolean }) => {
+    const response = await apiClient.get<SourceDetailResponse>(`/sources/${id}`, { params })
+    return response.data
+  },
+
+  getText: async (id: string, params?: {
+    offset?: number
+    length?: number
+    unit?: 'chars' | 'chunks'
+  }) => {
+    const response = await apiClient.get<SourceTextResponse>(`/sources/${id}/text`, { params })
     return response.data
   },
 
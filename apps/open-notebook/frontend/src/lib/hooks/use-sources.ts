@@ -32,21 +32,17 @@ export function useNotebookSources(notebookId: string) {
 
   const query = useInfiniteQuery({
     queryKey: QUERY_KEYS.sourcesInfinite(notebookId),
-    queryFn: async ({ pageParam = 0 }) => {
-      const data = await sourcesApi.list({
+    queryFn: async ({ pageParam }: { pageParam?: string }) => {
+      return sourcesApi.listPage({
         notebook_id: notebookId,
         limit: NOTEBOOK_SOURCES_PAGE_SIZE,
-        offset: pageParam,
+        cursor: pageParam,
         sort_by: 'updated',
         sort_order: 'desc',
       })
-      return {
-        sources: data,
-        nextOffset: data.length === NOTEBOOK_SOURCES_PAGE_SIZE ? pageParam + data.length : undefined,
-      }
     },
-    initialPageParam: 0,
-    getNextPageParam: (lastPage) => lastPage.nextOffset,
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.nextCursor,
     enabled: !!notebookId,
     staleTime: 5 * 1000,
     refetchOnWindowFocus: true,
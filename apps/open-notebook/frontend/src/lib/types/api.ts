@@ -46,10 +46,21 @@ export interface SourceListResponse {
 }
 
 export interface SourceDetailResponse extends SourceListResponse {
-  full_text: string
+  full_text: string | null  // Only returned with include_full_text=true
   notebooks?: string[]  // List of notebook IDs this source is linked to
 }
 
+export interface SourceTextResponse {
+  source_id: string
+  unit: 'chars' | 'chunks'
+  offset: number
+  length: number
+  total: number
+  next_offset: number | null
+  text: string | null
+  chunks: Array<{ order: number; content: string }> | null
+}
+
 export type SourceResponse = SourceDetailResponse
 
 export interface SourceStatusResponse {
@@ -214,6 +225,13 @@ export interface SendNotebookChatMessageRequest {
     notes: Array<Record<string, unknown>>
   }
   model_override?: string
+  context_mode?: 'selected' | 'retrieval'
+  context_config?: {
+    sources?: Record<string, string>
+    notes?: Record<string, string>
+  }
+  max_context_tokens?: number
+  retrieval_top_k?: number
 }
 
 export interface BuildContextRequest {
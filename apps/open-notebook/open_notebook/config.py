@@ -4,7 +4,10 @@ from typing import Optional
 # ROOT DATA FOLDER
 DATA_FOLDER = "./data"
 
-# LANGGRAPH CHECKPOINT FILE
+# LANGGRAPH CHECKPOINTS
+# "sqlite" keeps chat checkpoints in LANGGRAPH_CHECKPOINT_FILE; "surrealdb"
+# keeps them in the database, shared by every API replica
+LANGGRAPH_CHECKPOINTER = os.getenv("LANGGRAPH_CHECKPOINTER", "sqlite").lower()
 sqlite_folder = f"{DATA_FOLDER}/sqlite-db"
 os.makedirs(sqlite_folder, exist_ok=True)
 LANGGRAPH_CHECKPOINT_FILE = f"{sqlite_folder}/checkpoints.sqlite"
@@ -61,3 +64,15 @@ def get_upload_folder(
 # TIKTOKEN CACHE FOLDER
 TIKTOKEN_CACHE_DIR = f"{DATA_FOLDER}/tiktoken-cache"
 os.makedirs(TIKTOKEN_CACHE_DIR, exist_ok=True)
+
+# SOURCE TEXT STORAGE
+# "inline" keeps source full_text in the database row; "blob" stores it
+# zstd-compressed in BLOBS_FOLDER with a reference and preview in the row
+# (requires the zstandard package)
+FULL_TEXT_STORAGE = os.getenv("FULL_TEXT_STORAGE", "inline").lower()
+BLOBS_FOLDER = f"{DATA_FOLDER}/blobs"
+FULL_TEXT_PREVIEW_CHARS = 2000
+
+# REQUEST PROFILES
+# cProfile dumps and summaries written by the API's profiling middleware
+PROFILES_FOLDER = f"{DATA_FOLDER}/profiles"
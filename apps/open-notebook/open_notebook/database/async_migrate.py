@@ -106,6 +106,16 @@ class AsyncMigrationManager:
             AsyncMigration.from_file("migrations/8.surrealql"),
             AsyncMigration.from_file("migrations/9.surrealql"),
             AsyncMigration.from_file("migrations/10.surrealql"),  # Multi-tenancy
+            AsyncMigration.from_file("migrations/11.surrealql"),  # Rebuild checkpoints
+            AsyncMigration.from_file("migrations/12.surrealql"),  # Embedding model stamps
+            AsyncMigration.from_file("migrations/13.surrealql"),  # Embedding migrations
+            AsyncMigration.from_file("migrations/14.surrealql"),  # Chunk token counts
+            AsyncMigration.from_file("migrations/15.surrealql"),  # Stored token counts
+            AsyncMigration.from_file("migrations/16.surrealql"),  # Blob-stored source text
+            AsyncMigration.from_file("migrations/17.surrealql"),  # Keyset pagination indexes
+            AsyncMigration.from_file("migrations/18.surrealql"),  # Parent lookup indexes
+            AsyncMigration.from_file("migrations/19.surrealql"),  # LangGraph checkpoint tables
+            AsyncMigration.from_file("migrations/20.surrealql"),  # Legacy vector fallback
         ]
         self.down_migrations = [
             AsyncMigration.from_file("migrations/1_down.surrealql"),
@@ -118,6 +128,16 @@ class AsyncMigrationManager:
             AsyncMigration.from_file("migrations/8_down.surrealql"),
             AsyncMigration.from_file("migrations/9_down.surrealql"),
             AsyncMigration.from_file("migrations/10_down.surrealql"),  # Multi-tenancy
+            AsyncMigration.from_file("migrations/11_down.surrealql"),  # Rebuild checkpoints
+            AsyncMigration.from_file("migrations/12_down.surrealql"),  # Embedding model stamps
+            AsyncMigration.from_file("migrations/13_down.surrealql"),  # Embedding migrations
+            AsyncMigration.from_file("migrations/14_down.surrealql"),  # Chunk token counts
+            AsyncMigration.from_file("migrations/15_down.surrealql"),  # Stored token counts
+            AsyncMigration.from_file("migrations/16_down.surrealql"),  # Blob-stored source text
+            AsyncMigration.from_file("migrations/17_down.surrealql"),  # Keyset pagination indexes
+            AsyncMigration.from_file("migrations/18_down.surrealql"),  # Parent lookup indexes
+            AsyncMigration.from_file("migrations/19_down.surrealql"),  # LangGraph checkpoint tables
+            AsyncMigration.from_file("migrations/20_down.surrealql"),  # Legacy vector fallback
         ]
         self.runner = AsyncMigrationRunner(
             up_migrations=self.up_migrations,
@@ -0,0 +1,167 @@
+"""
+Content-addressed blob store for large source texts.
+
+Texts are stored zstd-compressed under BLOBS_FOLDER, named by the SHA-256 of
+their UTF-8 bytes, so identical texts share one blob and a reference never
+changes meaning. Reads decompress as a stream, so a slice near the start of a
+large text does not inflate the whole document.
+
+Deletion races with saves that reuse a blob: a save stores the text, then
+points its row at it, so a blob can look unreferenced in between. Reuse
+refreshes the blob's mtime, and delete() leaves blobs written or reused
+within GRACE_SECONDS in place.
+
+zstandard is an optional dependency, only needed when FULL_TEXT_STORAGE=blob
+or when reading texts that were stored that way.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import time
+import uuid
+from typing import Iterator
+
+from open_notebook.config import BLOBS_FOLDER
+from open_notebook.exceptions import ConfigurationError, NotFoundError
+
+BLOB_REF_PREFIX = "zstd:sha256:"
+COMPRESSION_LEVEL = 10
+READ_CHUNK_CHARS = 64 * 1024
+# Blobs written or reused this recently are never deleted
+GRACE_SECONDS = 60
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ConfigurationError(
+            "Blob storage requires the zstandard package: pip install zstandard"
+        )
+    return zstandard
+
+
+def text_ref(text: str) -> str:
+    """Reference a text is stored under."""
+    return BLOB_REF_PREFIX + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def blob_path(ref: str) -> str:
+    """Path of the blob for a reference, fanned out by hash prefix."""
+    if not ref.startswith(BLOB_REF_PREFIX):
+        raise ValueError(f"Not a blob reference: {ref}")
+    digest = ref[len(BLOB_REF_PREFIX) :]
+    if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+        raise ValueError(f"Not a blob reference: {ref}")
+    return os.path.join(BLOBS_FOLDER, digest[:2], f"{digest}.zst")
+
+
+def exists(ref: str) -> bool:
+    return os.path.exists(blob_path(ref))
+
+
+def put_text(text: str) -> str:
+    """
+    Store a text and return its reference.
+
+    Writing is skipped when the blob already exists; its mtime is refreshed
+    instead, see delete(). New blobs are written to a temporary file and
+    renamed into place, so readers never see a partial blob.
+    """
+    ref = text_ref(text)
+    path = blob_path(ref)
+    try:
+        os.utime(path)
+        return ref
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    compressor = _zstd().ZstdCompressor(level=COMPRESSION_LEVEL)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            with compressor.stream_writer(f, closefd=False) as writer:
+                writer.write(text.encode("utf-8"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return ref
+
+
+def iter_text(ref: str, chunk_chars: int = READ_CHUNK_CHARS) -> Iterator[str]:
+    """Yield a stored text in pieces, decompressing as it is read."""
+    path = blob_path(ref)
+    if not os.path.exists(path):
+        raise NotFoundError(f"Blob {ref} not found")
+
+    decompressor = _zstd().ZstdDecompressor()
+    with open(path, "rb") as f, decompressor.stream_reader(f) as reader:
+        text_reader = io.TextIOWrapper(reader, encoding="utf-8")
+        while True:
+            piece = text_reader.read(chunk_chars)
+            if not piece:
+                return
+            yield piece
+
+
+def read_text(ref: str) -> str:
+    return "".join(iter_text(ref))
+
+
+def read_text_range(ref: str, offset: int, length: int) -> str:
+    """
+    Read length characters starting at offset.
+
+    Decompression stops once the range is read; only the part before the
+    range is decompressed and discarded.
+    """
+    parts = []
+    position = 0
+    end = offset + length
+    for piece in iter_text(ref):
+        piece_end = position + len(piece)
+        if piece_end > offset:
+            parts.append(piece[max(offset - position, 0) : end - position])
+        position = piece_end
+        if position >= end:
+            break
+    return "".join(parts)
+
+
+def iter_refs() -> Iterator[str]:
+    """Yield the reference of every stored blob."""
+    if not os.path.isdir(BLOBS_FOLDER):
+        return
+    for fanout in sorted(os.listdir(BLOBS_FOLDER)):
+        folder = os.path.join(BLOBS_FOLDER, fanout)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".zst"):
+                yield BLOB_REF_PREFIX + name[: -len(".zst")]
+
+
+def delete(ref: str, grace_seconds: float = 0) -> bool:
+    """
+    Remove a blob; returns False if it did not exist or was kept.
+
+    The blob is first renamed aside, so a concurrent put_text() either
+    refreshed its mtime before, and the blob is put back when that is within
+    grace_seconds, or finds it gone and writes it again.
+    """
+    path = blob_path(ref)
+    doomed = f"{path}.{uuid.uuid4().hex}.deleting"
+    try:
+        os.replace(path, doomed)
+    except FileNotFoundError:
+        return False
+    if time.time() - os.stat(doomed).st_mtime < grace_seconds:
+        os.replace(doomed, path)
+        return False
+    os.remove(doomed)
+    return True
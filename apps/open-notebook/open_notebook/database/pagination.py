@@ -0,0 +1,113 @@
+"""
+Keyset (cursor) pagination on (sort field, id).
+
+A page continues strictly after the last row of the previous page, so with an
+index on the sort field and id every page costs the same, unlike
+LIMIT/START where the database walks past every skipped row. Cursors are
+opaque to clients: base64url-encoded JSON of the last row's sort value and id.
+
+The sort value must be the exact one the database stores: datetimes have
+nanosecond precision there but only microseconds in Python, and a rounded
+value would repeat or skip rows at page boundaries. Queries select it as a
+string with cursor_projection(), and next_cursor() prefers it.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from open_notebook.database.repository import ensure_record_id
+from open_notebook.exceptions import InvalidInputError
+
+# Datetime fields with a composite (field, id) index on paginated tables
+KEYSET_FIELDS = ("updated", "created")
+MAX_PAGE_SIZE = 100
+# Alias of the exact sort value selected by cursor_projection()
+CURSOR_VALUE = "cursor_value"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_keyset_order(order_by: Optional[str]) -> Tuple[str, str]:
+    """
+    Parse an order_by value like "updated desc" into (field, direction).
+
+    Raises InvalidInputError when the ordering cannot be paginated by cursor.
+    """
+    parts = (order_by or "updated desc").split()
+    field = parts[0] if parts else ""
+    direction = parts[1].lower() if len(parts) > 1 else "asc"
+    if len(parts) > 2 or field not in KEYSET_FIELDS or direction not in ("asc", "desc"):
+        raise InvalidInputError(
+            f"Cursor pagination supports ordering by {' or '.join(KEYSET_FIELDS)} "
+            f"asc/desc, not '{order_by}'"
+        )
+    return field, direction
+
+
+def cursor_projection(field: str) -> str:
+    """SELECT expression for the exact sort value of each row."""
+    return f"type::string({field}) AS {CURSOR_VALUE}"
+
+
+def encode_cursor(field: str, value: Any, id: Any) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"f": field, "v": str(value), "id": str(id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, field: str) -> Tuple[str, str]:
+    """Return the (sort value, id) a cursor points at."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, id = payload["v"], payload["id"]
+        cursor_field = payload["f"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidInputError("Invalid pagination cursor")
+    if cursor_field != field:
+        raise InvalidInputError(
+            f"Cursor was issued for ordering by {cursor_field}, not {field}"
+        )
+    return value, id
+
+
+def keyset_clauses(
+    field: str, direction: str, cursor: Optional[str] = None
+) -> Tuple[Optional[str], str, Dict[str, Any]]:
+    """
+    Build the WHERE condition, ORDER BY clause and parameters for a page.
+
+    The condition is None for the first page.
+    """
+    order = f"{field} {direction.upper()}, id {direction.upper()}"
+    if not cursor:
+        return None, order, {}
+
+    value, id = decode_cursor(cursor, field)
+    op = "<" if direction == "desc" else ">"
+    condition = (
+        f"({field} {op} <datetime>$cursor_value"
+        f" OR ({field} = <datetime>$cursor_value AND id {op} $cursor_id))"
+    )
+    return condition, order, {"cursor_value": value, "cursor_id": ensure_record_id(id)}
+
+
+def next_cursor(rows: Sequence[Any], limit: Optional[int], field: str) -> Optional[str]:
+    """
+    Cursor for the page after rows, or None when rows was the last page.
+
+    Rows may be dicts or models, selected with cursor_projection(); rows
+    without it fall back to the sort field itself. A full page always gets a
+    cursor, so the page after an exact multiple of limit comes back empty.
+    """
+    if not limit or len(rows) < limit:
+        return None
+    last = rows[-1]
+    if isinstance(last, dict):
+        value = last.get(CURSOR_VALUE) or last.get(field)
+        return encode_cursor(field, value, last.get("id"))
+    value = getattr(last, "_cursor_value", None) or getattr(last, field)
+    return encode_cursor(field, value, getattr(last, "id"))
@@ -1,11 +1,17 @@
+import asyncio
 import os
+import re
+import time
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, TypeVar, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, TypeVar, Union
 
 from loguru import logger
 from surrealdb import AsyncSurreal, RecordID  # type: ignore
 
+from open_notebook.metrics import DB_CONNECT_SECONDS, DB_QUERY_SECONDS, statement_name
+
 T = TypeVar("T", Dict[str, Any], List[Dict[str, Any]])
 
 
@@ -27,11 +33,28 @@ def get_database_password():
 
 
 def parse_record_ids(obj: Any) -> Any:
-    """Recursively parse and convert RecordIDs into strings."""
+    """
+    Convert RecordIDs in a query result into strings, in place.
+
+    Dicts and lists are updated rather than rebuilt, and lists of numbers
+    only (embedding vectors) are not walked item by item. Returns the
+    converted value.
+    """
     if isinstance(obj, dict):
-        return {k: parse_record_ids(v) for k, v in obj.items()}
+        for key, value in obj.items():
+            if isinstance(value, RecordID):
+                obj[key] = str(value)
+            elif isinstance(value, (dict, list)):
+                parse_record_ids(value)
     elif isinstance(obj, list):
-        return [parse_record_ids(item) for item in obj]
+        # Vectors are lists of numbers only; one cheap pass rules them out
+        if all(isinstance(item, (int, float)) for item in obj):
+            return obj
+        for index, item in enumerate(obj):
+            if isinstance(item, RecordID):
+                obj[index] = str(item)
+            elif isinstance(item, (dict, list)):
+                parse_record_ids(item)
     elif isinstance(obj, RecordID):
         return str(obj)
     return obj
@@ -44,18 +67,93 @@ def ensure_record_id(value: Union[str, RecordID]) -> RecordID:
     return RecordID.parse(value)
 
 
+# URL schemes of the embedded engines, which have no users to sign in as
+EMBEDDED_URL_SCHEMES = ("mem://", "memory", "file://", "surrealkv://", "surrealkv+versioned://")
+
+
+async def _connect():
+    url = get_database_url()
+    with DB_CONNECT_SECONDS.time():
+        db = AsyncSurreal(url)
+        if not url.startswith(EMBEDDED_URL_SCHEMES):
+            await db.signin(
+                {
+                    "username": os.environ.get("SURREAL_USER"),
+                    "password": get_database_password(),
+                }
+            )
+        await db.use(
+            os.environ.get("SURREAL_NAMESPACE"), os.environ.get("SURREAL_DATABASE")
+        )
+    return db
+
+
+class DbSession:
+    """
+    One connection shared by every repository call made while the session
+    is active. The connection is opened on first use, so a session that
+    never queries costs nothing.
+    """
+
+    def __init__(self) -> None:
+        self._connection: Any = None
+        self._lock = asyncio.Lock()
+        self.closed = False
+
+    async def connection(self) -> Any:
+        async with self._lock:
+            if self._connection is None:
+                self._connection = await _connect()
+        return self._connection
+
+    async def close(self) -> None:
+        self.closed = True
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+_active_session: ContextVar[Optional[DbSession]] = ContextVar(
+    "db_session", default=None
+)
+
+
+@asynccontextmanager
+async def db_session() -> AsyncIterator[DbSession]:
+    """
+    Run the repository calls made in this context over one connection.
+
+    The API opens one per request; commands and scripts can open their own.
+    Nested sessions reuse the outer one.
+    """
+    current = _active_session.get()
+    if current is not None and not current.closed:
+        yield current
+        return
+
+    session = DbSession()
+    token = _active_session.set(session)
+    try:
+        yield session
+    finally:
+        await session.close()
+        try:
+            _active_session.reset(token)
+        except ValueError:
+            # Closed from another context, e.g. a dependency teardown;
+            # the closed session is ignored from here on
+            pass
+
+
 @asynccontextmanager
 async def db_connection():
-    db = AsyncSurreal(get_database_url())
-    await db.signin(
-        {
-            "username": os.environ.get("SURREAL_USER"),
-            "password": get_database_password(),
-        }
-    )
-    await db.use(
-        os.environ.get("SURREAL_NAMESPACE"), os.environ.get("SURREAL_DATABASE")
-    )
+    """Connection of the active db_session(), or a new one for this use."""
+    session = _active_session.get()
+    if session is not None and not session.closed:
+        yield await session.connection()
+        return
+
+    db = await _connect()
     try:
         yield db
     finally:
@@ -69,7 +167,9 @@ async def repo_query(
 
     async with db_connection() as connection:
         try:
-            result = parse_record_ids(await connection.query(query_str, vars))
+            with DB_QUERY_SECONDS.time(statement_name(query_str)):
+                result = await connection.query(query_str, vars)
+            result = parse_record_ids(result)
             if isinstance(result, str):
                 raise RuntimeError(result)
             return result
@@ -82,6 +182,150 @@ async def repo_query(
             raise
 
 
+class QueryBatch:
+    """
+    Statements queued up and sent as one multi-statement query.
+
+    Each statement keeps its own parameters: they are renamed per statement
+    before sending, so two statements can both use $id.
+
+        batch = QueryBatch()
+        batch.add("SELECT * FROM $id", {"id": source_id})
+        batch.add("SELECT VALUE out FROM reference WHERE in = $id", {"id": source_id})
+        source_rows, notebook_ids = await batch.execute()
+    """
+
+    def __init__(self) -> None:
+        self._statements: List[str] = []
+        self._vars: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def add(self, query_str: str, vars: Optional[Dict[str, Any]] = None) -> int:
+        """Queue a single statement; returns its index in the results."""
+        index = len(self._statements)
+        for name, value in (vars or {}).items():
+            alias = f"b{index}_{name}"
+            query_str = re.sub(rf"\${re.escape(name)}\b", f"${alias}", query_str)
+            self._vars[alias] = value
+        self._statements.append(query_str.strip().rstrip(";"))
+        return index
+
+    async def execute(self) -> List[Any]:
+        """
+        Run the queued statements in one round trip.
+
+        Returns one result per statement, in order. Raises RuntimeError if
+        any statement failed.
+        """
+        if not self._statements:
+            return []
+        query_str = ";\n".join(self._statements) + ";"
+        async with db_connection() as connection:
+            with DB_QUERY_SECONDS.time("batch"):
+                response = await connection.query_raw(query_str, self._vars)
+        if response.get("error"):
+            error = response["error"]
+            raise RuntimeError(
+                error.get("message", str(error)) if isinstance(error, dict) else str(error)
+            )
+
+        results = []
+        for statement in response.get("result") or []:
+            if statement.get("status") == "ERR":
+                raise RuntimeError(str(statement.get("result")))
+            results.append(parse_record_ids(statement.get("result")))
+        if len(results) != len(self._statements):
+            raise RuntimeError(
+                f"Expected {len(self._statements)} statement results, got {len(results)}"
+            )
+        return results
+
+
+# Clauses repo_stream() adds itself, so they cannot appear in streamed queries
+STREAM_RESERVED_CLAUSES = {"ORDER", "LIMIT", "START", "GROUP", "SPLIT", "FETCH"}
+_CLAUSE_PATTERN = re.compile(
+    r"\b(WHERE|ORDER\s+BY|LIMIT|START|GROUP\s+(?:BY|ALL)|SPLIT|FETCH)\b",
+    re.IGNORECASE,
+)
+
+
+def _top_level_clauses(query: str) -> Dict[str, int]:
+    """Positions of clause keywords outside brackets, strings and subqueries."""
+    masked = []
+    depth = 0
+    quote = None
+    for char in query:
+        if quote:
+            masked.append(" ")
+            if char == quote:
+                quote = None
+            continue
+        if char in "'\"`":
+            quote = char
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        masked.append(char if depth == 0 and char not in ")]}" else " ")
+    clauses: Dict[str, int] = {}
+    for match in _CLAUSE_PATTERN.finditer("".join(masked)):
+        clauses.setdefault(match.group(1).split()[0].upper(), match.start())
+    return clauses
+
+
+async def repo_stream(
+    query_str: str,
+    vars: Optional[Dict[str, Any]] = None,
+    batch_size: int = 500,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Iterate over the rows of a SELECT, fetching batch_size rows at a time.
+
+    Pages are keyed on record id (id > last id, ORDER BY id), so every page is
+    the same cost and memory stays bounded by batch_size however large the
+    table. All pages share one connection.
+
+    The query must be a single-table SELECT that returns id and has no
+    ORDER BY, LIMIT, START, GROUP, SPLIT or FETCH clause.
+    """
+    query = query_str.strip().rstrip(";")
+    clauses = _top_level_clauses(query)
+    reserved: Set[str] = set(clauses) & STREAM_RESERVED_CLAUSES
+    if reserved:
+        raise ValueError(
+            f"repo_stream adds its own ordering and paging; remove {', '.join(sorted(reserved))}"
+        )
+    if "WHERE" in clauses:
+        where_at = clauses["WHERE"]
+        condition = query[where_at + len("WHERE") :]
+        next_query = f"{query[:where_at]}WHERE ({condition}) AND id > $stream_after"
+    else:
+        next_query = f"{query} WHERE id > $stream_after"
+    page = " ORDER BY id LIMIT $stream_batch_size"
+    params: Dict[str, Any] = {**(vars or {}), "stream_batch_size": batch_size}
+
+    label = statement_name(query)
+    async with db_connection() as connection:
+        page_query = query + page
+        while True:
+            start = time.perf_counter()
+            rows = await connection.query(page_query, params)
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, label)
+            rows = parse_record_ids(rows)
+            if isinstance(rows, str):
+                raise RuntimeError(rows)
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            if "id" not in rows[-1]:
+                raise ValueError("repo_stream queries must select id")
+            params["stream_after"] = ensure_record_id(rows[-1]["id"])
+            page_query = next_query + page
+
+
 async def repo_create(table: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """Create a new record in the specified table"""
     # Remove 'id' attribute if it exists in data
@@ -90,7 +334,9 @@ async def repo_create(table: str, data: Dict[str, Any]) -> Dict[str, Any]:
     data["updated"] = datetime.now(timezone.utc)
     try:
         async with db_connection() as connection:
-            return parse_record_ids(await connection.insert(table, data))
+            with DB_QUERY_SECONDS.time(f"insert {table}"):
+                result = await connection.insert(table, data)
+            return parse_record_ids(result)
     except RuntimeError as e:
         logger.error(str(e))
         raise
@@ -128,9 +374,14 @@ async def repo_upsert(
 
 
 async def repo_update(
-    table: str, id: str, data: Dict[str, Any]
+    table: str, id: str, data: Dict[str, Any], returning: Optional[str] = None
 ) -> List[Dict[str, Any]]:
-    """Update an existing record by table and id"""
+    """
+    Update an existing record by table and id.
+
+    Returns the whole updated record, or just the fields listed in returning
+    (e.g. "id, updated").
+    """
     # If id already contains the table name, use it as is
     try:
         if isinstance(id, RecordID) or (":" in id and id.startswith(f"{table}:")):
@@ -141,12 +392,11 @@ async def repo_update(
         if "created" in data and isinstance(data["created"], str):
             data["created"] = datetime.fromisoformat(data["created"])
         data["updated"] = datetime.now(timezone.utc)
-        query = f"UPDATE {record_id} MERGE $data;"
+        return_clause = f" RETURN {returning}" if returning else ""
+        query = f"UPDATE {record_id} MERGE $data{return_clause};"
         # logger.debug(f"Update query: {query}")
-        result = await repo_query(query, {"data": data})
-        # if isinstance(result, list):
-        #     return [_return_data(item) for item in result]
-        return parse_record_ids(result)
+        # repo_query has already converted record ids
+        return await repo_query(query, {"data": data})
     except Exception as e:
         raise RuntimeError(f"Failed to update record: {str(e)}")
 
@@ -155,8 +405,10 @@ async def repo_delete(record_id: Union[str, RecordID]):
     """Delete a record by record id"""
 
     try:
+        record_id = ensure_record_id(record_id)
         async with db_connection() as connection:
-            return await connection.delete(ensure_record_id(record_id))
+            with DB_QUERY_SECONDS.time(f"delete {record_id.table_name}"):
+                return await connection.delete(record_id)
     except Exception as e:
         logger.exception(e)
         raise RuntimeError(f"Failed to delete record: {str(e)}")
@@ -168,7 +420,9 @@ async def repo_insert(
     """Create a new record in the specified table"""
     try:
         async with db_connection() as connection:
-            return parse_record_ids(await connection.insert(table, data))
+            with DB_QUERY_SECONDS.time(f"insert {table}"):
+                result = await connection.insert(table, data)
+            return parse_record_ids(result)
     except Exception as e:
         if ignore_duplicates and "already contains" in str(e):
             return []
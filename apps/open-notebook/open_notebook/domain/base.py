@@ -1,15 +1,43 @@
+import copy
+import re
 from datetime import datetime
-from typing import Any, ClassVar, Dict, List, Optional, Type, TypeVar, Union, cast
+from typing import (
+    Any,
+    AsyncIterator,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from loguru import logger
-from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from pydantic import (
+    BaseModel,
+    PrivateAttr,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
 
+from open_notebook.database.pagination import (
+    CURSOR_VALUE,
+    cursor_projection,
+    keyset_clauses,
+    parse_keyset_order,
+)
 from open_notebook.database.repository import (
     ensure_record_id,
     repo_create,
     repo_delete,
     repo_query,
     repo_relate,
+    repo_stream,
     repo_update,
     repo_upsert,
 )
@@ -21,17 +49,129 @@ from open_notebook.exceptions import (
 
 T = TypeVar("T", bound="ObjectModel")
 
+# Field names accepted in fields/omit projections
+FIELD_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+# Fields maintained by save() itself rather than tracked for changes
+UNTRACKED_FIELDS = frozenset({"id", "created", "updated"})
+
 
 class ObjectModel(BaseModel):
     id: Optional[str] = None
     table_name: ClassVar[str] = ""
     nullable_fields: ClassVar[set[str]] = set()  # Fields that can be saved as None
+    # Vector columns stored on records but never read into models
+    vector_fields: ClassVar[Tuple[str, ...]] = ("embedding", "next_embedding")
     created: Optional[datetime] = None
     updated: Optional[datetime] = None
     # Multi-tenancy fields
     user_id: Optional[str] = None  # Personal owner (Supabase auth.users.id)
     team_id: Optional[str] = None  # Team owner (from Orch-Flow teams table)
     created_by: Optional[str] = None  # Who created it (always set)
+    # Hash of the text token_count was computed for, to skip recounting on save
+    _counted_text_hash: Optional[int] = PrivateAttr(default=None)
+    # Model fields left out by a fields/omit projection, see load_fields()
+    _unloaded_fields: Set[str] = PrivateAttr(default_factory=set)
+    # Field values as of the last load or save, see _changed_fields()
+    _clean_values: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    _embedded_content_hash: Optional[int] = PrivateAttr(default=None)
+    # Exact sort value of a paged row, see pagination.next_cursor()
+    _cursor_value: Optional[str] = PrivateAttr(default=None)
+    # Table name -> model class, filled in as subclasses are declared
+    _table_classes: ClassVar[Dict[str, Type["ObjectModel"]]] = {}
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        # The first class declared for a table is the one get() builds
+        if cls.table_name:
+            ObjectModel._table_classes.setdefault(cls.table_name, cls)
+
+    def model_post_init(self, __context: Any) -> None:
+        # A stored token count belongs to the text it was loaded with
+        if getattr(self, "token_count", None) is not None:
+            text = self.get_token_count_content()
+            if text is not None:
+                self._counted_text_hash = hash(text)
+
+    @classmethod
+    def _projection(
+        cls,
+        fields: Optional[List[str]] = None,
+        omit: Optional[List[str]] = None,
+        extra: Optional[List[str]] = None,
+    ) -> Tuple[str, Set[str]]:
+        """
+        Build the SELECT clause for a projection.
+
+        Vector columns are always left out, and required model fields are
+        always loaded, so the row can be validated. extra expressions are
+        selected as well. Returns the clause and the model fields it does not
+        load.
+        """
+        for name in [*(fields or []), *(omit or [])]:
+            if not FIELD_NAME_PATTERN.match(name):
+                raise InvalidInputError(f"Invalid field name: {name}")
+        required = [
+            name for name, info in cls.model_fields.items() if info.is_required()
+        ]
+
+        if fields:
+            selected = list(dict.fromkeys(["id", *required, *fields]))
+            return (
+                ", ".join([*selected, *(extra or [])]),
+                set(cls.model_fields) - set(selected),
+            )
+
+        omit = [name for name in omit or [] if name not in required]
+        omitted = list(dict.fromkeys([*cls.vector_fields, *omit]))
+        return (
+            f"{', '.join(['*', *(extra or [])])} OMIT {', '.join(omitted)}",
+            set(omit) & set(cls.model_fields),
+        )
+
+    @classmethod
+    def from_row(
+        cls: Type[T], row: Dict[str, Any], unloaded: Optional[Set[str]] = None
+    ) -> T:
+        """
+        Build an instance from a fetched row.
+
+        Args:
+            row: Row selected with a _projection() clause
+            unloaded: Model fields the projection left out
+        """
+        instance = cls(**row)
+        instance._unloaded_fields |= unloaded or set()
+        instance._cursor_value = row.get(CURSOR_VALUE)
+        instance._mark_clean()
+        return instance
+
+    async def load_fields(self, *fields: str) -> None:
+        """
+        Load fields that were left out when the object was fetched.
+
+        Args:
+            fields: Fields to load; all unloaded fields if none are given
+        """
+        names = [name for name in (fields or self._unloaded_fields) if name in self._unloaded_fields]
+        if not names or self.id is None:
+            return
+
+        clause, _ = self._projection(names)
+        result = await repo_query(
+            f"SELECT {clause} FROM $id", {"id": ensure_record_id(self.id)}
+        )
+        row = result[0] if result else {}
+
+        # Validate the loaded values the same way a full fetch would
+        loaded = self.__class__(
+            **{**self.model_dump(), **{name: row.get(name) for name in names}}
+        )
+        for name in names:
+            setattr(self, name, getattr(loaded, name))
+        self._unloaded_fields -= set(names)
+        self.model_post_init(None)
+        self._mark_clean(names)
 
     @classmethod
     async def get_all(
@@ -39,6 +179,10 @@ class ObjectModel(BaseModel):
         order_by: Optional[str] = None,
         user_id: Optional[str] = None,
         team_id: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        omit: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> List[T]:
         """
         Get all records with optional ownership filtering.
@@ -47,10 +191,28 @@ class ObjectModel(BaseModel):
             order_by: Optional field to order by
             user_id: Filter by personal ownership (user's items)
             team_id: Filter by team ownership (team's items)
+            fields: Only load these fields (plus id)
+            omit: Load every field except these
+            limit: Return one page of at most this many records
+            cursor: Continue after the page this cursor was issued for
 
         If both user_id and team_id are None, returns all records (backwards compatibility).
         If either is provided, filters to records where user_id matches OR team_id matches.
+
+        With limit or cursor, records are paged by (order_by field, id), which
+        must be created or updated (default "updated desc"); pass the page to
+        pagination.next_cursor() for the following cursor.
         """
+        keyset = None
+        extra: List[str] = []
+        if limit is not None or cursor is not None:
+            # Reject orderings and cursors that cannot be paged up front
+            sort_field, direction = parse_keyset_order(order_by)
+            keyset = keyset_clauses(sort_field, direction, cursor)
+            extra.append(cursor_projection(sort_field))
+            if fields:
+                # Rows can only be ordered on a selected field
+                fields = [*fields, sort_field]
         try:
             # If called from a specific subclass, use its table_name
             if cls.table_name:
@@ -76,16 +238,27 @@ class ObjectModel(BaseModel):
                     params["team_id"] = team_id
                 where_clauses.append(f"({' OR '.join(ownership_conditions)})")
 
+            limit_clause = ""
+            if keyset:
+                keyset_condition, order_by, keyset_params = keyset
+                if keyset_condition:
+                    where_clauses.append(keyset_condition)
+                    params.update(keyset_params)
+                if limit is not None:
+                    limit_clause = " LIMIT $limit"
+                    params["limit"] = limit
+
             where_clause = f" WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
             order_clause = f" ORDER BY {order_by}" if order_by else ""
 
-            query = f"SELECT * FROM {table_name}{where_clause}{order_clause}"
+            projection, unloaded = target_class._projection(fields, omit, extra)
+            query = f"SELECT {projection} FROM {table_name}{where_clause}{order_clause}{limit_clause}"
 
             result = await repo_query(query, params) if params else await repo_query(query)
             objects = []
             for obj in result:
                 try:
-                    objects.append(target_class(**obj))
+                    objects.append(target_class.from_row(obj, unloaded))
                 except Exception as e:
                     logger.critical(f"Error creating object: {str(e)}")
 
@@ -96,9 +269,68 @@ class ObjectModel(BaseModel):
             raise DatabaseOperationError(e)
 
     @classmethod
-    async def get(cls: Type[T], id: str) -> T:
+    async def iter_all(
+        cls: Type[T],
+        user_id: Optional[str] = None,
+        team_id: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        omit: Optional[List[str]] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[T]:
+        """
+        Iterate over all records in id order, batch_size records at a time.
+
+        Takes the same filters and projections as get_all(), but memory stays
+        bounded however large the table is.
+        """
+        if not cls.table_name:
+            raise InvalidInputError("iter_all() must be called from a specific model class")
+
+        params: Dict[str, Any] = {}
+        ownership_conditions = []
+        if user_id is not None:
+            ownership_conditions.append("user_id = $user_id")
+            params["user_id"] = user_id
+        if team_id is not None:
+            ownership_conditions.append("team_id = $team_id")
+            params["team_id"] = team_id
+        where_clause = (
+            f" WHERE {' OR '.join(ownership_conditions)}" if ownership_conditions else ""
+        )
+
+        projection, unloaded = cls._projection(fields, omit)
+        async for row in repo_stream(
+            f"SELECT {projection} FROM {cls.table_name}{where_clause}",
+            params,
+            batch_size=batch_size,
+        ):
+            try:
+                instance = cls.from_row(row, unloaded)
+            except Exception as e:
+                logger.critical(f"Error creating object: {str(e)}")
+                continue
+            yield instance
+
+    @classmethod
+    async def get(
+        cls: Type[T],
+        id: str,
+        fields: Optional[List[str]] = None,
+        omit: Optional[List[str]] = None,
+    ) -> T:
+        """
+        Get a record by id.
+
+        Args:
+            id: Record id
+            fields: Only load these fields (plus id)
+            omit: Load every field except these
+
+        Fields left out can be fetched later with load_fields().
+        """
         if not id:
             raise InvalidInputError("ID cannot be empty")
+        cls._projection(fields, omit)  # Reject invalid field names up front
         try:
             # Get the table name from the ID (everything before the first colon)
             table_name = id.split(":")[0] if ":" in id else id
@@ -113,11 +345,17 @@ class ObjectModel(BaseModel):
                     raise InvalidInputError(f"No class found for table {table_name}")
                 target_class = cast(Type[T], found_class)
 
-            result = await repo_query("SELECT * FROM $id", {"id": ensure_record_id(id)})
+            projection, unloaded = target_class._projection(fields, omit)
+            result = await repo_query(
+                f"SELECT {projection} FROM $id", {"id": ensure_record_id(id)}
+            )
             if result:
-                return target_class(**result[0])
+                return target_class.from_row(result[0], unloaded)
             else:
                 raise NotFoundError(f"{table_name} with id {id} not found")
+        except (NotFoundError, InvalidInputError, ValidationError):
+            # A row that fails validation is a data error, not a missing record
+            raise
         except Exception as e:
             logger.error(f"Error fetching object with id {id}: {str(e)}")
             logger.exception(e)
@@ -126,18 +364,7 @@ class ObjectModel(BaseModel):
     @classmethod
     def _get_class_by_table_name(cls, table_name: str) -> Optional[Type["ObjectModel"]]:
         """Find the appropriate subclass based on table_name."""
-
-        def get_all_subclasses(c: Type["ObjectModel"]) -> List[Type["ObjectModel"]]:
-            all_subclasses: List[Type["ObjectModel"]] = []
-            for subclass in c.__subclasses__():
-                all_subclasses.append(subclass)
-                all_subclasses.extend(get_all_subclasses(subclass))
-            return all_subclasses
-
-        for subclass in get_all_subclasses(ObjectModel):
-            if hasattr(subclass, "table_name") and subclass.table_name == table_name:
-                return subclass
-        return None
+        return ObjectModel._table_classes.get(table_name)
 
     def needs_embedding(self) -> bool:
         return False
@@ -145,18 +372,119 @@ class ObjectModel(BaseModel):
     def get_embedding_content(self) -> Optional[str]:
         return None
 
-    async def save(self) -> None:
+    def get_token_count_content(self) -> Optional[str]:
+        """Text whose token count is stored with the record, if any."""
+        return None
+
+    def _refresh_token_count(self) -> None:
+        """Recount the stored token count if the counted text changed."""
+        text = self.get_token_count_content()
+        if text is None or not hasattr(self, "token_count"):
+            return
+        text_hash = hash(text)
+        if getattr(self, "token_count", None) is None or text_hash != self._counted_text_hash:
+            from open_notebook.utils.token_utils import token_count
+
+            setattr(self, "token_count", token_count(text))
+            self._counted_text_hash = text_hash
+
+    async def _shadow_embedding(self, content: str) -> Dict[str, Any]:
+        """Embed content with the target model of a running embedding migration."""
+        from open_notebook.domain.embedding_migration import shadow_embedding_fields
         from open_notebook.domain.models import model_manager
 
+        (
+            shadow_model_id,
+            SHADOW_MODEL,
+        ) = await model_manager.get_shadow_embedding_model_with_id()
+        if not SHADOW_MODEL:
+            return {}
+        return shadow_embedding_fields(
+            shadow_model_id, (await SHADOW_MODEL.aembed([content]))[0]
+        )
+
+    def _mark_clean(self, names: Optional[List[str]] = None) -> None:
+        """
+        Record the current field values as stored, so save() can send only
+        what changed since.
+
+        Args:
+            names: Record just these fields; all loaded fields if not given
+        """
+        if names is None:
+            self._clean_values = {}
+            names = [
+                name
+                for name in self.__class__.model_fields
+                if name not in UNTRACKED_FIELDS and name not in self._unloaded_fields
+            ]
+        elif self._clean_values is None:
+            return
+        for name in names:
+            value = getattr(self, name)
+            # Containers are copied so in-place edits show up as changes
+            if isinstance(value, (list, dict, BaseModel)):
+                value = copy.deepcopy(value)
+            self._clean_values[name] = value
+        if self.needs_embedding():
+            self._embedded_content_hash = hash(self.get_embedding_content())
+
+    def _changed_fields(self) -> Optional[Set[str]]:
+        """Fields changed since the last load or save, or None if untracked."""
+        if self._clean_values is None:
+            return None
+        changed = set()
+        for name, field in self.__class__.model_fields.items():
+            if name in UNTRACKED_FIELDS:
+                continue
+            value = getattr(self, name)
+            if name in self._clean_values:
+                clean = self._clean_values[name]
+            else:
+                # An unloaded field counts as changed once it is assigned
+                clean = field.get_default(call_default_factory=True)
+            if value is not clean and value != clean:
+                changed.add(name)
+        return changed
+
+    def _validate_fields(self, names: Set[str]) -> None:
+        """Strictly validate the given fields, as a full save would."""
+        validator = self.__class__.__pydantic_validator__
+        scratch = self.model_copy()
+        for name in names:
+            validator.validate_assignment(scratch, name, getattr(self, name), strict=True)
+
+    async def save(self) -> None:
+        """
+        Create or update the record.
+
+        Records that were loaded or saved before only send the fields changed
+        since, and are only re-embedded when their embedding content changed.
+        """
+        from open_notebook.domain.models import embedding_metadata, model_manager
+
+        # Only existing records with a known stored state can be saved partially
+        partial = self.id is not None and self._clean_values is not None
         try:
-            self.model_validate(self.model_dump(), strict=True)
-            data = self._prepare_save_data()
+            if partial:
+                self._validate_fields(cast(Set[str], self._changed_fields()))
+            else:
+                self.model_validate(self.model_dump(), strict=True)
+            self._refresh_token_count()
+            changed = self._changed_fields() if partial else None
+            data = self._prepare_save_data(changed)
             data["updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
             if self.needs_embedding():
                 embedding_content = self.get_embedding_content()
-                if embedding_content:
-                    EMBEDDING_MODEL = await model_manager.get_embedding_model()
+                if embedding_content and (
+                    not partial
+                    or hash(embedding_content) != self._embedded_content_hash
+                ):
+                    (
+                        embedding_model_id,
+                        EMBEDDING_MODEL,
+                    ) = await model_manager.get_embedding_model_with_id()
                     if not EMBEDDING_MODEL:
                         logger.warning(
                             "No embedding model found. Content will not be searchable."
@@ -166,17 +494,27 @@ class ObjectModel(BaseModel):
                         if EMBEDDING_MODEL
                         else []
                     )
+                    data.update(
+                        embedding_metadata(embedding_model_id, data["embedding"])
+                    )
+                    data.update(await self._shadow_embedding(embedding_content))
 
             repo_result: Union[List[Dict[str, Any]], Dict[str, Any]]
             if self.id is None:
                 data["created"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 repo_result = await repo_create(self.__class__.table_name, data)
-            else:
-                data["created"] = (
-                    self.created.strftime("%Y-%m-%d %H:%M:%S")
-                    if isinstance(self.created, datetime)
-                    else self.created
+            elif partial:
+                logger.debug(f"Updating {sorted(data)} of record {self.id}")
+                repo_result = await repo_update(
+                    self.__class__.table_name, self.id, data, returning="id, updated"
                 )
+            else:
+                if "created" not in self._unloaded_fields:
+                    data["created"] = (
+                        self.created.strftime("%Y-%m-%d %H:%M:%S")
+                        if isinstance(self.created, datetime)
+                        else self.created
+                    )
                 logger.debug(f"Updating record with id {self.id}")
                 repo_result = await repo_update(
                     self.__class__.table_name, self.id, data
@@ -190,6 +528,9 @@ class ObjectModel(BaseModel):
                         setattr(self, key, type(getattr(self, key))(**value))
                     else:
                         setattr(self, key, value)
+            # Fields just written are now loaded
+            self._unloaded_fields -= set(data)
+            self._mark_clean()
 
         except ValidationError as e:
             logger.error(f"Validation failed: {e}")
@@ -201,12 +542,23 @@ class ObjectModel(BaseModel):
             logger.error(f"Error saving record: {e}")
             raise DatabaseOperationError(e)
 
-    def _prepare_save_data(self) -> Dict[str, Any]:
-        data = self.model_dump()
+    def _prepare_save_data(self, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """
+        Serialize the fields to write.
+
+        Args:
+            fields: Only serialize these fields; all fields if not given
+        """
+        data = self.model_dump(include=fields)
         return {
             key: value
             for key, value in data.items()
-            if value is not None or key in self.__class__.nullable_fields
+            # Fields that were never loaded keep their stored value
+            if value is not None
+            or (
+                key in self.__class__.nullable_fields
+                and key not in self._unloaded_fields
+            )
         }
 
     async def delete(self) -> bool:
@@ -0,0 +1,280 @@
+"""
+Shadow-write migration between embedding models.
+
+While a migration is backfilling, every new vector is written twice: once with
+the current default model (what search uses) and once with the target model.
+Notes and insights keep the target vector in next_embedding* fields; source
+chunks get extra source_embedding rows stamped with the target model. Search
+keeps using the current default until coverage of the target model reaches
+100%, then default_embedding_model is switched in a single transaction and the
+old vectors are garbage-collected in the background.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, ClassVar, Dict, List, Optional
+
+from loguru import logger
+
+from open_notebook.database.repository import ensure_record_id, repo_query
+from open_notebook.domain.base import RecordModel
+from open_notebook.exceptions import InvalidInputError
+
+MIGRATION_BACKFILLING = "backfilling"
+MIGRATION_COLLECTING = "collecting"
+MIGRATION_COMPLETED = "completed"
+MIGRATION_CANCELLED = "cancelled"
+
+
+class EmbeddingMigration(RecordModel):
+    record_id: ClassVar[str] = "open_notebook:embedding_migration"
+    source_model: Optional[str] = None
+    target_model: Optional[str] = None
+    status: Optional[str] = None
+    rebuild_command_id: Optional[str] = None
+    started_at: Optional[str] = None
+    cutover_at: Optional[str] = None
+    completed_at: Optional[str] = None
+
+    @classmethod
+    async def get_instance(cls) -> "EmbeddingMigration":
+        """Always fetch fresh state from database (override parent caching behavior)"""
+        result = await repo_query(
+            "SELECT * FROM $record_id",
+            {"record_id": ensure_record_id(cls.record_id)},
+        )
+        data = result[0] if result and isinstance(result[0], dict) else {}
+        data.pop("id", None)
+
+        instance = object.__new__(cls)
+        object.__setattr__(instance, "__dict__", {})
+        super(RecordModel, instance).__init__(**data)
+        return instance
+
+    @property
+    def is_backfilling(self) -> bool:
+        return self.status == MIGRATION_BACKFILLING and bool(self.target_model)
+
+
+def shadow_embedding_fields(
+    model_id: Optional[str], embedding: List[float]
+) -> Dict[str, Any]:
+    """Fields holding a note/insight vector for the migration target model."""
+    if not model_id or not embedding:
+        return {}
+    return {
+        "next_embedding": embedding,
+        "next_embedding_model": str(model_id),
+        "next_embedding_dim": len(embedding),
+    }
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _count(result: List[Any]) -> int:
+    if not result:
+        return 0
+    first = result[0]
+    if isinstance(first, dict):
+        return int(first.get("count", 0))
+    return int(first) if isinstance(first, int) else 0
+
+
+async def get_embedding_coverage(target_model: str) -> Dict[str, Dict[str, int]]:
+    """
+    Count how many embedded items already have a vector from target_model.
+
+    A source counts as covered once it has at least as many target-model chunks
+    as chunks from other models, since both are split from the same text.
+    """
+    coverage: Dict[str, Dict[str, int]] = {}
+
+    chunk_counts = await repo_query(
+        """
+        SELECT
+            source,
+            count(embedding_model = $target) AS target_chunks,
+            count(embedding_model != $target) AS other_chunks
+        FROM source_embedding
+        GROUP BY source
+        """,
+        {"target": target_model},
+    )
+    coverage["sources"] = {
+        "total": len(chunk_counts),
+        "covered": sum(
+            1
+            for row in chunk_counts
+            if row.get("target_chunks", 0) > 0
+            and row.get("target_chunks", 0) >= row.get("other_chunks", 0)
+        ),
+    }
+
+    for item_type, table in (("notes", "note"), ("insights", "source_insight")):
+        total = await repo_query(
+            f"SELECT count() AS count FROM {table} WHERE embedding_dim != none GROUP ALL"
+        )
+        covered = await repo_query(
+            f"""
+            SELECT count() AS count FROM {table}
+            WHERE embedding_model = $target OR next_embedding_model = $target
+            GROUP ALL
+            """,
+            {"target": target_model},
+        )
+        coverage[item_type] = {"total": _count(total), "covered": _count(covered)}
+
+    return coverage
+
+
+def is_fully_covered(coverage: Dict[str, Dict[str, int]]) -> bool:
+    """True when every embedded item has a vector from the target model."""
+    return all(counts["covered"] >= counts["total"] for counts in coverage.values())
+
+
+def coverage_percentage(coverage: Dict[str, Dict[str, int]]) -> float:
+    total = sum(counts["total"] for counts in coverage.values())
+    covered = sum(min(counts["covered"], counts["total"]) for counts in coverage.values())
+    return round(covered / total * 100, 2) if total else 100.0
+
+
+async def start_embedding_migration(
+    target_model: str, source_model: Optional[str]
+) -> EmbeddingMigration:
+    """Record a new migration in the backfilling state."""
+    migration = await EmbeddingMigration.get_instance()
+    if migration.status in (MIGRATION_BACKFILLING, MIGRATION_COLLECTING):
+        raise InvalidInputError(
+            f"An embedding migration to {migration.target_model} is already {migration.status}"
+        )
+    if not target_model or target_model == source_model:
+        raise InvalidInputError("Target model must differ from the current embedding model")
+
+    await repo_query(
+        "UPSERT $record_id CONTENT $data",
+        {
+            "record_id": ensure_record_id(EmbeddingMigration.record_id),
+            "data": {
+                "source_model": source_model,
+                "target_model": target_model,
+                "status": MIGRATION_BACKFILLING,
+                "started_at": _now(),
+            },
+        },
+    )
+    return await EmbeddingMigration.get_instance()
+
+
+async def cutover_embedding_model(target_model: str) -> None:
+    """
+    Switch default_embedding_model to the target model.
+
+    The default switch and the migration state change commit in one transaction,
+    so searches move from the old vectors to the new ones in a single step.
+    """
+    await repo_query(
+        """
+        BEGIN TRANSACTION;
+        UPDATE $defaults_id MERGE { default_embedding_model: $target };
+        UPDATE $migration_id MERGE { status: $status, cutover_at: $now };
+        COMMIT TRANSACTION;
+        """,
+        {
+            "defaults_id": ensure_record_id("open_notebook:default_models"),
+            "migration_id": ensure_record_id(EmbeddingMigration.record_id),
+            "target": target_model,
+            "status": MIGRATION_COLLECTING,
+            "now": _now(),
+        },
+    )
+    logger.info(f"Embedding model cut over to {target_model}")
+
+
+async def collect_old_embeddings(target_model: str) -> Dict[str, int]:
+    """
+    Garbage-collect vectors from models other than target_model.
+
+    Shadow vectors on notes and insights are promoted to the primary fields,
+    and source chunks from other models are deleted source by source.
+    """
+    stats = {"sources": 0, "notes": 0, "insights": 0}
+
+    for item_type, table in (("notes", "note"), ("insights", "source_insight")):
+        promoted = await repo_query(
+            f"""
+            UPDATE {table} SET
+                embedding = next_embedding,
+                embedding_model = next_embedding_model,
+                embedding_dim = next_embedding_dim
+            WHERE next_embedding_model = $target AND embedding_model != $target
+            RETURN id
+            """,
+            {"target": target_model},
+        )
+        stats[item_type] = len(promoted or [])
+        await repo_query(
+            f"""
+            UPDATE {table} SET
+                next_embedding = NONE,
+                next_embedding_model = NONE,
+                next_embedding_dim = NONE
+            WHERE next_embedding_model != NONE
+            RETURN NONE
+            """
+        )
+
+    # Only drop old chunks for sources that already have target chunks, so a
+    # source that failed to re-embed stays searchable until it is rebuilt.
+    stale_sources = await repo_query(
+        """
+        RETURN array::intersect(
+            array::distinct(SELECT VALUE source FROM source_embedding WHERE embedding_model != $target),
+            array::distinct(SELECT VALUE source FROM source_embedding WHERE embedding_model = $target)
+        )
+        """,
+        {"target": target_model},
+    )
+    for source_id in stale_sources or []:
+        await repo_query(
+            "DELETE source_embedding WHERE source = $source AND embedding_model != $target",
+            {"source": ensure_record_id(source_id), "target": target_model},
+        )
+        stats["sources"] += 1
+
+    await repo_query(
+        "UPDATE $migration_id MERGE { status: $status, completed_at: $now }",
+        {
+            "migration_id": ensure_record_id(EmbeddingMigration.record_id),
+            "status": MIGRATION_COMPLETED,
+            "now": _now(),
+        },
+    )
+    return stats
+
+
+async def discard_shadow_embeddings(target_model: str) -> None:
+    """Cancel a migration before cutover by dropping every target-model vector."""
+    await repo_query(
+        "DELETE source_embedding WHERE embedding_model = $target",
+        {"target": target_model},
+    )
+    for table in ("note", "source_insight"):
+        await repo_query(
+            f"""
+            UPDATE {table} SET
+                next_embedding = NONE,
+                next_embedding_model = NONE,
+                next_embedding_dim = NONE
+            WHERE next_embedding_model != NONE
+            RETURN NONE
+            """
+        )
+    await repo_query(
+        "UPDATE $migration_id MERGE { status: $status, completed_at: $now }",
+        {
+            "migration_id": ensure_record_id(EmbeddingMigration.record_id),
+            "status": MIGRATION_CANCELLED,
+            "now": _now(),
+        },
+    )
@@ -1,4 +1,4 @@
-from typing import ClassVar, Dict, Optional, Union
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union
 
 from esperanto import (
     AIFactory,
@@ -11,10 +11,23 @@ from loguru import logger
 
 from open_notebook.database.repository import ensure_record_id, repo_query
 from open_notebook.domain.base import ObjectModel, RecordModel
+from open_notebook.metrics import instrument_embedding_model
 
 ModelType = Union[LanguageModel, EmbeddingModel, SpeechToTextModel, TextToSpeechModel]
 
 
+def embedding_metadata(model_id: Optional[str], embedding: List[float]) -> Dict[str, Any]:
+    """
+    Fields stamped next to every stored vector to record which model produced it.
+
+    Returns an empty dict when there is nothing to stamp, so the fields stay NONE
+    (a NULL would be rejected by their option<...> schema).
+    """
+    if not model_id or not embedding:
+        return {}
+    return {"embedding_model": str(model_id), "embedding_dim": len(embedding)}
+
+
 class Model(ObjectModel):
     table_name: ClassVar[str] = "model"
     name: str
@@ -95,10 +108,13 @@ class ModelManager:
                 config=kwargs,
             )
         elif model.type == "embedding":
-            return AIFactory.create_embedding(
-                model_name=model.name,
-                provider=model.provider,
-                config=kwargs,
+            return instrument_embedding_model(
+                AIFactory.create_embedding(
+                    model_name=model.name,
+                    provider=model.provider,
+                    config=kwargs,
+                ),
+                f"{model.provider}/{model.name}",
             )
         elif model.type == "speech_to_text":
             return AIFactory.create_speech_to_text(
@@ -148,15 +164,42 @@ class ModelManager:
 
     async def get_embedding_model(self, **kwargs) -> Optional[EmbeddingModel]:
         """Get the default embedding model"""
+        _, model = await self.get_embedding_model_with_id(**kwargs)
+        return model
+
+    async def get_embedding_model_with_id(
+        self, **kwargs
+    ) -> Tuple[Optional[str], Optional[EmbeddingModel]]:
+        """Get the default embedding model together with its model record id"""
         defaults = await self.get_defaults()
         model_id = defaults.default_embedding_model
         if not model_id:
-            return None
+            return None, None
         model = await self.get_model(model_id, **kwargs)
         assert model is None or isinstance(model, EmbeddingModel), (
             f"Expected EmbeddingModel but got {type(model)}"
         )
-        return model
+        return str(model_id), model
+
+    async def get_shadow_embedding_model_with_id(
+        self, **kwargs
+    ) -> Tuple[Optional[str], Optional[EmbeddingModel]]:
+        """
+        Get the target model of an embedding migration that is backfilling.
+
+        New vectors are written with this model as well as the default one, so
+        items created during the migration do not need a second backfill.
+        """
+        from open_notebook.domain.embedding_migration import EmbeddingMigration
+
+        migration = await EmbeddingMigration.get_instance()
+        if not migration.is_backfilling:
+            return None, None
+        model = await self.get_model(migration.target_model, **kwargs)
+        assert model is None or isinstance(model, EmbeddingModel), (
+            f"Expected EmbeddingModel but got {type(model)}"
+        )
+        return migration.target_model, model
 
     async def get_default_model(self, model_type: str, **kwargs) -> Optional[ModelType]:
         """
@@ -1,16 +1,20 @@
 import asyncio
-from typing import Any, ClassVar, Dict, List, Literal, Optional, Tuple, Union
+from typing import Any, ClassVar, Dict, List, Literal, Optional, Set, Tuple, Union
 
 from loguru import logger
 from pydantic import BaseModel, Field, field_validator
 from surreal_commands import submit_command
 from surrealdb import RecordID
 
+from open_notebook import config
+from open_notebook.database import blob_store
+from open_notebook.database.pagination import cursor_projection, keyset_clauses
 from open_notebook.database.repository import ensure_record_id, repo_query
 from open_notebook.domain.base import ObjectModel
-from open_notebook.domain.models import model_manager
+from open_notebook.domain.models import embedding_metadata, model_manager
 from open_notebook.exceptions import DatabaseOperationError, InvalidInputError
-from open_notebook.utils import split_text
+from open_notebook.jobs import tenant_context
+from open_notebook.utils import split_text, token_count
 
 
 class Notebook(ObjectModel):
@@ -45,45 +49,62 @@ class Notebook(ObjectModel):
             logger.exception(e)
             raise DatabaseOperationError(e)
 
-    async def get_notes(self) -> List["Note"]:
+    async def get_notes(
+        self, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> List["Note"]:
+        """
+        Get the notebook's notes without their content, newest first.
+
+        Args:
+            limit: Return one page of at most this many notes
+            cursor: Continue after the page this cursor was issued for
+        """
         if self.id is None:
             raise InvalidInputError("Cannot get notes for notebook without ID")
+        where, order, params = keyset_clauses("updated", "desc", cursor)
         try:
             srcs = await repo_query(
-                """
-            select * omit note.content, note.embedding from (
-                select in as note from artifact where out=$id
-                fetch note
-            ) order by note.updated desc
-            """,
-                {"id": ensure_record_id(self.id)},
+                f"""
+                SELECT *, {cursor_projection("updated")}
+                OMIT content, embedding, next_embedding
+                FROM (SELECT VALUE in FROM artifact WHERE out = $id)
+                {f"WHERE {where}" if where else ""}
+                ORDER BY {order}
+                {"LIMIT $limit" if limit is not None else ""}
+                """,
+                {"id": ensure_record_id(self.id), "limit": limit, **params},
             )
-            return [Note(**src["note"]) for src in srcs] if srcs else []
+            return [Note.from_row(src, {"content"}) for src in srcs] if srcs else []
         except Exception as e:
             logger.error(f"Error fetching notes for notebook {self.id}: {str(e)}")
             logger.exception(e)
             raise DatabaseOperationError(e)
 
-    async def get_chat_sessions(self) -> List["ChatSession"]:
+    async def get_chat_sessions(
+        self, limit: Optional[int] = None, cursor: Optional[str] = None
+    ) -> List["ChatSession"]:
+        """
+        Get the notebook's chat sessions, most recently updated first.
+
+        Args:
+            limit: Return one page of at most this many sessions
+            cursor: Continue after the page this cursor was issued for
+        """
         if self.id is None:
             raise InvalidInputError("Cannot get chat sessions for notebook without ID")
+        where, order, params = keyset_clauses("updated", "desc", cursor)
         try:
             srcs = await repo_query(
-                """
-                select * from (
-                    select
-                    <- chat_session as chat_session
-                    from refers_to
-                    where out=$id
-                    fetch chat_session
-                )
-                order by chat_session.updated desc
-            """,
-                {"id": ensure_record_id(self.id)},
-            )
-            return (
-                [ChatSession(**src["chat_session"][0]) for src in srcs] if srcs else []
+                f"""
+                SELECT *, {cursor_projection("updated")}
+                FROM (SELECT VALUE in FROM refers_to WHERE out = $id)
+                {f"WHERE {where}" if where else ""}
+                ORDER BY {order}
+                {"LIMIT $limit" if limit is not None else ""}
+                """,
+                {"id": ensure_record_id(self.id), "limit": limit, **params},
             )
+            return [ChatSession.from_row(src) for src in srcs] if srcs else []
         except Exception as e:
             logger.error(
                 f"Error fetching chat sessions for notebook {self.id}: {str(e)}"
@@ -122,6 +143,10 @@ class SourceInsight(ObjectModel):
     table_name: ClassVar[str] = "source_insight"
     insight_type: str
     content: str
+    token_count: Optional[int] = None
+
+    def get_token_count_content(self) -> Optional[str]:
+        return self.content
 
     async def get_source(self) -> "Source":
         if self.id is None:
@@ -151,12 +176,43 @@ class SourceInsight(ObjectModel):
         return note
 
 
+async def delete_unreferenced_blobs(refs: List[Optional[str]]) -> int:
+    """
+    Delete the blobs of refs that no source row points at any more.
+
+    Blobs are content-addressed and shared by sources with the same text, so
+    one is only deleted once its last source is deleted or moved off it.
+    Blobs written or reused within blob_store.GRACE_SECONDS are kept, as a
+    save may be about to point a source at them; the store_source_texts
+    command sweeps them up later.
+    """
+    candidates = {ref for ref in refs if ref}
+    if not candidates:
+        return 0
+    in_use = await repo_query(
+        "SELECT VALUE full_text_ref FROM source WHERE full_text_ref IN $refs",
+        {"refs": sorted(candidates)},
+    )
+    deleted = 0
+    for ref in candidates - set(in_use):
+        if await asyncio.to_thread(
+            blob_store.delete, ref, blob_store.GRACE_SECONDS
+        ):
+            deleted += 1
+    return deleted
+
+
 class Source(ObjectModel):
     table_name: ClassVar[str] = "source"
     asset: Optional[Asset] = None
     title: Optional[str] = None
     topics: Optional[List[str]] = Field(default_factory=list)
     full_text: Optional[str] = None
+    token_count: Optional[int] = None  # Tokens in full_text
+    # Set when full_text lives in the blob store instead of the row
+    full_text_ref: Optional[str] = None
+    full_text_preview: Optional[str] = None
+    full_text_length: Optional[int] = None  # Characters in full_text
     command: Optional[Union[str, RecordID]] = Field(
         default=None, description="Link to surreal-commands processing job"
     )
@@ -164,6 +220,103 @@ class Source(ObjectModel):
     class Config:
         arbitrary_types_allowed = True
 
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        # Blob-stored text is read on demand, see load_fields()
+        if self.full_text is None and self.full_text_ref:
+            self._unloaded_fields.add("full_text")
+
+    async def load_fields(self, *fields: str) -> None:
+        """
+        Load fields that were left out when the object was fetched.
+
+        full_text is decompressed from the blob store when the source was
+        saved with blob storage.
+        """
+        names = set(fields or self._unloaded_fields)
+        if "full_text" in names and "full_text" in self._unloaded_fields:
+            if "full_text_ref" in self._unloaded_fields or not self.full_text_ref:
+                await super().load_fields("full_text", "full_text_ref")
+            if self.full_text is None and self.full_text_ref:
+                self.full_text = await asyncio.to_thread(
+                    blob_store.read_text, self.full_text_ref
+                )
+                self._unloaded_fields.discard("full_text")
+                self.model_post_init(None)
+                self._mark_clean(["full_text"])
+        names -= {"full_text", "full_text_ref"}
+        if names:
+            await super().load_fields(*names)
+
+    async def save(self) -> None:
+        changed = self._changed_fields()
+        # Unchanged text already in the configured storage is left alone
+        if self.full_text is not None:
+            if config.FULL_TEXT_STORAGE == "blob":
+                if changed is None or "full_text" in changed or not self.full_text_ref:
+                    await self._store_full_text_blob()
+            elif self.full_text_ref:
+                await self._store_full_text_inline()
+        await super().save()
+
+    async def delete(self) -> bool:
+        if self.id is not None and "full_text_ref" in self._unloaded_fields:
+            await super().load_fields("full_text_ref")
+        ref = self.full_text_ref
+        deleted = await super().delete()
+        await delete_unreferenced_blobs([ref])
+        return deleted
+
+    async def _store_full_text_blob(self) -> None:
+        """Write full_text to the blob store and point the row at it."""
+        text = self.full_text or ""
+        ref = await asyncio.to_thread(blob_store.put_text, text)
+        if ref == self.full_text_ref:
+            return
+        old_ref = self.full_text_ref
+        self.full_text_ref = ref
+        self.full_text_preview = text[: config.FULL_TEXT_PREVIEW_CHARS]
+        self.full_text_length = len(text)
+        if self.id is not None:
+            # Swap the inline text for the reference in one statement
+            await repo_query(
+                """
+                UPDATE $id SET
+                    full_text = NONE,
+                    full_text_ref = $ref,
+                    full_text_preview = $preview,
+                    full_text_length = $length
+                RETURN NONE
+                """,
+                {
+                    "id": ensure_record_id(self.id),
+                    "ref": ref,
+                    "preview": self.full_text_preview,
+                    "length": self.full_text_length,
+                },
+            )
+            await delete_unreferenced_blobs([old_ref])
+
+    async def _store_full_text_inline(self) -> None:
+        """Drop the blob reference so full_text is saved in the row again."""
+        old_ref = self.full_text_ref
+        self.full_text_ref = None
+        self.full_text_preview = None
+        self.full_text_length = None
+        if self.id is not None:
+            await repo_query(
+                """
+                UPDATE $id SET
+                    full_text = $full_text,
+                    full_text_ref = NONE,
+                    full_text_preview = NONE,
+                    full_text_length = NONE
+                RETURN NONE
+                """,
+                {"id": ensure_record_id(self.id), "full_text": self.full_text},
+            )
+            await delete_unreferenced_blobs([old_ref])
+
     @field_validator("command", mode="before")
     @classmethod
     def parse_command(cls, value):
@@ -208,27 +361,39 @@ class Source(ObjectModel):
             if not status_result:
                 return None
 
-            # Extract execution metadata if available
-            result = getattr(status_result, "result", None)
-            execution_metadata = result.get("execution_metadata", {}) if isinstance(result, dict) else {}
-
-            return {
-                "status": status_result.status,
-                "started_at": execution_metadata.get("started_at"),
-                "completed_at": execution_metadata.get("completed_at"),
-                "error": getattr(status_result, "error_message", None),
-                "result": result,
-            }
+            return self.command_progress(
+                {
+                    "status": status_result.status,
+                    "result": getattr(status_result, "result", None),
+                    "error_message": getattr(status_result, "error_message", None),
+                }
+            )
         except Exception as e:
             logger.warning(f"Failed to get command progress for {self.command}: {e}")
             return None
 
+    @staticmethod
+    def command_progress(command: Dict[str, Any]) -> Dict[str, Any]:
+        """Processing information from a command's status, result and error_message."""
+        # Extract execution metadata if available
+        result = command.get("result")
+        execution_metadata = result.get("execution_metadata", {}) if isinstance(result, dict) else {}
+
+        return {
+            "status": command.get("status"),
+            "started_at": execution_metadata.get("started_at"),
+            "completed_at": execution_metadata.get("completed_at"),
+            "error": command.get("error_message"),
+            "result": result,
+        }
+
     async def get_context(
         self, context_size: Literal["short", "long"] = "short"
     ) -> Dict[str, Any]:
         insights_list = await self.get_insights()
         insights = [insight.model_dump() for insight in insights_list]
         if context_size == "long":
+            await self.load_fields("full_text")
             return dict(
                 id=self.id,
                 title=self.title,
@@ -238,6 +403,33 @@ class Source(ObjectModel):
         else:
             return dict(id=self.id, title=self.title, insights=insights)
 
+    def context_field_tokens(self, context: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Token count of each field of a get_context() result.
+
+        Uses the stored counts of the full text and insights, so large sources
+        are not re-tokenized on every context build.
+        """
+        tokens = {
+            "title": token_count(context["title"]) if context.get("title") else 0,
+            "insights": sum(
+                insight["token_count"]
+                if insight.get("token_count") is not None
+                else token_count(insight.get("content") or "")
+                for insight in context.get("insights", [])
+            ),
+        }
+        if context.get("full_text"):
+            tokens["full_text"] = (
+                self.token_count
+                if self.token_count is not None
+                else token_count(context["full_text"])
+            )
+        return tokens
+
+    def get_token_count_content(self) -> Optional[str]:
+        return self.full_text
+
     async def get_embedded_chunks(self) -> int:
         if self.id is None:
             raise InvalidInputError("Cannot get embedded chunks for source without ID")
@@ -262,7 +454,7 @@ class Source(ObjectModel):
         try:
             result = await repo_query(
                 """
-                SELECT * FROM source_insight WHERE source=$id
+                SELECT * OMIT embedding, next_embedding FROM source_insight WHERE source=$id
                 """,
                 {"id": ensure_record_id(self.id)},
             )
@@ -277,7 +469,7 @@ class Source(ObjectModel):
             raise InvalidInputError("Notebook ID must be provided")
         return await self.relate("reference", notebook_id)
 
-    async def vectorize(self) -> str:
+    async def vectorize(self, embedding_model_id: Optional[str] = None) -> str:
         """
         Submit vectorization as a background job using the vectorize_source command.
 
@@ -285,6 +477,10 @@ class Source(ObjectModel):
         pool exhaustion when processing large documents. The actual chunk processing
         happens in the background worker pool, with natural concurrency control.
 
+        Args:
+            embedding_model_id: Only (re)build the chunks of this model, leaving
+                chunks from other models in place (embedding migration backfill)
+
         Returns:
             str: The command/job ID that can be used to track progress via the commands API
 
@@ -295,7 +491,7 @@ class Source(ObjectModel):
         logger.info(f"Submitting vectorization job for source {self.id}")
 
         try:
-            if not self.full_text:
+            if not self.full_text and not self.full_text_ref:
                 raise ValueError(f"Source {self.id} has no text to vectorize")
 
             # Submit the vectorize_source command which will:
@@ -307,7 +503,9 @@ class Source(ObjectModel):
                 "vectorize_source",   # command name
                 {
                     "source_id": str(self.id),
-                }
+                    "embedding_model_id": embedding_model_id,
+                },
+                tenant_context(self.user_id, self.team_id),
             )
 
             command_id_str = str(command_id)
@@ -326,7 +524,10 @@ class Source(ObjectModel):
     async def add_insight(self, insight_type: str, content: str) -> Any:
         if self.id is None:
             raise InvalidInputError("Cannot add insight to source without ID")
-        EMBEDDING_MODEL = await model_manager.get_embedding_model()
+        (
+            embedding_model_id,
+            EMBEDDING_MODEL,
+        ) = await model_manager.get_embedding_model_with_id()
         if not EMBEDDING_MODEL:
             logger.warning("No embedding model found. Insight will not be searchable.")
 
@@ -337,32 +538,35 @@ class Source(ObjectModel):
                 (await EMBEDDING_MODEL.aembed([content]))[0] if EMBEDDING_MODEL else []
             )
             return await repo_query(
-                """
-                CREATE source_insight CONTENT {
-                        "source": $source_id,
-                        "insight_type": $insight_type,
-                        "content": $content,
-                        "embedding": $embedding,
-                };""",
+                "CREATE source_insight CONTENT $data;",
                 {
-                    "source_id": ensure_record_id(self.id),
-                    "insight_type": insight_type,
-                    "content": content,
-                    "embedding": embedding,
+                    "data": {
+                        "source": ensure_record_id(self.id),
+                        "insight_type": insight_type,
+                        "content": content,
+                        "token_count": token_count(content),
+                        "embedding": embedding,
+                        **embedding_metadata(embedding_model_id, embedding),
+                        **await self._shadow_embedding(content),
+                    }
                 },
             )
         except Exception as e:
             logger.error(f"Error adding insight to source {self.id}: {str(e)}")
             raise  # DatabaseOperationError(e)
 
-    def _prepare_save_data(self) -> dict:
+    def _prepare_save_data(self, fields: Optional[Set[str]] = None) -> dict:
         """Override to ensure command field is always RecordID format for database"""
-        data = super()._prepare_save_data()
+        data = super()._prepare_save_data(fields)
 
         # Ensure command field is RecordID format if not None
         if data.get("command") is not None:
             data["command"] = ensure_record_id(data["command"])
 
+        # Blob-stored text is not written to the row
+        if self.full_text_ref:
+            data.pop("full_text", None)
+
         return data
 
 
@@ -371,6 +575,7 @@ class Note(ObjectModel):
     title: Optional[str] = None
     note_type: Optional[Literal["human", "ai"]] = None
     content: Optional[str] = None
+    token_count: Optional[int] = None
 
     @field_validator("content")
     @classmethod
@@ -396,12 +601,25 @@ class Note(ObjectModel):
                 content=self.content[:100] if self.content else None,
             )
 
+    def context_field_tokens(self, context: Dict[str, Any]) -> Dict[str, int]:
+        """Token count of each field of a get_context() result, using the stored count."""
+        content = context.get("content") or ""
+        return {
+            "title": token_count(context["title"]) if context.get("title") else 0,
+            "content": self.token_count
+            if content == self.content and self.token_count is not None
+            else token_count(content),
+        }
+
     def needs_embedding(self) -> bool:
         return True
 
     def get_embedding_content(self) -> Optional[str]:
         return self.content
 
+    def get_token_count_content(self) -> Optional[str]:
+        return self.content
+
 
 class ChatSession(ObjectModel):
     table_name: ClassVar[str] = "chat_session"
@@ -487,13 +705,16 @@ async def vector_search(
     if not keyword:
         raise InvalidInputError("Search keyword cannot be empty")
     try:
-        EMBEDDING_MODEL = await model_manager.get_embedding_model()
+        (
+            embedding_model_id,
+            EMBEDDING_MODEL,
+        ) = await model_manager.get_embedding_model_with_id()
         if EMBEDDING_MODEL is None:
             raise ValueError("EMBEDDING_MODEL is not configured")
         embed = (await EMBEDDING_MODEL.aembed([keyword]))[0]
         search_results = await repo_query(
             """
-            SELECT * FROM fn::vector_search($embed, $results, $source, $note, $minimum_score, $user_id, $team_id);
+            SELECT * FROM fn::vector_search($embed, $results, $source, $note, $minimum_score, $user_id, $team_id, $embedding_model);
             """,
             {
                 "embed": embed,
@@ -503,6 +724,7 @@ async def vector_search(
                 "minimum_score": minimum_score,
                 "user_id": user_id,
                 "team_id": team_id,
+                "embedding_model": embedding_model_id,
             },
         )
         return search_results
@@ -510,3 +732,82 @@ async def vector_search(
         logger.error(f"Error performing vector search: {str(e)}")
         logger.exception(e)
         raise DatabaseOperationError(e)
+
+
+async def search_source_chunks(
+    question: str,
+    source_ids: List[str],
+    top_k: int = 20,
+    minimum_score: float = 0.2,
+) -> List[Dict[str, Any]]:
+    """
+    Find the source chunks most similar to a question within a set of sources.
+
+    Args:
+        question: Text to embed and compare against the chunks
+        source_ids: Sources to search in
+        top_k: Maximum number of chunks to return
+        minimum_score: Minimum similarity score threshold
+
+    Returns:
+        Chunks ordered by similarity, each with id, source, title, order,
+        content, token_count (None for chunks embedded before it was stored)
+        and similarity
+    """
+    if not question:
+        raise InvalidInputError("Question cannot be empty")
+    if not source_ids:
+        return []
+    try:
+        (
+            embedding_model_id,
+            EMBEDDING_MODEL,
+        ) = await model_manager.get_embedding_model_with_id()
+        if EMBEDDING_MODEL is None:
+            raise ValueError("EMBEDDING_MODEL is not configured")
+        embed = (await EMBEDDING_MODEL.aembed([question]))[0]
+        # Unstamped legacy vectors are only trusted until the current model
+        # has written vectors of its own, as in fn::vector_search
+        stamped = await repo_query(
+            "SELECT VALUE id FROM source_embedding WHERE embedding_model = $embedding_model LIMIT 1",
+            {"embedding_model": embedding_model_id},
+        )
+        return await repo_query(
+            """
+            SELECT
+                id,
+                source,
+                source.title AS title,
+                order,
+                content,
+                token_count,
+                vector::similarity::cosine(embedding, $embed) AS similarity
+            FROM source_embedding
+            WHERE source IN $source_ids
+                AND embedding != none
+                AND (
+                    embedding_model = $embedding_model
+                    OR (
+                        $legacy
+                        AND embedding_model = none
+                        AND embedding_dim = $query_dim
+                    )
+                )
+                AND vector::similarity::cosine(embedding, $embed) >= $minimum_score
+            ORDER BY similarity DESC
+            LIMIT $top_k
+            """,
+            {
+                "embed": embed,
+                "source_ids": [ensure_record_id(sid) for sid in source_ids],
+                "embedding_model": embedding_model_id,
+                "legacy": not stamped,
+                "query_dim": len(embed),
+                "minimum_score": minimum_score,
+                "top_k": top_k,
+            },
+        )
+    except Exception as e:
+        logger.error(f"Error searching source chunks: {str(e)}")
+        logger.exception(e)
+        raise DatabaseOperationError(e)
@@ -0,0 +1,550 @@
+"""
+LangGraph checkpointers shared by the chat graphs, selected by
+LANGGRAPH_CHECKPOINTER.
+
+"sqlite" (the default) keeps checkpoints in LANGGRAPH_CHECKPOINT_FILE,
+accessed through one SQLite connection per thread in WAL mode with a busy
+timeout, so readers never wait for writers and concurrent writers queue
+instead of failing. The async methods run the same code in worker threads,
+which keeps the event loop free while SQLite works.
+
+"surrealdb" keeps them in the langgraph_checkpoint and langgraph_write
+tables, over the repository's connections, so every API replica sees every
+chat session. It is async only, which is how the graphs are run.
+
+Every save prunes the thread to its latest LANGGRAPH_CHECKPOINT_RETENTION
+checkpoints, so a session's history does not grow with its age. Existing
+threads are pruned, and SQLite's freed space returned to the filesystem, by
+acompact(), run from the compact_checkpoints command.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    PendingWrite,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.sqlite import SqliteSaver
+from loguru import logger
+from surrealdb import RecordID  # type: ignore
+
+from open_notebook.config import LANGGRAPH_CHECKPOINT_FILE, LANGGRAPH_CHECKPOINTER
+from open_notebook.database.repository import QueryBatch, repo_query
+
+DEFAULT_RETENTION = 10
+BUSY_TIMEOUT_SECONDS = 30.0
+
+
+def checkpoint_retention() -> int:
+    """Checkpoints kept per thread; 0 keeps all of them."""
+    try:
+        return max(int(os.getenv("LANGGRAPH_CHECKPOINT_RETENTION", DEFAULT_RETENTION)), 0)
+    except ValueError:
+        logger.warning("Ignoring invalid LANGGRAPH_CHECKPOINT_RETENTION")
+        return DEFAULT_RETENTION
+
+
+class SqliteCheckpointer(BaseCheckpointSaver):
+    """SqliteSaver with per-thread WAL connections, async methods and retention."""
+
+    def __init__(self, path: str, retention: int = DEFAULT_RETENTION):
+        super().__init__()
+        self.path = path
+        self.retention = retention
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+    def _saver(self) -> SqliteSaver:
+        """This thread's SqliteSaver, on its own connection."""
+        saver = getattr(self._local, "saver", None)
+        if saver is None:
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, timeout=BUSY_TIMEOUT_SECONDS
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT_SECONDS * 1000)}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            saver = SqliteSaver(conn, serde=self.serde)
+            saver.setup()
+            self._local.saver = saver
+            with self._connections_lock:
+                self._connections.append(conn)
+        return saver
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    # Sync API, delegated to this thread's saver
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self._saver().get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self._saver().list(config, filter=filter, before=before, limit=limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saver = self._saver()
+        saved = saver.put(config, checkpoint, metadata, new_versions)
+        if self.retention:
+            configurable = saved["configurable"]
+            with saver.cursor() as cur:
+                self._prune(
+                    cur,
+                    configurable["thread_id"],
+                    configurable.get("checkpoint_ns", ""),
+                    self.retention,
+                )
+        return saved
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self._saver().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._saver().delete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Same version format as the checkpoints SqliteSaver already wrote
+        return self._saver().get_next_version(current, channel)
+
+    # Async API: the sync calls in worker threads, each with its connection
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: [*self.list(config, filter=filter, before=before, limit=limit)]
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # Retention and compaction
+
+    @staticmethod
+    def _prune(cur: sqlite3.Cursor, thread_id: str, checkpoint_ns: str, keep: int) -> int:
+        """Delete all but the latest keep checkpoints of a thread, and their writes."""
+        cur.execute(
+            """
+            DELETE FROM checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                SELECT checkpoint_id FROM checkpoints
+                WHERE thread_id = ? AND checkpoint_ns = ?
+                ORDER BY checkpoint_id DESC LIMIT ?
+            )
+            """,
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns, keep),
+        )
+        deleted = cur.rowcount
+        if deleted:
+            cur.execute(
+                """
+                DELETE FROM writes
+                WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                    SELECT checkpoint_id FROM checkpoints
+                    WHERE thread_id = ? AND checkpoint_ns = ?
+                )
+                """,
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+            )
+        return deleted
+
+    def size(self) -> int:
+        """Bytes on disk, including the WAL not yet checkpointed into the file."""
+        return sum(
+            os.path.getsize(path)
+            for path in (self.path, f"{self.path}-wal")
+            if os.path.exists(path)
+        )
+
+    def compact(self, retention: Optional[int] = None, vacuum: bool = True) -> Dict[str, Any]:
+        """
+        Prune every thread to the latest retention checkpoints (checkpoints
+        saved before retention was enabled, or under a larger one), then
+        VACUUM to give the freed pages back and truncate the WAL.
+        """
+        keep = self.retention if retention is None else retention
+        saver = self._saver()
+        size_before = self.size()
+        pruned = 0
+        with saver.cursor() as cur:
+            threads = cur.execute(
+                "SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints"
+            ).fetchall()
+            if keep:
+                for thread_id, checkpoint_ns in threads:
+                    pruned += self._prune(cur, thread_id, checkpoint_ns, keep)
+        if vacuum:
+            with saver.lock:
+                saver.conn.execute("VACUUM")
+                saver.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            "threads": len(threads),
+            "checkpoints_deleted": pruned,
+            "size_before": size_before,
+            "size_after": self.size(),
+        }
+
+    async def acompact(
+        self, retention: Optional[int] = None, vacuum: bool = True
+    ) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.compact, retention, vacuum)
+
+
+def _thread_config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
+
+
+class SurrealCheckpointer(BaseCheckpointSaver):
+    """
+    Checkpoints and pending writes in SurrealDB (migration 19), one row each.
+
+    Rows are keyed [thread_id, checkpoint_ns, checkpoint_id] so saving twice
+    is harmless. Metadata is stored as JSON text, as SqliteSaver does, and
+    alist() filters on it after loading.
+    """
+
+    CHECKPOINT_FIELDS = (
+        "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata"
+    )
+    WRITES_QUERY = """
+        SELECT task_id, task_path, idx, channel, type, value FROM langgraph_write
+        WHERE thread_id = $thread_id AND checkpoint_ns = $checkpoint_ns
+            AND checkpoint_id = $checkpoint_id
+        ORDER BY task_path, task_id, idx
+    """
+
+    def __init__(self, retention: int = DEFAULT_RETENTION):
+        super().__init__()
+        self.retention = retention
+
+    def _tuple(self, row: Dict[str, Any], writes: List[Dict[str, Any]]) -> CheckpointTuple:
+        thread_id, checkpoint_ns = row["thread_id"], row["checkpoint_ns"]
+        pending_writes: List[PendingWrite] = [
+            (
+                write["task_id"],
+                write["channel"],
+                self.serde.loads_typed((write["type"], write["value"])),
+            )
+            for write in writes
+        ]
+        return CheckpointTuple(
+            _thread_config(thread_id, checkpoint_ns, row["checkpoint_id"]),
+            self.serde.loads_typed((row["type"], row["checkpoint"])),
+            json.loads(row["metadata"]),
+            (
+                _thread_config(thread_id, checkpoint_ns, row["parent_checkpoint_id"])
+                if row.get("parent_checkpoint_id")
+                else None
+            ),
+            pending_writes,
+        )
+
+    async def _writes(self, row: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return await repo_query(
+            self.WRITES_QUERY,
+            {
+                "thread_id": row["thread_id"],
+                "checkpoint_ns": row["checkpoint_ns"],
+                "checkpoint_id": row["checkpoint_id"],
+            },
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        params = {
+            "thread_id": str(configurable["thread_id"]),
+            "checkpoint_ns": configurable.get("checkpoint_ns", ""),
+        }
+        if checkpoint_id := get_checkpoint_id(config):
+            # The checkpoint and its writes in one round trip
+            params["checkpoint_id"] = checkpoint_id
+            batch = QueryBatch()
+            batch.add(
+                f"""
+                SELECT {self.CHECKPOINT_FIELDS} FROM langgraph_checkpoint
+                WHERE thread_id = $thread_id AND checkpoint_ns = $checkpoint_ns
+                    AND checkpoint_id = $checkpoint_id
+                """,
+                params,
+            )
+            batch.add(self.WRITES_QUERY, params)
+            rows, writes = await batch.execute()
+            return self._tuple(rows[0], writes) if rows else None
+
+        rows = await repo_query(
+            f"""
+            SELECT {self.CHECKPOINT_FIELDS} FROM langgraph_checkpoint
+            WHERE thread_id = $thread_id AND checkpoint_ns = $checkpoint_ns
+            ORDER BY checkpoint_id DESC LIMIT 1
+            """,
+            params,
+        )
+        return self._tuple(rows[0], await self._writes(rows[0])) if rows else None
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        conditions = []
+        params: Dict[str, Any] = {}
+        if config is not None:
+            configurable = config["configurable"]
+            conditions.append("thread_id = $thread_id")
+            params["thread_id"] = str(configurable["thread_id"])
+            if (checkpoint_ns := configurable.get("checkpoint_ns")) is not None:
+                conditions.append("checkpoint_ns = $checkpoint_ns")
+                params["checkpoint_ns"] = checkpoint_ns
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = $checkpoint_id")
+                params["checkpoint_id"] = checkpoint_id
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < $before")
+            params["before"] = before_id
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # With a metadata filter the limit applies after filtering, below
+        limit_clause = ""
+        if limit is not None and not filter:
+            limit_clause = "LIMIT $limit"
+            params["limit"] = limit
+        rows = await repo_query(
+            f"""
+            SELECT {self.CHECKPOINT_FIELDS} FROM langgraph_checkpoint {where}
+            ORDER BY checkpoint_id DESC {limit_clause}
+            """,
+            params,
+        )
+
+        returned = 0
+        for row in rows:
+            if limit is not None and returned >= limit:
+                return
+            metadata = json.loads(row["metadata"])
+            if filter and any(metadata.get(key) != value for key, value in filter.items()):
+                continue
+            returned += 1
+            yield self._tuple(row, await self._writes(row))
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        batch = QueryBatch()
+        batch.add(
+            "UPSERT $id CONTENT $data RETURN NONE",
+            {
+                "id": RecordID(
+                    "langgraph_checkpoint", [thread_id, checkpoint_ns, checkpoint["id"]]
+                ),
+                "data": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint["id"],
+                    "parent_checkpoint_id": configurable.get("checkpoint_id"),
+                    "type": type_,
+                    "checkpoint": serialized,
+                    "metadata": json.dumps(
+                        get_checkpoint_metadata(config, metadata), ensure_ascii=False
+                    ),
+                },
+            },
+        )
+        if self.retention:
+            self._add_prune(batch, thread_id, checkpoint_ns, self.retention)
+        await batch.execute()
+        return _thread_config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = str(configurable["checkpoint_ns"])
+        checkpoint_id = str(configurable["checkpoint_id"])
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized = self.serde.dumps_typed(value)
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            rows.append(
+                {
+                    "id": RecordID(
+                        "langgraph_write",
+                        [thread_id, checkpoint_ns, checkpoint_id, task_id, idx],
+                    ),
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                    "task_id": task_id,
+                    "task_path": task_path,
+                    "idx": idx,
+                    "channel": channel,
+                    "type": type_,
+                    "value": serialized,
+                }
+            )
+        # Special writes (errors, interrupts) replace earlier ones, others are kept
+        if all(channel in WRITES_IDX_MAP for channel, _ in writes):
+            query = "FOR $row IN $rows { UPSERT $row.id CONTENT $row RETURN NONE; };"
+        else:
+            query = "INSERT IGNORE INTO langgraph_write $rows RETURN NONE;"
+        await repo_query(query, {"rows": rows})
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        batch = QueryBatch()
+        for table in ("langgraph_checkpoint", "langgraph_write"):
+            batch.add(
+                f"DELETE {table} WHERE thread_id = $thread_id", {"thread_id": str(thread_id)}
+            )
+        await batch.execute()
+
+    # Retention and compaction
+
+    @staticmethod
+    def _add_prune(batch: QueryBatch, thread_id: str, checkpoint_ns: str, keep: int) -> int:
+        """
+        Queue deleting all but the latest keep checkpoints of a thread, and
+        their writes. The result is the number of checkpoints deleted.
+        """
+        # One block, so it is one statement of the batch
+        return batch.add(
+            """
+            {
+                LET $kept = (
+                    SELECT VALUE checkpoint_id FROM langgraph_checkpoint
+                    WHERE thread_id = $thread_id AND checkpoint_ns = $checkpoint_ns
+                    ORDER BY checkpoint_id DESC LIMIT $keep
+                );
+                DELETE langgraph_write
+                WHERE thread_id = $thread_id AND checkpoint_ns = $checkpoint_ns
+                    AND checkpoint_id NOTINSIDE $kept;
+                RETURN array::len((
+                    DELETE langgraph_checkpoint
+                    WHERE thread_id = $thread_id AND checkpoint_ns = $checkpoint_ns
+                        AND checkpoint_id NOTINSIDE $kept
+                    RETURN BEFORE
+                ));
+            }
+            """,
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "keep": keep},
+        )
+
+    async def acompact(
+        self, retention: Optional[int] = None, vacuum: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Prune every thread to the latest retention checkpoints. SurrealDB
+        manages its own storage, so there is nothing to vacuum.
+        """
+        keep = self.retention if retention is None else retention
+        threads = await repo_query(
+            """
+            SELECT thread_id, checkpoint_ns FROM langgraph_checkpoint
+            GROUP BY thread_id, checkpoint_ns
+            """
+        )
+        pruned = 0
+        if keep:
+            for thread in threads:
+                batch = QueryBatch()
+                self._add_prune(batch, thread["thread_id"], thread["checkpoint_ns"], keep)
+                (deleted,) = await batch.execute()
+                pruned += deleted or 0
+        return {"threads": len(threads), "checkpoints_deleted": pruned}
+
+
+@lru_cache(maxsize=1)
+def get_checkpointer() -> BaseCheckpointSaver:
+    """The checkpointer both chat graphs compile with."""
+    if LANGGRAPH_CHECKPOINTER == "surrealdb":
+        return SurrealCheckpointer(checkpoint_retention())
+    if LANGGRAPH_CHECKPOINTER != "sqlite":
+        raise ValueError(
+            f"Unknown LANGGRAPH_CHECKPOINTER {LANGGRAPH_CHECKPOINTER!r}; use sqlite or surrealdb"
+        )
+    return SqliteCheckpointer(LANGGRAPH_CHECKPOINT_FILE, checkpoint_retention())
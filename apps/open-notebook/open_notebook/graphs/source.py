@@ -116,6 +116,7 @@ def trigger_transformations(state: SourceState, config: RunnableConfig) -> List[
 
 async def transform_content(state: TransformationState) -> Optional[dict]:
     source = state["source"]
+    await source.load_fields("full_text")
     content = source.full_text
     if not content:
         return None
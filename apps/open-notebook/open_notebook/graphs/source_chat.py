@@ -1,21 +1,21 @@
-import asyncio
-import sqlite3
 from typing import Annotated, Dict, List, Optional
 
 from ai_prompter import Prompter
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
-from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from typing_extensions import TypedDict
 
-from open_notebook.config import LANGGRAPH_CHECKPOINT_FILE
 from open_notebook.domain.notebook import Source, SourceInsight
+from open_notebook.graphs.checkpoint import get_checkpointer
 from open_notebook.graphs.utils import provision_langchain_model
-from open_notebook.utils import clean_thinking_content
+from open_notebook.utils import clean_thinking_content, truncate_to_tokens
 from open_notebook.utils.context_builder import ContextBuilder
 
+# Token budget for a source's full text when it is included verbatim
+SOURCE_TEXT_MAX_TOKENS = 1500
+
 
 class SourceChatState(TypedDict):
     messages: Annotated[list, add_messages]
@@ -27,7 +27,7 @@ class SourceChatState(TypedDict):
     context_indicators: Optional[Dict[str, List[str]]]
 
 
-def call_model_with_source_context(
+async def call_model_with_source_context(
     state: SourceChatState, config: RunnableConfig
 ) -> dict:
     """
@@ -43,36 +43,25 @@ def call_model_with_source_context(
     if not source_id:
         raise ValueError("source_id is required in state")
 
-    # Build source context using ContextBuilder (run async code in new loop)
-    def build_context():
-        """Build context in a new event loop"""
-        new_loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(new_loop)
-            context_builder = ContextBuilder(
-                source_id=source_id,
-                include_insights=True,
-                include_notes=False,  # Focus on source-specific content
-                max_tokens=50000,  # Reasonable limit for source context
-            )
-            return new_loop.run_until_complete(context_builder.build())
-        finally:
-            new_loop.close()
-            asyncio.set_event_loop(None)
-
-    # Get the built context
-    try:
-        # Try to get the current event loop
-        asyncio.get_running_loop()
-        # If we're in an event loop, run in a thread with a new loop
-        import concurrent.futures
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(build_context)
-            context_data = future.result()
-    except RuntimeError:
-        # No event loop running, safe to create a new one
-        context_data = build_context()
+    # Retrieve the passages relevant to the latest question
+    question = next(
+        (
+            message.content
+            for message in reversed(state.get("messages", []))
+            if isinstance(message, HumanMessage) and isinstance(message.content, str)
+        ),
+        None,
+    )
+
+    # Build source context using ContextBuilder
+    context_builder = ContextBuilder(
+        source_id=source_id,
+        include_insights=True,
+        include_notes=False,  # Focus on source-specific content
+        max_tokens=50000,  # Reasonable limit for source context
+        query=question,
+    )
+    context_data = await context_builder.build()
 
     # Extract source and insights from context
     source = None
@@ -113,47 +102,14 @@ def call_model_with_source_context(
     system_prompt = Prompter(prompt_template="source_chat").render(data=prompt_data)
     payload = [SystemMessage(content=system_prompt)] + state.get("messages", [])
 
-    # Handle async model provisioning from sync context
-    def run_in_new_loop():
-        """Run the async function in a new event loop"""
-        new_loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(new_loop)
-            return new_loop.run_until_complete(
-                provision_langchain_model(
-                    str(payload),
-                    config.get("configurable", {}).get("model_id")
-                    or state.get("model_override"),
-                    "chat",
-                    max_tokens=8192,
-                )
-            )
-        finally:
-            new_loop.close()
-            asyncio.set_event_loop(None)
-
-    try:
-        # Try to get the current event loop
-        asyncio.get_running_loop()
-        # If we're in an event loop, run in a thread with a new loop
-        import concurrent.futures
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(run_in_new_loop)
-            model = future.result()
-    except RuntimeError:
-        # No event loop running, safe to use asyncio.run()
-        model = asyncio.run(
-            provision_langchain_model(
-                str(payload),
-                config.get("configurable", {}).get("model_id")
-                or state.get("model_override"),
-                "chat",
-                max_tokens=8192,
-            )
-        )
+    model = await provision_langchain_model(
+        str(payload),
+        config.get("configurable", {}).get("model_id") or state.get("model_override"),
+        "chat",
+        max_tokens=8192,
+    )
 
-    ai_message = model.invoke(payload)
+    ai_message = await model.ainvoke(payload)
 
     # Clean thinking content from AI response (e.g., <think>...</think> tags)
     content = ai_message.content if isinstance(ai_message.content, str) else str(ai_message.content)
@@ -190,13 +146,23 @@ def _format_source_context(context_data: Dict) -> str:
                 context_parts.append(f"**Source ID:** {source.get('id', 'Unknown')}")
                 context_parts.append(f"**Title:** {source.get('title', 'No title')}")
                 if source.get("full_text"):
-                    # Truncate full text if too long
+                    # Trim full text at a sentence boundary if too long
                     full_text = source["full_text"]
-                    if len(full_text) > 5000:
-                        full_text = full_text[:5000] + "...\n[Content truncated]"
+                    trimmed = truncate_to_tokens(full_text, SOURCE_TEXT_MAX_TOKENS)
+                    if trimmed != full_text:
+                        full_text = trimmed + "\n[Content truncated]"
                     context_parts.append(f"**Content:**\n{full_text}")
                 context_parts.append("")  # Empty line for separation
 
+    # Add passages retrieved for the question
+    if context_data.get("chunks"):
+        context_parts.append("## RELEVANT PASSAGES")
+        for chunk in context_data["chunks"]:
+            if isinstance(chunk, dict):
+                context_parts.append(f"**Source ID:** {chunk.get('source_id', 'Unknown')}")
+                context_parts.append(f"**Passage:** {chunk.get('content', '')}")
+                context_parts.append("")  # Empty line for separation
+
     # Add insights
     if context_data.get("insights"):
         context_parts.append("## SOURCE INSIGHTS")
@@ -217,22 +183,16 @@ def _format_source_context(context_data: Dict) -> str:
         context_parts.append("## CONTEXT METADATA")
         context_parts.append(f"- Source count: {metadata.get('source_count', 0)}")
         context_parts.append(f"- Insight count: {metadata.get('insight_count', 0)}")
+        context_parts.append(f"- Passage count: {metadata.get('chunk_count', 0)}")
         context_parts.append(f"- Total tokens: {context_data.get('total_tokens', 0)}")
         context_parts.append("")
 
     return "\n".join(context_parts)
 
 
-# Create SQLite checkpointer
-conn = sqlite3.connect(
-    LANGGRAPH_CHECKPOINT_FILE,
-    check_same_thread=False,
-)
-memory = SqliteSaver(conn)
-
 # Create the StateGraph
 source_chat_state = StateGraph(SourceChatState)
 source_chat_state.add_node("source_chat_agent", call_model_with_source_context)
 source_chat_state.add_edge(START, "source_chat_agent")
 source_chat_state.add_edge("source_chat_agent", END)
-source_chat_graph = source_chat_state.compile(checkpointer=memory)
+source_chat_graph = source_chat_state.compile(checkpointer=get_checkpointer())
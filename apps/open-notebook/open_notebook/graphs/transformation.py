@@ -24,6 +24,7 @@ async def run_transformation(state: dict, config: RunnableConfig) -> dict:
     assert source or content, "No content to transform"
     transformation: Transformation = state["transformation"]
     if not content:
+        await source.load_fields("full_text")
         content = source.full_text
     transformation_template_text = transformation.prompt
     default_prompts: DefaultPrompts = DefaultPrompts(transformation_instructions=None)
@@ -1,11 +1,61 @@
+import time
+from typing import Any, Dict
+from uuid import UUID
+
 from esperanto import LanguageModel
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import LLMResult
 from loguru import logger
 
 from open_notebook.domain.models import model_manager
+from open_notebook.metrics import LLM_CALL_SECONDS, LLM_TOKENS
 from open_notebook.utils import token_count
 
 
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Records the latency and token usage of a chat model's calls."""
+
+    # Recording is a few dict operations, not worth a thread hop
+    run_inline = True
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized: Any, prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "ok")
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+        if not (input_tokens or output_tokens):
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+        if input_tokens:
+            LLM_TOKENS.inc(input_tokens, self.model_name, "input")
+        if output_tokens:
+            LLM_TOKENS.inc(output_tokens, self.model_name, "output")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "error")
+
+    def _finish(self, run_id: UUID, status: str) -> None:
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - start, self.model_name, status)
+
+
 async def provision_langchain_model(
     content, model_id, default_type, **kwargs
 ) -> BaseChatModel:
@@ -29,4 +79,14 @@ async def provision_langchain_model(
 
     logger.debug(f"Using model: {model}")
     assert isinstance(model, LanguageModel), f"Model is not a LanguageModel: {model}"
-    return model.to_langchain()
+    lc_model = model.to_langchain()
+    callbacks = lc_model.callbacks or []
+    # A callback manager set by the provider is left alone
+    if isinstance(callbacks, list) and not any(
+        isinstance(callback, LLMMetricsCallback) for callback in callbacks
+    ):
+        lc_model.callbacks = [
+            *callbacks,
+            LLMMetricsCallback(f"{model.provider}/{model.model_name}"),
+        ]
+    return lc_model
@@ -0,0 +1,22 @@
+"""
+Background job scheduling for Open Notebook.
+
+The worker entrypoint lives in open_notebook.jobs.worker and is imported
+explicitly to avoid pulling surreal-commands into every process.
+"""
+
+from .fair_scheduler import (
+    SYSTEM_TENANT,
+    FairScheduler,
+    QueuedJob,
+    tenant_context,
+    tenant_key,
+)
+
+__all__ = [
+    "FairScheduler",
+    "QueuedJob",
+    "SYSTEM_TENANT",
+    "tenant_context",
+    "tenant_key",
+]
@@ -0,0 +1,159 @@
+"""
+Per-tenant fair scheduling for the background command queue.
+
+Commands are grouped by owner (team or personal user, the same ownership stored
+on sources and notebooks) and dispatched round-robin across owners, so one
+tenant's bulk import cannot occupy the whole worker pool while others wait.
+"""
+
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+SYSTEM_TENANT = "system"
+
+# Global pool size is shared with the stock surreal-commands worker setting
+DEFAULT_MAX_TASKS = int(os.getenv("SURREAL_COMMANDS_MAX_TASKS", "5"))
+# How many of those slots a single tenant may occupy at once
+DEFAULT_TENANT_MAX_TASKS = int(os.getenv("TENANT_MAX_CONCURRENT_TASKS", "2"))
+
+
+def tenant_key(user_id: Optional[str] = None, team_id: Optional[str] = None) -> str:
+    """
+    Build the scheduling key for an owner.
+
+    Team ownership wins over personal ownership, mirroring get_ownership_context().
+    Records without ownership (legacy data, system jobs) share the system tenant.
+    """
+    if team_id:
+        return f"team:{team_id}"
+    if user_id:
+        return f"user:{user_id}"
+    return SYSTEM_TENANT
+
+
+def tenant_context(user_id: Optional[str] = None, team_id: Optional[str] = None) -> Dict[str, Any]:
+    """Command context payload that tags a submitted command with its tenant."""
+    return {"tenant": tenant_key(user_id, team_id)}
+
+
+@dataclass
+class QueuedJob:
+    """A command waiting for (or holding) a worker slot."""
+
+    command_id: str
+    command_name: str
+    args: Dict[str, Any]
+    tenant: str = SYSTEM_TENANT
+    context: Optional[Dict[str, Any]] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+
+
+class FairScheduler:
+    """
+    Round-robin dispatcher with a global and a per-tenant concurrency cap.
+
+    The scheduler holds no I/O: callers enqueue jobs, ask for the next runnable
+    job whenever a slot frees up, and report completion. Tenants that are at
+    their cap are skipped without losing their place in the rotation.
+    """
+
+    def __init__(
+        self,
+        max_tasks: int = DEFAULT_MAX_TASKS,
+        tenant_max_tasks: int = DEFAULT_TENANT_MAX_TASKS,
+        tenant_limits: Optional[Dict[str, int]] = None,
+    ):
+        if max_tasks < 1:
+            raise ValueError("max_tasks must be at least 1")
+        if tenant_max_tasks < 1:
+            raise ValueError("tenant_max_tasks must be at least 1")
+        self.max_tasks = max_tasks
+        self.tenant_max_tasks = tenant_max_tasks
+        self.tenant_limits: Dict[str, int] = dict(tenant_limits or {})
+
+        self._queues: Dict[str, Deque[QueuedJob]] = {}
+        self._ring: Deque[str] = deque()  # tenants with queued jobs, in turn order
+        self._running: Dict[str, Dict[str, QueuedJob]] = {}
+        self._completed: Dict[str, int] = {}
+
+    def limit_for(self, tenant: str) -> int:
+        """Concurrency cap for a tenant (explicit override or the default)."""
+        return self.tenant_limits.get(tenant, self.tenant_max_tasks)
+
+    @property
+    def running_count(self) -> int:
+        return sum(len(jobs) for jobs in self._running.values())
+
+    @property
+    def queued_count(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def enqueue(self, job: QueuedJob) -> None:
+        """Add a job to the back of its tenant's queue."""
+        queue = self._queues.get(job.tenant)
+        if queue is None:
+            queue = self._queues[job.tenant] = deque()
+        if not queue:
+            self._ring.append(job.tenant)
+        queue.append(job)
+
+    def next_job(self) -> Optional[QueuedJob]:
+        """
+        Pop the next runnable job, or None if the pool is full or every tenant
+        with queued work is at its cap.
+        """
+        if self.running_count >= self.max_tasks:
+            return None
+
+        for _ in range(len(self._ring)):
+            tenant = self._ring[0]
+            self._ring.rotate(-1)
+            if len(self._running.get(tenant, {})) >= self.limit_for(tenant):
+                continue
+
+            queue = self._queues[tenant]
+            job = queue.popleft()
+            if not queue:
+                # Tenant is drained; drop it from the rotation until it enqueues again
+                self._ring.remove(tenant)
+                del self._queues[tenant]
+
+            job.started_at = time.monotonic()
+            self._running.setdefault(tenant, {})[job.command_id] = job
+            return job
+
+        return None
+
+    def complete(self, job: QueuedJob) -> None:
+        """Release the slot held by a finished job."""
+        running = self._running.get(job.tenant)
+        if running is None or running.pop(job.command_id, None) is None:
+            return
+        if not running:
+            del self._running[job.tenant]
+        self._completed[job.tenant] = self._completed.get(job.tenant, 0) + 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-tenant queued/running counts for metrics and logging."""
+        now = time.monotonic()
+        tenants = set(self._queues) | set(self._running) | set(self._completed)
+        stats = []
+        for tenant in sorted(tenants):
+            queue = self._queues.get(tenant) or deque()
+            stats.append(
+                {
+                    "tenant": tenant,
+                    "queued": len(queue),
+                    "running": len(self._running.get(tenant, {})),
+                    "completed": self._completed.get(tenant, 0),
+                    "limit": self.limit_for(tenant),
+                    "oldest_wait_seconds": round(now - queue[0].enqueued_at, 3)
+                    if queue
+                    else 0.0,
+                }
+            )
+        return stats
@@ -0,0 +1,268 @@
+"""
+Fair-share command worker.
+
+Drop-in replacement for ``surreal-commands-worker`` that routes every queued
+command through a FairScheduler instead of a single FIFO semaphore. Commands are
+still executed by surreal-commands' own command service, so retries, status
+updates and results behave exactly as with the stock worker.
+
+Usage:
+    python -m open_notebook.jobs.worker --import-modules commands
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from open_notebook.jobs.fair_scheduler import (
+    DEFAULT_MAX_TASKS,
+    DEFAULT_TENANT_MAX_TASKS,
+    SYSTEM_TENANT,
+    FairScheduler,
+    QueuedJob,
+    tenant_key,
+)
+from open_notebook.loop_monitor import start_loop_monitor
+from open_notebook.metrics import (
+    COMMAND_QUEUE_WAIT_SECONDS,
+    COMMAND_RUN_SECONDS,
+    metrics_token,
+    start_metrics_server,
+)
+
+# Cache of source id -> tenant for commands submitted without a tenant tag
+_source_tenants: Dict[str, str] = {}
+_SOURCE_TENANT_CACHE_SIZE = 10_000
+
+
+def parse_tenant_limits(raw: Optional[str]) -> Dict[str, int]:
+    """
+    Parse per-tenant overrides such as ``team:abc=4,user:xyz=1``.
+
+    Malformed entries are logged and ignored rather than failing worker startup.
+    """
+    limits: Dict[str, int] = {}
+    if not raw:
+        return limits
+    for entry in raw.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        tenant, sep, value = entry.rpartition("=")
+        try:
+            if not sep or not tenant:
+                raise ValueError(entry)
+            limits[tenant.strip()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid tenant limit entry: {entry}")
+    return limits
+
+
+async def resolve_tenant(cmd: Dict[str, Any]) -> str:
+    """
+    Determine which tenant a queued command belongs to.
+
+    Commands submitted by the API carry ``context.tenant``. Older or internally
+    submitted commands fall back to the ownership of the source they operate on.
+    """
+    context = cmd.get("context") or {}
+    if isinstance(context, dict) and context.get("tenant"):
+        return str(context["tenant"])
+
+    args = cmd.get("args") or {}
+    source_id = args.get("source_id") if isinstance(args, dict) else None
+    if not source_id:
+        return SYSTEM_TENANT
+
+    source_id = str(source_id)
+    if source_id in _source_tenants:
+        return _source_tenants[source_id]
+
+    try:
+        from open_notebook.database.repository import ensure_record_id, repo_query
+
+        result = await repo_query(
+            "SELECT user_id, team_id FROM $id", {"id": ensure_record_id(source_id)}
+        )
+        owner = result[0] if result else {}
+        tenant = tenant_key(owner.get("user_id"), owner.get("team_id"))
+    except Exception as e:
+        logger.warning(f"Could not resolve tenant for source {source_id}: {e}")
+        return SYSTEM_TENANT
+
+    if len(_source_tenants) >= _SOURCE_TENANT_CACHE_SIZE:
+        _source_tenants.clear()
+    _source_tenants[source_id] = tenant
+    return tenant
+
+
+class FairWorker:
+    """Feeds queued commands into a FairScheduler and runs what it releases."""
+
+    def __init__(self, scheduler: FairScheduler, stats_interval: float = 60.0):
+        self.scheduler = scheduler
+        self.stats_interval = stats_interval
+        self._seen: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, cmd: Dict[str, Any]) -> None:
+        """Enqueue a command record (from the initial scan or a LIVE notification)."""
+        command_id = str(cmd["id"])
+        if command_id in self._seen:
+            return
+        self._seen.add(command_id)
+
+        job = QueuedJob(
+            command_id=command_id,
+            command_name=f"{cmd['app']}.{cmd['name']}",
+            args=cmd.get("args") or {},
+            context=cmd.get("context"),
+            tenant=await resolve_tenant(cmd),
+        )
+        self.scheduler.enqueue(job)
+        logger.debug(f"Queued {job.command_name} {job.command_id} for {job.tenant}")
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start as many jobs as the scheduler allows right now."""
+        while True:
+            job = self.scheduler.next_job()
+            if job is None:
+                return
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: QueuedJob) -> None:
+        from surreal_commands import command_service
+
+        if job.started_at is not None:
+            COMMAND_QUEUE_WAIT_SECONDS.observe(
+                job.started_at - job.enqueued_at, job.command_name
+            )
+        start = time.perf_counter()
+        status = "crashed"
+        try:
+            logger.info(f"Starting {job.command_name} {job.command_id} ({job.tenant})")
+            await command_service.execute_command(
+                job.command_id, job.command_name, job.args, job.context
+            )
+            status = "finished"
+        except Exception as e:
+            logger.error(f"Command {job.command_name} {job.command_id} crashed: {e}")
+        finally:
+            COMMAND_RUN_SECONDS.observe(
+                time.perf_counter() - start, job.command_name, status
+            )
+            self.scheduler.complete(job)
+            self._seen.discard(job.command_id)
+            self._dispatch()
+
+    async def _log_stats(self) -> None:
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            for row in self.scheduler.snapshot():
+                if row["queued"] or row["running"]:
+                    logger.info(
+                        f"Tenant {row['tenant']}: {row['running']}/{row['limit']} running, "
+                        f"{row['queued']} queued, oldest wait {row['oldest_wait_seconds']}s"
+                    )
+
+    async def listen(self) -> None:
+        """Process pending commands, then follow the queue via a LIVE query."""
+        from surreal_commands import db_connection
+
+        stats_task = asyncio.create_task(self._log_stats())
+        try:
+            async with db_connection() as db:
+                existing = await db.query(
+                    "SELECT * FROM command WHERE status = 'new' ORDER BY created ASC"
+                )
+                logger.info(f"Found {len(existing or [])} pending command(s)")
+                for cmd in existing or []:
+                    if isinstance(cmd, dict) and cmd.get("status") == "new":
+                        await self.submit(cmd)
+
+                query_uuid = await db.live("command", diff=True)
+                notifications = await db.subscribe_live(query_uuid)
+                async for cmd in notifications:
+                    try:
+                        if isinstance(cmd, dict) and cmd.get("status", "new") == "new":
+                            await self.submit(cmd)
+                    except Exception as e:
+                        logger.error(f"Error queueing command {cmd}: {e}")
+        finally:
+            stats_task.cancel()
+
+
+async def serve(worker: FairWorker) -> None:
+    """Run the worker with the event loop monitor watching its loop."""
+    loop_monitor = await start_loop_monitor()
+    try:
+        await worker.listen()
+    finally:
+        if loop_monitor:
+            await loop_monitor.stop()
+
+
+def import_command_modules(modules: List[str]) -> None:
+    """Import modules so their @command functions register with surreal-commands."""
+    import importlib
+    import sys
+
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    for module_name in modules:
+        importlib.import_module(module_name)
+        logger.info(f"Imported command module: {module_name}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Open Notebook fair-share worker")
+    parser.add_argument(
+        "--import-modules",
+        "-i",
+        default=os.getenv("SURREAL_COMMANDS_MODULES", "commands"),
+        help="Comma-separated list of modules that register commands",
+    )
+    parser.add_argument("--max-tasks", "-m", type=int, default=DEFAULT_MAX_TASKS)
+    parser.add_argument(
+        "--tenant-max-tasks", type=int, default=DEFAULT_TENANT_MAX_TASKS
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("WORKER_METRICS_PORT", "0")),
+        help="Serve Prometheus metrics at /metrics on this port (0 disables)",
+    )
+    args = parser.parse_args(argv)
+
+    import_command_modules(
+        [m.strip() for m in args.import_modules.split(",") if m.strip()]
+    )
+    scheduler = FairScheduler(
+        max_tasks=args.max_tasks,
+        tenant_max_tasks=args.tenant_max_tasks,
+        tenant_limits=parse_tenant_limits(os.getenv("TENANT_CONCURRENCY_LIMITS")),
+    )
+    if args.metrics_port:
+        if not metrics_token():
+            logger.warning("WORKER_METRICS_PORT is set but METRICS_TOKEN is not; scrapes get 404")
+        start_metrics_server(args.metrics_port)
+        logger.info(f"Serving worker metrics on :{args.metrics_port}/metrics")
+    logger.info(
+        f"Fair worker started: {scheduler.max_tasks} slots, "
+        f"{scheduler.tenant_max_tasks} per tenant"
+    )
+    try:
+        asyncio.run(serve(FairWorker(scheduler)))
+    except KeyboardInterrupt:
+        logger.info("Worker stopped by user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Event loop lag monitor and blocking call detector.
+
+A heartbeat task sleeps a short interval on the monitored loop and records
+how late it wakes up. A watchdog thread checks that the heartbeat keeps
+beating: when it has been silent for longer than the threshold, whatever
+the loop thread is executing right now is what blocks it, so the watchdog
+captures that stack, names the innermost frame in our own code as the
+location, and logs it. Once the loop runs again the stall is counted by
+location in the metrics.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from loguru import logger
+
+from open_notebook.metrics import (
+    EVENT_LOOP_BLOCKED_SECONDS,
+    EVENT_LOOP_BLOCKS,
+    EVENT_LOOP_LAG_SECONDS,
+)
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_THRESHOLD_MS = 250
+STACK_DEPTH = 40
+
+
+def loop_block_threshold() -> float:
+    """Seconds of blocking that trigger a report; 0 disables the monitor."""
+    try:
+        return max(float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", DEFAULT_THRESHOLD_MS)), 0.0) / 1000
+    except ValueError:
+        logger.warning("Ignoring invalid LOOP_BLOCK_THRESHOLD_MS")
+        return DEFAULT_THRESHOLD_MS / 1000
+
+
+def _is_app_frame(filename: str) -> bool:
+    return filename.startswith(str(APP_ROOT)) and "site-packages" not in filename
+
+
+def blocking_frame(stack: List[traceback.FrameSummary]) -> Optional[traceback.FrameSummary]:
+    """
+    The innermost frame in our code, which is the call to fix even when the
+    time is spent in a library below it.
+    """
+    for frame in reversed(stack):
+        if _is_app_frame(frame.filename) and frame.filename != __file__:
+            return frame
+    return stack[-1] if stack else None
+
+
+def frame_location(frame: traceback.FrameSummary) -> str:
+    """"path:function", stable across edits, for logs and metric labels."""
+    path = Path(frame.filename)
+    if _is_app_frame(frame.filename):
+        return f"{path.relative_to(APP_ROOT)}:{frame.name}"
+    return f"{path.name}:{frame.name}"
+
+
+@dataclass
+class Stall:
+    location: str
+    line: Optional[int]
+    task: Optional[str]
+    stack: str
+
+
+class LoopMonitor:
+    """Watches the event loop it is started on; see the module docstring."""
+
+    def __init__(self, threshold: float, interval: float = 0.1):
+        self.threshold = threshold
+        self.interval = interval
+        self.stall: Optional[Stall] = None
+        self._last_beat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+        logger.info(f"Event loop monitor reporting blocks over {self.threshold * 1000:.0f}ms")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self._last_beat = time.monotonic()
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            if self.stall is not None:
+                self._record_stall(self.stall, lag)
+                self.stall = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(min(self.interval, self.threshold) / 2):
+            last_beat = self._last_beat
+            silent = time.monotonic() - last_beat
+            if self.stall is not None or silent <= self.interval + self.threshold:
+                continue
+            stall = self._capture()
+            # Discard the stack if the loop moved on while it was taken
+            if stall is None or self._last_beat != last_beat:
+                continue
+            self.stall = stall
+            logger.warning(
+                f"Event loop blocked for over {silent:.2f}s at {stall.location} "
+                f"(line {stall.line}), task {stall.task}:\n{stall.stack}"
+            )
+
+    def _capture(self) -> Optional[Stall]:
+        """The stack the loop thread is executing, from the watchdog thread."""
+        frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore[arg-type]
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)[-STACK_DEPTH:]
+        blocking = blocking_frame(stack)
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        return Stall(
+            location=frame_location(blocking) if blocking else "unknown",
+            line=blocking.lineno if blocking else None,
+            task=task.get_name() if task else None,
+            stack="".join(traceback.format_list(stack)),
+        )
+
+    def _record_stall(self, stall: Stall, lag: float) -> None:
+        EVENT_LOOP_BLOCKS.inc(1, stall.location)
+        EVENT_LOOP_BLOCKED_SECONDS.inc(lag, stall.location)
+        logger.warning(f"Event loop was blocked for {lag:.2f}s at {stall.location}")
+
+
+async def start_loop_monitor() -> Optional[LoopMonitor]:
+    """Start monitoring the running loop, unless LOOP_BLOCK_THRESHOLD_MS is 0."""
+    threshold = loop_block_threshold()
+    if not threshold:
+        return None
+    monitor = LoopMonitor(threshold)
+    await monitor.start()
+    return monitor
@@ -0,0 +1,427 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Histograms and counters live in this process's memory and are rendered on
+demand: the API serves them at /metrics, and the command worker can serve
+its own with start_metrics_server(). Both only answer scrapes that present
+METRICS_TOKEN as a bearer token. Recording a value takes one short,
+uncontended lock, so instrumenting hot paths costs well under a microsecond.
+
+Label values must come from a small set (route templates, statement names,
+model names); past MAX_LABEL_SETS distinct values a metric records under
+"other" instead of growing without bound.
+
+Histograms with a category also add their observations to the totals of
+an active collect_timings() block, which is how a profiled request learns
+how much of its wall time went to the database, models or tokenization.
+"""
+
+import hmac
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds, from sub-millisecond queries to long model calls
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    30.0, 60.0, 120.0, 300.0,
+)
+MAX_LABEL_SETS = 500
+OVERFLOW_LABEL = "other"
+
+# Seconds per category for the collect_timings() block of the current context
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "metric_timings", default=None
+)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """
+    Sum the seconds observed by categorized histograms within the block.
+
+    Tasks started inside the block share the totals, so concurrent work for
+    one request (e.g. parallel embedding calls) can add up to more than the
+    block's wall time.
+    """
+    timings: Dict[str, float] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labelvalues: Tuple[Any, ...]) -> Tuple[str, ...]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {labelvalues}"
+            )
+        key = tuple(str(value) for value in labelvalues)
+        if key not in self._children and len(self._children) >= MAX_LABEL_SETS:
+            return (OVERFLOW_LABEL,) * len(key)
+        return key
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            children = [(key, self._copy(child)) for key, child in self._children.items()]
+        for key, child in sorted(children):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _copy(self, child: Any) -> Any:
+        return child
+
+    def _render_child(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, *labelvalues: Any) -> None:
+        key = self._key(labelvalues)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def value(self, *labelvalues: Any) -> float:
+        return self._children.get(tuple(str(v) for v in labelvalues), 0)
+
+    def _render_child(self, key: Tuple[str, ...], child: float) -> List[str]:
+        labels = _format_labels(self.labelnames, key)
+        return [f"{self.name}_total{labels} {_format_value(child)}"]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        category: Optional[str] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.category = category
+
+    def observe(self, value: float, *labelvalues: Any) -> None:
+        if self.category:
+            timings = _timings.get()
+            if timings is not None:
+                timings[self.category] = timings.get(self.category, 0.0) + value
+        key = self._key(labelvalues)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                child = self._children[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            child[0][index] += 1
+            child[1] += value
+            child[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues: Any) -> Iterator[None]:
+        """Observe the duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def count(self, *labelvalues: Any) -> int:
+        child = self._children.get(tuple(str(v) for v in labelvalues))
+        return child[2] if child else 0
+
+    def _copy(self, child: Any) -> Any:
+        return [list(child[0]), child[1], child[2]]
+
+    def _render_child(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        counts, total, count = child
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+            cumulative += bucket_count
+            labels = _format_labels(
+                self.labelnames, key, f'le="{_format_value(bound)}"'
+            )
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Drop all recorded values, keeping the metrics."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "open_notebook_http_request_duration_seconds",
+        "API request latency by route template.",
+        ("method", "route", "status"),
+    )
+)
+DB_CONNECT_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "open_notebook_db_connect_duration_seconds",
+        "Time to open and sign in a SurrealDB connection.",
+        category="db",
+    )
+)
+DB_QUERY_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "open_notebook_db_query_duration_seconds",
+        "SurrealDB query latency by statement.",
+        ("statement",),
+        category="db",
+    )
+)
+LLM_CALL_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "open_notebook_llm_call_duration_seconds",
+        "Language model call latency.",
+        ("model", "status"),
+        category="llm",
+    )
+)
+LLM_TOKENS: Counter = REGISTRY.register(
+    Counter(
+        "open_notebook_llm_tokens",
+        "Tokens reported by language model calls.",
+        ("model", "kind"),
+    )
+)
+EMBEDDING_CALL_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "open_notebook_embedding_call_duration_seconds",
+        "Embedding model call latency.",
+        ("model", "status"),
+        category="embedding",
+    )
+)
+EMBEDDED_TEXTS: Counter = REGISTRY.register(
+    Counter(
+        "open_notebook_embedded_texts",
+        "Texts sent to embedding models.",
+        ("model",),
+    )
+)
+TOKEN_COUNT_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "open_notebook_token_count_duration_seconds",
+        "Time spent tokenizing text to count tokens.",
+        buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+        category="tokenization",
+    )
+)
+TOKENS_COUNTED: Counter = REGISTRY.register(
+    Counter("open_notebook_tokens_counted", "Tokens counted by token_count().")
+)
+COMMAND_QUEUE_WAIT_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "open_notebook_command_queue_wait_seconds",
+        "Time commands waited in the worker queue for a slot.",
+        ("command",),
+    )
+)
+COMMAND_RUN_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "open_notebook_command_run_duration_seconds",
+        "Command execution time in the worker.",
+        ("command", "status"),
+    )
+)
+EVENT_LOOP_LAG_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "open_notebook_event_loop_lag_seconds",
+        "How late the event loop ran a timer, sampled continuously.",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 60.0),
+    )
+)
+EVENT_LOOP_BLOCKS: Counter = REGISTRY.register(
+    Counter(
+        "open_notebook_event_loop_blocks",
+        "Times the event loop was blocked past the threshold, by blocking code location.",
+        ("location",),
+    )
+)
+EVENT_LOOP_BLOCKED_SECONDS: Counter = REGISTRY.register(
+    Counter(
+        "open_notebook_event_loop_blocked_seconds",
+        "Seconds the event loop spent blocked past the threshold, by blocking code location.",
+        ("location",),
+    )
+)
+
+
+_STATEMENT_PATTERN = re.compile(
+    r"^\s*\(?\s*(SELECT|CREATE|UPDATE|UPSERT|DELETE|INSERT|RELATE|DEFINE|REMOVE|"
+    r"LET|RETURN|FOR|BEGIN|INFO|LIVE|KILL)\b",
+    re.IGNORECASE,
+)
+_TARGET_PATTERN = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|UPSERT|CREATE|DELETE|RELATE)\s+(?:ONLY\s+)?"
+    r"(\$?[A-Za-z_][A-Za-z0-9_]*)",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=2048)
+def statement_name(query: str) -> str:
+    """
+    Short label for a query: its statement and target, like "select source".
+
+    Record ids collapse to their table and parameters keep their name, so
+    the label set stays small however the query was built.
+    """
+    statements = [part for part in query.split(";") if part.strip()]
+    if len(statements) > 1 and not re.match(r"^\s*(FOR|BEGIN)\b", query, re.IGNORECASE):
+        return "batch"
+    match = _STATEMENT_PATTERN.match(query)
+    if not match:
+        return "other"
+    verb = match.group(1).lower()
+    for target in _TARGET_PATTERN.finditer(query, match.start()):
+        # Skip subqueries, so "SELECT (SELECT .. FROM a) FROM b" is "select b"
+        before = query[match.end() : target.start()]
+        if before.count("(") == before.count(")"):
+            return f"{verb} {target.group(1)}"
+    return verb
+
+
+def instrument_embedding_model(model: Any, name: str) -> Any:
+    """Time the aembed() calls of an embedding model instance."""
+    if getattr(model, "_metrics_instrumented", False):
+        return model
+    aembed = model.aembed
+
+    async def timed_aembed(texts: List[str], *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await aembed(texts, *args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            EMBEDDING_CALL_SECONDS.observe(time.perf_counter() - start, name, status)
+            EMBEDDED_TEXTS.inc(len(texts), name)
+
+    model.aembed = timed_aembed
+    model._metrics_instrumented = True
+    return model
+
+
+def metrics_token() -> Optional[str]:
+    return os.getenv("METRICS_TOKEN") or None
+
+
+def metrics_authorized(authorization: Optional[str]) -> bool:
+    """
+    Whether an Authorization header carries METRICS_TOKEN as a bearer token.
+    Always false when no token is configured: route, statement and model
+    names are not for every tenant to read.
+    """
+    token = metrics_token()
+    scheme, _, provided = (authorization or "").partition(" ")
+    return bool(token and provided) and scheme.lower() == "bearer" and hmac.compare_digest(
+        provided.strip().encode(), token.encode()
+    )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics" or not metrics_token():
+            self.send_error(404)
+            return
+        if not metrics_authorized(self.headers.get("Authorization")):
+            self.send_error(401)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics from a background thread, for processes without the API."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    thread.start()
+    return server
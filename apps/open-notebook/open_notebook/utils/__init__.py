@@ -12,6 +12,7 @@ from .text_utils import (
     remove_non_ascii,
     remove_non_printable,
     split_text,
+    truncate_to_tokens,
 )
 from .token_utils import token_cost, token_count
 from .version_utils import (
@@ -22,6 +23,7 @@ from .version_utils import (
 
 __all__ = [
     "split_text",
+    "truncate_to_tokens",
     "remove_non_ascii",
     "remove_non_printable",
     "parse_thinking_content",
@@ -11,10 +11,45 @@ from typing import Any, Dict, List, Literal, Optional
 
 from loguru import logger
 
-from open_notebook.domain.notebook import Note, Notebook, Source
+from open_notebook.domain.notebook import (
+    Note,
+    Notebook,
+    Source,
+    search_source_chunks,
+)
 from open_notebook.exceptions import DatabaseOperationError, NotFoundError
 
-from .text_utils import token_count
+from .text_utils import token_count, truncate_to_tokens
+
+# Fields that truncate_to_fit may shorten, in order of preference
+TRIMMABLE_FIELDS = ("full_text", "content")
+# Smallest share of an item worth keeping when it is trimmed to fit
+MIN_TRIMMED_TOKENS = 100
+
+
+def _text_tokens(value: Any) -> int:
+    """
+    Token count of the text inside a field value. Record ids (the "id" keys
+    of nested items) and non-text values such as numbers are ignored, as
+    the domain models' context_field_tokens do.
+    """
+    if isinstance(value, str):
+        return token_count(value) if value else 0
+    if isinstance(value, dict):
+        return sum(_text_tokens(v) for k, v in value.items() if k != "id")
+    if isinstance(value, (list, tuple)):
+        return sum(_text_tokens(v) for v in value)
+    return 0
+
+
+def count_field_tokens(content: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Count the tokens of each field of a context item's content.
+
+    Only text is counted, so the total reflects what the prompt carries
+    rather than the repr of the dict. The item's id is not a field.
+    """
+    return {key: _text_tokens(value) for key, value in content.items() if key != "id"}
 
 
 @dataclass
@@ -22,16 +57,62 @@ class ContextItem:
     """Represents a single item in the context."""
     
     id: str
-    type: Literal["source", "note", "insight"]
+    type: Literal["source", "note", "insight", "chunk"]
     content: Dict[str, Any]
     priority: int = 0
     token_count: Optional[int] = None
+    field_tokens: Optional[Dict[str, int]] = None  # {field: token count}
     
     def __post_init__(self):
-        """Calculate token count for the content if not provided."""
+        """Calculate token counts for the content if not provided."""
+        if self.field_tokens is None and self.token_count is None:
+            self.field_tokens = count_field_tokens(self.content)
         if self.token_count is None:
-            content_str = str(self.content)
-            self.token_count = token_count(content_str)
+            self.token_count = sum((self.field_tokens or {}).values())
+
+    def trim_to(self, max_tokens: int) -> Optional[str]:
+        """
+        Shorten the item's main text field so the item fits max_tokens.
+
+        The field is cut at a sentence boundary. Other fields are left
+        untouched, so an item whose other fields alone exceed the budget
+        cannot be trimmed.
+
+        Args:
+            max_tokens: Token budget for the whole item
+
+        Returns:
+            Name of the trimmed field, or None if the item cannot fit
+        """
+        if self.field_tokens is None:
+            self.field_tokens = count_field_tokens(self.content)
+
+        field = next(
+            (
+                name
+                for name in TRIMMABLE_FIELDS
+                if isinstance(self.content.get(name), str) and self.field_tokens.get(name)
+            ),
+            None,
+        )
+        if field is None:
+            return None
+
+        other_tokens = sum(
+            tokens for name, tokens in self.field_tokens.items() if name != field
+        )
+        field_budget = max_tokens - other_tokens
+        if field_budget < MIN_TRIMMED_TOKENS:
+            return None
+
+        trimmed = truncate_to_tokens(self.content[field], field_budget)
+        if not trimmed:
+            return None
+
+        self.content = {**self.content, field: trimmed}
+        self.field_tokens = {**self.field_tokens, field: token_count(trimmed)}
+        self.token_count = sum(self.field_tokens.values())
+        return field
 
 
 @dataclass
@@ -52,7 +133,41 @@ class ContextConfig:
         if self.notes is None:
             self.notes = {}
         if self.priority_weights is None:
-            self.priority_weights = {"source": 100, "note": 50, "insight": 75}
+            self.priority_weights = {
+                "source": 100,
+                "chunk": 90,
+                "note": 50,
+                "insight": 75,
+            }
+
+
+def pack_by_token_budget(
+    items: List[ContextItem], max_tokens: Optional[int]
+) -> List[ContextItem]:
+    """
+    Greedily pack items, in the given order, into a token budget.
+
+    An item that does not fit is skipped and packing continues, so a smaller
+    item further down the list can still use the remaining space.
+
+    Args:
+        items: Items ordered by preference
+        max_tokens: Token budget, or None for no limit
+
+    Returns:
+        The items that fit, in their original order
+    """
+    if max_tokens is None:
+        return list(items)
+
+    packed = []
+    remaining = max_tokens
+    for item in items:
+        tokens = item.token_count or 0
+        if tokens <= remaining:
+            packed.append(item)
+            remaining -= tokens
+    return packed
 
 
 class ContextBuilder:
@@ -73,6 +188,11 @@ class ContextBuilder:
         - context_config: ContextConfig - Custom context configuration
         - max_tokens: int - Maximum token limit
         - priority_order: List[str] - Custom priority order
+        - query: str - Retrieval mode: add the source chunks most relevant to
+          this question instead of full source content
+        - retrieval_top_k: int - Number of chunks to consider (default 20)
+        - retrieval_max_tokens: int - Token budget for chunks (defaults to
+          what is left of max_tokens)
         """
         # Store all parameters for flexibility
         self.params = kwargs
@@ -83,6 +203,9 @@ class ContextBuilder:
         self.include_insights: bool = kwargs.get('include_insights', True)
         self.include_notes: bool = kwargs.get('include_notes', True)
         self.max_tokens: Optional[int] = kwargs.get('max_tokens')
+        self.query: Optional[str] = kwargs.get('query')
+        self.retrieval_top_k: int = kwargs.get('retrieval_top_k', 20)
+        self.retrieval_max_tokens: Optional[int] = kwargs.get('retrieval_max_tokens')
 
         # Context configuration
         context_config_arg: Optional[ContextConfig] = kwargs.get('context_config')
@@ -98,6 +221,11 @@ class ContextBuilder:
 
         # Items storage
         self.items: List[ContextItem] = []
+        # Sources searched for chunks in retrieval mode
+        self.retrieval_source_ids: List[str] = []
+        # What truncate_to_fit removed or shortened, reported in metadata
+        self.dropped: List[Dict[str, Any]] = []
+        self.trimmed: List[Dict[str, Any]] = []
 
         logger.debug(f"ContextBuilder initialized with params: {list(kwargs.keys())}")
     
@@ -113,6 +241,9 @@ class ContextBuilder:
             
             # Clear existing items
             self.items = []
+            self.retrieval_source_ids = []
+            self.dropped = []
+            self.trimmed = []
             
             # Build context based on parameters
             if self.source_id:
@@ -121,6 +252,9 @@ class ContextBuilder:
             if self.notebook_id:
                 await self._add_notebook_context(self.notebook_id)
             
+            if self.query:
+                await self._add_retrieval_context(self.query)
+
             # Process any additional custom parameters
             await self._process_custom_params()
             
@@ -159,8 +293,15 @@ class ContextBuilder:
                 source_id if source_id.startswith("source:")
                 else f"source:{source_id}"
             )
+
+            # In retrieval mode the relevant chunks stand in for the full text
+            if self.query:
+                self.retrieval_source_ids.append(full_source_id)
+                if "full content" in inclusion_level:
+                    inclusion_level = "insights"
             
-            source = await Source.get(full_source_id)
+            # full_text is loaded by get_context only for full content
+            source = await Source.get(full_source_id, omit=["full_text"])
             if not source:
                 logger.warning(f"Source {source_id} not found")
                 return
@@ -175,7 +316,8 @@ class ContextBuilder:
                 id=source.id or "",
                 type="source",
                 content=source_context,
-                priority=priority
+                priority=priority,
+                field_tokens=source.context_field_tokens(source_context),
             )
             self.add_item(item)
             
@@ -193,7 +335,12 @@ class ContextBuilder:
                             "insight_type": insight.insight_type,
                             "content": insight.content
                         },
-                        priority=insight_priority
+                        priority=insight_priority,
+                        field_tokens=(
+                            {"content": insight.token_count}
+                            if insight.token_count is not None
+                            else None
+                        ),
                     )
                     self.add_item(insight_item)
             
@@ -286,7 +433,8 @@ class ContextBuilder:
                 id=note.id or "",
                 type="note",
                 content=note_context,
-                priority=priority
+                priority=priority,
+                field_tokens=note.context_field_tokens(note_context),
             )
             self.add_item(item)
             
@@ -297,6 +445,77 @@ class ContextBuilder:
         except Exception as e:
             logger.error(f"Error adding note context for {note_id}: {str(e)}")
     
+    async def _add_retrieval_context(self, query: str) -> None:
+        """
+        Add the source chunks most similar to the query.
+
+        Chunks are taken in similarity order and packed greedily into the
+        retrieval budget using their stored token counts. Without
+        retrieval_max_tokens the budget is what max_tokens leaves after items
+        of the same or higher priority; lower-priority notes and insights
+        give way to chunks in truncate_to_fit().
+
+        Args:
+            query: The question to retrieve chunks for
+        """
+        if not self.retrieval_source_ids:
+            return
+
+        try:
+            chunks = await search_source_chunks(
+                query,
+                list(dict.fromkeys(self.retrieval_source_ids)),
+                top_k=self.retrieval_top_k,
+            )
+        except Exception as e:
+            # Without embeddings the context still carries source insights
+            logger.warning(f"Chunk retrieval failed, continuing without chunks: {str(e)}")
+            return
+
+        priority = (self.context_config.priority_weights or {}).get("chunk", 90)
+        candidates = [
+            ContextItem(
+                id=str(chunk["id"]),
+                type="chunk",
+                content={
+                    "id": str(chunk["id"]),
+                    "source_id": str(chunk["source"]),
+                    "title": chunk.get("title"),
+                    "order": chunk.get("order"),
+                    "similarity": chunk.get("similarity"),
+                    "content": chunk.get("content", ""),
+                },
+                priority=priority,
+                # Chunks embedded before token counts were stored fall back
+                # to counting the text
+                field_tokens={
+                    "content": chunk.get("token_count")
+                    or token_count(chunk.get("content") or "")
+                },
+            )
+            for chunk in chunks
+        ]
+
+        budget = self.retrieval_max_tokens
+        if budget is None and self.max_tokens:
+            used = sum(
+                item.token_count or 0
+                for item in self.items
+                if item.priority >= priority
+            )
+            budget = max(self.max_tokens - used, 0)
+
+        packed = pack_by_token_budget(candidates, budget)
+        # Present passages in reading order within each source
+        packed.sort(key=lambda item: (item.content["source_id"], item.content["order"] or 0))
+        for item in packed:
+            self.add_item(item)
+
+        logger.debug(
+            f"Retrieved {len(candidates)} chunks, packed {len(packed)} "
+            f"into a budget of {budget} tokens"
+        )
+
     async def _process_custom_params(self) -> None:
         """Process any additional custom parameters."""
         # Hook for future extensions - can be overridden in subclasses
@@ -323,8 +542,14 @@ class ContextBuilder:
     
     def truncate_to_fit(self, max_tokens: int) -> None:
         """
-        Remove items if total token count exceeds limit.
-        
+        Pack items into the token budget in priority order.
+
+        Items that fit are kept whole. An item that does not fit is trimmed at
+        a sentence boundary into the space left, or dropped if too little
+        would remain, before any lower-priority item is considered; smaller
+        items behind it still fill what is left. Dropped and trimmed items
+        are recorded for the response metadata.
+
         Args:
             max_tokens: Maximum allowed tokens
         """
@@ -337,18 +562,39 @@ class ContextBuilder:
             logger.debug(f"Token count {total_tokens} within limit {max_tokens}")
             return
         
-        logger.info(f"Truncating from {total_tokens} to {max_tokens} tokens")
-        
-        # Remove items from the end (lowest priority) until under limit
-        current_tokens = total_tokens
-        removed_count = 0
-        
-        while current_tokens > max_tokens and self.items:
-            removed_item = self.items.pop()
-            current_tokens -= (removed_item.token_count or 0)
-            removed_count += 1
+        logger.info(f"Packing {total_tokens} tokens into {max_tokens}")
         
-        logger.info(f"Removed {removed_count} items, final token count: {current_tokens}")
+        kept = set()
+        remaining = max_tokens
+        for index, item in enumerate(self.items):
+            tokens = item.token_count or 0
+            if tokens <= remaining:
+                kept.add(index)
+                remaining -= tokens
+                continue
+
+            field = item.trim_to(remaining)
+            if field:
+                self.trimmed.append(
+                    {
+                        "id": item.id,
+                        "type": item.type,
+                        "field": field,
+                        "original_tokens": tokens,
+                        "kept_tokens": item.token_count,
+                    }
+                )
+                kept.add(index)
+                remaining -= item.token_count or 0
+            else:
+                self.dropped.append({"id": item.id, "type": item.type, "tokens": tokens})
+
+        packed = [item for index, item in enumerate(self.items) if index in kept]
+        self.items = packed
+        logger.info(
+            f"Dropped {len(self.dropped)} items, trimmed {len(self.trimmed)}, "
+            f"final token count: {max_tokens - remaining}"
+        )
     
     def remove_duplicates(self) -> None:
         """Remove duplicate items based on ID."""
@@ -377,6 +623,7 @@ class ContextBuilder:
         sources = []
         notes = []
         insights = []
+        chunks = []
         
         for item in self.items:
             if item.type == "source":
@@ -385,6 +632,8 @@ class ContextBuilder:
                 notes.append(item.content)
             elif item.type == "insight":
                 insights.append(item.content)
+            elif item.type == "chunk":
+                chunks.append(item.content)
         
         # Calculate total tokens
         total_tokens = sum(item.token_count or 0 for item in self.items)
@@ -393,16 +642,21 @@ class ContextBuilder:
             "sources": sources,
             "notes": notes,
             "insights": insights,
+            "chunks": chunks,
             "total_tokens": total_tokens,
             "total_items": len(self.items),
             "metadata": {
                 "source_count": len(sources),
                 "note_count": len(notes),
                 "insight_count": len(insights),
+                "chunk_count": len(chunks),
+                "dropped": self.dropped,
+                "trimmed": self.trimmed,
                 "config": {
                     "include_insights": self.include_insights,
                     "include_notes": self.include_notes,
-                    "max_tokens": self.max_tokens
+                    "max_tokens": self.max_tokens,
+                    "context_mode": "retrieval" if self.query else "selected",
                 }
             }
         }
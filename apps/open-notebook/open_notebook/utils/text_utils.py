@@ -17,6 +17,10 @@ THINK_PATTERN = re.compile(r"<think>(.*?)</think>", re.DOTALL)
 # Pattern for malformed output: content</think> (missing opening tag)
 THINK_PATTERN_NO_OPEN = re.compile(r"^(.*?)</think>", re.DOTALL)
 
+# Sentence boundaries: end punctuation (Latin or CJK) followed by whitespace,
+# or a line break
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?\u3002\uff01\uff1f])\s+|\n+")
+
 
 def split_text(txt: str, chunk_size=500):
     """
@@ -51,6 +55,54 @@ def split_text(txt: str, chunk_size=500):
     return text_splitter.split_text(txt)
 
 
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Trim text to at most max_tokens tokens, cutting at a sentence boundary.
+
+    Whole sentences are kept while they fit. If not even the first sentence
+    fits, it is cut at a word boundary instead.
+
+    Args:
+        text (str): The text to trim.
+        max_tokens (int): The token budget.
+
+    Returns:
+        str: The text itself when it fits, otherwise its longest prefix of
+            whole sentences that fits the budget.
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    if token_count(text) <= max_tokens:
+        return text
+
+    # Offsets where each sentence ends; the answer is the longest such prefix
+    # that fits, so paragraph breaks inside it are preserved
+    ends = [
+        match.start()
+        for match in SENTENCE_BOUNDARY.finditer(text)
+        if text[: match.start()].strip()
+    ]
+    low, high = 0, len(ends)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if token_count(text[: ends[middle - 1]]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    if low:
+        return text[: ends[low - 1]]
+
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if token_count(" ".join(words[:middle])) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+
 def remove_non_ascii(text: str) -> str:
     """Remove non-ASCII characters from text."""
     return re.sub(r"[^\x00-\x7F]+", "", text)
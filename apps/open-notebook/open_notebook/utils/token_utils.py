@@ -4,32 +4,61 @@ Handles token counting and cost calculations for language models.
 """
 
 import os
+import time
+from functools import lru_cache
+
+from loguru import logger
 
 from open_notebook.config import TIKTOKEN_CACHE_DIR
+from open_notebook.metrics import TOKEN_COUNT_SECONDS, TOKENS_COUNTED
 
 # Set tiktoken cache directory before importing tiktoken to ensure
 # tokenizer encodings are cached persistently in the data folder
 os.environ["TIKTOKEN_CACHE_DIR"] = TIKTOKEN_CACHE_DIR
 
 
+@lru_cache(maxsize=1)
+def _encoding():
+    """
+    The 'o200k_base' encoding, or None if it cannot be loaded.
+
+    Loading downloads the encoding unless it is in TIKTOKEN_CACHE_DIR, so it
+    fails offline; the failure is remembered rather than retried per call.
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except ImportError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not load the o200k_base encoding, estimating token counts: {e}")
+        return None
+
+
 def token_count(input_string: str) -> int:
     """
     Count the number of tokens in the input string using the 'o200k_base' encoding.
 
+    Falls back to an estimate from the word count when tiktoken or the
+    encoding is not available.
+
     Args:
         input_string (str): The input string to count tokens for.
 
     Returns:
         int: The number of tokens in the input string.
     """
-    try:
-        import tiktoken
-        encoding = tiktoken.get_encoding("o200k_base")
-        tokens = encoding.encode(input_string)
-        return len(tokens)
-    except ImportError:
+    start = time.perf_counter()
+    encoding = _encoding()
+    if encoding is not None:
+        count = len(encoding.encode(input_string))
+    else:
         # Fallback: simple word count estimation
-        return int(len(input_string.split()) * 1.3)
+        count = int(len(input_string.split()) * 1.3)
+    TOKEN_COUNT_SECONDS.observe(time.perf_counter() - start)
+    TOKENS_COUNTED.inc(count)
+    return count
 
 
 def token_cost(token_count: int, cost_per_million: float = 0.150) -> float:
@@ -16,4 +16,9 @@ echo "Starting worker with:"
 echo "  OPENAI_API_KEY: ${OPENAI_API_KEY:0:20}..."
 echo "  SURREAL_URL: ${SURREAL_URL}"
 
+# FAIR_SCHEDULER=true routes the queue through the per-tenant fair-share worker
+if [ "${FAIR_SCHEDULER:-false}" = "true" ]; then
+    exec python -m open_notebook.jobs.worker -i commands "$@"
+fi
+
 exec surreal-commands-worker -i commands "$@"
@@ -0,0 +1,92 @@
+"""
+Microbenchmark for decoding query results with parse_record_ids.
+
+Compares the previous copying implementation with the in-place one on
+synthetic rows shaped like `SELECT * FROM source_embedding` and
+`SELECT * FROM note` results. No database is needed.
+
+Usage:
+    uv run python scripts/bench_record_ids.py [--rows 2000] [--dim 1536]
+"""
+
+import argparse
+import copy
+import random
+import sys
+import timeit
+from pathlib import Path
+
+from surrealdb import RecordID
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from open_notebook.database.repository import parse_record_ids  # noqa: E402
+
+
+def parse_record_ids_copying(obj):
+    """The implementation before in-place decoding, kept for comparison."""
+    if isinstance(obj, dict):
+        return {k: parse_record_ids_copying(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [parse_record_ids_copying(item) for item in obj]
+    elif isinstance(obj, RecordID):
+        return str(obj)
+    return obj
+
+
+def source_embedding_rows(count: int, dim: int) -> list:
+    return [
+        {
+            "id": RecordID("source_embedding", f"chunk{i}"),
+            "source": RecordID("source", f"src{i // 20}"),
+            "order": i % 20,
+            "content": "lorem ipsum " * 80,
+            "token_count": 160,
+            "embedding": [random.random() for _ in range(dim)],
+            "embedding_model": "model:abc",
+            "embedding_dim": dim,
+        }
+        for i in range(count)
+    ]
+
+
+def note_rows(count: int, dim: int) -> list:
+    return [
+        {
+            "id": RecordID("note", f"note{i}"),
+            "title": f"Note {i}",
+            "content": "note body " * 200,
+            "note_type": "human",
+            "embedding": [random.random() for _ in range(dim)],
+            "token_count": 400,
+        }
+        for i in range(count)
+    ]
+
+
+def bench(name: str, rows: list, repeat: int) -> None:
+    # Every run gets a fresh copy, since the in-place version mutates its input
+    copies = [copy.deepcopy(rows) for _ in range(repeat * 2)]
+    old = min(
+        timeit.repeat(lambda: parse_record_ids_copying(copies.pop()), number=1, repeat=repeat)
+    )
+    new = min(timeit.repeat(lambda: parse_record_ids(copies.pop()), number=1, repeat=repeat))
+    print(
+        f"{name:<18} rows={len(rows):<6} copying={old * 1000:8.2f} ms  "
+        f"in-place={new * 1000:8.2f} ms  speedup={old / new:6.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bench("source_embedding", source_embedding_rows(args.rows, args.dim), args.repeat)
+    bench("note", note_rows(args.rows, args.dim), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -65,3 +65,11 @@ def auth_token():
 def auth_headers(auth_token):
     """Fixture that provides auth headers for authenticated requests."""
     return {"Authorization": f"Bearer {auth_token}"}
+
+
+@pytest.fixture
+def surreal_db(monkeypatch):
+    """An embedded database; every query of a test runs in one db_session."""
+    monkeypatch.setenv("SURREAL_URL", "mem://")
+    monkeypatch.setenv("SURREAL_NAMESPACE", "test")
+    monkeypatch.setenv("SURREAL_DATABASE", "test")
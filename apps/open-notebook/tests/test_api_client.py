@@ -0,0 +1,129 @@
+"""
+Unit tests for the pooled API clients.
+
+Requests go to an httpx.MockTransport, so no API server is needed.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from api.client import APIClient, AsyncAPIClient, _APIClientBase
+
+
+def mock_transport(requests):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/api/notes/missing":
+            return httpx.Response(404, json={"detail": "Note not found"})
+        return httpx.Response(200, json={"path": request.url.path})
+
+    return httpx.MockTransport(handler)
+
+
+# ============================================================================
+# TEST SUITE 1: Sync Client
+# ============================================================================
+
+
+class TestAPIClient:
+    """Test suite for the synchronous client."""
+
+    def make_client(self, requests, **kwargs):
+        client = APIClient(base_url="http://api.test", **kwargs)
+        client._client = httpx.Client(
+            base_url=client.base_url, transport=mock_transport(requests)
+        )
+        return client
+
+    def test_calls_reuse_one_pooled_client(self):
+        requests = []
+        client = self.make_client(requests)
+        pooled = client.client
+
+        assert client.get_sources() == [{"path": "/api/sources"}]
+        assert client.get_note("note:1") == {"path": "/api/notes/note:1"}
+
+        assert client.client is pooled
+        assert len(requests) == 2
+        assert requests[0].headers.get("Authorization") is None
+
+    def test_timeouts_by_endpoint(self):
+        requests = []
+        client = self.make_client(requests, endpoint_timeouts={"/api/sources": 5.0})
+
+        client.get_sources()
+        client.get_notes()
+        client.create_note("Body")
+
+        read_timeouts = [request.extensions["timeout"]["read"] for request in requests]
+        assert read_timeouts == [5.0, client.default_timeout, client.timeout]
+
+    def test_client_without_transport_cannot_be_created(self):
+        class Incomplete(_APIClientBase):
+            pass
+
+        with pytest.raises(TypeError, match="_make_request"):
+            Incomplete(base_url="http://api.test")
+
+    def test_http_errors_raise(self):
+        client = self.make_client([])
+
+        with pytest.raises(RuntimeError, match="404"):
+            client.get_note("missing")
+
+    def test_batch_keeps_call_order(self):
+        requests = []
+        client = self.make_client(requests)
+
+        results = client.batch(
+            [lambda: client.get_note("note:1"), lambda: client.get_note("note:2")]
+        )
+
+        assert results == [{"path": "/api/notes/note:1"}, {"path": "/api/notes/note:2"}]
+
+
+# ============================================================================
+# TEST SUITE 2: Async Client
+# ============================================================================
+
+
+class TestAsyncAPIClient:
+    """Test suite for the asyncio client."""
+
+    @pytest.mark.asyncio
+    async def test_batch_runs_requests_concurrently(self):
+        requests = []
+        in_flight = 0
+        peak = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            requests.append(request)
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json=[{"path": request.url.path}])
+
+        client = AsyncAPIClient(base_url="http://api.test")
+        pooled = client.client
+        client._client = httpx.AsyncClient(
+            base_url=client.base_url, transport=httpx.MockTransport(handler)
+        )
+
+        async with client:
+            sources, insights = await client.batch(
+                [client.get_sources(), client.get_source_insights("source:1")],
+                max_concurrency=2,
+            )
+
+        assert sources == [{"path": "/api/sources"}]
+        assert insights == [{"path": "/api/sources/source:1/insights"}]
+        assert peak == 2
+        await pooled.aclose()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,99 @@
+"""
+Unit tests for local Supabase token verification.
+
+Tokens are signed in the tests, so no Supabase project is needed.
+"""
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from api.jwt_verifier import SupabaseJWTVerifier
+
+SECRET = "test-secret-that-is-long-enough-for-hs256"
+
+
+def make_token(key=SECRET, algorithm="HS256", headers=None, **claims) -> str:
+    payload = {
+        "sub": "user-1",
+        "email": "user@example.com",
+        "role": "authenticated",
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+        **claims,
+    }
+    return jwt.encode(payload, key, algorithm=algorithm, headers=headers)
+
+
+# ============================================================================
+# TEST SUITE 1: Local Verification
+# ============================================================================
+
+
+class TestSupabaseJWTVerifier:
+    """Test suite for verifying and caching Supabase access tokens."""
+
+    @pytest.mark.asyncio
+    async def test_hs256_token_is_verified_and_cached(self):
+        verifier = SupabaseJWTVerifier(jwt_secret=SECRET)
+        token = make_token()
+
+        user = await verifier.verify(token)
+        with patch("api.jwt_verifier.jwt.decode") as mock_decode:
+            assert await verifier.verify(token) == user
+
+        assert user == {"id": "user-1", "email": "user@example.com", "role": "authenticated"}
+        mock_decode.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_invalid_tokens_are_rejected(self):
+        verifier = SupabaseJWTVerifier(jwt_secret=SECRET)
+
+        with pytest.raises(jwt.InvalidTokenError):
+            await verifier.verify(make_token(key="another-secret-that-is-long-enough"))
+        with pytest.raises(jwt.ExpiredSignatureError):
+            await verifier.verify(make_token(exp=int(time.time()) - 10))
+        with pytest.raises(jwt.InvalidTokenError):
+            await verifier.verify("not-a-jwt")
+
+    @pytest.mark.asyncio
+    async def test_expired_cache_entries_are_dropped(self):
+        verifier = SupabaseJWTVerifier(jwt_secret=SECRET, cache_size=1)
+        verifier.remember("a", {"id": "a"}, time.time() - 1)
+        assert verifier.cached_user("a") is None
+
+        verifier.remember("b", {"id": "b"}, time.time() + 60)
+        verifier.remember("c", {"id": "c"}, time.time() + 60)
+        assert verifier.cached_user("b") is None
+        assert verifier.cached_user("c") == {"id": "c"}
+
+    @pytest.mark.asyncio
+    async def test_asymmetric_keys_are_fetched_once(self):
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        public_jwk = jwt.algorithms.ECAlgorithm.to_jwk(
+            private_key.public_key(), as_dict=True
+        )
+        public_jwk.update({"kid": "key-1", "alg": "ES256"})
+        verifier = SupabaseJWTVerifier("https://project.supabase.co")
+
+        async def fetch_keys():
+            verifier._keys_fetched_at = time.monotonic()
+            verifier._keys = {"key-1": jwt.PyJWK(public_jwk)}
+
+        fetch = AsyncMock(side_effect=fetch_keys)
+        with patch.object(verifier, "_fetch_keys", fetch):
+            token = make_token(private_key, "ES256", headers={"kid": "key-1"})
+            assert (await verifier.verify(token))["id"] == "user-1"
+            # Unknown key ids are left to the remote check, without refetching
+            other = make_token(private_key, "ES256", headers={"kid": "key-2"})
+            assert await verifier.verify(other) is None
+
+        fetch.assert_awaited_once()
+        assert verifier.jwks_url == "https://project.supabase.co/auth/v1/.well-known/jwks.json"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
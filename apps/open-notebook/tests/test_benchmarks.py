@@ -0,0 +1,108 @@
+"""
+Unit tests for the offline benchmark harness.
+
+Only the pure parts are exercised here; scenarios need a database.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from benchmarks.fakes import (
+    FAKE_SETTINGS,
+    FakeEmbeddingModel,
+    FakeLanguageModel,
+    fake_vector,
+)
+from benchmarks.harness import InlineCommandQueue, summarize
+from benchmarks.loadtest import LagProbe, parse_mix
+
+
+class TestFakeProviders:
+    """Test suite for the fake model providers."""
+
+    def test_vectors_are_deterministic(self):
+        assert fake_vector("chunk", 8) == fake_vector("chunk", 8)
+        assert fake_vector("chunk", 8) != fake_vector("other", 8)
+        assert len(fake_vector("chunk", 8)) == 8
+
+    def test_models_answer_without_a_network(self, monkeypatch):
+        monkeypatch.setattr(FAKE_SETTINGS, "llm_latency", 0.0)
+        monkeypatch.setattr(FAKE_SETTINGS, "embedding_latency", 0.0)
+        monkeypatch.setattr(FAKE_SETTINGS, "embedding_dim", 4)
+
+        embeddings = asyncio.run(FakeEmbeddingModel().aembed(["a", "b"]))
+        reply = FakeLanguageModel().to_langchain().invoke("Summarize this")
+
+        assert [len(vector) for vector in embeddings] == [4, 4]
+        assert len(reply.content.split()) == FAKE_SETTINGS.llm_output_tokens
+        assert reply.usage_metadata["output_tokens"] == FAKE_SETTINGS.llm_output_tokens
+
+    def test_structured_calls_get_json(self, monkeypatch):
+        monkeypatch.setattr(FAKE_SETTINGS, "llm_latency", 0.0)
+
+        model = FakeLanguageModel(structured={"type": "json"}).to_langchain()
+        strategy = json.loads(model.invoke("Plan the searches").content)
+
+        assert strategy["reasoning"]
+        assert {"term", "instructions"} <= set(strategy["searches"][0])
+
+
+class TestHarness:
+    """Test suite for the inline command queue and timing summaries."""
+
+    def test_summarize_reports_percentiles(self):
+        summary = summarize([float(i) for i in range(1, 101)])
+
+        assert summary["runs"] == 100
+        assert summary["min_s"] == 1.0
+        assert summary["p50_s"] == 51.0
+        assert summary["p95_s"] == 95.0
+        assert summary["max_s"] == 100.0
+
+    def test_drain_runs_chained_commands(self):
+        queue = InlineCommandQueue(concurrency=2)
+        ran = []
+
+        async def run(app, name, args):
+            ran.append(name)
+            if name == "vectorize_source":
+                for i in range(3):
+                    queue.submit(app, "embed_chunk", {"chunk": i})
+            queue.executed += 1
+
+        queue._run = run  # type: ignore[method-assign]
+        queue.submit("open_notebook", "vectorize_source", {"source_id": "source:1"})
+
+        assert asyncio.run(queue.drain()) == 4
+        assert ran == ["vectorize_source"] + ["embed_chunk"] * 3
+        assert queue.pending == []
+
+
+class TestLoadTest:
+    """Test suite for the load test's traffic mix and lag probe."""
+
+    def test_mix_drops_zero_weights_and_rejects_unknown_operations(self):
+        assert parse_mix("search=3, upload=0,status") == {"search": 3.0, "status": 1.0}
+        with pytest.raises(ValueError, match="browse"):
+            parse_mix("search=1,browse=2")
+
+    def test_lag_probe_sees_a_blocked_loop(self):
+        probe = LagProbe(interval=0.01)
+
+        async def block_the_loop():
+            task = asyncio.create_task(probe.run())
+            await asyncio.sleep(0.05)
+            time.sleep(0.2)
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        asyncio.run(block_the_loop())
+
+        assert max(probe.samples) >= 0.15
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
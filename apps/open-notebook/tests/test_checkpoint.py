@@ -0,0 +1,250 @@
+"""
+Unit tests for the LangGraph checkpointers.
+
+SQLite tests use their own checkpoint file in a temporary directory;
+SurrealDB tests use an in-memory database with migration 19 applied.
+"""
+
+import operator
+from pathlib import Path
+from typing import Annotated
+from unittest.mock import patch
+
+import pytest
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+from open_notebook.database.repository import db_session, repo_query
+from open_notebook.graphs.checkpoint import (
+    SqliteCheckpointer,
+    SurrealCheckpointer,
+    checkpoint_retention,
+    get_checkpointer,
+)
+
+MIGRATION = Path(__file__).parent.parent / "migrations" / "19.surrealql"
+
+
+class CountState(TypedDict):
+    turns: Annotated[list, operator.add]
+
+
+async def count_turn(state: CountState) -> dict:
+    return {"turns": [len(state.get("turns", [])) + 1]}
+
+
+def build_graph(checkpointer):
+    state = StateGraph(CountState)
+    state.add_node("count", count_turn)
+    state.add_edge(START, "count")
+    state.add_edge("count", END)
+    return state.compile(checkpointer=checkpointer)
+
+
+def thread(thread_id: str) -> RunnableConfig:
+    return RunnableConfig(configurable={"thread_id": thread_id})
+
+
+@pytest.fixture
+def checkpoint_file(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite")
+
+
+class TestSqliteCheckpointer:
+    """Test suite for async use, retention and compaction."""
+
+    @pytest.mark.asyncio
+    async def test_async_graph_keeps_state_across_turns(self, checkpoint_file):
+        checkpointer = SqliteCheckpointer(checkpoint_file)
+        graph = build_graph(checkpointer)
+        try:
+            for _ in range(3):
+                await graph.ainvoke({"turns": []}, config=thread("a"))
+            state = await graph.aget_state(thread("a"))
+            other = await graph.aget_state(thread("b"))
+        finally:
+            checkpointer.close()
+
+        assert state.values["turns"] == [1, 2, 3]
+        assert not other.values
+
+    @pytest.mark.asyncio
+    async def test_retention_keeps_latest_checkpoints_per_thread(self, checkpoint_file):
+        checkpointer = SqliteCheckpointer(checkpoint_file, retention=2)
+        graph = build_graph(checkpointer)
+        try:
+            for _ in range(5):
+                await graph.ainvoke({"turns": []}, config=thread("a"))
+            await graph.ainvoke({"turns": []}, config=thread("b"))
+            kept = [item async for item in checkpointer.alist(thread("a"))]
+            latest = await checkpointer.aget_tuple(thread("a"))
+            other = [item async for item in checkpointer.alist(thread("b"))]
+        finally:
+            checkpointer.close()
+
+        assert len(kept) == 2
+        assert latest is not None
+        assert latest.checkpoint["id"] == kept[0].checkpoint["id"]
+        assert latest.checkpoint["channel_values"]["turns"] == [1, 2, 3, 4, 5]
+        assert len(other) == 2
+
+    @pytest.mark.asyncio
+    async def test_compact_prunes_existing_threads(self, checkpoint_file):
+        checkpointer = SqliteCheckpointer(checkpoint_file, retention=0)
+        graph = build_graph(checkpointer)
+        try:
+            for _ in range(20):
+                await graph.ainvoke({"turns": ["x" * 1000]}, config=thread("a"))
+            saved = len([item async for item in checkpointer.alist(thread("a"))])
+
+            result = checkpointer.compact(retention=1)
+            state = await graph.aget_state(thread("a"))
+            remaining = [item async for item in checkpointer.alist(thread("a"))]
+        finally:
+            checkpointer.close()
+
+        assert result["threads"] == 1
+        assert result["checkpoints_deleted"] == saved - 1
+        assert result["size_after"] < result["size_before"]
+        assert len(remaining) == 1
+        assert len(state.values["turns"]) == 40
+
+    def test_retention_from_environment(self, monkeypatch):
+        monkeypatch.setenv("LANGGRAPH_CHECKPOINT_RETENTION", "3")
+        assert checkpoint_retention() == 3
+        monkeypatch.setenv("LANGGRAPH_CHECKPOINT_RETENTION", "0")
+        assert checkpoint_retention() == 0
+        monkeypatch.setenv("LANGGRAPH_CHECKPOINT_RETENTION", "many")
+        assert checkpoint_retention() == 10
+
+    @pytest.mark.parametrize(
+        "backend, expected",
+        [("sqlite", SqliteCheckpointer), ("surrealdb", SurrealCheckpointer)],
+    )
+    def test_checkpointer_is_selected_by_config(self, backend, expected):
+        get_checkpointer.cache_clear()
+        try:
+            with patch("open_notebook.graphs.checkpoint.LANGGRAPH_CHECKPOINTER", backend):
+                assert isinstance(get_checkpointer(), expected)
+            with patch("open_notebook.graphs.checkpoint.LANGGRAPH_CHECKPOINTER", "redis"):
+                get_checkpointer.cache_clear()
+                with pytest.raises(ValueError):
+                    get_checkpointer()
+        finally:
+            get_checkpointer.cache_clear()
+
+
+class TestSurrealCheckpointer:
+    """Test suite for checkpoints stored in SurrealDB."""
+
+    @staticmethod
+    async def migrate():
+        await repo_query(MIGRATION.read_text())
+
+    @pytest.mark.asyncio
+    async def test_async_graph_keeps_state_across_turns(self, surreal_db):
+        graph = build_graph(SurrealCheckpointer())
+        async with db_session():
+            await self.migrate()
+            for _ in range(3):
+                await graph.ainvoke({"turns": []}, config=thread("a"))
+            state = await graph.aget_state(thread("a"))
+            other = await graph.aget_state(thread("b"))
+            history = [item async for item in graph.aget_state_history(thread("a"))]
+
+        assert state.values["turns"] == [1, 2, 3]
+        assert not other.values
+        assert history[0].config == state.config
+        assert history[1].config == state.parent_config
+
+    @pytest.mark.asyncio
+    async def test_retention_keeps_latest_checkpoints_per_thread(self, surreal_db):
+        checkpointer = SurrealCheckpointer(retention=2)
+        graph = build_graph(checkpointer)
+        async with db_session():
+            await self.migrate()
+            for _ in range(5):
+                await graph.ainvoke({"turns": []}, config=thread("a"))
+            await graph.ainvoke({"turns": []}, config=thread("b"))
+            kept = [item async for item in checkpointer.alist(thread("a"))]
+            latest = await checkpointer.aget_tuple(thread("a"))
+            other = [item async for item in checkpointer.alist(thread("b"))]
+            writes = await repo_query(
+                "SELECT VALUE checkpoint_id FROM langgraph_write WHERE thread_id = 'a'"
+            )
+
+        assert len(kept) == 2
+        assert latest is not None
+        assert latest.checkpoint["id"] == kept[0].checkpoint["id"]
+        assert latest.checkpoint["channel_values"]["turns"] == [1, 2, 3, 4, 5]
+        assert len(other) == 2
+        assert set(writes) <= {item.checkpoint["id"] for item in kept}
+
+    @pytest.mark.asyncio
+    async def test_pending_writes_are_loaded_with_their_checkpoint(self, surreal_db):
+        checkpointer = SurrealCheckpointer()
+        graph = build_graph(checkpointer)
+        async with db_session():
+            await self.migrate()
+            await graph.ainvoke({"turns": []}, config=thread("a"))
+            latest = await checkpointer.aget_tuple(thread("a"))
+            assert latest is not None
+            await checkpointer.aput_writes(
+                latest.config, [("turns", [9]), ("turns", [10])], "task-1"
+            )
+            # Saving the same writes again keeps the first ones
+            await checkpointer.aput_writes(latest.config, [("turns", [11])], "task-1")
+            reloaded = await checkpointer.aget_tuple(latest.config)
+
+        assert reloaded is not None
+        assert reloaded.pending_writes == [
+            ("task-1", "turns", [9]),
+            ("task-1", "turns", [10]),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_list_filters_on_metadata_and_delete_thread(self, surreal_db):
+        checkpointer = SurrealCheckpointer(retention=0)
+        graph = build_graph(checkpointer)
+        async with db_session():
+            await self.migrate()
+            for _ in range(2):
+                await graph.ainvoke({"turns": []}, config=thread("a"))
+            inputs = [
+                item
+                async for item in checkpointer.alist(
+                    thread("a"), filter={"source": "input"}, limit=1
+                )
+            ]
+            everything = [item async for item in checkpointer.alist(None)]
+            await checkpointer.adelete_thread("a")
+            deleted = await checkpointer.aget_tuple(thread("a"))
+
+        assert len(inputs) == 1
+        assert inputs[0].metadata["source"] == "input"
+        assert inputs[0].checkpoint["id"] == next(
+            item.checkpoint["id"]
+            for item in everything
+            if item.metadata["source"] == "input"
+        )
+        assert deleted is None
+
+    @pytest.mark.asyncio
+    async def test_compact_prunes_existing_threads(self, surreal_db):
+        checkpointer = SurrealCheckpointer(retention=0)
+        graph = build_graph(checkpointer)
+        async with db_session():
+            await self.migrate()
+            for thread_id in ("a", "b"):
+                for _ in range(4):
+                    await graph.ainvoke({"turns": []}, config=thread(thread_id))
+            saved = len([item async for item in checkpointer.alist(None)])
+
+            result = await checkpointer.acompact(retention=1)
+            state = await graph.aget_state(thread("a"))
+            remaining = [item async for item in checkpointer.alist(None)]
+
+        assert result == {"threads": 2, "checkpoints_deleted": saved - 2}
+        assert len(remaining) == 2
+        assert state.values["turns"] == [1, 2, 3, 4]
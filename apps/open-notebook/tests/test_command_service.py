@@ -0,0 +1,48 @@
+"""
+Unit tests for waiting on background commands.
+
+Command status reads are mocked, so no database or worker is needed.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from surreal_commands import CommandResult, CommandStatus
+
+from api.command_service import CommandService
+
+
+def status(value: CommandStatus) -> CommandResult:
+    return CommandResult(command_id="command:1", status=value)
+
+
+class TestWaitForCommand:
+    """Test suite for the non-blocking command wait used by sync processing."""
+
+    @pytest.mark.asyncio
+    @patch("api.command_service.asyncio.sleep", new_callable=AsyncMock)
+    @patch("api.command_service.get_command_status", new_callable=AsyncMock)
+    async def test_polls_with_backoff_until_complete(self, mock_status, mock_sleep):
+        mock_status.side_effect = [status(CommandStatus.NEW)] + [
+            status(CommandStatus.RUNNING)
+        ] * 6 + [status(CommandStatus.COMPLETED)]
+
+        result = await CommandService.wait_for_command_job("command:1")
+
+        assert result.is_success()
+        delays = [call.args[0] for call in mock_sleep.await_args_list]
+        assert delays == [0.1, 0.2, 0.4, 0.8, 1.6, 2.0, 2.0]
+
+    @pytest.mark.asyncio
+    @patch("api.command_service.get_command_status", new_callable=AsyncMock)
+    async def test_times_out(self, mock_status):
+        mock_status.return_value = status(CommandStatus.RUNNING)
+
+        with pytest.raises(TimeoutError):
+            await CommandService.wait_for_command_job("command:1", timeout=0.15)
+
+        assert mock_status.await_count >= 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
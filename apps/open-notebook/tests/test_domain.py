@@ -14,7 +14,7 @@ from open_notebook.domain.models import ModelManager
 from open_notebook.domain.notebook import Note, Notebook, Source
 from open_notebook.domain.podcast import EpisodeProfile, SpeakerProfile
 from open_notebook.domain.transformation import Transformation
-from open_notebook.exceptions import InvalidInputError
+from open_notebook.exceptions import InvalidInputError, NotFoundError
 
 # ============================================================================
 # TEST SUITE 1: RecordModel Singleton Pattern
@@ -157,6 +157,59 @@ class TestNoteDomain:
         note2 = Note(title="Test", content=None)
         assert note2.get_embedding_content() is None
 
+    def test_note_token_count_refreshed_only_when_content_changes(self):
+        """Test the stored token count is recounted only for new text."""
+        from unittest.mock import patch
+
+        with patch(
+            "open_notebook.utils.token_utils.token_count", return_value=7
+        ) as mock_count:
+            # Loaded with a stored count: no recount on save
+            note = Note(title="Test", content="Stored text", token_count=3)
+            note._refresh_token_count()
+            assert note.token_count == 3
+            mock_count.assert_not_called()
+
+            note.content = "Edited text"
+            note._refresh_token_count()
+            assert note.token_count == 7
+            mock_count.assert_called_once_with("Edited text")
+
+    @pytest.mark.asyncio
+    async def test_note_saves_when_the_encoding_cannot_be_loaded(self, surreal_db):
+        """Test saving offline estimates the token count instead of failing."""
+        from unittest.mock import patch
+
+        from open_notebook.database.repository import db_session
+        from open_notebook.utils.token_utils import _encoding
+
+        _encoding.cache_clear()
+        try:
+            with patch("tiktoken.get_encoding", side_effect=OSError("offline")):
+                async with db_session():
+                    note = Note(title="Offline", content="one two three four five")
+                    await note.save()
+                    saved = await Note.get(note.id)
+        finally:
+            _encoding.cache_clear()
+
+        assert saved.token_count == 6
+
+    def test_context_field_tokens_use_stored_counts(self):
+        """Test context token totals come from stored counts."""
+        source = Source(title="", full_text="x" * 10_000, token_count=2500)
+        context = {
+            "id": None,
+            "title": "",
+            "insights": [{"content": "summary", "token_count": 40}],
+            "full_text": source.full_text,
+        }
+        assert source.context_field_tokens(context) == {
+            "title": 0,
+            "insights": 40,
+            "full_text": 2500,
+        }
+
 
 # ============================================================================
 # TEST SUITE 6: Podcast Domain Validation
@@ -304,5 +357,676 @@ class TestEpisodeProfile:
         assert profile.num_segments == 5
 
 
+# ============================================================================
+# TEST SUITE 10: Field Projections
+# ============================================================================
+
+
+class TestFieldProjections:
+    """Test suite for fields/omit projections and lazily loaded fields."""
+
+    def test_projection_clauses(self):
+        """Test vectors are always omitted and projections are validated."""
+        clause, unloaded = Source._projection(omit=["full_text"])
+        assert clause == "* OMIT embedding, next_embedding, full_text"
+        assert unloaded == {"full_text"}
+
+        clause, unloaded = Source._projection(fields=["title", "command"])
+        assert clause == "id, title, command"
+        assert "full_text" in unloaded and "title" not in unloaded
+
+        with pytest.raises(InvalidInputError):
+            Source._projection(fields=["title FROM source; DELETE source"])
+
+    @pytest.mark.asyncio
+    async def test_unloaded_field_is_loaded_on_demand_and_not_saved(self):
+        """Test omitted fields are lazily loaded and never overwritten."""
+        from unittest.mock import AsyncMock, patch
+
+        with patch(
+            "open_notebook.domain.base.repo_query", new_callable=AsyncMock
+        ) as mock_query:
+            mock_query.return_value = [{"id": "source:1", "title": "Doc"}]
+            source = await Source.get("source:1", omit=["full_text"])
+
+            assert "OMIT embedding, next_embedding, full_text" in mock_query.await_args.args[0]
+            assert "full_text" not in source._prepare_save_data()
+
+            mock_query.return_value = [{"id": "source:1", "full_text": "Body"}]
+            await source.load_fields("full_text")
+
+            assert source.full_text == "Body"
+            assert mock_query.await_args.args[0] == "SELECT id, full_text FROM $id"
+            await source.load_fields("full_text")
+            assert mock_query.await_count == 2
+
+    def test_projections_always_load_required_fields(self):
+        """Test fields/omit cannot leave out fields the model requires."""
+        clause, unloaded = Notebook._projection(fields=["id"])
+        assert clause == "id, name, description"
+        assert {"name", "description"}.isdisjoint(unloaded)
+
+        clause, unloaded = Notebook._projection(omit=["description", "archived"])
+        assert clause.endswith("OMIT embedding, next_embedding, archived")
+        assert unloaded == {"archived"}
+
+    @pytest.mark.asyncio
+    async def test_invalid_row_is_not_reported_as_not_found(self):
+        """Test get() surfaces validation errors instead of NotFoundError."""
+        from unittest.mock import AsyncMock, patch
+
+        with patch(
+            "open_notebook.domain.base.repo_query", new_callable=AsyncMock
+        ) as mock_query:
+            mock_query.return_value = [{"id": "notebook:1", "name": "Notes"}]
+            with pytest.raises(ValidationError):
+                await Notebook.get("notebook:1", fields=["id"])
+
+            mock_query.return_value = [
+                {"id": "notebook:1", "name": " ", "description": ""}
+            ]
+            with pytest.raises(InvalidInputError):
+                await Notebook.get("notebook:1", fields=["id"])
+
+            mock_query.return_value = []
+            with pytest.raises(NotFoundError):
+                await Notebook.get("notebook:1", fields=["id"])
+
+
+
+# ============================================================================
+# TEST SUITE 11: Blob-Stored Source Text
+# ============================================================================
+
+
+class TestBlobStoredSourceText:
+    """Test suite for sources whose full_text lives in the blob store."""
+
+    def test_blob_ref_is_content_addressed(self):
+        """Test references derive from the text and map to fanned-out paths."""
+        from open_notebook.database import blob_store
+
+        ref = blob_store.text_ref("hello")
+        assert ref == blob_store.text_ref("hello") != blob_store.text_ref("hello!")
+        digest = ref.rsplit(":", 1)[1]
+        assert blob_store.blob_path(ref).endswith(f"{digest[:2]}/{digest}.zst")
+        with pytest.raises(ValueError):
+            blob_store.blob_path("zstd:sha256:../../etc/passwd")
+
+    def test_read_text_range_spans_pieces(self):
+        """Test ranged reads stitch streamed pieces and stop early."""
+        from unittest.mock import patch
+
+        from open_notebook.database import blob_store
+
+        pieces = iter(["0123", "4567", "89ab", "cdef"])
+        with patch.object(blob_store, "iter_text", return_value=pieces):
+            assert blob_store.read_text_range("ref", 2, 7) == "2345678"
+        assert next(pieces) == "cdef"  # Last piece never decompressed
+
+    def test_blob_roundtrip(self, tmp_path):
+        """Test texts are compressed to disk and read back."""
+        pytest.importorskip("zstandard")
+        from unittest.mock import patch
+
+        from open_notebook.database import blob_store
+
+        text = "Grüße " * 50_000
+        with patch.object(blob_store, "BLOBS_FOLDER", str(tmp_path)):
+            ref = blob_store.put_text(text)
+            assert blob_store.put_text(text) == ref
+            assert blob_store.read_text(ref) == text
+            assert blob_store.read_text_range(ref, 6, 6) == "Grüße "
+            assert blob_store.delete(ref)
+
+    def test_recently_reused_blobs_survive_delete(self, tmp_path):
+        """Test a blob a save just wrote or reused is not deleted under it."""
+        pytest.importorskip("zstandard")
+        import os
+        from unittest.mock import patch
+
+        from open_notebook.database import blob_store
+
+        with patch.object(blob_store, "BLOBS_FOLDER", str(tmp_path)):
+            ref = blob_store.put_text("Body")
+            path = blob_store.blob_path(ref)
+            os.utime(path, (0, 0))
+            assert blob_store.put_text("Body") == ref  # Reuse refreshes the mtime
+            assert not blob_store.delete(ref, grace_seconds=60)
+            assert blob_store.read_text(ref) == "Body"
+
+            os.utime(path, (0, 0))
+            assert blob_store.delete(ref, grace_seconds=60)
+            assert os.listdir(os.path.dirname(path)) == []
+            # A save after the delete writes the blob again
+            assert blob_store.put_text("Body") == ref
+            assert blob_store.read_text(ref) == "Body"
+
+    def test_blob_source_marks_full_text_unloaded(self):
+        """Test blob-stored text is not written to the row."""
+        source = Source(
+            id="source:1", full_text_ref="zstd:sha256:" + "a" * 64, full_text_length=9
+        )
+        assert "full_text" in source._unloaded_fields
+
+        source.full_text = "Some text"
+        assert "full_text" not in source._prepare_save_data()
+
+    @pytest.mark.asyncio
+    async def test_blob_full_text_is_loaded_on_demand(self):
+        """Test load_fields reads blob-stored text without a database query."""
+        from unittest.mock import AsyncMock, patch
+
+        from open_notebook.database import blob_store
+
+        source = Source(id="source:1", full_text_ref="zstd:sha256:" + "a" * 64)
+        with (
+            patch.object(blob_store, "read_text", return_value="Body") as mock_read,
+            patch(
+                "open_notebook.domain.base.repo_query", new_callable=AsyncMock
+            ) as mock_query,
+        ):
+            await source.load_fields("full_text")
+            await source.load_fields("full_text")
+
+        assert source.full_text == "Body"
+        mock_read.assert_called_once_with(source.full_text_ref)
+        mock_query.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_save_in_blob_mode_swaps_inline_text_for_ref(self):
+        """Test saving moves the text to the blob store in one update."""
+        from unittest.mock import AsyncMock, patch
+
+        from open_notebook import config
+        from open_notebook.database import blob_store
+
+        source = Source(id="source:1", full_text="Body", token_count=1)
+        with (
+            patch.object(config, "FULL_TEXT_STORAGE", "blob"),
+            patch.object(blob_store, "put_text", return_value="zstd:sha256:ref"),
+            patch(
+                "open_notebook.domain.notebook.repo_query", new_callable=AsyncMock
+            ) as mock_query,
+        ):
+            await source._store_full_text_blob()
+
+        assert source.full_text_ref == "zstd:sha256:ref"
+        assert (source.full_text_preview, source.full_text_length) == ("Body", 4)
+        assert "full_text = NONE" in mock_query.await_args.args[0]
+        assert "full_text" not in source._prepare_save_data()
+
+    @pytest.mark.asyncio
+    async def test_blobs_are_deleted_with_their_last_source(self, surreal_db, tmp_path):
+        """Test shared blobs outlive a source and go once nothing references them."""
+        pytest.importorskip("zstandard")
+        from unittest.mock import patch
+
+        from open_notebook import config
+        from open_notebook.database import blob_store
+        from open_notebook.database.repository import db_session
+
+        with (
+            patch.object(blob_store, "BLOBS_FOLDER", str(tmp_path)),
+            patch.object(blob_store, "GRACE_SECONDS", 0),
+            patch.object(config, "FULL_TEXT_STORAGE", "blob"),
+            patch("open_notebook.utils.token_utils.token_count", return_value=1),
+        ):
+            async with db_session():
+                first = Source(title="First", full_text="Shared")
+                second = Source(title="Second", full_text="Shared")
+                await first.save()
+                await second.save()
+                shared = first.full_text_ref
+                assert shared == second.full_text_ref
+
+                await first.delete()
+                assert blob_store.exists(shared)
+
+                second.full_text = "Edited"
+                await second.save()
+                assert not blob_store.exists(shared)
+                edited = second.full_text_ref
+
+                reloaded = await Source.get(second.id, fields=["title"])
+                await reloaded.delete()
+                assert not blob_store.exists(edited)
+
+    @pytest.mark.asyncio
+    async def test_moving_texts_inline_deletes_their_blobs(self, surreal_db, tmp_path):
+        """Test blobs are removed once every source is moved back inline."""
+        pytest.importorskip("zstandard")
+        from unittest.mock import patch
+
+        from commands.storage_commands import move_texts_inline
+        from open_notebook import config
+        from open_notebook.database import blob_store
+        from open_notebook.database.repository import db_session
+
+        with (
+            patch.object(blob_store, "BLOBS_FOLDER", str(tmp_path)),
+            patch.object(blob_store, "GRACE_SECONDS", 0),
+            patch.object(config, "FULL_TEXT_STORAGE", "blob"),
+            patch("open_notebook.utils.token_utils.token_count", return_value=1),
+        ):
+            async with db_session():
+                sources = [Source(title=str(i), full_text="Shared") for i in range(3)]
+                for source in sources:
+                    await source.save()
+                ref = sources[0].full_text_ref
+
+                assert await move_texts_inline(batch_size=2) == 3
+                reloaded = await Source.get(sources[2].id)
+                await reloaded.load_fields("full_text")
+
+            assert reloaded.full_text == "Shared"
+            assert not blob_store.exists(ref)
+
+    @pytest.mark.asyncio
+    async def test_sweep_deletes_blobs_kept_back_in_the_grace_window(
+        self, surreal_db, tmp_path
+    ):
+        """Test the storage command sweep removes blobs left behind by deletes."""
+        pytest.importorskip("zstandard")
+        import os
+        from unittest.mock import patch
+
+        from commands.storage_commands import sweep_unreferenced_blobs
+        from open_notebook import config
+        from open_notebook.database import blob_store
+        from open_notebook.database.repository import db_session
+
+        with (
+            patch.object(blob_store, "BLOBS_FOLDER", str(tmp_path)),
+            patch.object(config, "FULL_TEXT_STORAGE", "blob"),
+            patch("open_notebook.utils.token_utils.token_count", return_value=1),
+        ):
+            async with db_session():
+                kept = Source(title="Kept", full_text="Kept")
+                gone = Source(title="Gone", full_text="Gone")
+                await kept.save()
+                await gone.save()
+                await gone.delete()
+                # Just written, so the delete left the blob in place
+                assert blob_store.exists(gone.full_text_ref)
+
+                for ref in (kept.full_text_ref, gone.full_text_ref):
+                    os.utime(blob_store.blob_path(ref), (0, 0))
+                assert await sweep_unreferenced_blobs(batch_size=1) == 1
+
+            assert blob_store.exists(kept.full_text_ref)
+            assert not blob_store.exists(gone.full_text_ref)
+
+
+# ============================================================================
+# TEST SUITE 12: Keyset Pagination
+# ============================================================================
+
+
+class TestKeysetPagination:
+    """Test suite for cursor pagination on (updated, id)."""
+
+    def test_cursor_roundtrip_and_validation(self):
+        """Test cursors decode to the row they were issued for."""
+        from datetime import datetime, timezone
+
+        from open_notebook.database.pagination import decode_cursor, encode_cursor
+
+        updated = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        cursor = encode_cursor("updated", updated, "note:abc")
+        assert decode_cursor(cursor, "updated") == (updated.isoformat(), "note:abc")
+
+        with pytest.raises(InvalidInputError):
+            decode_cursor(cursor, "created")
+        with pytest.raises(InvalidInputError):
+            decode_cursor("not-a-cursor", "updated")
+
+    def test_keyset_order_and_clauses(self):
+        """Test only sort keys with a composite index can be paged."""
+        from open_notebook.database.pagination import (
+            encode_cursor,
+            keyset_clauses,
+            parse_keyset_order,
+        )
+
+        assert parse_keyset_order(None) == ("updated", "desc")
+        assert parse_keyset_order("created ASC") == ("created", "asc")
+        with pytest.raises(InvalidInputError):
+            parse_keyset_order("title asc")
+
+        assert keyset_clauses("updated", "desc") == (None, "updated DESC, id DESC", {})
+        condition, order, params = keyset_clauses(
+            "created", "asc", encode_cursor("created", "2025-01-01T00:00:00", "note:1")
+        )
+        assert "created > <datetime>$cursor_value" in condition
+        assert "id > $cursor_id" in condition
+        assert params["cursor_value"] == "2025-01-01T00:00:00"
+
+    @pytest.mark.asyncio
+    async def test_get_all_pages_by_cursor(self):
+        """Test get_all continues after the cursor and issues the next one."""
+        from unittest.mock import AsyncMock, patch
+
+        from open_notebook.database.pagination import next_cursor
+
+        rows = [
+            {"id": "note:2", "content": "b", "updated": "2025-01-02T00:00:00"},
+            {"id": "note:1", "content": "a", "updated": "2025-01-01T00:00:00"},
+        ]
+        with patch(
+            "open_notebook.domain.base.repo_query", new_callable=AsyncMock
+        ) as mock_query:
+            mock_query.return_value = rows
+            notes = await Note.get_all(order_by="updated desc", limit=2)
+            cursor = next_cursor(notes, 2, "updated")
+            assert cursor is not None
+            assert "LIMIT $limit" in mock_query.await_args.args[0]
+
+            mock_query.return_value = []
+            await Note.get_all(order_by="updated desc", limit=2, cursor=cursor)
+            query, params = mock_query.await_args.args
+            assert "updated < <datetime>$cursor_value" in query
+            assert "ORDER BY updated DESC, id DESC" in query
+            assert params["cursor_id"].id == "1"
+
+        assert next_cursor(notes[:1], 2, "updated") is None
+        with pytest.raises(InvalidInputError):
+            await Note.get_all(order_by="title asc", limit=2)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("direction", ["asc", "desc"])
+    async def test_pages_cover_rows_within_one_microsecond(self, surreal_db, direction):
+        """Test cursors keep the database's nanoseconds, so no row repeats or goes missing."""
+        from open_notebook.database.pagination import next_cursor
+        from open_notebook.database.repository import db_session, repo_query
+
+        # Two rows share each timestamp; all of them fall in one microsecond
+        async with db_session():
+            await repo_query(
+                """
+                FOR $i IN 0..8 {
+                    CREATE type::thing('note', 'n' + <string>$i) SET
+                        title = <string>$i,
+                        updated = <datetime>('2025-01-01T00:00:00.000000' + <string>math::floor($i / 2) + '00Z');
+                };
+                """
+            )
+            seen: list = []
+            cursor = None
+            for _ in range(4):  # Bounded, in case a cursor stops advancing
+                page = await Note.get_all(
+                    order_by=f"updated {direction}",
+                    fields=["title"],
+                    limit=3,
+                    cursor=cursor,
+                )
+                seen.extend(note.title for note in page)
+                cursor = next_cursor(page, 3, "updated")
+                if cursor is None:
+                    break
+
+        expected = [str(i) for i in range(8)]
+        assert seen == (expected if direction == "asc" else expected[::-1])
+
+
+# ============================================================================
+# TEST SUITE 13: Streaming Reads
+# ============================================================================
+
+
+class TestRepoStream:
+    """Test suite for paging through large tables with repo_stream."""
+
+    @staticmethod
+    def fake_connection(pages):
+        from contextlib import asynccontextmanager
+        from unittest.mock import AsyncMock, MagicMock
+
+        connection = MagicMock()
+        connection.query = AsyncMock(side_effect=pages)
+
+        @asynccontextmanager
+        async def db_connection():
+            yield connection
+
+        return connection, db_connection
+
+    @pytest.mark.asyncio
+    async def test_pages_by_id_on_one_connection(self):
+        """Test pages continue after the last id and wrap the WHERE clause."""
+        from unittest.mock import patch
+
+        from open_notebook.database.repository import repo_stream
+
+        connection, db_connection = self.fake_connection(
+            [[{"id": "note:1"}, {"id": "note:2"}], [{"id": "note:3"}]]
+        )
+        with patch("open_notebook.database.repository.db_connection", db_connection):
+            rows = [
+                row
+                async for row in repo_stream(
+                    "SELECT id FROM note WHERE a = 1 OR b = 2", batch_size=2
+                )
+            ]
+
+        assert [row["id"] for row in rows] == ["note:1", "note:2", "note:3"]
+        first, second = [call.args for call in connection.query.await_args_list]
+        assert first[0].endswith("WHERE a = 1 OR b = 2 ORDER BY id LIMIT $stream_batch_size")
+        assert "WHERE ( a = 1 OR b = 2) AND id > $stream_after ORDER BY id" in second[0]
+        assert second[1]["stream_after"].id == "2"
+
+    @pytest.mark.asyncio
+    async def test_rejects_paging_clauses(self):
+        """Test queries that order or page themselves are rejected."""
+        from open_notebook.database.repository import repo_stream
+
+        with pytest.raises(ValueError):
+            async for _ in repo_stream("SELECT id FROM note ORDER BY updated"):
+                pass
+        # Keywords inside subqueries and field names do not count
+        from open_notebook.database.repository import _top_level_clauses
+
+        clauses = _top_level_clauses(
+            "SELECT id, order, (SELECT id FROM x WHERE y LIMIT 1) AS z FROM t WHERE a"
+        )
+        assert set(clauses) == {"WHERE"}
+
+    @pytest.mark.asyncio
+    async def test_iter_all_yields_models(self):
+        """Test iter_all streams projected model instances."""
+        from unittest.mock import patch
+
+        connection, db_connection = self.fake_connection(
+            [[{"id": "note:1", "title": "A"}]]
+        )
+        with patch("open_notebook.database.repository.db_connection", db_connection):
+            notes = [note async for note in Note.iter_all(omit=["content"])]
+
+        assert [note.title for note in notes] == ["A"]
+        assert "content" in notes[0]._unloaded_fields
+        assert connection.query.await_args.args[0].startswith(
+            "SELECT * OMIT embedding, next_embedding, content FROM note"
+        )
+
+
+# ============================================================================
+# TEST SUITE 14: Record Id Decoding
+# ============================================================================
+
+
+class TestParseRecordIds:
+    """Test suite for in-place record id conversion of query results."""
+
+    def test_converts_nested_ids_in_place(self):
+        """Test ids are stringified without rebuilding containers."""
+        from surrealdb import RecordID
+
+        from open_notebook.database.repository import parse_record_ids
+
+        embedding = [0.1, 0.2, 0.3]
+        row = {
+            "id": RecordID("note", "a"),
+            "refs": [RecordID("source", "b"), {"in": RecordID("notebook", "c")}],
+            "embedding": embedding,
+        }
+
+        result = parse_record_ids([row])
+
+        assert result[0] is row
+        assert row["id"] == "note:a"
+        assert row["refs"] == ["source:b", {"in": "notebook:c"}]
+        assert row["embedding"] is embedding
+        assert parse_record_ids(RecordID("note", "d")) == "note:d"
+
+    def test_mixed_lists_starting_with_a_number_are_walked(self):
+        """Test only all-number lists skip the item walk."""
+        from surrealdb import RecordID
+
+        from open_notebook.database.repository import parse_record_ids
+
+        mixed = [1, RecordID("note", "a"), {"in": RecordID("source", "b")}]
+
+        assert parse_record_ids(mixed) == [1, "note:a", {"in": "source:b"}]
+
+
+# ============================================================================
+# TEST SUITE 15: Model Registry and Partial Saves
+# ============================================================================
+
+
+class TestPartialSave:
+    """Test suite for the table registry and changed-field saves."""
+
+    def test_registry_maps_tables_to_classes(self):
+        """Test polymorphic lookup uses the registry."""
+        from open_notebook.domain.base import ObjectModel
+
+        assert ObjectModel._get_class_by_table_name("note") is Note
+        assert ObjectModel._get_class_by_table_name("source") is Source
+        assert ObjectModel._get_class_by_table_name("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_loaded_record_saves_only_changed_fields(self):
+        """Test a fetched note sends only its changed fields and is not re-embedded."""
+        from unittest.mock import AsyncMock, patch
+
+        row = {"id": "note:1", "title": "Old", "content": "Body", "token_count": 1}
+        with patch(
+            "open_notebook.domain.base.repo_query",
+            new=AsyncMock(return_value=[row]),
+        ):
+            note = await Note.get("note:1")
+
+        note.title = "New"
+        update = AsyncMock(return_value=[{"id": "note:1", "updated": None}])
+        model_manager = AsyncMock()
+        with patch("open_notebook.domain.base.repo_update", new=update), patch(
+            "open_notebook.domain.models.model_manager", new=model_manager
+        ):
+            await note.save()
+
+        table, id, data = update.await_args.args
+        assert set(data) == {"title", "updated"}
+        assert update.await_args.kwargs["returning"] == "id, updated"
+        model_manager.get_embedding_model_with_id.assert_not_called()
+        assert note._changed_fields() == set()
+
+    def test_in_place_edits_count_as_changes(self):
+        """Test mutating a loaded list marks the field changed."""
+        source = Source(id="source:1", title="T", topics=["a"])
+        assert source._changed_fields() is None
+
+        source._mark_clean()
+        source.topics.append("b")
+
+        assert source._changed_fields() == {"topics"}
+
+    @pytest.mark.asyncio
+    async def test_changed_fields_are_validated(self):
+        """Test a partial save still rejects invalid values."""
+        note = Note(id="note:1", title="T", content="Body")
+        note._mark_clean()
+        note.title = 5
+
+        with pytest.raises(ValidationError):
+            await note.save()
+
+
+# ============================================================================
+# TEST SUITE 16: Database Sessions and Query Batches
+# ============================================================================
+
+
+class TestDbSession:
+    """Test suite for request-scoped connections and multi-statement batches."""
+
+    @pytest.mark.asyncio
+    async def test_session_shares_one_connection(self):
+        """Test repository calls in a session reuse its connection."""
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from open_notebook.database.repository import db_session, repo_query
+
+        connection = MagicMock()
+        connection.query = AsyncMock(return_value=[])
+        connection.close = AsyncMock()
+        connect = AsyncMock(return_value=connection)
+        with patch("open_notebook.database.repository._connect", connect):
+            async with db_session():
+                async with db_session():
+                    await repo_query("SELECT * FROM note")
+                await repo_query("SELECT * FROM source")
+            assert connect.await_count == 1
+            connection.close.assert_awaited_once()
+
+            await repo_query("SELECT * FROM note")
+            assert connect.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_renames_params_and_splits_results(self):
+        """Test each statement keeps its own parameters and result."""
+        from contextlib import asynccontextmanager
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        from surrealdb import RecordID
+
+        from open_notebook.database.repository import QueryBatch
+
+        connection = MagicMock()
+        connection.query_raw = AsyncMock(
+            return_value={
+                "result": [
+                    {"status": "OK", "result": [{"id": RecordID("note", "a")}]},
+                    {"status": "OK", "result": [3]},
+                ]
+            }
+        )
+
+        @asynccontextmanager
+        async def db_connection():
+            yield connection
+
+        batch = QueryBatch()
+        batch.add("SELECT * FROM $id;", {"id": "note:1"})
+        batch.add("SELECT VALUE count() FROM $id_list", {"id_list": [1, 2, 3]})
+        with patch("open_notebook.database.repository.db_connection", db_connection):
+            notes, counts = await batch.execute()
+
+        query, params = connection.query_raw.await_args.args
+        assert query == "SELECT * FROM $b0_id;\nSELECT VALUE count() FROM $b1_id_list;"
+        assert params == {"b0_id": "note:1", "b1_id_list": [1, 2, 3]}
+        assert notes == [{"id": "note:a"}]
+        assert counts == [3]
+
+        connection.query_raw.return_value = {
+            "result": [{"status": "ERR", "result": "Parse error"}]
+        }
+        batch = QueryBatch()
+        batch.add("SELEC 1")
+        with patch("open_notebook.database.repository.db_connection", db_connection):
+            with pytest.raises(RuntimeError, match="Parse error"):
+                await batch.execute()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,273 @@
+"""
+Unit tests for the embedding rebuild pipeline.
+
+These tests cover checkpoint resumption, batched embedding and progress
+reporting with the database layer mocked out; vector search runs against an
+in-memory database.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from api.routers.embedding_rebuild import _checkpoint_progress
+from commands.embedding_commands import (
+    RebuildEmbeddingsInput,
+    _checkpoint_matches,
+    _rebuild_content_batch,
+    collect_items_for_rebuild,
+)
+from open_notebook.database.repository import db_session, repo_query
+from open_notebook.domain.embedding_migration import (
+    coverage_percentage,
+    is_fully_covered,
+)
+from open_notebook.domain.models import embedding_metadata
+
+# ============================================================================
+# TEST SUITE 1: Checkpoints
+# ============================================================================
+
+
+class TestRebuildCheckpoint:
+    """Test suite for deciding whether a checkpoint can be resumed."""
+
+    def test_running_checkpoint_with_same_scope_resumes(self):
+        input_data = RebuildEmbeddingsInput(mode="all", include_notes=False)
+        checkpoint = {
+            "status": "running",
+            "mode": "all",
+            "include_sources": True,
+            "include_notes": False,
+            "include_insights": True,
+        }
+        assert _checkpoint_matches(checkpoint, input_data)
+
+    def test_completed_or_different_scope_does_not_resume(self):
+        input_data = RebuildEmbeddingsInput(mode="all")
+        checkpoint = {
+            "status": "completed",
+            "mode": "all",
+            "include_sources": True,
+            "include_notes": True,
+            "include_insights": True,
+        }
+        assert not _checkpoint_matches(checkpoint, input_data)
+        assert not _checkpoint_matches(
+            {**checkpoint, "status": "running", "mode": "existing"}, input_data
+        )
+        assert not _checkpoint_matches(None, input_data)
+
+    def test_progress_reports_throughput_and_eta(self):
+        started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        checkpoint = {
+            "total_items": 100,
+            "processed": {"sources": 20, "notes": 10, "insights": 0},
+            "failed_items": 0,
+            "run_started_at": started.isoformat(),
+            "run_done_at_start": 10,
+        }
+        progress = _checkpoint_progress(checkpoint, now=started + timedelta(seconds=10))
+        assert progress.processed == 30
+        assert progress.percentage == 30.0
+        assert progress.items_per_second == 2.0
+        assert progress.eta_seconds == 35.0
+
+
+# ============================================================================
+# TEST SUITE 2: Batched Embedding
+# ============================================================================
+
+
+class TestRebuildContentBatch:
+    """Test suite for note/insight batches embedded in one call."""
+
+    @pytest.mark.asyncio
+    @patch("commands.embedding_commands.repo_query", new_callable=AsyncMock)
+    async def test_batch_uses_single_embedding_call(self, mock_repo_query):
+        mock_repo_query.side_effect = [
+            [{"id": "note:a", "content": "alpha"}, {"id": "note:b", "content": "beta"}],
+            [],
+            [],
+        ]
+        model = MagicMock()
+        model.aembed = AsyncMock(return_value=[[0.1], [0.2]])
+
+        succeeded, failed = await _rebuild_content_batch(
+            "notes", ["note:a", "note:b"], model, asyncio.Semaphore(2), "model:new"
+        )
+
+        assert (succeeded, failed) == (2, 0)
+        model.aembed.assert_awaited_once_with(["alpha", "beta"])
+        assert mock_repo_query.await_count == 3
+        update_data = mock_repo_query.await_args_list[1].args[1]["data"]
+        assert update_data["embedding_model"] == "model:new"
+        assert update_data["embedding_dim"] == 1
+
+    @pytest.mark.asyncio
+    @patch("commands.embedding_commands.repo_query", new_callable=AsyncMock)
+    async def test_shadow_batch_writes_next_embedding(self, mock_repo_query):
+        mock_repo_query.side_effect = [[{"id": "note:a", "content": "alpha"}], []]
+        model = MagicMock()
+        model.aembed = AsyncMock(return_value=[[0.1, 0.2]])
+
+        await _rebuild_content_batch(
+            "notes", ["note:a"], model, asyncio.Semaphore(1), "model:next", shadow=True
+        )
+
+        update_data = mock_repo_query.await_args_list[1].args[1]["data"]
+        assert update_data == {
+            "next_embedding": [0.1, 0.2],
+            "next_embedding_model": "model:next",
+            "next_embedding_dim": 2,
+        }
+
+    @pytest.mark.asyncio
+    @patch("commands.embedding_commands.repo_query", new_callable=AsyncMock)
+    async def test_batch_failure_falls_back_per_item(self, mock_repo_query):
+        mock_repo_query.side_effect = [
+            [{"id": "note:a", "content": "alpha"}, {"id": "note:b", "content": "beta"}],
+            [],
+        ]
+        model = MagicMock()
+        model.aembed = AsyncMock(
+            side_effect=[RuntimeError("batch"), [[0.1]], RuntimeError("item")]
+        )
+
+        succeeded, failed = await _rebuild_content_batch(
+            "notes", ["note:a", "note:b"], model, asyncio.Semaphore(2)
+        )
+
+        assert (succeeded, failed) == (1, 1)
+
+
+# ============================================================================
+# TEST SUITE 3: Embedding Model Versioning
+# ============================================================================
+
+
+class TestEmbeddingVersioning:
+    """Test suite for model stamps and the stale rebuild mode."""
+
+    def test_embedding_metadata(self):
+        assert embedding_metadata("model:abc", [0.1, 0.2, 0.3]) == {
+            "embedding_model": "model:abc",
+            "embedding_dim": 3,
+        }
+        assert embedding_metadata(None, [0.1]) == {}
+        assert embedding_metadata("model:abc", []) == {}
+
+    @pytest.mark.asyncio
+    async def test_stale_mode_filters_on_model(self):
+        pages = iter([[{"id": "source:1"}], [{"id": "note:1"}], [{"id": "source_insight:1"}]])
+        calls = []
+
+        async def fake_stream(query, vars=None, batch_size=500):
+            calls.append((query, vars))
+            for row in next(pages):
+                yield row
+
+        with patch("commands.embedding_commands.repo_stream", fake_stream):
+            items = await collect_items_for_rebuild(
+                "stale", True, True, True, "model:new"
+            )
+
+        assert items == {
+            "sources": ["source:1"],
+            "notes": ["note:1"],
+            "insights": ["source_insight:1"],
+        }
+        assert len(calls) == 3
+        for query, vars in calls:
+            assert "embedding_model != $embedding_model" in query
+            assert vars == {"embedding_model": "model:new"}
+
+    def test_cutover_requires_full_coverage(self):
+        coverage = {
+            "sources": {"total": 4, "covered": 4},
+            "notes": {"total": 6, "covered": 5},
+            "insights": {"total": 0, "covered": 0},
+        }
+        assert not is_fully_covered(coverage)
+        assert coverage_percentage(coverage) == 90.0
+
+        coverage["notes"]["covered"] = 6
+        assert is_fully_covered(coverage)
+        assert coverage_percentage(coverage) == 100.0
+
+
+# ============================================================================
+# TEST SUITE 4: Vector Search
+# ============================================================================
+
+
+class TestVectorSearch:
+    """Test suite for which stored vectors fn::vector_search compares against."""
+
+    MIGRATION = Path(__file__).parent.parent / "migrations" / "20.surrealql"
+    SEARCH = "RETURN fn::vector_search([1.0, 0.0], 10, true, true, 0.1, none, none, 'model:new')"
+
+    @pytest.mark.asyncio
+    async def test_legacy_vectors_only_match_before_the_model_has_written(self, surreal_db):
+        async with db_session():
+            await repo_query(self.MIGRATION.read_text())
+            await repo_query(
+                """
+                CREATE note:legacy SET title = 'Legacy', content = 'l',
+                    embedding = [1.0, 0.0], embedding_dim = 2;
+                CREATE note:other SET title = 'Other', content = 'o',
+                    embedding = [1.0, 0.0], embedding_dim = 2, embedding_model = 'model:old';
+                CREATE source_insight:legacy SET insight_type = 'Summary', content = 'i',
+                    embedding = [1.0, 0.0], embedding_dim = 2;
+                """
+            )
+            before = await repo_query(self.SEARCH)
+            await repo_query(
+                """
+                CREATE note:fresh SET title = 'Fresh', content = 'f',
+                    embedding = [1.0, 0.1], embedding_dim = 2, embedding_model = 'model:new';
+                """
+            )
+            after = await repo_query(self.SEARCH)
+
+        assert {row["id"] for row in before} == {"note:legacy", "source_insight:legacy"}
+        # Unstamped notes are dropped once the model has notes of its own;
+        # the insights table is judged on its own vectors
+        assert {row["id"] for row in after} == {"note:fresh", "source_insight:legacy"}
+
+    @pytest.mark.asyncio
+    async def test_chunk_search_drops_legacy_vectors_once_the_model_has_written(
+        self, surreal_db
+    ):
+        from open_notebook.domain.notebook import search_source_chunks
+
+        model = MagicMock()
+        model.aembed = AsyncMock(return_value=[[1.0, 0.0]])
+        with patch(
+            "open_notebook.domain.notebook.model_manager.get_embedding_model_with_id",
+            new_callable=AsyncMock,
+            return_value=("model:new", model),
+        ):
+            async with db_session():
+                await repo_query(
+                    """
+                    CREATE source_embedding:legacy SET source = source:a, content = 'l',
+                        embedding = [1.0, 0.0], embedding_dim = 2;
+                    CREATE source_embedding:other SET source = source:a, content = 'o',
+                        embedding = [1.0, 0.0], embedding_dim = 2, embedding_model = 'model:old';
+                    """
+                )
+                before = await search_source_chunks("question", ["source:a"])
+                await repo_query(
+                    """
+                    CREATE source_embedding:fresh SET source = source:b, content = 'f',
+                        embedding = [1.0, 0.1], embedding_dim = 2, embedding_model = 'model:new';
+                    """
+                )
+                after = await search_source_chunks("question", ["source:a", "source:b"])
+
+        assert [row["id"] for row in before] == ["source_embedding:legacy"]
+        assert [row["id"] for row in after] == ["source_embedding:fresh"]
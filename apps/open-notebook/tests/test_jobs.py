@@ -0,0 +1,98 @@
+"""
+Unit tests for the open_notebook.jobs module.
+
+This test suite covers the fair-share scheduling logic, which is pure and can be
+exercised without a database or a running worker.
+"""
+
+import pytest
+
+from open_notebook.jobs import SYSTEM_TENANT, FairScheduler, QueuedJob, tenant_key
+from open_notebook.jobs.worker import parse_tenant_limits
+
+
+def make_job(tenant: str, n: int) -> QueuedJob:
+    return QueuedJob(
+        command_id=f"command:{tenant}-{n}",
+        command_name="open_notebook.embed_chunk",
+        args={},
+        tenant=tenant,
+    )
+
+
+# ============================================================================
+# TEST SUITE 1: Tenant Keys
+# ============================================================================
+
+
+class TestTenantKey:
+    """Test suite for tenant key derivation from ownership."""
+
+    def test_team_takes_precedence(self):
+        assert tenant_key(user_id="u1", team_id="t1") == "team:t1"
+
+    def test_personal_and_system(self):
+        assert tenant_key(user_id="u1") == "user:u1"
+        assert tenant_key() == SYSTEM_TENANT
+
+
+# ============================================================================
+# TEST SUITE 2: Fair Scheduler
+# ============================================================================
+
+
+class TestFairScheduler:
+    """Test suite for round-robin dispatch and concurrency caps."""
+
+    def test_round_robin_across_tenants(self):
+        """A bulk tenant does not block a tenant that queued later."""
+        scheduler = FairScheduler(max_tasks=10, tenant_max_tasks=10)
+        for i in range(5):
+            scheduler.enqueue(make_job("team:bulk", i))
+        scheduler.enqueue(make_job("user:small", 0))
+
+        first = scheduler.next_job()
+        second = scheduler.next_job()
+        assert first is not None and first.tenant == "team:bulk"
+        assert second is not None and second.tenant == "user:small"
+
+    def test_tenant_cap_skips_without_blocking_others(self):
+        scheduler = FairScheduler(max_tasks=10, tenant_max_tasks=1)
+        scheduler.enqueue(make_job("team:a", 0))
+        scheduler.enqueue(make_job("team:a", 1))
+        scheduler.enqueue(make_job("team:b", 0))
+
+        started = [scheduler.next_job(), scheduler.next_job(), scheduler.next_job()]
+        assert [job.tenant if job else None for job in started] == [
+            "team:a",
+            "team:b",
+            None,
+        ]
+
+        scheduler.complete(started[0])  # type: ignore[arg-type]
+        resumed = scheduler.next_job()
+        assert resumed is not None and resumed.command_id == "command:team:a-1"
+
+    def test_global_cap_and_snapshot(self):
+        scheduler = FairScheduler(
+            max_tasks=2, tenant_max_tasks=5, tenant_limits={"team:vip": 3}
+        )
+        for i in range(3):
+            scheduler.enqueue(make_job("team:vip", i))
+
+        assert scheduler.next_job() is not None
+        assert scheduler.next_job() is not None
+        assert scheduler.next_job() is None  # pool is full
+
+        stats = {row["tenant"]: row for row in scheduler.snapshot()}
+        assert stats["team:vip"]["running"] == 2
+        assert stats["team:vip"]["queued"] == 1
+        assert stats["team:vip"]["limit"] == 3
+
+    def test_invalid_limits_rejected(self):
+        with pytest.raises(ValueError):
+            FairScheduler(max_tasks=0)
+
+    def test_parse_tenant_limits(self):
+        limits = parse_tenant_limits("team:abc=4, user:x=0,bogus,system=1")
+        assert limits == {"team:abc": 4, "user:x": 1, "system": 1}
@@ -0,0 +1,83 @@
+"""
+Unit tests for the event loop monitor.
+
+The loop is blocked on purpose with time.sleep, so these take about a second.
+"""
+
+import asyncio
+import time
+import traceback
+
+import pytest
+
+from open_notebook.loop_monitor import (
+    APP_ROOT,
+    LoopMonitor,
+    blocking_frame,
+    frame_location,
+    loop_block_threshold,
+)
+from open_notebook.metrics import EVENT_LOOP_BLOCKED_SECONDS, EVENT_LOOP_BLOCKS
+
+
+async def block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    """Test suite for detecting and locating event loop blocks."""
+
+    def test_blocking_code_is_located_and_counted(self):
+        location = "tests/test_loop_monitor.py:block_the_loop"
+        before = EVENT_LOOP_BLOCKS.value(location)
+        captured = []
+
+        async def scenario():
+            monitor = LoopMonitor(threshold=0.1, interval=0.02)
+            record_stall = monitor._record_stall
+            monitor._record_stall = lambda stall, lag: (  # type: ignore[method-assign]
+                captured.append(stall),
+                record_stall(stall, lag),
+            )
+            await monitor.start()
+            await asyncio.sleep(0.05)
+            await asyncio.create_task(block_the_loop(0.5), name="blocking-request")
+            await asyncio.sleep(0.1)
+            await monitor.stop()
+
+        asyncio.run(scenario())
+
+        (stall,) = captured
+        assert stall.location == location
+        assert stall.task == "blocking-request"
+        assert "time.sleep(seconds)" in stall.stack
+        assert EVENT_LOOP_BLOCKS.value(location) == before + 1
+        assert EVENT_LOOP_BLOCKED_SECONDS.value(location) >= 0.4
+
+    def test_a_healthy_loop_reports_nothing(self):
+        async def scenario():
+            monitor = LoopMonitor(threshold=0.1, interval=0.02)
+            await monitor.start()
+            for _ in range(10):
+                await asyncio.sleep(0.02)
+            await monitor.stop()
+            return monitor
+
+        assert asyncio.run(scenario()).stall is None
+
+    def test_location_prefers_our_code_over_libraries(self):
+        ours = traceback.FrameSummary(str(APP_ROOT / "api/routers/sources.py"), 584, "create_source")
+        library = traceback.FrameSummary("/usr/lib/python3/site-packages/surreal_commands/api.py", 10, "wait")
+
+        assert frame_location(blocking_frame([ours, library])) == "api/routers/sources.py:create_source"
+        assert frame_location(blocking_frame([library])) == "api.py:wait"
+
+    def test_threshold_comes_from_the_environment(self, monkeypatch):
+        monkeypatch.setenv("LOOP_BLOCK_THRESHOLD_MS", "0")
+        assert loop_block_threshold() == 0
+        monkeypatch.setenv("LOOP_BLOCK_THRESHOLD_MS", "500")
+        assert loop_block_threshold() == 0.5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,209 @@
+"""
+Unit tests for the in-process metrics.
+
+Metrics are rendered from memory, so no database or model provider is needed.
+"""
+
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from api.metrics import MetricsMiddleware
+from open_notebook.graphs.utils import LLMMetricsCallback
+from open_notebook.metrics import (
+    EMBEDDED_TEXTS,
+    EMBEDDING_CALL_SECONDS,
+    HTTP_REQUEST_SECONDS,
+    LLM_CALL_SECONDS,
+    LLM_TOKENS,
+    Counter,
+    Histogram,
+    instrument_embedding_model,
+    start_metrics_server,
+    statement_name,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    for metric in (
+        HTTP_REQUEST_SECONDS,
+        LLM_CALL_SECONDS,
+        LLM_TOKENS,
+        EMBEDDING_CALL_SECONDS,
+        EMBEDDED_TEXTS,
+    ):
+        metric.clear()
+
+
+# ============================================================================
+# TEST SUITE 1: Metric Types
+# ============================================================================
+
+
+class TestMetrics:
+    """Test suite for histograms, counters and the text format."""
+
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5, "/a")
+
+        assert histogram.render() == [
+            "# HELP test_seconds Test.",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{route="/a",le="0.1"} 1',
+            'test_seconds_bucket{route="/a",le="1"} 2',
+            'test_seconds_bucket{route="/a",le="+Inf"} 3',
+            'test_seconds_sum{route="/a"} 5.55',
+            'test_seconds_count{route="/a"} 3',
+        ]
+
+    def test_counter_escapes_labels_and_caps_label_sets(self, monkeypatch):
+        monkeypatch.setattr("open_notebook.metrics.MAX_LABEL_SETS", 2)
+        counter = Counter("test_things", "Test.", ("name",))
+        counter.inc(2, 'say "hi"')
+        counter.inc(1, "b")
+        counter.inc(1, "c")
+        counter.inc(1, "d")
+
+        assert 'test_things_total{name="say \\"hi\\""} 2' in counter.render()
+        assert counter.value("other") == 2
+
+    def test_wrong_label_count_is_rejected(self):
+        with pytest.raises(ValueError):
+            Histogram("test_labels", "Test.", ("a", "b")).observe(1, "only-a")
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("SELECT * FROM source WHERE id = $id", "select source"),
+            ("select *, (select * from note) as notes from notebook", "select notebook"),
+            ("SELECT * FROM $id", "select $id"),
+            ("UPDATE source:abc MERGE $data;", "update source"),
+            ("DELETE source_embedding WHERE source = $id", "delete source_embedding"),
+            ("RELATE source:a->reference->notebook:b CONTENT $data;", "relate source"),
+            ("LET $x = 1; SELECT * FROM $x", "batch"),
+            ("fn::text_search($query, 10)", "other"),
+        ],
+    )
+    def test_statement_name(self, query, expected):
+        assert statement_name(query) == expected
+
+
+# ============================================================================
+# TEST SUITE 2: Instrumentation
+# ============================================================================
+
+
+class TestInstrumentation:
+    """Test suite for the request, model and embedding hooks."""
+
+    def test_requests_are_labelled_by_route_template(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str):
+            return {"id": item_id}
+
+        client = TestClient(app)
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/nowhere")
+
+        assert HTTP_REQUEST_SECONDS.count("GET", "/items/{item_id}", 200) == 2
+        assert HTTP_REQUEST_SECONDS.count("GET", "unmatched", 404) == 1
+
+    @pytest.mark.asyncio
+    async def test_embedding_calls_are_timed_once(self):
+        class FakeEmbedding:
+            aembed = AsyncMock(return_value=[[0.1], [0.2]])
+
+        model = FakeEmbedding()
+        instrument_embedding_model(model, "fake/embed")
+        instrument_embedding_model(model, "fake/embed")
+
+        assert await model.aembed(["a", "b"]) == [[0.1], [0.2]]
+        assert EMBEDDING_CALL_SECONDS.count("fake/embed", "ok") == 1
+        assert EMBEDDED_TEXTS.value("fake/embed") == 2
+
+    def test_llm_callback_records_latency_and_tokens(self):
+        callback = LLMMetricsCallback("fake/chat")
+        run_id = uuid4()
+        message = AIMessage(
+            content="hi",
+            usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15},
+        )
+
+        callback.on_chat_model_start({}, [], run_id=run_id)
+        callback.on_llm_end(
+            LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id
+        )
+        failed = uuid4()
+        callback.on_llm_start({}, ["prompt"], run_id=failed)
+        callback.on_llm_error(RuntimeError("boom"), run_id=failed)
+
+        assert LLM_CALL_SECONDS.count("fake/chat", "ok") == 1
+        assert LLM_CALL_SECONDS.count("fake/chat", "error") == 1
+        assert LLM_TOKENS.value("fake/chat", "input") == 12
+        assert LLM_TOKENS.value("fake/chat", "output") == 3
+
+
+# ============================================================================
+# TEST SUITE 3: Metrics Endpoints
+# ============================================================================
+
+
+class TestMetricsEndpoints:
+    """Test suite for METRICS_TOKEN on the API and worker endpoints."""
+
+    def test_api_metrics_require_the_token(self, monkeypatch):
+        from api.main import app
+
+        client = TestClient(app)
+        monkeypatch.delenv("METRICS_TOKEN", raising=False)
+        assert client.get("/metrics").status_code == 404
+
+        monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+        assert client.get("/metrics").status_code == 401
+        assert (
+            client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code
+            == 401
+        )
+        response = client.get(
+            "/metrics", headers={"Authorization": "Bearer scrape-secret"}
+        )
+        assert response.status_code == 200
+        assert "open_notebook_http_request_duration_seconds" in response.text
+
+    def test_worker_metrics_require_the_token(self, monkeypatch):
+        import urllib.error
+        import urllib.request
+
+        monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+        server = start_metrics_server(0, host="127.0.0.1")
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        try:
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(url, timeout=5)
+            assert error.value.code == 401
+
+            request = urllib.request.Request(
+                url, headers={"Authorization": "Bearer scrape-secret"}
+            )
+            with urllib.request.urlopen(request, timeout=5) as response:
+                assert response.status == 200
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
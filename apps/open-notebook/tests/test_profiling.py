@@ -0,0 +1,97 @@
+"""
+Unit tests for on-demand request profiling.
+
+Profiles are written to a temporary folder, so no data folder is touched.
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from api.profiling import ProfilingMiddleware
+from api.routers.profiles import require_profiling_token
+from open_notebook.metrics import DB_QUERY_SECONDS, TOKEN_COUNT_SECONDS
+
+TOKEN = "profile-secret"
+
+
+class Item(BaseModel):
+    name: str
+    count: int
+
+
+def make_app(folder, **kwargs):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, folder=str(folder), **kwargs)
+
+    @app.get("/api/items/{item_id}")
+    async def get_item(item_id: str):
+        DB_QUERY_SECONDS.observe(0.25, "select item")
+        TOKEN_COUNT_SECONDS.observe(0.05)
+        return Item(name=item_id, count=1)
+
+    return TestClient(app)
+
+
+# ============================================================================
+# TEST SUITE 1: Profiling Middleware
+# ============================================================================
+
+
+class TestProfilingMiddleware:
+    """Test suite for capturing and attributing request profiles."""
+
+    def test_token_header_profiles_the_request(self, tmp_path):
+        client = make_app(tmp_path, token=TOKEN)
+
+        response = client.get("/api/items/a", headers={"X-Profile-Token": TOKEN})
+
+        profile_id = response.headers["X-Profile-Id"]
+        summary = json.loads((tmp_path / f"{profile_id}.json").read_text())
+        assert (tmp_path / f"{profile_id}.prof").exists()
+        assert summary["route"] == "/api/items/{item_id}"
+        assert summary["status"] == 200
+        assert summary["trigger"] == "header"
+        assert summary["attributed_seconds"]["db"] == 0.25
+        assert summary["attributed_seconds"]["tokenization"] == 0.05
+        assert "validation" in summary["attributed_seconds"]
+        assert summary["top_functions"]
+
+    def test_requests_without_a_valid_token_are_not_profiled(self, tmp_path):
+        client = make_app(tmp_path, token=TOKEN)
+
+        plain = client.get("/api/items/a")
+        wrong = client.get("/api/items/a", headers={"X-Profile-Token": "guess"})
+
+        assert plain.status_code == wrong.status_code == 200
+        assert "X-Profile-Id" not in wrong.headers
+        assert list(tmp_path.iterdir()) == []
+
+    def test_sampled_requests_are_profiled_without_a_header(self, tmp_path):
+        client = make_app(tmp_path, sample_rate=1.0)
+
+        response = client.get("/api/items/a")
+
+        assert "X-Profile-Id" not in response.headers
+        (summary_path,) = tmp_path.glob("*.json")
+        assert json.loads(summary_path.read_text())["trigger"] == "sampled"
+
+    def test_profile_endpoints_require_the_token(self, monkeypatch):
+        monkeypatch.delenv("PROFILING_TOKEN", raising=False)
+        with pytest.raises(HTTPException) as disabled:
+            require_profiling_token(TOKEN)
+
+        monkeypatch.setenv("PROFILING_TOKEN", TOKEN)
+        with pytest.raises(HTTPException) as forbidden:
+            require_profiling_token("guess")
+        require_profiling_token(TOKEN)
+
+        assert disabled.value.status_code == 404
+        assert forbidden.value.status_code == 403
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
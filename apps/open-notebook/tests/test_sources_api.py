@@ -0,0 +1,218 @@
+"""
+Unit tests for the source text slice endpoint.
+
+The route function is called directly with the database layer mocked out, so
+these tests do not need authentication credentials.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+
+from api.models import SourceUpdate
+from api.routers.sources import (
+    _text_etag,
+    get_source,
+    get_source_text,
+    get_sources,
+    update_source,
+)
+from open_notebook.domain.notebook import Source
+
+
+def make_request(headers=None) -> Request:
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "headers": raw_headers})
+
+
+# ============================================================================
+# TEST SUITE 1: Source Text Slices
+# ============================================================================
+
+
+class TestSourceText:
+    """Test suite for ranged full_text retrieval."""
+
+    @pytest.mark.asyncio
+    @patch("api.routers.sources.repo_query", new_callable=AsyncMock)
+    async def test_char_slice_reports_next_offset(self, mock_repo_query):
+        mock_repo_query.side_effect = [
+            [{"updated": "2025-01-01T00:00:00Z", "total": 25}],
+            ["0123456789"],
+        ]
+        response = Response()
+
+        result = await get_source_text(
+            make_request(), response, "source:1", unit="chars", offset=10, length=10
+        )
+
+        assert result.text == "0123456789"
+        assert (result.offset, result.length, result.total) == (10, 10, 25)
+        assert result.next_offset == 20
+        assert mock_repo_query.await_args.args[1]["length"] == 10
+        assert response.headers["ETag"].startswith('W/"')
+
+    @pytest.mark.asyncio
+    @patch("api.routers.sources.repo_query", new_callable=AsyncMock)
+    async def test_matching_etag_returns_not_modified(self, mock_repo_query):
+        updated = "2025-01-01T00:00:00Z"
+        mock_repo_query.return_value = [{"updated": updated, "total": 25}]
+        etag = _text_etag("source:1", updated, 25, "chars", 0, 10)
+
+        result = await get_source_text(
+            make_request({"If-None-Match": etag}),
+            Response(),
+            "source:1",
+            unit="chars",
+            offset=0,
+            length=10,
+        )
+
+        assert result.status_code == 304
+        assert mock_repo_query.await_count == 1
+
+    @pytest.mark.asyncio
+    @patch("api.routers.sources.repo_query", new_callable=AsyncMock)
+    async def test_chunk_slice_deduplicates_orders(self, mock_repo_query):
+        mock_repo_query.side_effect = [
+            [{"updated": "2025-01-01T00:00:00Z", "total": 3}],
+            [
+                {"order": 0, "content": "first"},
+                {"order": 0, "content": "first"},
+                {"order": 1, "content": "second"},
+            ],
+        ]
+
+        result = await get_source_text(
+            make_request(), Response(), "source:1", unit="chunks", offset=0, length=2
+        )
+
+        assert [chunk.order for chunk in result.chunks] == [0, 1]
+        assert result.next_offset == 2
+        assert result.text is None
+
+    @pytest.mark.asyncio
+    @patch("api.routers.sources.blob_store.read_text_range")
+    @patch("api.routers.sources.repo_query", new_callable=AsyncMock)
+    async def test_blob_stored_text_is_sliced_from_blob(
+        self, mock_repo_query, mock_read_range
+    ):
+        mock_repo_query.return_value = [
+            {"updated": "2025-01-01T00:00:00Z", "full_text_ref": "zstd:sha256:x", "total": 25}
+        ]
+        mock_read_range.return_value = "0123456789"
+
+        result = await get_source_text(
+            make_request(), Response(), "source:1", unit="chars", offset=20, length=10
+        )
+
+        mock_read_range.assert_called_once_with("zstd:sha256:x", 20, 10)
+        assert mock_repo_query.await_count == 1
+        assert result.text == "0123456789"
+
+
+# ============================================================================
+# TEST SUITE 2: Source List Cursors
+# ============================================================================
+
+
+class TestSourceListCursor:
+    """Test suite for keyset pagination of the source list."""
+
+    @pytest.mark.asyncio
+    @patch("api.routers.sources.repo_query", new_callable=AsyncMock)
+    async def test_full_page_sets_next_cursor(self, mock_repo_query):
+        mock_repo_query.return_value = [
+            {
+                "id": f"source:{i}",
+                "title": f"S{i}",
+                "created": "2025-01-01T00:00:00Z",
+                "updated": f"2025-01-0{i}T00:00:00Z",
+            }
+            for i in (3, 2)
+        ]
+        response = Response()
+
+        await get_sources(
+            response, notebook_id=None, limit=2, offset=0, cursor=None,
+            sort_by="updated", sort_order="desc",
+        )
+        cursor = response.headers["X-Next-Cursor"]
+
+        mock_repo_query.return_value = []
+        response = Response()
+        await get_sources(
+            response, notebook_id=None, limit=2, offset=0, cursor=cursor,
+            sort_by="updated", sort_order="desc",
+        )
+
+        query, params = mock_repo_query.await_args.args
+        assert "START" not in query
+        assert "updated < <datetime>$cursor_value" in query
+        assert params["cursor_value"] == "2025-01-02T00:00:00Z"
+        assert "X-Next-Cursor" not in response.headers
+
+
+# ============================================================================
+# TEST SUITE 3: Source Detail
+# ============================================================================
+
+
+class TestSourceDetail:
+    """Test suite for reading a source's details in one round trip."""
+
+    @pytest.mark.asyncio
+    async def test_detail_is_one_batch(self):
+        execute = AsyncMock(
+            return_value=[
+                [
+                    {
+                        "id": "source:1",
+                        "title": "Doc",
+                        "command": "command:9",
+                        "created": "2025-01-01T00:00:00Z",
+                        "updated": "2025-01-01T00:00:00Z",
+                    }
+                ],
+                [{"status": "completed", "result": {"execution_metadata": {}}}],
+                [{"chunks": 4}],
+                ["notebook:1"],
+            ]
+        )
+        with patch("api.routers.sources.QueryBatch.execute", execute):
+            result = await get_source("source:1", include_full_text=False)
+
+        execute.assert_awaited_once()
+        assert result.status == "completed"
+        assert result.processing_info["status"] == "completed"
+        assert result.embedded_chunks == 4
+        assert result.notebooks == ["notebook:1"]
+
+
+# ============================================================================
+# TEST SUITE 4: Source Updates
+# ============================================================================
+
+
+class TestSourceUpdate:
+    """Test suite for the source returned by updates."""
+
+    @pytest.mark.asyncio
+    async def test_blob_stored_text_is_returned(self):
+        source = Source(id="source:1", title="Doc", full_text_ref="blob:sha256:abc")
+        with (
+            patch("api.routers.sources.Source.get", AsyncMock(return_value=source)),
+            patch.object(Source, "save", AsyncMock()),
+            patch.object(Source, "get_embedded_chunks", AsyncMock(return_value=0)),
+            patch(
+                "open_notebook.domain.notebook.blob_store.read_text",
+                return_value="Body",
+            ) as read_text,
+        ):
+            result = await update_source("source:1", SourceUpdate(title="Renamed"))
+
+        read_text.assert_called_once_with("blob:sha256:abc")
+        assert result.title == "Renamed"
+        assert result.full_text == "Body"
@@ -16,8 +16,19 @@ from open_notebook.utils import (
     remove_non_printable,
     split_text,
     token_count,
+    truncate_to_tokens,
 )
-from open_notebook.utils.context_builder import ContextBuilder, ContextConfig
+from open_notebook.utils.context_builder import (
+    ContextBuilder,
+    ContextConfig,
+    ContextItem,
+    pack_by_token_budget,
+)
+
+
+def word_count(text: str) -> int:
+    """Deterministic stand-in for the tokenizer."""
+    return len(text.split())
 
 # ============================================================================
 # TEST SUITE 1: Text Utilities
@@ -145,15 +156,21 @@ class TestTokenUtilities:
         """Test fallback when tiktoken raises an error."""
         from unittest.mock import patch
 
+        from open_notebook.utils.token_utils import _encoding
+
         # Make tiktoken raise an ImportError to trigger fallback
-        with patch("tiktoken.get_encoding", side_effect=ImportError("tiktoken not available")):
-            text = "one two three four five"
-            count = token_count(text)
+        _encoding.cache_clear()
+        try:
+            with patch("tiktoken.get_encoding", side_effect=ImportError("tiktoken not available")):
+                text = "one two three four five"
+                count = token_count(text)
+        finally:
+            _encoding.cache_clear()
 
-            # Fallback uses word count * 1.3
-            # 5 words * 1.3 = 6.5 -> 6
-            assert isinstance(count, int)
-            assert count > 0
+        # Fallback uses word count * 1.3
+        # 5 words * 1.3 = 6.5 -> 6
+        assert isinstance(count, int)
+        assert count == 6
 
 
 # ============================================================================
@@ -262,5 +279,180 @@ class TestContextBuilder:
         assert builder.include_insights is False
 
 
+# ============================================================================
+# TEST SUITE 5: Retrieval Context
+# ============================================================================
+
+
+class TestRetrievalContext:
+    """Test suite for token-budgeted retrieval context."""
+
+    def test_truncate_to_tokens_cuts_at_sentence_boundary(self):
+        from unittest.mock import patch
+
+        text = "One two three. Four five six.\n\nSeven eight nine ten."
+        with patch("open_notebook.utils.text_utils.token_count", side_effect=word_count):
+            assert truncate_to_tokens(text, 100) == text
+            assert truncate_to_tokens(text, 6) == "One two three. Four five six."
+            assert truncate_to_tokens(text, 4) == "One two three."
+            # No whole sentence fits: fall back to a word boundary
+            assert truncate_to_tokens(text, 2) == "One two"
+            assert truncate_to_tokens(text, 0) == ""
+
+    def test_pack_by_token_budget_skips_items_that_do_not_fit(self):
+        items = [
+            ContextItem(id=f"chunk:{n}", type="chunk", content={}, token_count=tokens)
+            for n, tokens in enumerate([400, 700, 300, 200])
+        ]
+
+        packed = pack_by_token_budget(items, 1000)
+        assert [item.id for item in packed] == ["chunk:0", "chunk:2", "chunk:3"]
+        assert pack_by_token_budget(items, None) == items
+
+    @pytest.mark.asyncio
+    async def test_retrieval_packs_chunks_by_stored_token_counts(self):
+        from unittest.mock import AsyncMock, patch
+
+        chunks = [
+            {"id": "source_embedding:b", "source": "source:1", "order": 3,
+             "content": "best match", "token_count": 60, "similarity": 0.9},
+            {"id": "source_embedding:c", "source": "source:1", "order": 1,
+             "content": "too big", "token_count": 80, "similarity": 0.8},
+            {"id": "source_embedding:a", "source": "source:1", "order": 0,
+             "content": "small", "token_count": 30, "similarity": 0.7},
+        ]
+        builder = ContextBuilder(query="question", max_tokens=100)
+        builder.retrieval_source_ids = ["source:1"]
+
+        with patch(
+            "open_notebook.utils.context_builder.search_source_chunks",
+            new_callable=AsyncMock,
+            return_value=chunks,
+        ) as mock_search:
+            await builder._add_retrieval_context("question")
+
+        mock_search.assert_awaited_once_with("question", ["source:1"], top_k=20)
+        # Greedy by similarity, then presented in reading order
+        assert [item.id for item in builder.items] == [
+            "source_embedding:a",
+            "source_embedding:b",
+        ]
+        assert sum(item.token_count or 0 for item in builder.items) == 90
+
+    @pytest.mark.asyncio
+    async def test_lower_priority_items_do_not_use_up_the_chunk_budget(self):
+        from unittest.mock import AsyncMock, patch
+
+        chunks = [
+            {"id": "source_embedding:a", "source": "source:1", "order": 0,
+             "content": "match", "token_count": 60, "similarity": 0.9},
+        ]
+        builder = ContextBuilder(query="question", max_tokens=100)
+        builder.retrieval_source_ids = ["source:1"]
+        builder.items = [
+            ContextItem(id=f"note:{n}", type="note", content={"content": "x"},
+                        priority=50, field_tokens={"content": 50})
+            for n in range(4)
+        ]
+
+        with patch(
+            "open_notebook.utils.context_builder.search_source_chunks",
+            new_callable=AsyncMock,
+            return_value=chunks,
+        ):
+            await builder._add_retrieval_context("question")
+        builder.prioritize()
+        builder.truncate_to_fit(100)
+
+        assert [item.id for item in builder.items] == ["source_embedding:a"]
+        assert [item["id"] for item in builder.dropped] == [f"note:{n}" for n in range(4)]
+
+
+# ============================================================================
+# TEST SUITE 6: Token Budget Packing
+# ============================================================================
+
+
+class TestTruncateToFit:
+    """Test suite for packing items into the token budget."""
+
+    def test_field_tokens_count_text_not_repr(self):
+        from unittest.mock import patch
+
+        with patch("open_notebook.utils.context_builder.token_count", side_effect=word_count):
+            item = ContextItem(
+                id="note:1",
+                type="note",
+                content={
+                    "id": "note:1",
+                    "title": "A title",
+                    "content": "one two three",
+                    "insights": [{"id": "source_insight:1", "content": "four five"}],
+                    "position": 7,
+                },
+            )
+        assert item.field_tokens == {"title": 2, "content": 3, "insights": 2, "position": 0}
+        assert item.token_count == 7
+
+    def test_oversized_item_is_trimmed_before_lower_priority_items(self):
+        from unittest.mock import patch
+
+        text = "First sentence here. Second sentence here. " * 100
+        builder = ContextBuilder()
+        builder.items = [
+            ContextItem(id="source:big", type="source", content={"full_text": text},
+                        priority=100, field_tokens={"full_text": 600}),
+            ContextItem(id="note:huge", type="note", content={"id": "note:huge"},
+                        priority=50, token_count=5000),
+            ContextItem(id="insight:small", type="insight", content={"content": "x"},
+                        priority=40, field_tokens={"content": 50}),
+        ]
+
+        with patch("open_notebook.utils.text_utils.token_count", side_effect=word_count), \
+                patch("open_notebook.utils.context_builder.token_count", side_effect=word_count):
+            builder.truncate_to_fit(350)
+
+        assert [item.id for item in builder.items] == ["source:big"]
+        assert builder.items[0].content["full_text"].endswith("here.")
+        assert 300 < builder.items[0].token_count <= 350
+        assert builder.trimmed[0]["id"] == "source:big"
+        assert builder.trimmed[0]["original_tokens"] == 600
+        assert builder.dropped == [
+            {"id": "note:huge", "type": "note", "tokens": 5000},
+            {"id": "insight:small", "type": "insight", "tokens": 50},
+        ]
+
+        response = builder._format_response()
+        assert response["metadata"]["dropped"] == builder.dropped
+        assert response["metadata"]["trimmed"] == builder.trimmed
+        assert response["total_tokens"] <= 350
+
+    def test_high_priority_item_is_trimmed_before_small_items_fill_the_budget(self):
+        from unittest.mock import patch
+
+        text = "Four words per sentence. " * 300
+        builder = ContextBuilder()
+        builder.items = [
+            ContextItem(id="source:big", type="source", content={"full_text": text},
+                        priority=100, field_tokens={"full_text": 1050}),
+            *[
+                ContextItem(id=f"note:{n}", type="note", content={"content": "x"},
+                            priority=50, field_tokens={"content": 50})
+                for n in range(20)
+            ],
+        ]
+
+        with patch("open_notebook.utils.text_utils.token_count", side_effect=word_count), \
+                patch("open_notebook.utils.context_builder.token_count", side_effect=word_count):
+            builder.truncate_to_fit(1000)
+
+        # The source takes the budget first; notes only get what it leaves
+        assert builder.items[0].id == "source:big"
+        assert builder.items[0].token_count >= 950
+        assert builder.trimmed[0]["id"] == "source:big"
+        assert len(builder.dropped) >= 19
+        assert sum(item.token_count or 0 for item in builder.items) <= 1000
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])